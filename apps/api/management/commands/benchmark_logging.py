@@ -0,0 +1,119 @@
+"""
+管理命令：测量日志对信息流与媒体代理吞吐的影响
+
+三种模式依次对同一组请求计时，输出每秒请求数：
+- off：关闭全部日志
+- sync：处理器同步写文件，不采样
+- queued：按 LOG_SAMPLING_RATES 采样，经队列由后台线程写文件
+
+日志写入临时文件（包含真实的磁盘 I/O）。信息流请求走完整链路（需要 OpenSearch / Redis 可用）；
+媒体代理默认用内存中的固定响应代替 MinIO，只测量 Django 与日志本身的开销，--live-media 时访问真实 MinIO。
+
+使用方法：
+python manage.py benchmark_logging --host localhost
+python manage.py benchmark_logging --host localhost --requests 2000 --media-path images/demo.jpg
+"""
+
+import copy
+import logging
+import logging.config
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+from apps.core.utils.structured_logging import start_queue_logging, stop_queue_logging
+
+MODES = ('off', 'sync', 'queued')
+
+
+class _FakeMinioResponse:
+    status_code = 200
+    content = b'\x89PNG' + b'\x00' * 2048
+    headers = {'content-type': 'image/png', 'content-length': str(len(content)), 'etag': '"bench"'}
+
+
+class Command(BaseCommand):
+    help = '对比关闭日志、同步日志与采样+队列日志下 feed / media_proxy 的每秒请求数'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='localhost', help='请求使用的 Host（决定站点）')
+        parser.add_argument('--requests', type=int, default=500, help='每种模式每个端点的请求数')
+        parser.add_argument('--warmup', type=int, default=20, help='每种模式的预热请求数')
+        parser.add_argument('--feed-size', type=int, default=20)
+        parser.add_argument('--media-path', default='images/benchmark.png')
+        parser.add_argument('--live-media', action='store_true', help='媒体代理访问真实 MinIO')
+
+    def handle(self, *args, **options):
+        log_dir = tempfile.mkdtemp(prefix='bench-logging-')
+        endpoints = {
+            'feed': f"/api/feed/?site={options['host']}&size={options['feed_size']}",
+            'media_proxy': f"/api/media/proxy/{options['media_path']}",
+        }
+        client = Client(HTTP_HOST=options['host'])
+
+        results = {}
+        patcher = None
+        if not options['live_media']:
+            patcher = mock.patch('apps.api.rest.media_proxy.requests.get', return_value=_FakeMinioResponse())
+            patcher.start()
+        try:
+            for mode in MODES:
+                log_file = os.path.join(log_dir, f'{mode}.log')
+                self._configure(mode, log_file)
+                try:
+                    for name, url in endpoints.items():
+                        results[(mode, name)] = self._run(client, url, options['requests'], options['warmup'])
+                finally:
+                    self._reset()
+                results[(mode, 'log_bytes')] = os.path.getsize(log_file) if os.path.exists(log_file) else 0
+        finally:
+            if patcher is not None:
+                patcher.stop()
+
+        self.stdout.write(f"{'mode':<8} {'feed rps':>10} {'media rps':>10} {'log bytes':>12}")
+        for mode in MODES:
+            feed_rps = results[(mode, 'feed')]
+            media_rps = results[(mode, 'media_proxy')]
+            self.stdout.write(
+                f"{mode:<8} {feed_rps:>10.1f} {media_rps:>10.1f} {results[(mode, 'log_bytes')]:>12}"
+            )
+        self.stdout.write(f"日志文件目录: {log_dir}")
+
+    def _configure(self, mode, log_file):
+        # 先停掉启动时接入的队列，各模式从同一份配置开始
+        stop_queue_logging(restore=True)
+        if mode == 'off':
+            logging.disable(logging.CRITICAL)
+            return
+
+        config = copy.deepcopy(settings.LOGGING)
+        for handler in config['handlers'].values():
+            handler.update({'class': 'logging.FileHandler', 'filename': log_file})
+            handler.pop('stream', None)
+        # sync 模式不采样：过滤器在 dictConfig 时读取采样率
+        rates = {} if mode == 'sync' else settings.LOG_SAMPLING_RATES
+        with override_settings(LOG_SAMPLING_RATES=rates):
+            logging.config.dictConfig(config)
+            if mode == 'queued':
+                start_queue_logging()
+
+    def _reset(self):
+        logging.disable(logging.NOTSET)
+        stop_queue_logging(restore=True)
+        logging.config.dictConfig(settings.LOGGING)
+        if getattr(settings, 'LOG_QUEUE_ENABLED', False):
+            start_queue_logging()
+
+    def _run(self, client, url, count, warmup):
+        for _ in range(warmup):
+            client.get(url)
+        started = time.perf_counter()
+        for _ in range(count):
+            client.get(url)
+        elapsed = time.perf_counter() - started
+        return count / elapsed if elapsed else 0.0
@@ -4,12 +4,15 @@ Django API响应标准化中间件
 """
 
 import json
+import logging
 import time
 from django.http import JsonResponse
 from django.utils.deprecation import MiddlewareMixin
 from django.conf import settings
 from rest_framework.response import Response
 
+logger = logging.getLogger(__name__)
+
 
 class APIResponseStandardMiddleware(MiddlewareMixin):
     """
@@ -83,7 +86,7 @@ class APIResponseStandardMiddleware(MiddlewareMixin):
                 
         except Exception as e:
             # 如果标准化失败，记录错误但不影响原响应
-            print(f"API response standardization failed: {e}")
+            logger.warning("API response standardization failed: %s", e)
         
         return response
     
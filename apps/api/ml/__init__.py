@@ -0,0 +1,3 @@
+"""
+信息流排序模型（可插拔打分器，见 lgbm_ranker）
+"""
@@ -0,0 +1,314 @@
+"""
+信息流学习排序：可插拔模型后端 + 进程内模型热切换
+
+- 特征：召回文档字段（召回分、24小时 CTR/热度、质量分、发布时长、权重等）与 fetch_agg_features 的 ctr_1h/pop_1h，
+  一次遍历组装成 (候选数, 特征数) 矩阵，由模型批量打分
+- 后端按模型文件后缀选择：.txt → LightGBM，.so → treelite 编译产物，.npz → NumPy 线性模型；
+  新后端用 register_backend 注册
+- 模型目录（settings.FEED_RANKER_MODEL_DIR）下的 alias.json 记录现行版本，如 {"current": "lgbm_ranker_v3.txt"}，
+  缺失时使用 lgbm_ranker.txt。每个进程首次使用时加载，之后定期检查文件修改时间，变化时在后台线程加载并整体替换，
+  加载失败保留旧模型
+- 延迟保护：打分耗时按每 500 个候选折算，p99 超出 feed.ranker.p99_budget_ms 时暂停模型打分一段时间，
+  调用方回退线性公式
+"""
+import json
+import logging
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+
+from apps.core.flags import flag
+
+logger = logging.getLogger(__name__)
+
+# 特征顺序即模型输入列顺序，训练脚本须保持一致
+FEATURE_NAMES = (
+    "recall_score", "ctr_1h", "pop_1h", "ctr_24h", "pop_24h",
+    "quality_score", "age_hours", "weight", "reading_time", "has_video",
+)
+
+ALIAS_FILE = "alias.json"
+DEFAULT_MODEL_FILE = "lgbm_ranker.txt"
+# 检查模型文件变化的间隔（秒）
+CHECK_INTERVAL = 10
+
+# 延迟折算的批大小、统计窗口与暂停时长
+LATENCY_BATCH = 500
+LATENCY_WINDOW = 200
+LATENCY_MIN_SAMPLES = 50
+FALLBACK_COOLDOWN = 60
+
+
+# ---- 特征 ----
+
+def _age_hours(value, now_ts):
+    """发布至今的小时数；缺失或无法解析时为 NaN（树模型按缺失值处理）"""
+    if not value:
+        return math.nan
+    try:
+        published = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return math.nan
+    if published.tzinfo is None:
+        published = published.replace(tzinfo=dt_timezone.utc)
+    return max(0.0, (now_ts - published.timestamp()) / 3600.0)
+
+
+def feature_matrix(cands, agg_feats, now=None):
+    """候选特征矩阵，列顺序见 FEATURE_NAMES；实时特征优先于召回文档中的值"""
+    now_ts = time.time() if now is None else now
+    get_feats = agg_feats.get
+    rows = []
+    for c in cands:
+        feats = get_feats(c["id"]) or {}
+        rows.append((
+            c.get("score") or 0.0,
+            feats.get("ctr_1h", c.get("ctr_1h") or 0.0),
+            feats.get("pop_1h", c.get("pop_1h") or 0.0),
+            c.get("ctr_24h") or 0.0,
+            c.get("pop_24h") or 0.0,
+            1.0 if (q := c.get("quality_score")) is None else q,
+            _age_hours(c.get("publish_time") or c.get("publish_at"), now_ts),
+            c.get("weight") or 0.0,
+            c.get("reading_time") or 0.0,
+            1.0 if c.get("has_video") else 0.0,
+        ))
+    return np.array(rows, dtype=np.float64).reshape(len(rows), len(FEATURE_NAMES))
+
+
+# ---- 模型后端 ----
+
+BACKENDS = {}
+
+
+def register_backend(*suffixes):
+    """按模型文件后缀注册后端"""
+    def decorator(cls):
+        for suffix in suffixes:
+            BACKENDS[suffix] = cls
+        return cls
+    return decorator
+
+
+def backend_for(path):
+    return BACKENDS.get(os.path.splitext(path)[1].lower())
+
+
+class ModelBackend(ABC):
+    """模型后端：构造时读取模型文件，predict 对特征矩阵批量打分（分数越高越靠前）"""
+    name = "base"
+
+    def __init__(self, path):
+        self.path = path
+
+    @abstractmethod
+    def predict(self, matrix):
+        """返回与 matrix 行数相同的一维分数数组"""
+
+    def _check_features(self, count):
+        if count != len(FEATURE_NAMES):
+            raise ValueError(f"model expects {count} features, ranker provides {len(FEATURE_NAMES)}")
+
+
+@register_backend(".txt")
+class LightGBMBackend(ModelBackend):
+    """LightGBM 文本模型（单线程预测，避免与请求线程争用 CPU）"""
+    name = "lightgbm"
+
+    def __init__(self, path):
+        super().__init__(path)
+        import lightgbm
+
+        self.booster = lightgbm.Booster(model_file=path)
+        self._check_features(self.booster.num_feature())
+
+    def predict(self, matrix):
+        return self.booster.predict(matrix, num_threads=1)
+
+
+@register_backend(".so", ".dylib")
+class TreeliteBackend(ModelBackend):
+    """treelite 编译的共享库（tl2cgen 或旧版 treelite_runtime）"""
+    name = "treelite"
+
+    def __init__(self, path):
+        super().__init__(path)
+        try:
+            import tl2cgen as runtime
+        except ImportError:
+            import treelite_runtime as runtime
+
+        self.runtime = runtime
+        self.predictor = runtime.Predictor(path, nthread=1)
+        self.dtype = getattr(self.predictor, "threshold_type", "float64")
+        self._check_features(self.predictor.num_feature)
+
+    def predict(self, matrix):
+        dmat = self.runtime.DMatrix(matrix.astype(self.dtype, copy=False))
+        return np.asarray(self.predictor.predict(dmat)).reshape(-1)
+
+
+@register_backend(".npz")
+class NumpyLinearBackend(ModelBackend):
+    """NumPy 线性模型：weights 数组与 FEATURE_NAMES 对齐，缺失特征按 0 计"""
+    name = "numpy"
+
+    def __init__(self, path):
+        super().__init__(path)
+        with np.load(path, allow_pickle=False) as data:
+            self.weights = np.asarray(data["weights"], dtype=np.float64).reshape(-1)
+        self._check_features(self.weights.shape[0])
+
+    def predict(self, matrix):
+        return np.nan_to_num(matrix) @ self.weights
+
+
+# ---- 模型加载与热切换 ----
+
+class ModelHandle:
+    """进程内的现行模型：按 alias.json 解析模型文件，文件变化时重新加载"""
+
+    def __init__(self, model_dir):
+        self.model_dir = model_dir
+        self.backend = None
+        # 最近一次尝试加载的 (路径, 修改时间)；加载失败也记录，避免反复加载同一个坏文件
+        self.signature = None
+        self.checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def resolve(self):
+        """现行模型文件的 (路径, 修改时间)；文件不存在时返回 None"""
+        name = DEFAULT_MODEL_FILE
+        try:
+            with open(os.path.join(self.model_dir, ALIAS_FILE), encoding="utf-8") as f:
+                name = json.load(f).get("current") or name
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Invalid ranker model alias in {self.model_dir}: {e}")
+        path = os.path.join(self.model_dir, name)
+        try:
+            return path, os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def load(self):
+        """模型文件变化时加载新模型并整体替换；进行中的打分继续使用旧对象"""
+        signature = self.resolve()
+        self.checked_at = time.time()
+        if signature is None or signature == self.signature:
+            return
+        self.signature = signature
+        path = signature[0]
+        backend_cls = backend_for(path)
+        if backend_cls is None:
+            logger.warning(f"No ranker backend for model file {path}")
+            return
+        started = time.perf_counter()
+        try:
+            backend = backend_cls(path)
+        except Exception as e:
+            logger.warning(f"Failed to load ranker model {path}, keeping previous model: {e}")
+            return
+        self.backend = backend
+        logger.info(
+            f"Ranker model loaded: {path} ({backend.name}) in {(time.perf_counter() - started) * 1000:.0f}ms"
+        )
+
+    def _reload(self):
+        try:
+            self.load()
+        except Exception as e:
+            logger.warning(f"Ranker model reload failed: {e}")
+        finally:
+            self._lock.release()
+
+    def get(self):
+        """当前模型（可能为 None）；首次调用同步加载，之后到期在后台线程检查更新"""
+        if not self.checked_at:
+            with self._lock:
+                if not self.checked_at:
+                    self.load()
+            return self.backend
+        if time.time() - self.checked_at >= CHECK_INTERVAL and self._lock.acquire(blocking=False):
+            threading.Thread(target=self._reload, name="ranker-model-reload", daemon=True).start()
+        return self.backend
+
+
+class LatencyGuard:
+    """模型打分延迟保护：最近耗时（按每 LATENCY_BATCH 个候选折算）的 p99 超出预算时暂停模型打分"""
+
+    def __init__(self):
+        self.samples = deque(maxlen=LATENCY_WINDOW)
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        return time.monotonic() >= self.paused_until
+
+    def record(self, elapsed_ms, count, budget_ms):
+        # 不足一批的候选按一批计，避免固定开销被放大
+        per_batch = elapsed_ms * LATENCY_BATCH / max(count, LATENCY_BATCH)
+        with self._lock:
+            self.samples.append(per_batch)
+            if len(self.samples) < LATENCY_MIN_SAMPLES:
+                return
+            p99 = float(np.percentile(self.samples, 99))
+            if p99 > budget_ms:
+                self.paused_until = time.monotonic() + FALLBACK_COOLDOWN
+                self.samples.clear()
+                logger.warning(
+                    f"Ranker model p99 {p99:.1f}ms per {LATENCY_BATCH} candidates exceeds "
+                    f"{budget_ms}ms budget, using linear scorer for {FALLBACK_COOLDOWN}s"
+                )
+
+
+class LearnedRanker:
+    """模型打分器：模型不可用、延迟超预算或打分出错时返回 None，由调用方使用线性公式"""
+
+    def __init__(self, model_dir):
+        self.model = ModelHandle(model_dir)
+        self.guard = LatencyGuard()
+
+    def score(self, cands, agg_feats):
+        if not cands or not self.guard.allow():
+            return None
+        backend = self.model.get()
+        if backend is None:
+            return None
+        started = time.perf_counter()
+        try:
+            scores = np.asarray(backend.predict(feature_matrix(cands, agg_feats)), dtype=np.float64).reshape(-1)
+        except Exception as e:
+            logger.warning(f"Ranker model scoring failed: {e}")
+            return None
+        self.guard.record((time.perf_counter() - started) * 1000, len(cands), flag("feed.ranker.p99_budget_ms", 5))
+        if scores.shape[0] != len(cands):
+            logger.warning(f"Ranker model returned {scores.shape[0]} scores for {len(cands)} candidates")
+            return None
+        return scores
+
+
+_ranker = None
+_ranker_lock = threading.Lock()
+
+
+def get_ranker():
+    global _ranker
+    if _ranker is None:
+        with _ranker_lock:
+            if _ranker is None:
+                _ranker = LearnedRanker(settings.FEED_RANKER_MODEL_DIR)
+    return _ranker
+
+
+def learned_scores(cands, agg_feats):
+    """候选的模型分数；不可用时返回 None"""
+    return get_ranker().score(cands, agg_feats)
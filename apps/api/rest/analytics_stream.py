@@ -1,129 +1,102 @@
 """
 实时分析事件流 - Server-Sent Events (SSE) API
 提供实时用户行为事件推送
+
+事件由 apps.api.utils.analytics_hub 中的进程级广播中心统一轮询和分发。
 """
 
-from django.http import StreamingHttpResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from clickhouse_driver import Client
 from django.conf import settings
 import json
-import time
 import logging
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
 from apps.core.utils.circuit_breaker import get_breaker
+from apps.api.utils.analytics_hub import HubFull, hub
 
 logger = logging.getLogger(__name__)
 
+HEARTBEAT_INTERVAL = 15  # 无事件时的心跳间隔（秒）
+
+
+def _sse(event: str, data: dict, event_id=None) -> str:
+    """格式化一条SSE消息"""
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _parse_last_event_id(request):
+    """从 Last-Event-ID 请求头（EventSource 自动重连）或查询参数中解析续传位置"""
+    raw = request.headers.get('Last-Event-ID') or request.GET.get('Last-Event-ID')
+    if raw and str(raw).isdigit():
+        return int(raw)
+    return None
+
+
+class _SubscriptionStream:
+    """SSE 响应内容：响应关闭时注销订阅（生成器尚未开始迭代时其 finally 不会执行）"""
+
+    def __init__(self, events, subscriber):
+        self.events = events
+        self.subscriber = subscriber
+
+    def __iter__(self):
+        return self.events
+
+    def close(self):
+        self.events.close()
+        hub.unsubscribe(self.subscriber)
+
+
 @require_http_methods(["GET"])
 @csrf_exempt
 def analytics_stream(request):
     """
     SSE流式推送最新分析事件
+
+    所有连接共享进程内的 AnalyticsEventHub：ClickHouse 只由一个后台线程轮询，
+    每个连接只等待自己的线程安全队列。连接数达到上限时返回 503，客户端按 retry 间隔重连。
     """
+    last_event_id = _parse_last_event_id(request)
+    try:
+        subscriber = hub.subscribe(last_event_id)
+    except HubFull:
+        response = JsonResponse({"success": False, "error": "stream capacity reached"}, status=503)
+        response['Retry-After'] = str(HEARTBEAT_INTERVAL)
+        return response
+    logger.debug("SSE subscriber #%s connected, last_event_id=%s", subscriber.id, last_event_id)
+
     def event_stream():
-        # 获取客户端最后接收的事件ID
-        last_event_id = request.GET.get('Last-Event-ID', '0')
-        last_timestamp = request.GET.get('last_ts', None)
-        
-        logger.info(f"🔗 SSE连接建立，last_event_id: {last_event_id}, last_ts: {last_timestamp}")
-        
-        # 发送连接确认
-        yield f"event: connected\n"
-        yield f"data: {json.dumps({'status': 'connected', 'timestamp': datetime.now(timezone.utc).isoformat()})}\n\n"
-        
-        event_counter = int(last_event_id) if last_event_id.isdigit() else 0
-        logger.info(f"🎯 初始化 event_counter: {event_counter}")
-        
         try:
-            # 直接连接ClickHouse，不使用熔断器
-            ch = Client.from_url(settings.CLICKHOUSE_URL)
-            
-            # 🎯 简化逻辑：直接设置起始时间戳，只监控新事件
-            last_timestamp_dt = datetime.now(timezone.utc)
-            last_timestamp = last_timestamp_dt.isoformat()
-            logger.info(f"📅 设置起始时间戳为当前时间: {last_timestamp}")
-            
-            # 发送初始化消息
-            yield f"event: info\n"
-            yield f"data: {json.dumps({'message': '实时监控已启动，等待新事件...', 'timestamp': datetime.now(timezone.utc).isoformat()})}\n\n"
-
-            # 然后进入实时监控循环
+            yield _sse('connected', {
+                'status': 'connected',
+                'subscriber_id': subscriber.id,
+                'resumed_from': last_event_id,
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+            })
+
             while True:
-                try:
-                    # 检查是否有新事件
-                    new_events_query = """
-                        SELECT ts, event, article_id, channel, user_id, dwell_ms
-                        FROM events 
-                        WHERE ts > %(timestamp)s
-                        ORDER BY ts ASC 
-                        LIMIT 5
-                    """
-                    try:
-                        logger.info(f"🔍 查询新事件，时间戳: {last_timestamp_dt} (类型: {type(last_timestamp_dt)})")
-                        new_events = ch.execute(new_events_query, {'timestamp': last_timestamp_dt})
-                        logger.info(f"🔍 查询结果: {len(new_events) if new_events else 0} 条事件")
-                        
-                        if new_events and len(new_events) > 0:
-                            logger.info(f"🆕 发现 {len(new_events)} 条新事件")
-                            
-                            for event_data in new_events:
-                                event_counter += 1
-                                
-                                event_obj = {
-                                    "id": event_counter,
-                                    "ts": str(event_data[0]),
-                                    "event": event_data[1],
-                                    "article_id": event_data[2],
-                                    "channel": event_data[3],
-                                    "user_id": event_data[4],
-                                    "dwell_ms": event_data[5],
-                                    "server_time": datetime.now(timezone.utc).isoformat()
-                                }
-                                
-                                # 更新最后时间戳 - 保持datetime对象用于查询
-                                # 为了避免重复，在时间戳上加1秒
-                                old_timestamp = last_timestamp_dt
-                                last_timestamp_dt = event_data[0] + timedelta(seconds=1)
-                                last_timestamp = str(event_data[0])  # 字符串格式用于日志
-                                logger.info(f"⏰ 更新时间戳: {old_timestamp} -> {last_timestamp_dt}")
-                                
-                                # SSE格式输出
-                                yield f"id: {event_counter}\n"
-                                yield f"event: analytics_event\n"
-                                yield f"data: {json.dumps(event_obj)}\n\n"
-                                
-                                logger.info(f"📡 推送新事件 #{event_counter}: {event_data[1]} - {event_data[2]}")
-                                
-                                time.sleep(0.1)
-                        else:
-                            logger.info("😴 没有发现新事件")
-                    except Exception as query_error:
-                        logger.error(f"❌ 查询新事件失败: {query_error}")
-                    
-                    # 发送心跳保持连接
-                    yield f"event: heartbeat\n"
-                    yield f"data: {json.dumps({'timestamp': datetime.now(timezone.utc).isoformat(), 'event_count': event_counter, 'last_ts': last_timestamp})}\n\n"
-                    
-                    # 每3秒检查一次新事件
-                    time.sleep(3)
-                    
-                except Exception as e:
-                    logger.error(f"❌ SSE查询错误: {e}")
-                    # 发送错误事件
-                    yield f"event: error\n"
-                    yield f"data: {json.dumps({'error': str(e), 'timestamp': datetime.now(timezone.utc).isoformat()})}\n\n"
-                    time.sleep(5)  # 错误后等待更长时间
-                    
-        except Exception as e:
-            logger.error(f"🚨 SSE流严重错误: {e}")
-            yield f"event: error\n"
-            yield f"data: {json.dumps({'error': 'ClickHouse连接失败', 'details': str(e), 'timestamp': datetime.now(timezone.utc).isoformat()})}\n\n"
-    
+                event = subscriber.next_event(timeout=HEARTBEAT_INTERVAL)
+                if event is None:
+                    yield _sse('heartbeat', {
+                        'timestamp': datetime.now(timezone.utc).isoformat(),
+                        'event_count': hub.last_event_id,
+                        'last_ts': str(hub.last_ts) if hub.last_ts else None,
+                        'lag_ms': round(subscriber.last_lag_ms, 2),
+                        'dropped': subscriber.dropped,
+                    })
+                    continue
+                yield _sse('analytics_event', event, event_id=event['id'])
+        finally:
+            # 客户端断开时 WSGI 服务器关闭生成器，在此注销
+            hub.unsubscribe(subscriber)
+            logger.debug("SSE subscriber #%s disconnected: %s", subscriber.id, subscriber.stats())
+
     # 创建SSE响应
     response = StreamingHttpResponse(
-        event_stream(), 
+        _SubscriptionStream(event_stream(), subscriber), 
         content_type='text/event-stream'
     )
     
@@ -131,10 +104,9 @@ def analytics_stream(request):
     response['Cache-Control'] = 'no-cache'
     # response['Connection'] = 'keep-alive'  # WSGI不允许这个头部
     response['Access-Control-Allow-Origin'] = '*'  # 开发环境，生产环境应限制域名
-    response['Access-Control-Allow-Headers'] = 'Cache-Control'
+    response['Access-Control-Allow-Headers'] = 'Cache-Control, Last-Event-ID'
     response['X-Accel-Buffering'] = 'no'  # Nginx不缓冲
     
-    logger.info("🌊 SSE流响应已创建")
     return response
 
 
@@ -165,20 +137,19 @@ def analytics_stream_stats(request):
         
         latest_ts = str(latest_event[0][0]) if latest_event else None
         
-        from django.http import JsonResponse
         return JsonResponse({
             "success": True,
             "data": {
                 "recent_events_1min": recent_count,
                 "latest_event_ts": latest_ts,
                 "server_time": datetime.now(timezone.utc).isoformat(),
-                "stream_available": True
+                "stream_available": True,
+                "hub": hub.stats(),
             }
         })
         
     except Exception as e:
         logger.error(f"SSE统计错误: {e}")
-        from django.http import JsonResponse
         return JsonResponse({
             "success": False,
             "error": str(e)
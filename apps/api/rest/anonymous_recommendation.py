@@ -5,6 +5,7 @@
 """
 
 import hashlib
+import logging
 import time
 from typing import Dict, List, Optional, Tuple
 from django.core.cache import cache
@@ -14,6 +15,71 @@ from apps.core.flags import flag
 from apps.core.site_utils import get_site_from_request
 from apps.core.models import Channel
 from apps.core.utils.circuit_breaker import get_breaker
+from apps.core.utils.latency_metrics import latency_summary, record_latency
+
+logger = logging.getLogger(__name__)
+
+# 站点趋势刷新间隔（秒）与过期后仍可使用的旧值保留时间
+SITE_TRENDS_REFRESH = 60
+SITE_TRENDS_STALE_TTL = 600
+
+# 画像指标
+PROFILE_METRICS_NAMESPACE = 'anon_profile'
+
+PROFILE_QUERY = """
+SELECT
+    'device' AS source,
+    channel,
+    countMerge(views) AS count,
+    avgMerge(avg_dwell) AS dwell,
+    max(last_view) AS last_ts,
+    uniqMerge(unique_articles) AS unique_articles
+FROM device_channel_daily
+WHERE site = %(site)s AND device_id = %(device_id)s AND day >= today() - 6
+GROUP BY channel
+UNION ALL
+SELECT
+    'session' AS source,
+    channel,
+    sum(events) AS count,
+    toFloat64(sum(view_dwell_ms)) AS dwell,
+    max(last_event) AS last_ts,
+    toUInt64(0) AS unique_articles
+FROM session_channel_hourly
+WHERE site = %(site)s AND session_id = %(session_id)s AND hour >= toStartOfHour(now() - INTERVAL 1 HOUR)
+GROUP BY channel
+"""
+
+SITE_TRENDS_QUERY = """
+SELECT
+    channel,
+    count() AS total_views,
+    avg(dwell_ms) AS avg_dwell,
+    uniq(device_id) AS unique_devices
+FROM events
+WHERE site = %(site)s
+AND event = 'view'
+AND ts >= now() - INTERVAL 24 HOUR
+GROUP BY channel
+ORDER BY total_views DESC
+"""
+
+
+def record_profile_metrics(cache_hit: bool, latency_ms: float):
+    """记录画像获取的缓存命中与延迟"""
+    record_latency(PROFILE_METRICS_NAMESPACE, 'hits' if cache_hit else 'misses', latency_ms)
+
+
+def get_profile_metrics() -> Dict:
+    """读取画像缓存命中率与最近延迟分位数"""
+    summary = latency_summary(PROFILE_METRICS_NAMESPACE)
+    hits, misses = summary['counts'].get('hits', 0), summary['counts'].get('misses', 0)
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        'latency_ms': {key: summary[key] for key in ('samples', 'p50', 'p95')},
+    }
 
 
 class AnonymousRecommendationEngine:
@@ -53,27 +119,27 @@ class AnonymousRecommendationEngine:
     
     def get_anonymous_user_profile(self, device_id: str, session_id: str, site: str) -> Dict:
         """获取匿名用户画像"""
+        started = time.perf_counter()
         cache_key = f"anon_profile_{device_id}_{site}"
         profile = cache.get(cache_key)
+        hit = profile is not None
         
         if profile is None:
             profile = self._build_anonymous_profile(device_id, session_id, site)
             cache.set(cache_key, profile, self.cache_timeout)
         
+        record_profile_metrics(hit, (time.perf_counter() - started) * 1000)
         return profile
     
     def _build_anonymous_profile(self, device_id: str, session_id: str, site: str) -> Dict:
         """构建匿名用户画像"""
-        # 1. 分析设备历史行为
-        device_history = self._get_device_behavior_history(device_id, site)
-        
-        # 2. 分析当前会话行为
-        session_behavior = self._get_session_behavior(session_id, site)
+        # 1. 设备历史与当前会话行为（一次预聚合表点查）
+        device_history, session_behavior = self._get_device_and_session_behavior(device_id, session_id, site)
         
-        # 3. 分析站点热门内容
+        # 2. 站点热门内容（按站点每分钟计算一次，所有访客共享）
         site_trends = self._get_site_trends(site)
         
-        # 4. 构建用户画像
+        # 3. 构建用户画像
         profile = {
             "user_type": "anonymous",
             "device_id": device_id,
@@ -88,107 +154,73 @@ class AnonymousRecommendationEngine:
         
         return profile
     
-    def _get_device_behavior_history(self, device_id: str, site: str) -> List[Dict]:
-        """获取设备历史行为"""
-        try:
-            query = f"""
-            SELECT 
-                channel,
-                COUNT(*) as view_count,
-                AVG(dwell_ms) as avg_dwell,
-                MAX(ts) as last_view,
-                COUNT(DISTINCT article_id) as unique_articles
-            FROM events 
-            WHERE device_id = '{device_id}' 
-            AND site = '{site}' 
-            AND event = 'view'
-            AND ts >= now() - INTERVAL 7 DAY
-            GROUP BY channel
-            ORDER BY view_count DESC
-            LIMIT 10
-            """
-            
-            result = self.breaker.call(self.ch_client.execute, query)
-            
-            return [
-                {
-                    "channel": row[0],
-                    "view_count": row[1],
-                    "avg_dwell": row[2],
-                    "last_view": row[3],
-                    "unique_articles": row[4]
-                }
-                for row in result
-            ]
-        except Exception as e:
-            print(f"Error getting device history: {e}")
-            return []
-    
-    def _get_session_behavior(self, session_id: str, site: str) -> List[Dict]:
-        """获取当前会话行为"""
+    def _get_device_and_session_behavior(self, device_id: str, session_id: str, site: str) -> Tuple[List[Dict], List[Dict]]:
+        """
+        获取设备7天历史行为与当前会话行为
+        
+        两部分分别来自 device_channel_daily 与 session_channel_hourly 预聚合表，
+        都按排序键前缀 (site, device_id|session_id) 定位，合并为一次查询往返。
+        """
         try:
-            query = f"""
-            SELECT 
-                channel,
-                article_id,
-                event,
-                dwell_ms,
-                ts
-            FROM events 
-            WHERE session_id = '{session_id}' 
-            AND site = '{site}' 
-            AND ts >= now() - INTERVAL 1 HOUR
-            ORDER BY ts DESC
-            LIMIT 50
-            """
-            
-            result = self.breaker.call(self.ch_client.execute, query)
-            
-            return [
-                {
-                    "channel": row[0],
-                    "article_id": row[1],
-                    "event": row[2],
-                    "dwell_ms": row[3],
-                    "ts": row[4]
-                }
-                for row in result
-            ]
+            result = self.breaker.call(self.ch_client.execute, PROFILE_QUERY, {
+                'site': site,
+                'device_id': device_id,
+                'session_id': session_id,
+            })
         except Exception as e:
-            print(f"Error getting session behavior: {e}")
-            return []
+            logger.warning(f"Error getting anonymous profile behavior: {e}")
+            return [], []
+        
+        device_history, session_behavior = [], []
+        for source, channel, count, dwell, last_ts, unique_articles in result:
+            if source == 'device':
+                device_history.append({
+                    "channel": channel,
+                    "view_count": count,
+                    "avg_dwell": dwell or 0,
+                    "last_view": last_ts,
+                    "unique_articles": unique_articles
+                })
+            else:
+                session_behavior.append({
+                    "channel": channel,
+                    "events": count,
+                    "view_dwell_ms": dwell or 0,
+                    "last_event": last_ts
+                })
+        
+        device_history.sort(key=lambda b: b["view_count"], reverse=True)
+        return device_history[:10], session_behavior
     
     def _get_site_trends(self, site: str) -> Dict:
-        """获取站点趋势数据"""
+        """
+        获取站点趋势数据
+        
+        所有访客共享同一份结果：过期后只有拿到锁的请求重新计算，其余请求继续使用旧值。
+        """
+        cache_key = f"anon_site_trends_{site}"
+        cached = cache.get(cache_key)
+        if cached is not None and cached['computed_at'] > time.time() - SITE_TRENDS_REFRESH:
+            return cached['trends']
+        if cached is not None and not cache.add(f"{cache_key}_lock", 1, SITE_TRENDS_REFRESH):
+            return cached['trends']
+        
         try:
-            query = f"""
-            SELECT 
-                channel,
-                COUNT(*) as total_views,
-                AVG(dwell_ms) as avg_dwell,
-                COUNT(DISTINCT device_id) as unique_devices
-            FROM events 
-            WHERE site = '{site}' 
-            AND event = 'view'
-            AND ts >= now() - INTERVAL 24 HOUR
-            GROUP BY channel
-            ORDER BY total_views DESC
-            """
-            
-            result = self.breaker.call(self.ch_client.execute, query)
-            
-            trends = {}
-            for row in result:
-                trends[row[0]] = {
-                    "total_views": row[1],
-                    "avg_dwell": row[2],
-                    "unique_devices": row[3]
-                }
-            
-            return trends
+            result = self.breaker.call(self.ch_client.execute, SITE_TRENDS_QUERY, {'site': site})
         except Exception as e:
-            print(f"Error getting site trends: {e}")
-            return {}
+            logger.warning(f"Error getting site trends: {e}")
+            return cached['trends'] if cached is not None else {}
+        
+        trends = {}
+        for row in result:
+            trends[row[0]] = {
+                "total_views": row[1],
+                "avg_dwell": row[2],
+                "unique_devices": row[3]
+            }
+        
+        cache.set(cache_key, {'trends': trends, 'computed_at': time.time()}, SITE_TRENDS_STALE_TTL)
+        return trends
     
     def _extract_interests(self, device_history: List[Dict], session_behavior: List[Dict]) -> Dict[str, float]:
         """提取用户兴趣标签"""
@@ -202,9 +234,9 @@ class AnonymousRecommendationEngine:
         
         # 基于当前会话（权重更高）
         for behavior in session_behavior:
-            if behavior["event"] == "view":
-                channel = behavior["channel"]
-                weight = behavior["dwell_ms"] / 1000  # 停留时间
+            channel = behavior["channel"]
+            weight = behavior["view_dwell_ms"] / 1000  # 浏览停留时间
+            if weight:
                 interests[channel] = interests.get(channel, 0) + weight * 2  # 当前会话权重翻倍
         
         # 归一化
@@ -302,9 +334,10 @@ class AnonymousRecommendationEngine:
         if device_history:
             confidence += min(len(device_history) / 10, 1.0) * 0.4
         
-        # 基于会话活跃度
+        # 基于会话活跃度（会话内事件数）
         if session_behavior:
-            confidence += min(len(session_behavior) / 5, 1.0) * 0.6
+            session_events = sum(b["events"] for b in session_behavior)
+            confidence += min(session_events / 5, 1.0) * 0.6
         
         return min(confidence, 1.0)
     
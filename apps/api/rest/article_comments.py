@@ -4,6 +4,10 @@
 提供文章页面的评论显示和管理功能
 与用户评论系统集成
 """
+import base64
+from datetime import datetime
+
+from django.core.cache import cache
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
@@ -13,12 +17,124 @@ from django.utils.html import strip_tags
 from apps.web_users.models import WebUser, UserComment
 from apps.web_users.serializers import UserCommentSerializer
 from apps.api.rest.web_auth import get_user_from_token
+from apps.api.utils.cache_namespace import comment_ns, versioned_key
+from rest_framework import serializers
 import json
 
 
+# 评论分页缓存时间（秒）：新评论/审核通过信号递增命名空间代数立即失效
+COMMENTS_CACHE_TIMEOUT = 30
+
+_datetime_field = serializers.DateTimeField()
+
+
+def _encode_cursor(comment):
+    raw = f"{comment.created_at.isoformat()}|{comment.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor):
+    """游标为 (created_at, id) 的 base64 编码，解析失败抛出 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, comment_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(comment_id)
+    except Exception:
+        raise ValueError('invalid cursor')
+
+
+def _serialize_comment(comment):
+    """与 UserCommentSerializer 输出一致的轻量序列化（不经过 DRF 字段反射）"""
+    user = comment.user
+    return {
+        'id': comment.id,
+        'article_id': comment.article_id,
+        'article_title': comment.article_title,
+        'article_slug': comment.article_slug,
+        'article_channel': comment.article_channel,
+        'content': comment.content,
+        'parent': comment.parent_id,
+        'parent_content': comment.parent_content,
+        'parent_author': comment.parent_author,
+        'status': comment.status,
+        'likes': comment.likes,
+        'created_at': _datetime_field.to_representation(comment.created_at),
+        'updated_at': _datetime_field.to_representation(comment.updated_at),
+        'user_info': {
+            'username': user.username,
+            'nickname': user.nickname or user.username,
+            'avatar': user.avatar,
+        },
+        'is_liked': False,
+        'replies': [],
+    }
+
+
+def _load_comment_page(article_id, limit, cursor=None, offset=0):
+    """
+    用一条SQL取回一页根评论及其完整线程
+
+    根评论按 (created_at, id) 倒序做键集分页，子查询多取一条用于判断 has_next；
+    线程内按物化路径排序，父评论总在回复之前，单次遍历即可建树。
+    """
+    roots = UserComment.objects.filter(
+        article_id=article_id,
+        status='published',
+        parent__isnull=True,
+    )
+    if cursor:
+        created_at, comment_id = cursor
+        roots = roots.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=comment_id))
+    root_ids = roots.order_by('-created_at', '-id').values('id')[offset:offset + limit + 1]
+
+    comments = (
+        UserComment.objects.filter(
+            article_id=article_id,
+            status='published',
+            thread_root_id__in=root_ids,
+        )
+        .select_related('user')
+        .order_by('-thread_root__created_at', '-thread_root_id', 'path')
+    )
+
+    threads = []
+    by_id = {}
+    last_root = None
+    for comment in comments:
+        if comment.parent_id is None:
+            if len(threads) == limit:
+                # 多取的一条根评论只用于判断是否还有下一页
+                return threads, _encode_cursor(last_root)
+            node = _serialize_comment(comment)
+            threads.append(node)
+            last_root = comment
+        else:
+            parent = by_id.get(comment.parent_id)
+            if parent is None:
+                # 父评论未发布（审核中/已拒绝）时不展示其回复
+                continue
+            node = _serialize_comment(comment)
+            parent['replies'].append(node)
+        by_id[comment.id] = node
+    return threads, None
+
+
+def _iter_comment_nodes(nodes):
+    for node in nodes:
+        yield node
+        yield from _iter_comment_nodes(node['replies'])
+
+
 @require_http_methods(["GET"])
 def get_article_comments(request, article_id):
-    """获取文章的所有评论"""
+    """
+    获取文章评论（按根评论分页，包含完整回复线程）
+
+    查询参数:
+        cursor: 上一页返回的 next_cursor（推荐，键集分页）
+        page: 页码（兼容旧调用，深翻页请使用 cursor）
+        limit: 每页根评论数（1-50）
+    """
     try:
         # 获取当前用户（如果已登录）
         current_user = get_user_from_token(request)
@@ -35,64 +151,44 @@ def get_article_comments(request, article_id):
         if limit < 1 or limit > 50:
             return JsonResponse({'success': False, 'message': 'limit 必须在 1-50 之间'}, status=400)
 
-        offset = (page - 1) * limit
-
-        # 仅对根评论进行分页
-        root_qs = UserComment.objects.filter(
-            article_id=article_id,
-            status='published',
-            parent__isnull=True
-        ).select_related('user').order_by('-created_at')
-
-        total = root_qs.count()
-        root_comments = list(root_qs[offset:offset + limit])
-
-        # 逐层获取所选根评论的所有子孙评论（避免全量扫描）
-        all_thread_comments = list(root_comments)
-        frontier = root_comments
-        while frontier:
-            children_qs = list(
-                UserComment.objects.filter(
-                    article_id=article_id,
-                    status='published',
-                    parent__in=frontier
-                ).select_related('user').order_by('created_at')
-            )
-            if not children_qs:
-                break
-            all_thread_comments.extend(children_qs)
-            frontier = children_qs
-
-        # 序列化所需评论
-        serializer = UserCommentSerializer(all_thread_comments, many=True)
-        comments_data = serializer.data
+        raw_cursor = request.GET.get('cursor') or None
+        cursor = None
+        if raw_cursor:
+            try:
+                cursor = _decode_cursor(raw_cursor)
+            except ValueError:
+                return JsonResponse({'success': False, 'message': 'cursor 无效'}, status=400)
+        offset = 0 if cursor else (page - 1) * limit
+
+        # 线程数据与用户无关，按文章缓存；点赞状态按用户单独标注
+        cache_key = versioned_key(
+            f"article_comments:{article_id}:{raw_cursor or page}:{limit}",
+            [comment_ns(article_id)],
+        )
+        cached = cache.get(cache_key)
+        if cached is None:
+            threads, next_cursor = _load_comment_page(article_id, limit, cursor=cursor, offset=offset)
+            cached = {'threads': threads, 'next_cursor': next_cursor}
+            cache.set(cache_key, cached, COMMENTS_CACHE_TIMEOUT)
+        comments_tree = cached['threads']
+        next_cursor = cached['next_cursor']
 
         # 标注点赞状态（当前用户）
-        if current_user:
+        if current_user and comments_tree:
             from apps.web_users.models import UserInteraction
-            comment_ids = [str(comment['id']) for comment in comments_data]
-            
+            nodes = list(_iter_comment_nodes(comments_tree))
+
             user_likes = set(
                 UserInteraction.objects.filter(
                     user=current_user,
                     target_type='comment',
-                    target_id__in=comment_ids,
+                    target_id__in=[str(node['id']) for node in nodes],
                     interaction_type='like'
                 ).values_list('target_id', flat=True)
             )
-            
-            for comment in comments_data:
-                comment['is_liked'] = str(comment['id']) in user_likes
-        else:
-            for comment in comments_data:
-                comment['is_liked'] = False
-
-        # 为每条评论添加空的 replies 字段（便于前端直接使用）
-        for comment in comments_data:
-            comment.setdefault('replies', [])
 
-        # 构建评论树结构
-        comments_tree = build_comment_tree(comments_data)
+            for node in nodes:
+                node['is_liked'] = str(node['id']) in user_likes
 
         return JsonResponse({
             'success': True,
@@ -100,8 +196,8 @@ def get_article_comments(request, article_id):
             'pagination': {
                 'page': page,
                 'limit': limit,
-                'total': total,  # 根评论总数
-                'has_next': offset + limit < total
+                'has_next': next_cursor is not None,
+                'next_cursor': next_cursor,
             }
         })
         
@@ -192,9 +288,7 @@ def add_article_comment(request, article_id):
                 parent_author=parent_author,
                 status='published'  # 直接发布，或者设为pending等待审核
             )
-            
-            # 🔄 原子自增 ArticlePage 的 comment_count 字段
-            ArticlePage.objects.filter(id=article_obj.id).update(comment_count=F('comment_count') + 1)
+            # ArticlePage.comment_count 由 web_users 信号标记后批量重算
         
         # 序列化返回数据
         serializer = UserCommentSerializer(comment)
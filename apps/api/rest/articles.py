@@ -16,6 +16,7 @@ from apps.core.models import Channel, Region, SiteSettings, Category
 from apps.core.site_utils import get_site_from_request
 from apps.searchapp.client import get_client
 from apps.searchapp.simple_index import get_index_name
+from apps.searchapp.indexer import fill_missing_listing_fields
 from wagtail.rich_text import expand_db_html
 from .utils import (
     validate_site_parameter,
@@ -27,6 +28,7 @@ from .utils import (
     generate_etag,
     generate_surrogate_keys
 )
+from apps.api.utils.cache_namespace import versioned_key, article_ns, listing_namespaces
 from apps.api.serializers.taxonomy import ArticleWithTaxonomySerializer
 from ..utils.rate_limit import (
     ARTICLES_RATE_LIMIT,
@@ -147,8 +149,13 @@ def articles_list(request):
         # 获取最后修改时间
         last_modified = get_last_modified(articles)
         
-        # 生成缓存键
-        cache_key = f"articles_list:{site.id}:{page}:{size}"
+        # 生成缓存键（按频道/标签过滤的列表只依赖对应命名空间）
+        tags = [t.strip() for t in request.query_params.get("tags", "").split(",") if t.strip()]
+        cache_key = generate_cache_key(
+            "articles_list",
+            {**request.query_params.dict(), "site_id": site.id, "page": page, "size": size},
+            listing_namespaces(site, channels=[request.query_params.get("channel")], tags=tags),
+        )
         
         # 生成ETag（优先使用时间戳）
         etag = generate_etag_with_cache(cache_key, response_data, last_modified, 120)
@@ -282,7 +289,7 @@ def article_detail(request, slug):
         last_modified = get_last_modified(article)
         
         # 生成缓存键
-        cache_key = f"article_detail:{site.id}:{article.slug}"
+        cache_key = versioned_key(f"article_detail:{site.id}:{article.slug}", [article_ns(article.id)])
         
         # 生成ETag（优先使用时间戳）
         etag = generate_etag_with_cache(cache_key, response_data, last_modified, 120)
@@ -472,6 +479,15 @@ def regions_list(request):
         )
 
 
+# 门户列表渲染用到的索引字段
+PORTAL_SOURCE_FIELDS = [
+    "article_id", "title", "slug", "summary", "url", "author", "region", "has_video",
+    "first_published_at", "publish_time", "primary_channel_slug", "channel", "channel_name", "topic_title",
+    "is_featured", "weight", "view_count", "comment_count", "like_count", "favorite_count", "reading_time",
+    "cover_url", "cover_renditions",
+]
+
+
 @api_view(["GET"])
 def portal_articles(request):
     """
@@ -519,6 +535,7 @@ def portal_articles(request):
             "from": start_from,
             "size": size,
             "track_total_hits": True,
+            "_source": {"includes": PORTAL_SOURCE_FIELDS},
         }
 
         # 4. 执行查询
@@ -526,22 +543,38 @@ def portal_articles(request):
         hits = res.get("hits", {})
         total = hits.get("total", {}).get("value", 0)
 
-        # 5. 序列化
+        # 5. 序列化（封面与统计数据均在索引时写入 _source；旧文档缺字段时一次回查补齐）
         items = []
-        for h in hits.get("hits", []):
-            s = h.get("_source", {})
+        sources = [{"article_id": h.get("_id"), **h.get("_source", {})} for h in hits.get("hits", [])]
+        fill_missing_listing_fields(sources)
+        for s in sources:
+            cover_url = s.get("cover_url") or ""
             item = {
-                "id": s.get("article_id") or h.get("_id"),
+                "id": s.get("article_id"),
                 "title": s.get("title"),
                 "slug": s.get("slug"),
                 "excerpt": s.get("summary") or "",
-                "cover_url": "",  # 可后续扩展
+                "cover_url": cover_url,
+                "image_url": cover_url,  # 兼容性字段
+                "cover_renditions": s.get("cover_renditions") or {},
                 "publish_at": s.get("first_published_at") or s.get("publish_time"),
                 "channel_slug": s.get("primary_channel_slug") or s.get("channel"),
+                "channel_name": s.get("channel_name") or "",
+                "topic_title": s.get("topic_title") or "",
                 "region": s.get("region"),
                 "source_site": site,
                 "source_url": s.get("url") or "",
                 "canonical_url": s.get("url") or "",
+                "author": s.get("author"),
+                "has_video": s.get("has_video", False),
+                "is_featured": s.get("is_featured", False),
+                "weight": s.get("weight", 0),
+                # 统计数据
+                "view_count": s.get("view_count", 0),
+                "comment_count": s.get("comment_count", 0),
+                "like_count": s.get("like_count", 0),
+                "favorite_count": s.get("favorite_count", 0),
+                "reading_time": s.get("reading_time", 1),
             }
             if fields:
                 item = apply_field_filtering(item, fields)
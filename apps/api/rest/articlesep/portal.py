@@ -11,8 +11,10 @@ from rest_framework import status
 from apps.core.site_utils import get_site_from_request
 from apps.searchapp.client import get_client
 from apps.searchapp.simple_index import get_index_name
+from apps.searchapp.indexer import fill_missing_listing_fields
 from ..utils import apply_field_filtering, generate_etag
 from ..utils.rate_limit import PORTAL_ARTICLES_RATE_LIMIT
+from ..articles import PORTAL_SOURCE_FIELDS
 
 
 @api_view(["GET"])
@@ -63,6 +65,7 @@ def portal_articles(request):
             "from": start_from,
             "size": size,
             "track_total_hits": True,
+            "_source": {"includes": PORTAL_SOURCE_FIELDS},
         }
 
         # 4. 执行查询
@@ -70,86 +73,40 @@ def portal_articles(request):
         hits = res.get("hits", {})
         total = hits.get("total", {}).get("value", 0)
 
-        # 5. 序列化 - 增强图片数据获取
+        # 5. 序列化（封面与统计数据均在索引时写入 _source；旧文档缺字段时一次回查补齐）
         items = []
-        article_ids = []
-        
-        # 收集文章ID用于批量查询图片
-        for h in hits.get("hits", []):
-            s = h.get("_source", {})
-            article_id = s.get("article_id") or h.get("_id")
-            article_ids.append(article_id)
-        
-        # 批量查询文章的封面图片和统计数据
-        article_data = {}
-        if article_ids:
-            from apps.news.models.article import ArticlePage
-            articles_query = ArticlePage.objects.filter(
-                id__in=article_ids
-            ).select_related('cover').values(
-                'id', 'cover__file', 'cover__title',
-                'view_count', 'comment_count', 'like_count', 'favorite_count', 'reading_time',
-                'author_name', 'is_featured', 'weight'
-            )
-            
-            # 使用存储后端统一生成媒体URL，避免硬编码 /media 前缀
-            from apps.core.storages import PublicMediaStorage
-            storage = PublicMediaStorage()
-
-            for article in articles_query:
-                article_id = str(article['id'])
-                data = {
-                    'view_count': article['view_count'] or 0,
-                    'comment_count': article['comment_count'] or 0,
-                    'like_count': article['like_count'] or 0,
-                    'favorite_count': article['favorite_count'] or 0,
-                    'reading_time': article['reading_time'] or 1,
-                    'author_name': article['author_name'] or '',
-                    'is_featured': article['is_featured'] or False,
-                    'weight': article['weight'] or 0,
-                    'cover_url': '',
-                    'cover_title': ''
-                }
-                
-                # 处理封面图片
-                if article['cover__file']:
-                    data['cover_url'] = storage.url(article['cover__file'])
-                    data['cover_title'] = article['cover__title'] or ''
-                
-                article_data[article_id] = data
-        
-        # 构建响应项目
-        for h in hits.get("hits", []):
-            s = h.get("_source", {})
-            article_id = s.get("article_id") or h.get("_id")
-            
-            # 获取文章数据（图片和统计信息）
-            data = article_data.get(str(article_id), {})
-            cover_url = data.get('cover_url', '')
+        sources = [{"article_id": h.get("_id"), **h.get("_source", {})} for h in hits.get("hits", [])]
+        fill_missing_listing_fields(sources)
+        for s in sources:
+            article_id = s.get("article_id")
+            cover_url = s.get("cover_url") or ""
             
             item = {
                 "id": article_id,
                 "title": s.get("title"),
                 "slug": s.get("slug"),
                 "excerpt": s.get("summary") or "",
-                "cover_url": cover_url,  # 从数据库获取实际图片
+                "cover_url": cover_url,
                 "image_url": cover_url,  # 兼容性字段
+                "cover_renditions": s.get("cover_renditions") or {},
                 "publish_at": s.get("first_published_at") or s.get("publish_time"),
                 "channel_slug": s.get("primary_channel_slug") or s.get("channel"),
+                "channel_name": s.get("channel_name") or "",
+                "topic_title": s.get("topic_title") or "",
                 "region": s.get("region"),
                 "source_site": site,
                 "source_url": s.get("url") or "",
                 "canonical_url": s.get("url") or "",
-                "author": data.get('author_name') or s.get("author"),  # 优先使用数据库中的作者
+                "author": s.get("author"),
                 "has_video": s.get("has_video", False),  # 添加视频标识
-                "is_featured": data.get('is_featured', False),  # 添加推荐标识
-                "weight": data.get('weight', 0),  # 添加权重字段
+                "is_featured": s.get("is_featured", False),  # 添加推荐标识
+                "weight": s.get("weight", 0),  # 添加权重字段
                 # 统计数据
-                "view_count": data.get('view_count', 0),
-                "comment_count": data.get('comment_count', 0), 
-                "like_count": data.get('like_count', 0),
-                "favorite_count": data.get('favorite_count', 0),
-                "reading_time": data.get('reading_time', 1),
+                "view_count": s.get("view_count", 0),
+                "comment_count": s.get("comment_count", 0), 
+                "like_count": s.get("like_count", 0),
+                "favorite_count": s.get("favorite_count", 0),
+                "reading_time": s.get("reading_time", 1),
             }
             if fields:
                 item = apply_field_filtering(item, fields)
@@ -24,7 +24,8 @@ from .utils import (
     apply_field_filtering,
     generate_cache_key,
     generate_etag,
-    generate_surrogate_keys
+    generate_surrogate_keys,
+    site_content_namespaces
 )
 from ..utils.rate_limit import CHANNELS_RATE_LIMIT as CATEGORY_RATE_LIMIT
 from ..utils.cache_performance import monitor_cache_performance
@@ -98,7 +99,7 @@ def _original_categories_list(request):
             'order': order_by,
             'limit': limit or ''
         }
-        cache_key = generate_cache_key("categories_list", cache_params)
+        cache_key = generate_cache_key("categories_list", cache_params, site_content_namespaces(site))
         
         # 4. 尝试从缓存获取
         cached_result = cache.get(cache_key)
@@ -169,11 +170,11 @@ def _original_categories_list(request):
                     "error": f"Parent category '{parent_param}' not found"
                 }, status=status.HTTP_404_NOT_FOUND)
         
-        # 6. 性能优化 - 预加载相关数据
-        from apps.news.models import ArticlePage
+        # 6. 性能优化 - 预加载相关数据，子分类数在同一查询中标注
         queryset = queryset.select_related('parent').prefetch_related(
-            'channels',
-            'children'
+            'channels'
+        ).annotate(
+            active_children_count=Count('children', filter=Q(children__is_active=True), distinct=True)
         )
         
         # 7. 排序
@@ -184,8 +185,7 @@ def _original_categories_list(request):
         elif order_by == '-created_at':
             queryset = queryset.order_by('-created_at')
         elif order_by == 'articles_count':
-            # 文章数量排序比较复杂，暂时用简单排序
-            queryset = queryset.order_by('order', 'name')
+            queryset = queryset.order_by('-live_article_count', 'order', 'name')
         else:
             queryset = queryset.order_by('order', 'name')
         
@@ -199,8 +199,8 @@ def _original_categories_list(request):
         
         # 9. 序列化
         if format_type == 'tree':
-            # 只获取顶级分类用于树状展示
-            root_categories = queryset.filter(parent=None)
+            # 只获取顶级分类用于树状展示，子树一次查询加载
+            root_categories = Category.load_subtrees(queryset.filter(parent=None))
             serializer = CategoryTreeSerializer(
                 root_categories, 
                 many=True, 
@@ -285,7 +285,7 @@ def category_detail(request, slug):
             'include_articles': include_articles,
             'articles_limit': articles_limit
         }
-        cache_key = generate_cache_key("category_detail", cache_params)
+        cache_key = generate_cache_key("category_detail", cache_params, site_content_namespaces(site))
         
         # 4. 尝试从缓存获取
         cached_result = cache.get(cache_key)
@@ -301,8 +301,14 @@ def category_detail(request, slug):
         try:
             category = Category.objects.select_related('parent').prefetch_related(
                 'channels',
-                'children',
-                'articles'
+                Prefetch(
+                    'children',
+                    queryset=Category.objects.select_related('parent').prefetch_related('channels').annotate(
+                        active_children_count=Count('children', filter=Q(children__is_active=True), distinct=True)
+                    ),
+                ),
+            ).annotate(
+                active_children_count=Count('children', filter=Q(children__is_active=True), distinct=True)
             ).get(slug=slug, sites=site, is_active=True)
         except Category.DoesNotExist:
             return Response({
@@ -381,7 +387,7 @@ def categories_tree(request):
             'max_depth': max_depth or '',
             'include_counts': include_counts
         }
-        cache_key = generate_cache_key("categories_tree", cache_params)
+        cache_key = generate_cache_key("categories_tree", cache_params, site_content_namespaces(site))
         
         # 4. 尝试从缓存获取
         cached_result = cache.get(cache_key)
@@ -413,20 +419,17 @@ def categories_tree(request):
                     "error": f"Channel '{channel_param}' not found"
                 }, status=status.HTTP_404_NOT_FOUND)
         
-        # 6. 性能优化 - 递归预加载
-        queryset = queryset.select_related('parent').prefetch_related(
-            'channels',
-            'children__children__children',  # 预加载3层
-            'articles'
-        ).order_by('order', 'name')
+        # 6. 任意深度的子树一次查询加载（物化路径前缀匹配），文章数为反范式字段
+        depth_limit = int(max_depth) if max_depth and max_depth.isdigit() else None
+        roots = Category.load_subtrees(queryset.order_by('order', 'name'), max_depth=depth_limit)
         
         # 7. 序列化
         serializer = CategoryTreeSerializer(
-            queryset,
+            roots,
             many=True,
             context={
                 'request': request,
-                'max_depth': int(max_depth) if max_depth and max_depth.isdigit() else None,
+                'max_depth': depth_limit,
                 'include_counts': include_counts
             }
         )
@@ -13,6 +13,7 @@ from django.utils import timezone
 
 from apps.core.models import SiteCDNConfig, CDNProvider
 from apps.core.cdn.manager import CDNManager
+from apps.core.tasks.revalidation import enqueue_revalidation
 from ..utils.rate_limit import CDN_CONFIG_RATE_LIMIT
 
 
@@ -83,17 +84,16 @@ def purge_site_cache(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # 使用CDN管理器清除缓存
-        cdn_manager = CDNManager()
-        result = cdn_manager.purge_site_cache(site_hostname, urls)
+        # 加入失效队列，由后台任务按提供商限制分块刷新并重试
+        result = enqueue_revalidation(site_hostname, paths=urls)
         
-        if result['success']:
-            return Response(result)
-        else:
-            return Response(
-                result, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        return Response({
+            'success': True,
+            'message': 'Cache purge queued',
+            'site': site_hostname,
+            'urls': urls,
+            **result,
+        }, status=status.HTTP_202_ACCEPTED)
             
     except Exception as e:
         return Response(
@@ -2,6 +2,8 @@ from clickhouse_driver import Client
 from django.conf import settings
 import logging
 from apps.core.utils.circuit_breaker import get_breaker
+from apps.core.services.metrics_rollups import pick_tier
+from ..utils.realtime_counters import read_window_features
 
 logger = logging.getLogger(__name__)
 
@@ -28,20 +30,35 @@ def ch():
             raise
 
 def fetch_agg_features(ids, site:str)->dict:
+    """
+    候选文章的 ctr_1h / pop_1h
+
+    优先读取 Redis 滑动窗口计数（一次管道往返）；计数窗口不完整或 Redis 不可用时查询 ClickHouse。
+    """
     if not ids: return {}
-    
+    ids = [str(i) for i in ids[:1000]]
+
+    realtime = read_window_features(site, ids)
+    if realtime is not None:
+        return realtime
+    return fetch_clickhouse_features(ids, site)
+
+
+def fetch_clickhouse_features(ids, site:str)->dict:
     try:
-        ids_list = ",".join([f"'{i}'" for i in ids[:1000]])
+        client = ch()
+        tier = pick_tier(1, client)
         q = f'''
-          SELECT article_id, sum(clicks)/nullIf(sum(impressions),0) AS ctr_1h
-          FROM article_metrics_agg
-          WHERE site = %(site)s AND window_start >= now() - INTERVAL 1 HOUR
-            AND article_id IN ({ids_list})
+          SELECT article_id, sum(clicks)/nullIf(sum(impressions),0) AS ctr_1h, sum(clicks) AS pop_1h
+          FROM {tier.table}
+          WHERE site = %(site)s AND {tier.window_condition("hours")}
+            AND article_id IN %(ids)s
           GROUP BY article_id
         '''
+        params = {"site": site, "hours": 1, "ids": tuple(ids)}
         breaker = get_breaker("clickhouse", failure_threshold=5, recovery_timeout=30, rolling_window=60)
-        rows = breaker.call(ch().execute, q, {"site": site})
-        return {aid: {"ctr_1h": float(ctr or 0.0)} for (aid, ctr) in rows}
+        rows = breaker.call(client.execute, q, params)
+        return {aid: {"ctr_1h": float(ctr or 0.0), "pop_1h": float(pop or 0.0)} for (aid, ctr, pop) in rows}
     except Exception as e:
         logger.error(f"Failed to fetch agg features: {e}")
         # 如果ClickHouse查询失败，返回空结果而不是崩溃
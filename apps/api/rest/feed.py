@@ -5,121 +5,23 @@ from django.conf import settings
 from django.core.cache import cache
 from apps.searchapp.client import get_client, index_name_for
 from apps.searchapp.queries import build_query
+from apps.searchapp.indexer import LISTING_SOURCE_EXCLUDES
 from apps.core.flags import flag, ab_bucket
 from apps.core.site_utils import get_site_from_request
 from .features import fetch_agg_features
-from .rank import score_and_diversify
+from .rank import score_and_diversify, score_and_diversify_anonymous
 from .anonymous_recommendation import get_anonymous_recommendation_config
 from ..utils.rate_limit import FEED_RATE_LIMIT
+from ..utils.candidate_pools import candidate_from_hit, recall_from_pool
 from apps.news.models.article import ArticlePage
 import re
 from django.utils import timezone
 from datetime import timedelta
 from wagtail.models import Site
+from ..utils.stages import StageRunner
 import logging
 
-def score_and_diversify_anonymous(candidates, agg_features, sort_by="final_score", strategy=None):
-    """
-    匿名用户个性化排序和多样性控制
-    """
-    from collections import defaultdict
-    
-    # 获取策略配置
-    diversity_boost = strategy.get("diversity_boost", 0.2) if strategy else 0.2
-    channel_weights = strategy.get("weights", {}) if strategy else {}
-    
-    # 计算个性化分数
-    for c in candidates:
-        # 基础分数
-        base_score = c.get("score", 0.0)
-        
-        # CTR分数
-        ctr = agg_features.get(c["id"], {}).get("ctr_1h", c.get("ctr_1h", 0.0))
-        
-        # 质量分数
-        quality = c.get("quality_score", 1.0)
-        
-        # 频道权重分数
-        channel = c.get("channel", "unknown")
-        channel_weight = channel_weights.get(channel, 1.0)
-        
-        # 计算最终分数
-        c["final_score"] = (
-            0.4 * base_score +           # 基础召回分数
-            0.3 * ctr +                  # CTR分数
-            0.2 * quality +              # 质量分数
-            0.1 * channel_weight         # 频道权重分数
-        )
-    
-    # 根据指定字段排序
-    sort_field = sort_by
-    if sort_field == "popularity":
-        sort_field = "pop_24h"
-    elif sort_field == "hot":
-        sort_field = "pop_1h"
-    elif sort_field == "ctr":
-        sort_field = "ctr_24h"
-    
-    candidates.sort(key=lambda x: x.get(sort_field, 0), reverse=True)
-    
-    # 多样性控制 - 根据策略类型调整限制
-    strategy_type = strategy.get("type", "unknown") if strategy else "unknown"
-    
-    if strategy_type == "cold_start":
-        # 冷启动：优先内容质量，最小多样性限制
-        limit_author = 999    # 基本不限制优质作者
-        limit_topic = 999     # 基本不限制话题
-        limit_channel = 999   # 基本不限制频道
-    elif strategy_type == "hybrid":
-        # 混合策略：中等多样性控制
-        limit_author = 50     # 放宽作者限制
-        limit_topic = 100     # 放宽话题限制
-        limit_channel = 50    # 放宽频道限制
-    else:
-        # 个性化或其他：放宽多样性控制
-        limit_author = 20     # 放宽作者限制
-        limit_topic = 30      # 放宽话题限制
-        limit_channel = 20    # 放宽频道限制
-    
-    seen_author = defaultdict(int)
-    seen_topic = defaultdict(int)
-    seen_channel = defaultdict(int)
-    
-    result = []
-    for c in candidates:
-        author = c.get("author") or "unknown"
-        topic = c.get("topic") or "unknown"
-        channel = c.get("channel") or "unknown"
-        
-        # 检查多样性限制 - 对unknown作者和话题不进行限制
-        if ((author != "unknown" and seen_author[author] >= limit_author) or 
-            (topic != "unknown" and seen_topic[topic] >= limit_topic) or
-            seen_channel[channel] >= limit_channel):
-            continue
-        
-        # 添加多样性奖励
-        diversity_bonus = 0
-        if seen_author[author] == 0:  # 新作者
-            diversity_bonus += diversity_boost * 0.3
-        if seen_topic[topic] == 0:    # 新话题
-            diversity_bonus += diversity_boost * 0.3
-        if seen_channel[channel] == 0:  # 新频道
-            diversity_bonus += diversity_boost * 0.4
-        
-        c["final_score"] += diversity_bonus
-        
-        result.append(c)
-        seen_author[author] += 1
-        seen_topic[topic] += 1
-        seen_channel[channel] += 1
-        
-        if len(result) >= 9999:  # 基本不限制结果数量
-            break
-    
-    # 按最终分数重新排序
-    result.sort(key=lambda x: x.get("final_score", 0), reverse=True)
-    
-    return result
+logger = logging.getLogger(__name__)
 
 def encode_cursor(payload: dict) -> str:
     return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
@@ -128,10 +30,139 @@ def decode_cursor(token: str|None) -> dict:
     if not token: return {}
     return json.loads(base64.urlsafe_b64decode(token.encode()).decode())
 
+def _default_recall_params(request):
+    """请求参数决定的通用召回参数（已登录用户、画像不可用时使用）"""
+    template = request.query_params.get("template", "recommend_default")
+    channels = request.query_params.getlist("channel") or ["society","tech","finance"]
+    # 尊重用户显式设置的hours参数
+    user_hours = request.query_params.get("hours")
+    hours = int(user_hours) if user_hours else flag("recall.window_hours", 72)
+    return template, channels, hours
+
+
+def _anonymous_recall_params(request, strategy):
+    """根据匿名画像的推荐策略确定召回参数"""
+    # 使用个性化频道配置，若请求显式传入channel则优先使用请求参数
+    req_channels = request.query_params.getlist("channel")
+    channels = req_channels if req_channels else strategy.get("channels", [])
+    
+    # 根据策略类型选择模板
+    if strategy["type"] == "cold_start":
+        template = "anonymous_cold_start"  # 冷启动专用模板
+    else:
+        template = "recommend_default"  # 其他情况使用默认模板
+    
+    # 根据策略调整参数，但尊重用户显式设置的hours参数
+    user_hours = request.query_params.get("hours")
+    if user_hours:
+        hours = int(user_hours)  # 用户显式设置则使用用户参数
+    elif strategy["type"] == "cold_start":
+        hours = 720  # 冷启动用户看30天内的内容，确保有足够数据
+    elif strategy["type"] == "hybrid":
+        hours = 48  # 混合策略看48小时
+    else:
+        hours = flag("recall.window_hours", 72)  # 个性化策略使用默认时间窗
+    return template, channels, hours
+
+
+def _search_recall(site, template, channels, hours, seen_ids, combined_seen, size):
+    """
+    召回：优先使用预先物化的候选池，长尾参数组合查询 OpenSearch
+
+    Returns:
+        (candidates, total_hits, returned_hits)
+    """
+    pooled = recall_from_pool(site, template, channels, hours, set(seen_ids) | set(combined_seen), size)
+    if pooled is not None:
+        return pooled
+
+    body = build_query(template, site=site, channels=channels, hours=hours, seen_ids=seen_ids, size=size)
+    # 列表不需要正文，slug/封面/计数等均已在索引时写入 _source
+    body["_source"] = {"excludes": LISTING_SOURCE_EXCLUDES}
+    resp = get_client().search(index=index_name_for(site), body=body)
+    hits = resp.get("hits", {}).get("hits", [])
+    candidates = []
+    for h in hits:
+        if h["_id"] not in combined_seen:
+            candidates.append(candidate_from_hit(h["_id"], h.get("_score", 0.0), h["_source"]))
+    return candidates, resp.get("hits", {}).get("total", {}).get("value", 0), len(hits)
+
+
+def _db_recall(site, hours, combined_seen, size):
+    """OpenSearch 无结果时从数据库召回最新文章"""
+    try:
+        site_obj = Site.objects.get(hostname=site)
+        qs = ArticlePage.objects.live().descendant_of(site_obj.root_page)
+    except Exception:
+        qs = ArticlePage.objects.live()
+    # 时间窗过滤：尊重hours
+    try:
+        if hours:
+            since = timezone.now() - timedelta(hours=int(hours))
+            qs = qs.filter(first_published_at__gte=since)
+    except Exception:
+        pass
+    pages = list(qs.order_by('-first_published_at')[:size])
+    if not pages:
+        # 回退到全站并适度放宽时间窗
+        qs_global = ArticlePage.objects.live()
+        try:
+            if hours:
+                since = timezone.now() - timedelta(hours=int(hours))
+                qs_global = qs_global.filter(first_published_at__gte=since)
+        except Exception:
+            pass
+        pages = list(qs_global.order_by('-first_published_at')[:size])
+    if not pages:
+        # 最后回退：不加时间窗，确保至少返回一些内容
+        pages = list(ArticlePage.objects.live().order_by('-first_published_at')[:size])
+    candidates = []
+    for p in pages:
+        pid = str(p.id)
+        if pid in combined_seen:
+            continue
+        candidates.append({
+            "id": pid,
+            "article_id": pid,
+            "title": p.title,
+            "slug": p.slug,
+            "publish_time": p.first_published_at.isoformat() if getattr(p, 'first_published_at', None) else None,
+            "publish_at": p.first_published_at.isoformat() if getattr(p, 'first_published_at', None) else None,
+            "channel": getattr(p, 'channel_slug', 'recommend'),
+            "topic": getattr(p, 'topic_slug', ''),
+            "author": getattr(p, 'author_name', ''),
+            "quality_score": 1.0,
+            "ctr_1h": 0.0,
+            "pop_1h": 0.0,
+            "pop_24h": 0.0,
+            "score": 0.0,
+        })
+    return candidates
+
+
+def _fetch_slugs(article_ids):
+    """批量查询文章slug（用于前端链接生成）"""
+    ids = [aid for aid in article_ids if str(aid).isdigit()]
+    return {
+        str(article['id']): article['slug']
+        for article in ArticlePage.objects.filter(id__in=ids).values('id', 'slug')
+    }
+
+
 @api_view(["GET"])
 @throttle_classes([])  # 使用自定义端点限流，禁用DRF默认Anon/User限流避免429
 @FEED_RATE_LIMIT
 def feed(request):
+    """
+    推荐流
+
+    互不依赖的阶段并发执行，各自有截止时间与降级结果：
+    - 匿名画像与通用召回同时发起；画像超时则直接使用通用召回
+    - 个性化召回结果不足一页时用通用召回补足
+    - 召回特征与slug补全同时查询（slug 已在索引中，只为缺失的文档回查数据库）
+    各阶段耗时在 debug.timings 中返回，并累计到 feed 管道指标。
+    """
+    runner = StageRunner("feed")
     # 使用智能站点识别
     site = get_site_from_request(request)
     size = int(request.query_params.get("size", 20))
@@ -159,145 +190,103 @@ def feed(request):
 
     # 检查是否为匿名用户
     is_anonymous = not request.user.is_authenticated
-    
+    sort_by = request.query_params.get("sort", "final_score")
+
+    # AB：10%使用更窄 24h 窗
+    session = request.headers.get("X-AB-Session", "anon")
+    narrow_window = ab_bucket("feed.24h-window", key=session, percent=10)
+
+    # 为了支持分页，Elasticsearch查询需要返回更多文章
+    # 每页20篇，但我们需要查询更多来支持分页
+    elasticsearch_size = max(size * 5, 500)  # 至少查询500篇，或者5倍于请求数量
+    recall_deadline = flag("feed.deadline.recall_ms", 800)
+
+    # 1. 画像与通用召回并发
+    template, channels, hours = _default_recall_params(request)
+    if narrow_window:
+        hours = min(hours, 24)
+    generic_recall = runner.submit(
+        "recall_generic", _search_recall, site, template, channels, hours, seen_ids, combined_seen, elasticsearch_size,
+        deadline_ms=recall_deadline, fallback=None,
+    )
+
+    personalized = None
     if is_anonymous:
         # 匿名用户使用智能推荐系统
-        try:
-            rec_config = get_anonymous_recommendation_config(request, site)
+        rec_config = runner.result(runner.submit(
+            "profile", get_anonymous_recommendation_config, request, site,
+            deadline_ms=flag("feed.deadline.profile_ms", 300), fallback=None,
+        ))
+        if rec_config:
             strategy = rec_config["strategy"]
             profile = rec_config["profile"]
-            
-            # 使用个性化频道配置，若请求显式传入channel则优先使用请求参数
-            req_channels = request.query_params.getlist("channel")
-            channels = req_channels if req_channels else strategy.get("channels", [])
-            
-            # 根据策略类型选择模板
-            if strategy["type"] == "cold_start":
-                template = "anonymous_cold_start"  # 冷启动专用模板
-            else:
-                template = "recommend_default"  # 其他情况使用默认模板
-            
-            # 根据策略调整参数，但尊重用户显式设置的hours参数
-            user_hours = request.query_params.get("hours")
-            if user_hours:
-                hours = int(user_hours)  # 用户显式设置则使用用户参数
-            elif strategy["type"] == "cold_start":
-                hours = 720  # 冷启动用户看30天内的内容，确保有足够数据
-            elif strategy["type"] == "hybrid":
-                hours = 48  # 混合策略看48小时
-            else:
-                hours = flag("recall.window_hours", 72)  # 个性化策略使用默认时间窗
-                
-        except Exception as e:
-            # 如果匿名推荐系统出错，回退到默认逻辑
-            print(f"Anonymous recommendation error: {e}")
-            template = request.query_params.get("template", "recommend_default")
-            channels = request.query_params.getlist("channel") or ["society","tech","finance"]
-            hours = flag("recall.window_hours", 72)
+            params = _anonymous_recall_params(request, strategy)
+            if narrow_window:
+                params = (params[0], params[1], min(params[2], 24))
+            if params != (template, channels, hours):
+                template, channels, hours = params
+                personalized = runner.submit(
+                    "recall_personalized", _search_recall, site, template, channels, hours,
+                    seen_ids, combined_seen, elasticsearch_size,
+                    deadline_ms=recall_deadline, fallback=None,
+                )
+        else:
+            # 画像超时或出错：回退到通用召回
             strategy = {"type": "fallback"}
             profile = {"user_type": "anonymous", "confidence_score": 0.0}
     else:
         # 已登录用户使用原有逻辑
-        template = request.query_params.get("template", "recommend_default")
-        channels = request.query_params.getlist("channel") or ["society","tech","finance"]
-        # 尊重用户显式设置的hours参数
-        user_hours = request.query_params.get("hours")
-        hours = int(user_hours) if user_hours else flag("recall.window_hours", 72)
+        runner.skip("profile")
         strategy = {"type": "authenticated"}
         profile = {"user_type": "authenticated", "confidence_score": 1.0}
+    if personalized is None:
+        runner.skip("recall_personalized")
 
-    sort_by = request.query_params.get("sort", "final_score")
-
-    # AB：10%使用更窄 24h 窗
-    session = request.headers.get("X-AB-Session", "anon")
-    if ab_bucket("feed.24h-window", key=session, percent=10):
-        hours = min(hours, 24)
-
-    client = get_client()
-    idx = index_name_for(site)
-    # 为了支持分页，Elasticsearch查询需要返回更多文章
-    # 每页20篇，但我们需要查询更多来支持分页
-    elasticsearch_size = max(size * 5, 500)  # 至少查询500篇，或者5倍于请求数量
-    body = build_query(template, site=site, channels=channels, hours=hours, seen_ids=seen_ids, size=elasticsearch_size)
-
+    # 2. 合并召回：个性化优先，不足一页时用通用召回补足
+    recalls = [runner.result(personalized)] if personalized is not None else []
+    if not recalls or not recalls[0] or len(recalls[0][0]) < size:
+        recalls.append(runner.result(generic_recall))
     candidates = []
     total_hits = 0
     returned_hits = 0
-    try:
-        resp = client.search(index=idx, body=body)
-        total_hits = resp.get("hits", {}).get("total", {}).get("value", 0)
-        returned_hits = len(resp.get("hits", {}).get("hits", []))
-        for h in resp.get("hits",{}).get("hits",[]):
-            if h["_id"] not in combined_seen:
-                item = {"id": h["_id"], "score": h.get("_score", 0.0), **h["_source"]}
-                # 确保前端兼容性：如果publish_at为空，使用publish_time
-                if not item.get("publish_at") and item.get("publish_time"):
-                    item["publish_at"] = item["publish_time"]
+    candidate_ids = set()
+    for recall in recalls:
+        if not recall:
+            continue
+        items, hits_total, hits_returned = recall
+        total_hits = max(total_hits, hits_total)
+        returned_hits += hits_returned
+        for item in items:
+            if item["id"] not in candidate_ids:
+                candidate_ids.add(item["id"])
                 candidates.append(item)
-        # 如果ES无结果，回退到DB
-        if total_hits == 0 or not candidates:
-            raise RuntimeError("Empty ES hits, fallback to DB")
-    except Exception as e:
-        logging.getLogger(__name__).warning(f"OpenSearch fallback to DB: {e}")
-        try:
-            site_obj = Site.objects.get(hostname=site)
-            qs = ArticlePage.objects.live().descendant_of(site_obj.root_page)
-        except Exception:
-            qs = ArticlePage.objects.live()
-        # 时间窗过滤：尊重hours
-        try:
-            if hours:
-                since = timezone.now() - timedelta(hours=int(hours))
-                qs = qs.filter(first_published_at__gte=since)
-        except Exception:
-            pass
-        pages = list(qs.order_by('-first_published_at')[:elasticsearch_size])
-        if not pages:
-            # 回退到全站并适度放宽时间窗
-            qs_global = ArticlePage.objects.live()
-            try:
-                if hours:
-                    since = timezone.now() - timedelta(hours=int(hours))
-                    qs_global = qs_global.filter(first_published_at__gte=since)
-            except Exception:
-                pass
-            pages = list(qs_global.order_by('-first_published_at')[:elasticsearch_size])
-        if not pages:
-            # 最后回退：不加时间窗，确保至少返回一些内容
-            pages = list(ArticlePage.objects.live().order_by('-first_published_at')[:elasticsearch_size])
-        for p in pages:
-            pid = str(p.id)
-            if pid in combined_seen:
-                continue
-            candidates.append({
-                "id": pid,
-                "article_id": pid,
-                "title": p.title,
-                "publish_time": p.first_published_at.isoformat() if getattr(p, 'first_published_at', None) else None,
-                "publish_at": p.first_published_at.isoformat() if getattr(p, 'first_published_at', None) else None,
-                "channel": getattr(p, 'channel_slug', 'recommend'),
-                "topic": getattr(p, 'topic_slug', ''),
-                "author": getattr(p, 'author_name', ''),
-                "quality_score": 1.0,
-                "ctr_1h": 0.0,
-                "pop_1h": 0.0,
-                "pop_24h": 0.0,
-                "score": 0.0,
-            })
+
+    # 如果ES无结果，回退到DB
+    if not candidates:
+        logger.warning("OpenSearch recall empty or unavailable, fallback to DB")
+        candidates = runner.run("recall_db", _db_recall, site, hours, combined_seen, elasticsearch_size, fallback=[])
         total_hits = len(candidates)
         returned_hits = len(candidates)
-    
-
-    agg = fetch_agg_features([c["id"] for c in candidates], site=site)
-    
-    # 根据用户类型调整排序策略
-    if is_anonymous and strategy.get("type") != "fallback":
-        # 匿名用户使用个性化排序
-        ranked = score_and_diversify_anonymous(candidates, agg, sort_by=sort_by, strategy=strategy)
     else:
-        # 已登录用户或回退情况使用原有排序
-        ranked = score_and_diversify(candidates, agg, sort_by=sort_by)
+        runner.skip("recall_db")
 
+    # 3. 召回特征与slug补全并发
+    enrich_deadline = flag("feed.deadline.enrich_ms", 300)
+    features = runner.submit(
+        "features", fetch_agg_features, [c["id"] for c in candidates], site=site,
+        deadline_ms=enrich_deadline, fallback={},
+    )
+    missing_slug_ids = [c.get("article_id") or c["id"] for c in candidates if not c.get("slug")]
+    if missing_slug_ids:
+        slugs = runner.submit(
+            "slugs", _fetch_slugs, missing_slug_ids,
+            deadline_ms=enrich_deadline, fallback=None,
+        )
+    else:
+        slugs = None
+        runner.skip("slugs")
+    agg = runner.result(features)
+    
     # 后端去重（跨模块更稳妥）：优先使用 canonical_url/url 其后是 (site, slug/id)，最后退化到规范化title
     def _dedup_key(item: dict) -> str:
         url = (item.get("canonical_url") or item.get("url") or "").strip().lower()
@@ -315,6 +304,21 @@ def feed(request):
             return f"title:{site}:{title_norm}"
         return f"row:{id(item)}"
 
+    # 根据用户类型调整排序策略
+    if is_anonymous and strategy.get("type") != "fallback":
+        # 匿名用户使用个性化排序
+        ranked = runner.run(
+            "rank", score_and_diversify_anonymous, candidates, agg, sort_by=sort_by, strategy=strategy,
+            limit=size, dedup_key=_dedup_key, fallback=candidates,
+        )
+    else:
+        # 已登录用户或回退情况使用原有排序
+        ranked = runner.run(
+            "rank", score_and_diversify, candidates, agg, sort_by=sort_by,
+            limit=size, dedup_key=_dedup_key, fallback=candidates,
+        )
+
+    # 排序已按页去重截断；排序失败退回原始候选时在这里兜底
     dedup_seen = set()
     dedup_ranked = []
     for r in ranked:
@@ -327,26 +331,12 @@ def feed(request):
     # 截取到请求的size
     ranked = dedup_ranked[:size]
 
-    # 为每个文章添加slug字段（用于前端链接生成）
-    article_ids = [r.get("article_id") or r["id"] for r in ranked]
-    try:
-        # 批量查询文章的slug
-        articles_with_slug = ArticlePage.objects.filter(
-            id__in=article_ids
-        ).values('id', 'slug')
-        
-        # 创建id到slug的映射
-        slug_map = {str(article['id']): article['slug'] for article in articles_with_slug}
-        
-        # 为每个ranked项添加slug
-        for item in ranked:
+    # 为缺少slug的文章补全slug字段（用于前端链接生成）；查询失败或超时不影响主要功能
+    slug_map = (runner.result(slugs) if slugs is not None else None) or {}
+    for item in ranked:
+        if not item.get("slug"):
             item_id = str(item.get("article_id") or item["id"])
             item["slug"] = slug_map.get(item_id, "")
-    except Exception as e:
-        # 如果查询失败，记录错误但不影响主要功能
-        print(f"Warning: Failed to fetch article slugs: {e}")
-        for item in ranked:
-            item["slug"] = ""
 
     # 生成next_cursor的逻辑：基于返回文章数量判断
     # 当返回的文章数量小于请求的size时，说明没有更多数据了
@@ -363,6 +353,7 @@ def feed(request):
     
     # 更新会话级 seen 缓存
     cache.set(seen_cache_key, cursor_seen_ids, timeout=6*3600)
+    runner.export_metrics()
 
     debug_info = {
         "hours": hours, 
@@ -385,7 +376,8 @@ def feed(request):
         "user_type": "anonymous" if is_anonymous else "authenticated",
         "strategy_type": strategy.get("type", "unknown"),
         "channels": channels,
-        "confidence_score": profile.get("confidence_score", 0.0)
+        "confidence_score": profile.get("confidence_score", 0.0),
+        "timings": runner.debug()
     }
     
     return Response({
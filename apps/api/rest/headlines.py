@@ -7,6 +7,7 @@ from django.core.cache import cache
 from django.conf import settings
 from apps.searchapp.client import get_client, index_name_for
 from apps.searchapp.queries import build_query
+from apps.searchapp.indexer import LISTING_SOURCE_EXCLUDES, fill_missing_listing_fields
 from apps.core.site_utils import get_site_from_request
 from apps.news.models.article import ArticlePage
 from wagtail.models import Site
@@ -148,6 +149,12 @@ def _cluster_items(items: list, similarity: float = 0.92) -> list:
     return out
 
 
+def _cover_from_source(src: dict):
+    """从索引文档取封面URL：优先大卡片规格，其次原图"""
+    renditions = src.get("cover_renditions") or {}
+    return renditions.get("card_large") or src.get("cover_url") or None
+
+
 @api_view(["GET"])
 @throttle_classes([])  # 复用自定义限流
 @FEED_RATE_LIMIT
@@ -217,6 +224,8 @@ def headlines(request):
         seen_ids=query_seen_ids,
         size=elastic_size,
     )
+    # 列表不需要正文，减少传输与反序列化
+    body["_source"] = {"excludes": LISTING_SOURCE_EXCLUDES}
 
     candidates = []
     total_hits = 0
@@ -233,27 +242,14 @@ def headlines(request):
             # 兜底 publish_at
             if not item.get("publish_at") and item.get("publish_time"):
                 item["publish_at"] = item["publish_time"]
-            
-            # 添加封面图片信息（从数据库获取）
-            cover_url = None
-            try:
-                article_id = item.get("article_id") or item.get("id")
-                if article_id:
-                    # 从数据库获取文章封面
-                    try:
-                        article = ArticlePage.objects.get(id=int(article_id))
-                        if article.cover:
-                            cover_url = f"http://192.168.8.195:8000/api/media/proxy/{article.cover.file.name}"
-                    except (ArticlePage.DoesNotExist, ValueError):
-                        pass
-            except Exception:
-                pass
-            
-            # 添加图片字段
+            candidates.append(item)
+
+        # 封面图片信息（索引时已反范式写入 _source；旧文档缺字段时一次回查补齐）
+        fill_missing_listing_fields(candidates)
+        for item in candidates:
+            cover_url = _cover_from_source(item)
             item["image_url"] = cover_url
             item["cover"] = {"url": cover_url} if cover_url else None
-            
-            candidates.append(item)
         # 若ES无结果，进入DB回退
         if total_hits == 0 or not candidates:
             raise RuntimeError("Empty ES hits for headlines")
@@ -277,6 +273,7 @@ def headlines(request):
             except Exception:
                 pass
         
+        qs = qs.select_related('cover', 'channel')
         pages = list(qs.order_by('-first_published_at')[:elastic_size])
         if not pages:
             # 扩大时间窗至7天确保有内容
@@ -307,8 +304,7 @@ def headlines(request):
             cover_url = None
             if p.cover:
                 try:
-                    # 使用媒体代理URL
-                    cover_url = f"http://192.168.8.195:8000/api/media/proxy/{p.cover.file.name}"
+                    cover_url = p.cover.file.url
                 except Exception:
                     pass
             
@@ -503,7 +499,7 @@ def headlines(request):
         user_id = session_id if session_id and session_id.startswith('user_') else None
         
         cache_key = generate_cache_key(
-            content_type, CacheLayer.BACKEND, site, cache_params, user_id
+            content_type, CacheLayer.BACKEND, site, cache_params, user_id, channels=req_channels
         )
         
         # 3. 检查缓存
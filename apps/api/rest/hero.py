@@ -1,18 +1,14 @@
 """
 Hero API - 专用的Hero轮播数据端点
-简单、快速的Hero内容获取，无需复杂算法
+直接返回后台预渲染的站点轮播快照（见 apps.news.services.hero_snapshot）
 """
 
-from datetime import datetime, timedelta
 from rest_framework.decorators import api_view, throttle_classes
 from rest_framework.response import Response
-from django.core.cache import cache
 from django.conf import settings
 from apps.core.site_utils import get_site_from_request
-from apps.news.models.article import ArticlePage
-from wagtail.models import Site
+from apps.news.services import hero_snapshot
 from ..utils.rate_limit import FEED_RATE_LIMIT
-from apps.core.flags import flag
 
 
 @api_view(["GET"])
@@ -31,7 +27,7 @@ def hero_items(request):
     返回:
     - items: Hero项目列表
     - total: 总数量
-    - cache_info: 缓存信息
+    - cache_info: 快照信息（hit=False 表示快照缺失，已临时拼装并调度重建）
     """
     site = get_site_from_request(request)
     size = max(1, min(int(request.query_params.get("size", 5)), 10))
@@ -41,102 +37,16 @@ def hero_items(request):
     # 获取站点名称（处理字符串和对象两种情况）
     site_name = site.hostname if hasattr(site, 'hostname') else str(site)
     
-    # 构建缓存key（移除hours参数）
-    cache_key = f"hero_items:{site_name}:{size}"
-    
-    # 尝试从缓存获取
-    cached_data = cache.get(cache_key)
-    if cached_data and not settings.DEBUG:
-        return Response({
-            **cached_data,
-            'cache_info': {
-                'hit': True,
-                'ttl': 300,
-                'type': 'hero_simple',
-                'key': cache_key
-            }
-        })
-    
-    # 🎯 Hero不受时间限制，只要是标记为Hero的活跃文章就显示
-    # cutoff_time = datetime.now() - timedelta(hours=hours)  # 已移除
-    
     try:
-        # 🎯 简单的数据库查询，无需OpenSearch，无时间限制
-        hero_articles = ArticlePage.objects.filter(
-            is_hero=True,
-            live=True
-            # first_published_at__gte=cutoff_time  # 已移除时间限制
-        ).select_related(
-            'channel', 'cover'
-        ).prefetch_related(
-            'tags', 'topics'
-        ).order_by('-first_published_at')[:size]
-        
-        items = []
-        for article in hero_articles:
-            # 确保有封面图片
-            image_url = None
-            if article.cover:
-                try:
-                    # 获取适合的图片尺寸
-                    image_url = article.cover.get_rendition('width-800').url
-                except:
-                    # 如果渲染失败，使用原图
-                    image_url = article.cover.file.url if article.cover.file else None
-            
-            # 跳过没有封面图的文章
-            if not image_url:
-                continue
-                
-            # 构建Hero项目数据
-            item = {
-                'id': str(article.id),
-                'article_id': str(article.id),
-                'title': article.title,
-                'excerpt': article.search_description or article.excerpt or '',
-                'image_url': image_url,
-                'publish_time': article.first_published_at.isoformat() if article.first_published_at else '',
-                'publish_at': article.first_published_at.isoformat() if article.first_published_at else '',
-                'slug': article.slug,
-                'author': getattr(article, 'author_name', '') or '',
-                'source': getattr(article, 'source', '') or '本站',
-                'is_breaking': getattr(article, 'is_breaking', False),
-                'is_live': getattr(article, 'is_live', False),
-                'is_event_mode': getattr(article, 'is_event_mode', False),
-                'has_video': getattr(article, 'has_video', False),
-                'tags': [tag.name for tag in article.tags.all()] if hasattr(article, 'tags') else [],
-            }
-            
-            # 添加频道信息
-            if article.channel:
-                item['channel'] = {
-                    'id': article.channel.slug,
-                    'name': article.channel.name,
-                    'slug': article.channel.slug
-                }
-            
-            # 添加主题信息（topics是多对多关系）
-            if hasattr(article, 'topics') and article.topics.exists():
-                first_topic = article.topics.first()
-                if first_topic:
-                    item['topic'] = {
-                        'id': first_topic.slug if hasattr(first_topic, 'slug') else str(first_topic.id),
-                        'name': first_topic.title if hasattr(first_topic, 'title') else first_topic.name,
-                        'slug': first_topic.slug if hasattr(first_topic, 'slug') else str(first_topic.id)
-                    }
-            # 如果没有专题，可以从标签中推断主题
-            elif hasattr(article, 'tags') and article.tags.exists():
-                first_tag = article.tags.first()
-                if first_tag:
-                    item['topic'] = {
-                        'id': first_tag.slug if hasattr(first_tag, 'slug') else str(first_tag.id),
-                        'name': first_tag.name,
-                        'slug': first_tag.slug if hasattr(first_tag, 'slug') else str(first_tag.id)
-                    }
-            
-            items.append(item)
-        
-        # 构建响应数据
+        # 未登记的站点标识使用默认站点的快照
+        site_name = hero_snapshot.resolve_site_name(site_name)
+        # 🎯 单次读取预渲染快照；缺失时用已存在的图片规格临时拼装，不在请求内生成图片
+        snapshot = hero_snapshot.get_snapshot(site_name)
+        hit = snapshot is not None
+        if not hit:
+            snapshot = hero_snapshot.fallback_snapshot(site_name)
+
+        items = snapshot['items'][:size]
         response_data = {
             'items': items,
             'total': len(items),
@@ -145,24 +55,17 @@ def hero_items(request):
                 'no_time_limit': True,  # 标识Hero无时间限制
                 'requested_size': size,
                 'returned_size': len(items),
-                'query_type': 'database_direct',
-                'api_version': 'hero_v2'  # 版本号更新
+                'query_type': 'snapshot' if snapshot.get('prerendered') else 'database_fallback',
+                'api_version': 'hero_v3'
+            },
+            'cache_info': {
+                'hit': hit,
+                'type': 'hero_snapshot',
+                'prerendered': snapshot.get('prerendered', False)
             }
         }
-        
-        # 缓存结果（5分钟）
-        cache.set(cache_key, response_data, 300)
-        
-        # 添加缓存信息
-        response_data['cache_info'] = {
-            'hit': False,
-            'ttl': 300,
-            'type': 'hero_simple',
-            'key': cache_key
-        }
-        
         return Response(response_data)
-        
+
     except Exception as e:
         # 错误处理
         error_response = {
@@ -177,7 +80,7 @@ def hero_items(request):
                 'site': site_name,
                 'no_time_limit': True,  # 标识Hero无时间限制
                 'requested_size': size,
-                'api_version': 'hero_v2'  # 版本号更新
+                'api_version': 'hero_v3'
             }
         }
         
@@ -7,8 +7,11 @@ from django.http import HttpResponse, Http404
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.cache import cache_control
 from django.conf import settings
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 
 @require_http_methods(["GET", "HEAD"])
 @cache_control(max_age=3600, public=True)  # 缓存1小时
@@ -28,31 +31,25 @@ def media_proxy(request, file_path):
         # 构建内部MinIO访问URL
         minio_url = f"http://minio:9000/idp-media-prod-public/{clean_file_path}"
         
-        # 添加调试日志
-        import logging
-        logger = logging.getLogger(__name__)
-        
-        # 记录请求详情帮助追踪来源
-        user_agent = request.META.get('HTTP_USER_AGENT', 'Unknown')
-        referer = request.META.get('HTTP_REFERER', 'No Referer')
-        remote_addr = request.META.get('REMOTE_ADDR', 'Unknown IP')
-        
-        logger.info(f"媒体代理请求: {file_path}")
-        logger.info(f"  -> MinIO URL: {minio_url}")
-        logger.info(f"  -> User-Agent: {user_agent}")
-        logger.info(f"  -> Referer: {referer}")
-        logger.info(f"  -> Remote IP: {remote_addr}")
-        
         # 从MinIO获取文件
         response = requests.get(minio_url, stream=True, timeout=10)
         
-        logger.info(f"MinIO响应: {response.status_code}")
+        # 每个请求一行（按 LOG_SAMPLING_RATES 采样），请求来源放在结构化字段中帮助追踪
+        logger.info(
+            "媒体代理请求: %s -> %s", file_path, response.status_code,
+            extra={'fields': {
+                'minio_url': minio_url,
+                'user_agent': request.META.get('HTTP_USER_AGENT', 'Unknown'),
+                'referer': request.META.get('HTTP_REFERER', 'No Referer'),
+                'remote_addr': request.META.get('REMOTE_ADDR', 'Unknown IP'),
+            }},
+        )
         
         if response.status_code == 404:
-            logger.warning(f"文件不存在: {file_path}")
+            logger.warning("文件不存在: %s", file_path)
             raise Http404("媒体文件不存在")
         elif response.status_code != 200:
-            logger.warning(f"访问失败: {response.status_code} for {file_path}")
+            logger.warning("访问失败: %s for %s", response.status_code, file_path)
             raise Http404("媒体文件访问失败")
         
         # 创建代理响应
@@ -78,12 +75,8 @@ def media_proxy(request, file_path):
         return proxy_response
         
     except requests.exceptions.RequestException as e:
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.error(f"网络请求失败: {e}")
+        logger.error("网络请求失败: %s", e)
         raise Http404("媒体文件访问失败")
     except Exception as e:
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.error(f"媒体代理处理错误: {e}")
+        logger.error("媒体代理处理错误: %s", e)
         raise Http404("媒体文件处理错误")
@@ -13,6 +13,9 @@ from datetime import datetime, timedelta
 
 from apps.api.utils.cache_performance import cache_monitor
 from apps.api.utils.cache_utils import get_cache_stats
+from apps.api.utils.stages import get_stage_metrics
+from apps.api.utils.candidate_pools import get_pool_stats
+from apps.api.rest.anonymous_recommendation import get_profile_metrics
 from django.core.cache import cache
 
 
@@ -82,6 +85,15 @@ def monitoring_dashboard(request):
             # 端点性能（前5个）
             "top_endpoints": _get_top_endpoints(cache_stats),
             
+            # 推荐流各阶段耗时与超时/降级次数
+            "feed_stages": get_stage_metrics("feed"),
+            
+            # 推荐流候选池命中率
+            "feed_candidate_pools": get_pool_stats(),
+            
+            # 匿名画像缓存命中率与获取耗时
+            "anonymous_profiles": get_profile_metrics(),
+            
             # 系统建议
             "recommendations": _generate_recommendations(cache_stats, headlines_healthy, hot_healthy)
         }
@@ -1,34 +1,176 @@
-from collections import defaultdict
+"""
+候选排序与多样性控制
+
+候选的数值字段（召回分、CTR、质量分、排序字段）一次遍历转成列式数组，打分与排序在 NumPy 中完成；
+作者/话题/频道上限沿 argsort 结果顺序扫描，取满一页即停止，只为返回的那一页写入 final_score。
+开启 feed.use_lgbm 时由学习排序模型打分（apps.api.ml.lgbm_ranker），模型不可用时回退线性公式。
+"""
+import numpy as np
+
+from apps.api.ml.lgbm_ranker import learned_scores
 from apps.core.flags import flag
 
-def score_and_diversify(cands, agg_feats, sort_by="final_score"):
-    # 打分：召回分 + CTR_1h + 质量分
-    for c in cands:
-        ctr = agg_feats.get(c["id"], {}).get("ctr_1h", c.get("ctr_1h", 0.0))
-        c["final_score"] = 0.6*c.get("score",0) + 0.3*ctr + 0.1*c.get("quality_score",1.0)
-    
-    # 根据指定字段排序
-    sort_field = sort_by
-    if sort_field == "popularity":
-        # 使用24小时热度作为主要热度指标
-        sort_field = "pop_24h"
-    elif sort_field == "hot":
-        # 使用1小时热度（最新热度）
-        sort_field = "pop_1h"
-    elif sort_field == "ctr":
-        # 使用24小时点击率
-        sort_field = "ctr_24h"
-    
-    cands.sort(key=lambda x: x.get(sort_field, 0), reverse=True)
-
-    # 多样性
-    limit_author = flag("feed.diversity.limit_author", 3)
-    limit_topic = flag("feed.diversity.limit_topic", 3)
-    seen_author = defaultdict(int); seen_topic = defaultdict(int)
-    out = []
-    for c in cands:
-        a = c.get("author") or "na"; t = c.get("topic") or "na"
-        if seen_author[a] >= limit_author or seen_topic[t] >= limit_topic: continue
-        out.append(c); seen_author[a]+=1; seen_topic[t]+=1
-        if len(out) >= 9999: break  # 基本不限制结果数量
+# 排序参数 -> 候选字段
+SORT_FIELDS = {
+    "popularity": "pop_24h",  # 使用24小时热度作为主要热度指标
+    "hot": "pop_1h",          # 使用1小时热度（最新热度）
+    "ctr": "ctr_24h",         # 使用24小时点击率
+}
+
+# 不设上限
+UNLIMITED = 10 ** 9
+
+
+class CandidateColumns:
+    """候选数值字段的列式表示（一次遍历取出全部数值列）"""
+
+    def __init__(self, cands, agg_feats, sort_field):
+        get_feats = agg_feats.get
+        # 召回分、CTR（实时特征优先）、质量分，可选排序字段
+        rows = [
+            (
+                c.get("score") or 0.0,
+                c.get("ctr_1h", 0.0) if (f := get_feats(c["id"])) is None else f.get("ctr_1h", c.get("ctr_1h", 0.0)),
+                1.0 if (q := c.get("quality_score")) is None else q,
+                0.0 if sort_field == "final_score" else (c.get(sort_field) or 0.0),
+            )
+            for c in cands
+        ]
+        matrix = np.array(rows, dtype=np.float64)
+        self.score, self.ctr, self.quality = matrix[:, 0], matrix[:, 1], matrix[:, 2]
+        self.sort_values = None if sort_field == "final_score" else matrix[:, 3]
+
+
+def _descending(values):
+    """按值降序的下标，相等时保持原顺序（与 list.sort(reverse=True) 一致）"""
+    return np.argsort(-values, kind="stable")
+
+
+def _select(order, cands, limit_author, limit_topic, limit_channel, missing_key, exempt_missing=False,
+            channel_count=None):
+    """
+    沿排序结果扫描，按作者/话题/频道上限挑选候选（惰性产出，调用方可提前结束）
+
+    作者/话题/频道只在扫描到的候选上读取；exempt_missing 时缺失的作者/话题不受上限约束。
+    给出 channel_count（候选中的频道数）时，所有频道都达到上限后停止扫描。
+
+    Yields:
+        (下标, 是否新作者, 是否新话题, 是否新频道)
+    """
+    seen_author, seen_topic, seen_channel = {}, {}, {}
+    saturated = 0
+    for i in order.tolist():
+        c = cands[i]
+        a = c.get("author") or missing_key
+        t = c.get("topic") or missing_key
+        ch = c.get("channel") or missing_key
+        na, nt, nc = seen_author.get(a, 0), seen_topic.get(t, 0), seen_channel.get(ch, 0)
+        if ((na >= limit_author and not (exempt_missing and a == missing_key)) or
+                (nt >= limit_topic and not (exempt_missing and t == missing_key)) or
+                nc >= limit_channel):
+            continue
+        yield i, na == 0, nt == 0, nc == 0
+        seen_author[a] = na + 1
+        seen_topic[t] = nt + 1
+        seen_channel[ch] = nc + 1
+        if nc + 1 == limit_channel:
+            saturated += 1
+            if saturated == channel_count:
+                return
+
+
+def _page(cands, indices, scores, limit, dedup_key):
+    """按顺序为返回页构建结果字典（可选去重）"""
+    out, seen = [], set()
+    for i in indices:
+        c = cands[i]
+        if dedup_key is not None:
+            key = dedup_key(c)
+            if key in seen:
+                continue
+            seen.add(key)
+        c["final_score"] = float(scores[i])
+        out.append(c)
+        if limit is not None and len(out) >= limit:
+            break
     return out
+
+
+def score_and_diversify(cands, agg_feats, sort_by="final_score", limit=None, dedup_key=None):
+    """
+    打分（召回分 + CTR_1h + 质量分，或学习排序模型）、排序与作者/话题多样性控制
+
+    Args:
+        limit: 返回数量上限（None 表示不限）
+        dedup_key: 可选的去重键函数，在多样性控制之后应用
+    """
+    if not cands:
+        return []
+    sort_field = SORT_FIELDS.get(sort_by, sort_by)
+    cols = CandidateColumns(cands, agg_feats, sort_field)
+    final = None
+    if flag("feed.use_lgbm", False):
+        final = learned_scores(cands, agg_feats)
+    if final is None:
+        final = 0.6 * cols.score + 0.3 * cols.ctr + 0.1 * cols.quality
+    order = _descending(final if cols.sort_values is None else cols.sort_values)
+
+    selected = _select(
+        order, cands,
+        flag("feed.diversity.limit_author", 3),
+        flag("feed.diversity.limit_topic", 3),
+        UNLIMITED,
+        missing_key="na",
+    )
+    # 入选顺序即结果顺序，取满一页即停止扫描
+    return _page(cands, (i for i, _, _, _ in selected), final, limit, dedup_key)
+
+
+# 匿名用户各策略的作者/话题/频道上限
+ANONYMOUS_DIVERSITY_LIMITS = {
+    "cold_start": (999, 999, 999),  # 冷启动：优先内容质量，基本不限制
+    "hybrid": (50, 100, 50),        # 混合策略：中等多样性控制
+}
+DEFAULT_ANONYMOUS_LIMITS = (20, 30, 20)  # 个性化或其他：放宽多样性控制
+
+
+def score_and_diversify_anonymous(candidates, agg_features, sort_by="final_score", strategy=None,
+                                  limit=None, dedup_key=None):
+    """
+    匿名用户个性化排序和多样性控制
+
+    在排序结果上按策略上限挑选候选，首次出现的作者/话题/频道获得多样性奖励，最后按含奖励的分数重排。
+    未知作者与话题不受上限约束。
+    """
+    if not candidates:
+        return []
+    strategy = strategy or {}
+    diversity_boost = strategy.get("diversity_boost", 0.2)
+    channel_weights = strategy.get("weights", {})
+
+    sort_field = SORT_FIELDS.get(sort_by, sort_by)
+    cols = CandidateColumns(candidates, agg_features, sort_field)
+    channels = [c.get("channel") or "unknown" for c in candidates]
+    channel_weight = np.array([channel_weights.get(ch, 1.0) for ch in channels], dtype=np.float64)
+    final = (
+        0.4 * cols.score +           # 基础召回分数
+        0.3 * cols.ctr +             # CTR分数
+        0.2 * cols.quality +         # 质量分数
+        0.1 * channel_weight         # 频道权重分数
+    )
+    order = _descending(final if cols.sort_values is None else cols.sort_values)
+
+    limits = ANONYMOUS_DIVERSITY_LIMITS.get(strategy.get("type"), DEFAULT_ANONYMOUS_LIMITS)
+    picks = list(_select(
+        order, candidates, *limits, missing_key="unknown", exempt_missing=True, channel_count=len(set(channels)),
+    ))
+    if not picks:
+        return []
+
+    # 多样性奖励：新作者 0.3、新话题 0.3、新频道 0.4（按 diversity_boost 缩放）
+    picks = np.array(picks, dtype=np.int64)
+    selected = picks[:, 0]
+    bonus = diversity_boost * (0.3 * picks[:, 1] + 0.3 * picks[:, 2] + 0.4 * picks[:, 3])
+    final[selected] += bonus
+    reordered = selected[_descending(final[selected])]
+    return _page(candidates, reordered.tolist(), final, limit, dedup_key)
@@ -5,6 +5,9 @@
 - 支持精准的Tag失效
 - 支持Path失效
 - 支持HMAC签名验证
+
+失效请求写入 apps.core.tasks.revalidation 的去重队列，
+由后台任务批量下发到 Next.js 与 CDN，接口本身不等待下发完成。
 """
 
 import hmac
@@ -18,6 +21,7 @@ from rest_framework.response import Response
 from rest_framework import status
 from wagtail.models import Site
 from apps.core.site_utils import get_site_from_request
+from apps.core.tasks.revalidation import enqueue_revalidation, get_revalidation_stats
 
 logger = logging.getLogger(__name__)
 
@@ -174,6 +178,8 @@ def execute_revalidation(payload, site):
     """
     执行缓存失效
     
+    收集载荷对应的 tag 与路径，一次性写入失效队列
+    
     Args:
         payload: 请求载荷
         site: 站点对象
@@ -188,34 +194,36 @@ def execute_revalidation(payload, site):
         "region_revalidated": False,
         "path_revalidated": False
     }
+    tags = []
+    paths = []
+    
+    # 1. 站点级失效
+    tags.append(f"site:{site.hostname}")
+    result["site_revalidated"] = True
+    
+    # 2. 页面级失效（如果有pageId）
+    if "pageId" in payload and payload["pageId"]:
+        tags.append(f"page:{payload['pageId']}")
+        result["page_revalidated"] = True
+    
+    # 3. 频道级失效（如果有channel）
+    if "channel" in payload and payload["channel"]:
+        tags.append(f"channel:{payload['channel']}")
+        result["channel_revalidated"] = True
+    
+    # 4. 地区级失效（如果有region）
+    if "region" in payload and payload["region"]:
+        tags.append(f"region:{payload['region']}")
+        result["region_revalidated"] = True
+    
+    # 5. 路径失效（如果有slug）
+    if "slug" in payload and payload["slug"]:
+        paths.append(f"/news/{payload['slug']}")
+        result["path_revalidated"] = True
     
     try:
-        # 1. 站点级失效
-        revalidate_tag(f"site:{site.hostname}")
-        result["site_revalidated"] = True
-        
-        # 2. 页面级失效（如果有pageId）
-        if "pageId" in payload and payload["pageId"]:
-            revalidate_tag(f"page:{payload['pageId']}")
-            result["page_revalidated"] = True
-        
-        # 3. 频道级失效（如果有channel）
-        if "channel" in payload and payload["channel"]:
-            revalidate_tag(f"channel:{payload['channel']}")
-            result["channel_revalidated"] = True
-        
-        # 4. 地区级失效（如果有region）
-        if "region" in payload and payload["region"]:
-            revalidate_tag(f"region:{payload['region']}")
-            result["region_revalidated"] = True
-        
-        # 5. 路径失效（如果有slug）
-        if "slug" in payload and payload["slug"]:
-            revalidate_path(f"/news/{payload['slug']}")
-            result["path_revalidated"] = True
-        
-        logger.info(f"Cache revalidation completed for site {site.hostname}: {result}")
-        
+        result["queue"] = enqueue_revalidation(site.hostname, tags=tags, paths=paths)
+        logger.info(f"Cache revalidation queued for site {site.hostname}: {result}")
     except Exception as e:
         logger.error(f"Cache revalidation failed: {e}")
         raise
@@ -223,44 +231,26 @@ def execute_revalidation(payload, site):
     return result
 
 
-def revalidate_tag(tag):
+def revalidate_tag(tag, site_hostname):
     """
-    失效指定标签的缓存
+    失效指定标签的缓存（加入失效队列）
     
     Args:
         tag: 缓存标签
+        site_hostname: 站点主机名
     """
-    try:
-        # 这里应该调用Next.js的revalidateTag API
-        # 暂时记录日志
-        logger.info(f"Revalidating tag: {tag}")
-        
-        # TODO: 实现与Next.js的通信
-        # 可以通过HTTP请求调用Next.js的revalidate接口
-        
-    except Exception as e:
-        logger.error(f"Failed to revalidate tag {tag}: {e}")
-        raise
+    return enqueue_revalidation(site_hostname, tags=[tag])
 
 
-def revalidate_path(path):
+def revalidate_path(path, site_hostname):
     """
-    失效指定路径的缓存
+    失效指定路径的缓存（加入失效队列，同时刷新CDN）
     
     Args:
         path: 页面路径
+        site_hostname: 站点主机名
     """
-    try:
-        # 这里应该调用Next.js的revalidatePath API
-        # 暂时记录日志
-        logger.info(f"Revalidating path: {path}")
-        
-        # TODO: 实现与Next.js的通信
-        # 可以通过HTTP请求调用Next.js的revalidate接口
-        
-    except Exception as e:
-        logger.error(f"Failed to revalidate path {path}: {e}")
-        raise
+    return enqueue_revalidation(site_hostname, paths=[path])
 
 
 @api_view(["GET"])
@@ -271,14 +261,17 @@ def revalidate_status(request):
     用于监控和调试
     """
     try:
-        # 获取最近的失效记录
-        # TODO: 实现失效记录存储和查询
+        stats = get_revalidation_stats()
+        counters = stats["counters"]
         
         return Response({
             "status": "active",
-            "last_revalidation": None,
-            "total_revalidations": 0,
-            "success_rate": 1.0
+            "last_revalidation": stats["last_flush_at"],
+            "total_revalidations": counters.get("items_sent", 0) + counters.get("items_failed", 0),
+            "success_rate": stats["success_rate"],
+            "pending": stats["pending"],
+            "latency_ms": stats["latency_ms"],
+            "counters": counters,
         })
         
     except Exception as e:
@@ -2,10 +2,14 @@ from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 
-from apps.api.rest.utils import validate_site_parameter
+import logging
+
+from apps.api.rest.utils import validate_site_parameter, apply_filtering
 from apps.searchapp.client import get_client
 from apps.searchapp.simple_index import get_index_name  # 🎯 使用简化索引
 
+logger = logging.getLogger(__name__)
+
 
 @api_view(["GET"])
 def search_os(request):
@@ -53,12 +57,12 @@ def search_os(request):
             if cats:
                 filters.append({"terms": {"categories": cats}})
 
-        # 时间过滤
+        # 时间过滤（数据库降级路径使用同一个起始时间）
+        gte = None
         if since:
             import datetime
             from django.utils import timezone
             now = timezone.now()
-            gte = None
             try:
                 # 确保 since 是字符串
                 since_str = str(since) if since else ""
@@ -105,9 +109,14 @@ def search_os(request):
         }
 
         # 4) 执行查询
-        client = get_client()
-        index = get_index_name(site.hostname)  # 🎯 使用简化索引
-        res = client.search(index=index, body=body)
+        try:
+            client = get_client()
+            index = get_index_name(site.hostname)  # 🎯 使用简化索引
+            res = client.search(index=index, body=body)
+        except Exception as e:
+            # OpenSearch 不可用（含熔断打开）时降级到数据库全文检索
+            logger.warning("OpenSearch search failed, falling back to database full-text: %s", e)
+            return Response(_search_database(request, site, q, order, page, size, since=gte))
 
         hits = res.get("hits", {})
         total = hits.get("total", {}).get("value", 0)
@@ -144,3 +153,52 @@ def search_os(request):
         return Response({"error": f"Internal server error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _search_database(request, site, q, order, page, size, since=None):
+    """
+    数据库全文检索降级路径
+
+    复用 apply_filtering 的过滤与 search_vector 全文检索，返回与 OpenSearch 路径相同的结构。
+    apply_filtering 不处理 since，由调用方传入已解析的起始时间。
+    """
+    from apps.news.models import ArticlePage
+
+    queryset = ArticlePage.objects.live().filter(path__startswith=site.root_page.path)
+    queryset = apply_filtering(queryset, request.query_params)
+    if since:
+        queryset = queryset.filter(first_published_at__gte=since)
+    if order in ("time", "-first_published_at") or not q:
+        queryset = queryset.order_by("-first_published_at", "-id")
+    elif order in ("hot", "-pop_24h"):
+        queryset = queryset.order_by("-view_count", "-first_published_at")
+    queryset = queryset.select_related("channel", "region")
+
+    total = queryset.count()
+    start = (page - 1) * size
+    items = []
+    for article in queryset[start:start + size]:
+        items.append({
+            "id": article.id,
+            "title": article.title,
+            "slug": article.slug,
+            "excerpt": article.excerpt or "",
+            "cover": None,
+            "publish_at": article.first_published_at.isoformat() if article.first_published_at else None,
+            "channel": {
+                "slug": article.channel.slug if article.channel else None,
+                "name": article.channel.name if article.channel else None,
+            },
+            "region": article.region.name if article.region else None,
+            "is_featured": article.is_featured,
+        })
+
+    return {
+        "items": items,
+        "pagination": {
+            "page": page,
+            "size": size,
+            "total": total,
+            "has_next": (page * size) < total,
+            "has_prev": page > 1,
+        },
+        "meta": {"site": site.hostname, "backend": "database"},
+    }
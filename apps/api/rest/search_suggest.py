@@ -1,6 +1,6 @@
 """
 搜索建议API
-基于历史搜索词、文章标题、热门查询生成搜索建议
+基于历史搜索词、文章标题、文章标签生成搜索建议
 """
 
 import logging
@@ -10,16 +10,27 @@ from rest_framework import status
 from django.db.models import Count, Q
 from django.core.cache import cache
 from apps.news.models import ArticlePage
-from apps.core.site_utils import get_site_from_request
+from apps.core.site_utils import get_site_from_request, get_wagtail_site_from_request
+from apps.searchapp.suggest import get_engine
 from apps.api.utils.search_utils import segment_text
 import re
 
 logger = logging.getLogger(__name__)
 
+# 前缀索引中的词条来源
+SUGGESTION_REASONS = {
+    "query": "热门搜索",
+    "tag": "相关标签",
+    "title": "来自文章标题",
+}
+
+
 @api_view(["GET"])
 def search_suggest(request):
     """
-    搜索建议接口 - 简化版本
+    搜索建议接口
+
+    从进程内前缀索引补全（见 apps.searchapp.suggest）；索引没有匹配时退回标题模糊匹配。
     """
     query = request.query_params.get("q", "").strip()
     limit = min(int(request.query_params.get("limit", 8)), 20)
@@ -31,21 +42,27 @@ def search_suggest(request):
             "query": query
         })
     
-    # 简单的默认建议
-    suggestions = [
-        {"text": f"{query}新闻", "type": "default", "reason": "热门搜索", "score": 70},
-        {"text": f"{query}资讯", "type": "default", "reason": "热门搜索", "score": 65},
-        {"text": f"{query}报道", "type": "default", "reason": "热门搜索", "score": 60},
-        {"text": f"{query}分析", "type": "default", "reason": "热门搜索", "score": 55},
-        {"text": f"{query}评论", "type": "default", "reason": "热门搜索", "score": 50},
-    ]
+    site = get_site_from_request(request)
+    suggestions = []
+    try:
+        for text, weight, kind in get_engine(site).suggest(query, limit):
+            suggestions.append({
+                "text": text,
+                "type": kind,
+                "reason": SUGGESTION_REASONS.get(kind, "热门搜索"),
+                "score": round(weight, 2),
+            })
+    except Exception as e:
+        logger.warning(f"Prefix suggestions error: {str(e)}")
     
-    # 限制数量
-    final_suggestions = suggestions[:limit]
+    if not suggestions:
+        wagtail_site = get_wagtail_site_from_request(request)
+        if wagtail_site:
+            suggestions = get_title_suggestions(query, wagtail_site, limit)
     
     return Response({
         "success": True,
-        "data": final_suggestions,
+        "data": suggestions[:limit],
         "query": query
     })
 
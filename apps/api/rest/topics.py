@@ -14,7 +14,7 @@ from datetime import datetime, timedelta, timezone as dt_timezone
 from rest_framework.decorators import api_view, throttle_classes
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Q, Count, Prefetch
+from django.db.models import Q, Count
 from django.core.cache import cache
 from django.utils import timezone
 
@@ -32,8 +32,10 @@ from .utils import (
     apply_field_filtering,
     generate_cache_key,
     generate_etag,
-    generate_surrogate_keys
+    generate_surrogate_keys,
+    site_content_namespaces
 )
+from ..utils.cache_namespace import listing_namespaces, topic_ns
 from ..utils.rate_limit import FEED_RATE_LIMIT as TOPIC_RATE_LIMIT
 from ..utils.cache_performance import monitor_cache_performance
 import logging
@@ -232,6 +234,7 @@ def topics_list(request):
     - order: 排序方式（-is_featured, order, -created_at, title）
     - limit: 限制数量
     - search: 搜索关键词（标题和摘要）
+    - recent_limit: 每个专题附带的最近文章数量（默认3，最大10，0表示不附带）
     """
     try:
         # 1. 验证站点参数
@@ -248,6 +251,10 @@ def topics_list(request):
         order_by = request.query_params.get('order', '-is_featured')
         limit = request.query_params.get('limit')
         search_query = request.query_params.get('search', '').strip()
+        try:
+            recent_limit = max(0, min(int(request.query_params.get('recent_limit', 3)), 10))
+        except (ValueError, TypeError):
+            recent_limit = 3
         
         # 3. 生成缓存键
         cache_params = {
@@ -257,9 +264,10 @@ def topics_list(request):
             'featured_only': featured_only,
             'order': order_by,
             'limit': limit or '',
-            'search': search_query
+            'search': search_query,
+            'recent_limit': recent_limit,
         }
-        cache_key = generate_cache_key("topics_list", cache_params)
+        cache_key = generate_cache_key("topics_list", cache_params, site_content_namespaces(site))
         
         # 4. 尝试从缓存获取
         cached_result = cache.get(cache_key)
@@ -297,10 +305,11 @@ def topics_list(request):
                 Q(summary__icontains=search_query)
             )
         
-        # 6. 性能优化 - 预加载相关数据
-        queryset = queryset.prefetch_related(
-            'sites',
-            Prefetch('articles', queryset=ArticlePage.objects.filter(live=True))
+        # 6. 性能优化 - 文章数由聚合标注提供，封面及其渲染图一次预加载
+        queryset = queryset.select_related('cover_image').prefetch_related(
+            'cover_image__renditions'
+        ).annotate(
+            live_articles_count=Count('articles', filter=Q(articles__live=True), distinct=True)
         )
         
         # 7. 排序
@@ -313,9 +322,7 @@ def topics_list(request):
         elif order_by == 'title':
             queryset = queryset.order_by('title')
         elif order_by == 'articles_count':
-            queryset = queryset.annotate(
-                articles_count=Count('articles', filter=Q(articles__live=True))
-            ).order_by('-articles_count')
+            queryset = queryset.order_by('-live_articles_count')
         else:
             queryset = queryset.order_by('-is_featured', 'order', '-created_at')
         
@@ -327,9 +334,10 @@ def topics_list(request):
             except (ValueError, TypeError):
                 pass
         
-        # 9. 序列化
+        # 9. 序列化（所有专题的最近文章由一次窗口查询取回）
+        topics = Topic.load_recent_articles(queryset, limit=recent_limit)
         serializer = TopicSerializer(
-            queryset, 
+            topics, 
             many=True, 
             context={'request': request}
         )
@@ -404,7 +412,7 @@ def topic_detail_db(request, slug):
             'include_articles': include_articles,
             'articles_limit': articles_limit
         }
-        cache_key = generate_cache_key("topic_detail_db", cache_params)
+        cache_key = generate_cache_key("topic_detail_db", cache_params, [topic_ns(slug)])
         
         # 4. 尝试从缓存获取
         cached_result = cache.get(cache_key)
@@ -419,25 +427,31 @@ def topic_detail_db(request, slug):
         # 5. 查询专题
         try:
             now = timezone.now()
-            topic = Topic.objects.prefetch_related(
-                'sites',
-                'articles'
+            topic = Topic.objects.select_related('cover_image').prefetch_related(
+                'tags',
+                'cover_image__renditions'
+            ).annotate(
+                live_articles_count=Count('articles', filter=Q(articles__live=True), distinct=True)
+            ).filter(
+                # 检查时间范围
+                Q(start_date__isnull=True) | Q(start_date__lte=now),
+                Q(end_date__isnull=True) | Q(end_date__gte=now),
             ).get(
                 slug=slug, 
                 sites=site, 
                 is_active=True,
-                # 检查时间范围
-                **{
-                    f'{Q(start_date__isnull=True) | Q(start_date__lte=now)}': True,
-                    f'{Q(end_date__isnull=True) | Q(end_date__gte=now)}': True,
-                }
             )
         except Topic.DoesNotExist:
             return Response({
                 "error": f"Topic '{slug}' not found or not available"
             }, status=status.HTTP_404_NOT_FOUND)
         
-        # 6. 序列化
+        # 6. 序列化（专题文章按 articles_limit 一次加载）
+        try:
+            articles_limit_int = max(0, min(int(articles_limit), 50))
+        except (ValueError, TypeError):
+            articles_limit_int = 20
+        Topic.load_recent_articles([topic], limit=articles_limit_int if include_articles else 0)
         serializer = TopicDetailSerializer(
             topic, 
             context={'request': request}
@@ -504,7 +518,7 @@ def topics_trending(request):
             'channels': ','.join(channels), 'region': region or '',
             'lang': lang or '', 'cursor': cursor_param or ''
         }
-        cache_key = generate_cache_key("topics_trending", cache_params)
+        cache_key = generate_cache_key("topics_trending", cache_params, listing_namespaces(site, channels=channels))
         
         cached_result = cache.get(cache_key)
         if cached_result:
@@ -621,7 +635,7 @@ def topic_detail_trending(request, slug: str):
             'channels': ','.join(channels), 'region': region or '',
             'lang': lang or ''
         }
-        cache_key = generate_cache_key("topic_detail_trending", cache_params)
+        cache_key = generate_cache_key("topic_detail_trending", cache_params, listing_namespaces(site, channels=channels))
         
         cached_result = cache.get(cache_key)
         if cached_result:
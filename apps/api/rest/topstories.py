@@ -17,6 +17,7 @@ from apps.news.models.article import ArticlePage
 from wagtail.models import Site
 from ..utils.rate_limit import FEED_RATE_LIMIT
 from apps.core.flags import flag
+from ..utils.cache_namespace import versioned_key, site_ns, AGGREGATE_NS
 from ..utils.modern_cache import (
     ModernCacheStrategy, ModernCacheManager, SmartCacheKey, CacheHeaders,
     BreakingNewsDetector, ContentType, CacheLayer,
@@ -154,7 +155,10 @@ def topstories(request):
     
     # 构建缓存key
     cache_params = f"{size}:{hours}:{diversity}:{len(exclude_clusters)}:{len(combined_seen)}"
-    cache_key = f"topstories:{site_name}:{hashlib.md5(cache_params.encode()).hexdigest()[:8]}"
+    cache_key = versioned_key(
+        f"topstories:{site_name}:{hashlib.md5(cache_params.encode()).hexdigest()[:8]}",
+        [site_ns(site_name), AGGREGATE_NS]
+    )
     
     # 尝试从缓存获取
     cached_data = cache.get(cache_key)
@@ -6,6 +6,7 @@ from clickhouse_driver import Client
 from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
 from apps.core.utils.circuit_breaker import get_breaker
+from ..utils.realtime_counters import record_events
 
 @api_view(["POST"])
 @csrf_exempt
@@ -67,6 +68,8 @@ def track(request):
                 """,
                 all_rows
             )
+            # 同步累加实时滑动窗口计数（供推荐特征读取，失败不影响埋点）
+            record_events((row[7], row[5], row[4], row[0]) for row in all_rows)
         
         return Response({
             "ok": True, 
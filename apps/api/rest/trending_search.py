@@ -1,6 +1,6 @@
 """
 热搜榜API
-基于ClickHouse搜索事件统计生成热搜榜单
+基于ClickHouse搜索词分钟级预聚合（search_terms_minute）生成热搜榜单
 """
 
 import logging
@@ -11,7 +11,6 @@ from django.core.cache import cache
 from django.conf import settings
 from clickhouse_driver import Client
 from datetime import datetime, timedelta
-import json
 
 logger = logging.getLogger(__name__)
 
@@ -80,7 +79,7 @@ def trending_search(request):
 
 
 def get_trending_from_clickhouse(site, channel, window, limit):
-    """从ClickHouse获取热搜数据"""
+    """从ClickHouse搜索词预聚合表获取热搜数据"""
     client = get_clickhouse_client()
     if not client:
         return None
@@ -94,41 +93,49 @@ def get_trending_from_clickhouse(site, channel, window, limit):
         }
         minutes = window_map.get(window, 60)
         
-        # 构建查询
+        # 读取分钟级预聚合表，同时取上一个等长窗口用于计算趋势
         where_conditions = [
-            "event = 'search'",
-            f"ts >= now() - INTERVAL {minutes} MINUTE",
-            "search_query != ''"
+            "minute >= toStartOfMinute(now() - INTERVAL %(span)s MINUTE)",
         ]
-        
+        params = {"minutes": minutes, "span": minutes * 2, "limit": limit}
         if site:
-            where_conditions.append(f"site = '{site}'")
+            where_conditions.append("site = %(site)s")
+            params["site"] = site
         if channel:
-            where_conditions.append(f"channel = '{channel}'")
+            where_conditions.append("channel = %(channel)s")
+            params["channel"] = channel
             
         where_clause = " AND ".join(where_conditions)
         
         query = f"""
         SELECT 
-            search_query,
-            COUNT(*) as search_count,
-            COUNT(DISTINCT device_id) as unique_users
-        FROM events 
+            query,
+            sumIf(searches, minute >= toStartOfMinute(now() - INTERVAL %(minutes)s MINUTE)) AS search_count,
+            uniqMergeIf(unique_users, minute >= toStartOfMinute(now() - INTERVAL %(minutes)s MINUTE)) AS unique_users,
+            sumIf(searches, minute < toStartOfMinute(now() - INTERVAL %(minutes)s MINUTE)) AS previous_count
+        FROM search_terms_minute 
         WHERE {where_clause}
-        GROUP BY search_query
+        GROUP BY query
         HAVING search_count >= 2
         ORDER BY search_count DESC, unique_users DESC
-        LIMIT {limit}
+        LIMIT %(limit)s
         """
         
-        results = client.execute(query)
+        results = client.execute(query, params)
         
         trending_data = []
-        for i, (query_text, count, unique_users) in enumerate(results):
-            # 简单的变化趋势（实际应该对比上一个时间窗口）
-            change = "up" if i < 3 else "stable"
+        for i, (query_text, count, unique_users, previous_count) in enumerate(results):
+            # 与上一个窗口对比得出趋势
             if i == 0:
                 change = "hot"
+            elif not previous_count:
+                change = "new"
+            elif count > previous_count * 1.2:
+                change = "up"
+            elif count < previous_count * 0.8:
+                change = "down"
+            else:
+                change = "stable"
                 
             trending_data.append({
                 "text": query_text,
@@ -16,7 +16,8 @@ from django.core.cache import cache
 from django.conf import settings
 from django.db.models import Q
 from apps.api.utils.search_utils import apply_search
-from wagtail.models import Site
+from apps.api.utils.cache_namespace import versioned_key, site_ns, AGGREGATE_NS
+from apps.core.site_registry import site_registry
 from apps.core.site_utils import get_wagtail_site_from_request
 import time
 
@@ -44,15 +45,10 @@ def validate_site_parameter(request):
         site_param = request.GET.get("site")
     
     if site_param:
-        try:
-            # 尝试作为 site_id 解析
-            if site_param.isdigit():
-                return Site.objects.get(id=int(site_param))
-            else:
-                # 作为主机名解析
-                return Site.objects.get(hostname=site_param)
-        except Site.DoesNotExist:
-            return None
+        # 数字按 site_id 解析，否则按主机名/别名解析（进程内站点注册表）
+        if site_param.isdigit():
+            return site_registry.get_by_id(int(site_param))
+        return site_registry.get_by_hostname(site_param)
     
     # 2. 如果没有 site 参数，使用 Host 头自动识别
     return get_wagtail_site_from_request(request)
@@ -345,13 +341,15 @@ def apply_ordering(queryset, order_param):
     return queryset
 
 
-def generate_cache_key(prefix, params):
+def generate_cache_key(prefix, params, namespaces=None):
     """
     生成缓存键
     
     Args:
         prefix: 缓存键前缀
         params: 参数字典
+        namespaces: 版本化命名空间列表（见 apps.api.utils.cache_namespace），
+                    命名空间失效后生成的键随之变化
         
     Returns:
         缓存键字符串
@@ -363,7 +361,12 @@ def generate_cache_key(prefix, params):
     param_str = json.dumps(filtered_params, sort_keys=True)
     param_hash = hashlib.md5(param_str.encode()).hexdigest()[:8]
     
-    return f"{prefix}:{param_hash}"
+    return versioned_key(f"{prefix}:{param_hash}", namespaces or [])
+
+
+def site_content_namespaces(site):
+    """站点内容列表缓存依赖的命名空间：本站点 + 可聚合内容"""
+    return [site_ns(site), AGGREGATE_NS]
 
 
 def generate_etag(data, updated_at=None, use_timestamp=True):
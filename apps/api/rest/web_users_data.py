@@ -3,16 +3,16 @@
 
 提供用户收藏、阅读历史、评论、互动等数据管理功能
 """
-from django.db.models import Count, Sum, F
 from django.utils import timezone
-from datetime import timedelta
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from apps.web_users.models import (
     WebUser, UserProfile, ReadingHistory, UserComment, 
-    UserFavorite, UserInteraction
+    UserFavorite, UserInteraction, UserStatsDaily
 )
+from apps.web_users.stats import record_reading
+from apps.web_users.interaction_cache import get_interaction_status
 from apps.web_users.serializers import (
     UserProfileSerializer, ReadingHistorySerializer,
     UserCommentSerializer, UserFavoriteSerializer,
@@ -70,8 +70,8 @@ def add_reading_history(request):
     
     serializer = ReadingHistorySerializer(data=data)
     if serializer.is_valid():
-        # 每次都创建新的阅读记录，允许用户多次阅读同一文章
-        record = serializer.save(user=user)
+        # 同一文章只保留一条记录：重复阅读累加次数与时长，并增量更新统计汇总
+        record = record_reading(user, serializer.validated_data)
         
         return Response({
             'success': True,
@@ -364,27 +364,16 @@ def get_user_stats(request):
     # 获取统计数据
     profile = user.profile
     
-    # 总阅读时长（分钟）
-    total_read_time = ReadingHistory.objects.filter(user=user).aggregate(
-        total=Sum('read_duration')
-    )['total'] or 0
-    total_read_time = total_read_time // 60  # 转换为分钟
-    
-    # 最近7天活动
-    seven_days_ago = timezone.now() - timedelta(days=7)
-    recent_activity = ReadingHistory.objects.filter(
-        user=user, 
-        read_time__gte=seven_days_ago
-    ).count()
-    
-    # 最喜欢的频道
-    favorite_channel = ReadingHistory.objects.filter(user=user).values(
-        'article_channel'
-    ).annotate(
-        count=Count('article_channel')
-    ).order_by('-count').first()
-    
-    favorite_channel_name = favorite_channel['article_channel'] if favorite_channel else '暂无'
+    # 阅读统计读取最新一行日汇总（含累计值与最近7天逐日阅读数）
+    daily = UserStatsDaily.objects.filter(user=user).order_by('-day').first()
+    if daily:
+        total_read_time = daily.total_read_duration // 60  # 转换为分钟
+        recent_activity = daily.recent_activity(timezone.localdate())
+        favorite_channel_name = daily.favorite_channel or '暂无'
+    else:
+        total_read_time = 0
+        recent_activity = 0
+        favorite_channel_name = '暂无'
     
     stats_data = {
         'articles_read': profile.articles_read,
@@ -420,26 +409,8 @@ def check_interactions(request):
             'message': 'target_ids参数是必需的'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # 查询用户互动
-    interactions = UserInteraction.objects.filter(
-        user=user,
-        target_type=target_type,
-        target_id__in=target_ids
-    ).values('target_id', 'interaction_type')
-    
-    # 查询收藏状态
-    favorites = UserFavorite.objects.filter(
-        user=user,
-        article_id__in=target_ids
-    ).values_list('article_id', flat=True)
-    
-    # 组织返回数据
-    result = {}
-    for target_id in target_ids:
-        result[target_id] = {
-            'liked': any(i['interaction_type'] == 'like' and i['target_id'] == target_id for i in interactions),
-            'favorited': target_id in favorites,
-        }
+    # 点赞/收藏状态：Redis 集合一次往返，未命中时从数据库整体构建集合
+    result = get_interaction_status(user.id, target_type, target_ids)
     
     return Response({
         'success': True,
@@ -511,7 +482,6 @@ def toggle_article_like(request, article_id):
     
     try:
         from django.db import transaction
-        from apps.news.models.article import ArticlePage
         
         with transaction.atomic():
             # 检查是否已点赞
@@ -524,13 +494,8 @@ def toggle_article_like(request, article_id):
             
             if interaction:
                 # 已点赞，取消点赞
-                deleted_count, _ = interaction.delete()
-                if deleted_count:
-                    # 原子减少文章点赞数
-                    try:
-                        ArticlePage.objects.filter(id=article_id).update(like_count=F('like_count') - 1)
-                    except Exception:
-                        pass
+                # 文章计数由信号标记后批量重算，这里不再直接更新
+                interaction.delete()
                 action = 'unliked'
                 is_liked = False
             else:
@@ -542,11 +507,6 @@ def toggle_article_like(request, article_id):
                         target_id=article_id,
                         interaction_type='like'
                     )
-                    # 原子增加文章点赞数
-                    try:
-                        ArticlePage.objects.filter(id=article_id).update(like_count=F('like_count') + 1)
-                    except Exception:
-                        pass
                     action = 'liked'
                     is_liked = True
                 except Exception:
@@ -643,17 +603,7 @@ def toggle_article_favorite(request, article_id):
             favorite_count = UserFavorite.objects.filter(
                 article_id=article_id
             ).count()
-            
-            # 🔄 同步更新 ArticlePage 的 favorite_count 字段
-            try:
-                article = ArticlePage.objects.get(id=article_id)
-                article.favorite_count = favorite_count
-                article.save(update_fields=['favorite_count'])
-            except ArticlePage.DoesNotExist:
-                # 文章不存在，记录日志但不影响用户操作
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.warning(f"Article {article_id} not found when updating favorite_count")
+            # ArticlePage.favorite_count 由信号标记后批量重算
         
         return Response({
             'success': True,
@@ -28,13 +28,15 @@ class CategorySerializer(serializers.ModelSerializer):
         ]
     
     def get_children_count(self, obj):
-        """获取子分类数量"""
+        """获取子分类数量（优先使用查询时标注的 active_children_count）"""
+        annotated = getattr(obj, 'active_children_count', None)
+        if annotated is not None:
+            return annotated
         return obj.children.filter(is_active=True).count()
     
     def get_articles_count(self, obj):
-        """获取文章数量"""
-        from apps.news.models import ArticlePage
-        return ArticlePage.objects.filter(categories=obj, live=True).count()
+        """获取文章数量（发布信号维护的反范式计数）"""
+        return obj.live_article_count
     
     def get_parent_name(self, obj):
         """获取父分类名称"""
@@ -59,20 +61,22 @@ class CategoryTreeSerializer(serializers.ModelSerializer):
         ]
     
     def get_children(self, obj):
-        """递归获取子分类"""
-        children = obj.children.filter(is_active=True).order_by('order', 'name')
+        """递归获取子分类（使用 Category.load_subtrees 预先挂好的子树，不再逐层查询）"""
+        children = getattr(obj, 'tree_children', None)
+        if children is None:
+            children = Category.load_subtrees([obj])[0].tree_children
         return CategoryTreeSerializer(children, many=True, context=self.context).data
     
     def get_articles_count(self, obj):
-        """获取文章数量（包含子分类）"""
-        from apps.news.models import ArticlePage
-        return ArticlePage.objects.filter(categories=obj, live=True).count()
+        """获取文章数量（发布信号维护的反范式计数）"""
+        return obj.live_article_count
 
 
 class TopicSerializer(serializers.ModelSerializer):
     """专题序列化器"""
     
     articles_count = serializers.SerializerMethodField()
+    recent_articles = serializers.SerializerMethodField()
     cover_image_url = serializers.SerializerMethodField()
     is_active_period = serializers.SerializerMethodField()
     
@@ -82,14 +86,23 @@ class TopicSerializer(serializers.ModelSerializer):
             'id', 'title', 'slug', 'summary', 
             'cover_image_url', 'is_active', 'is_featured',
             'order', 'start_date', 'end_date',
-            'articles_count', 'is_active_period',
+            'articles_count', 'recent_articles', 'is_active_period',
             'created_at', 'updated_at'
         ]
     
     def get_articles_count(self, obj):
-        """获取专题文章数量"""
-        from apps.news.models import ArticlePage
-        return ArticlePage.objects.filter(topic=obj, live=True).count()
+        """获取专题文章数量（优先使用查询时标注的 live_articles_count）"""
+        annotated = getattr(obj, 'live_articles_count', None)
+        if annotated is not None:
+            return annotated
+        return obj.articles.filter(live=True).count()
+    
+    def get_recent_articles(self, obj):
+        """获取最近的专题文章（使用 Topic.load_recent_articles 预先挂好的列表）"""
+        recent = getattr(obj, 'recent_article_list', None)
+        if recent is None:
+            return []
+        return recent
     
     def get_cover_image_url(self, obj):
         """获取封面图片URL"""
@@ -157,51 +170,38 @@ class CategoryDetailSerializer(CategorySerializer):
         } for article in recent_articles]
     
     def get_breadcrumb(self, obj):
-        """获取面包屑导航"""
-        breadcrumb = []
-        current = obj
-        while current:
-            breadcrumb.insert(0, {
-                'id': current.id,
-                'name': current.name,
-                'slug': current.slug
-            })
-            current = current.parent
-        return breadcrumb
+        """获取面包屑导航（祖先由物化路径一次查询取回）"""
+        return [
+            {'id': current.id, 'name': current.name, 'slug': current.slug}
+            for current in obj.get_ancestors() + [obj]
+        ]
 
 
 class TopicDetailSerializer(TopicSerializer):
     """专题详情序列化器 - 包含更多信息"""
     
-    recent_articles = serializers.SerializerMethodField()
     related_topics = serializers.SerializerMethodField()
     
     class Meta(TopicSerializer.Meta):
         fields = TopicSerializer.Meta.fields + [
-            'recent_articles', 'related_topics'
+            'related_topics'
         ]
     
     def get_recent_articles(self, obj):
-        """获取最近的专题文章"""
-        from apps.news.models import ArticlePage
-        recent_articles = ArticlePage.objects.filter(topic=obj, live=True).order_by('-first_published_at')[:10]
-        return [{
-            'id': article.id,
-            'title': article.title,
-            'slug': article.slug,
-            'excerpt': article.excerpt,
-            'publish_date': article.first_published_at,
-            'author_name': article.author_name
-        } for article in recent_articles]
+        """获取最近的专题文章（未预先加载时按详情页数量单独加载）"""
+        if getattr(obj, 'recent_article_list', None) is None:
+            Topic.load_recent_articles([obj], limit=10)
+        return obj.recent_article_list
     
     def get_related_topics(self, obj):
-        """获取相关专题（基于标签）"""
-        if not obj.tags.exists():
+        """获取相关专题（基于标签，使用预加载的标签，一次查询）"""
+        tag_ids = [tag.id for tag in obj.tags.all()]
+        if not tag_ids:
             return []
         
         # 获取有相同标签的其他专题
         related_topics = Topic.objects.filter(
-            tags__in=obj.tags.all(),
+            tags__id__in=tag_ids,
             is_active=True
         ).exclude(id=obj.id).distinct()[:5]
         
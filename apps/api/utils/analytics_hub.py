@@ -0,0 +1,235 @@
+"""
+分析事件广播中心
+
+每个进程只运行一个 ClickHouse 轮询线程，把新事件广播给所有 SSE 订阅者：
+- 订阅者各自持有有界的线程安全队列，慢客户端只会丢弃自己最旧的事件，不会拖慢其他人
+- 最近的事件保存在环形缓冲区中，支持通过 Last-Event-ID 断线续传
+- 记录每个订阅者的投递延迟和丢弃数，便于观察积压情况
+- 服务运行在 WSGI 下，每个连接占用一个工作线程，订阅者数量设有上限，
+  超出时拒绝新连接，避免占满处理普通请求的线程
+
+轮询线程在没有订阅者时自动退出，下一个订阅者到来时再启动。
+"""
+
+import itertools
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+
+from apps.core.utils.circuit_breaker import get_breaker
+
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 3.0          # 轮询间隔（秒）
+POLL_BATCH_SIZE = 500        # 每次轮询最多取回的事件数
+RING_BUFFER_SIZE = 1000      # 断线续传可回放的事件数
+SUBSCRIBER_QUEUE_SIZE = 200  # 每个订阅者的队列上限
+DEFAULT_MAX_SUBSCRIBERS = 8  # 每个进程同时保持的 SSE 连接数上限
+
+
+class HubFull(Exception):
+    """订阅者已达上限"""
+
+
+NEW_EVENTS_SQL = """
+    SELECT ts, event, article_id, channel, user_id, dwell_ms
+    FROM events
+    WHERE ts > %(timestamp)s
+    ORDER BY ts ASC
+    LIMIT %(limit)s
+"""
+
+
+class Subscriber:
+    """单个 SSE 客户端的订阅句柄"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.id = next(self._ids)
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._offer_lock = threading.Lock()
+        self.connected_at = time.time()
+        self.delivered = 0
+        self.dropped = 0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+
+    def offer(self, event: Dict[str, Any]) -> None:
+        """非阻塞投递；队列已满时丢弃最旧的事件"""
+        with self._offer_lock:
+            if self.queue.full():
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+            self.queue.put_nowait((time.monotonic(), event))
+
+    def next_event(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """等待下一条事件，超时返回 None（调用方据此发送心跳）"""
+        try:
+            enqueued_at, event = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        lag_ms = (time.monotonic() - enqueued_at) * 1000
+        self.last_lag_ms = lag_ms
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+        self.delivered += 1
+        return event
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "connected_seconds": round(time.time() - self.connected_at, 1),
+            "queued": self.queue.qsize(),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "last_lag_ms": round(self.last_lag_ms, 2),
+            "max_lag_ms": round(self.max_lag_ms, 2),
+        }
+
+
+class AnalyticsEventHub:
+    """进程内单例：一个轮询线程，多个订阅者"""
+
+    def __init__(self, poll_interval: float = POLL_INTERVAL, ring_size: int = RING_BUFFER_SIZE,
+                 max_subscribers: Optional[int] = None):
+        self.poll_interval = poll_interval
+        self.max_subscribers = max_subscribers
+        self.buffer: deque = deque(maxlen=ring_size)
+        self.subscribers: Dict[int, Subscriber] = {}
+        self.last_event_id = 0
+        self.last_ts: Optional[datetime] = None
+        self.polls = 0
+        self.poll_errors = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._client = None
+
+    # === 订阅管理 ===
+
+    def _subscriber_limit(self) -> int:
+        if self.max_subscribers is not None:
+            return self.max_subscribers
+        return getattr(settings, 'ANALYTICS_STREAM_MAX_SUBSCRIBERS', DEFAULT_MAX_SUBSCRIBERS)
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> Subscriber:
+        """
+        注册订阅者；提供 last_event_id 时先回放缓冲区中更新的事件
+
+        Raises:
+            HubFull: 本进程的订阅者已达上限
+        """
+        subscriber = Subscriber()
+        with self._lock:
+            if len(self.subscribers) >= self._subscriber_limit():
+                raise HubFull()
+            if last_event_id is not None:
+                for event in self.replay(last_event_id):
+                    subscriber.offer(event)
+            self.subscribers[subscriber.id] = subscriber
+            self._ensure_poller()
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            self.subscribers.pop(subscriber.id, None)
+
+    def replay(self, last_event_id: int) -> List[Dict[str, Any]]:
+        return [event for event in list(self.buffer) if event["id"] > last_event_id]
+
+    def publish(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """分配事件ID，写入环形缓冲区并广播给所有订阅者"""
+        with self._lock:
+            self.last_event_id += 1
+            event = dict(event, id=self.last_event_id)
+            self.buffer.append(event)
+            subscribers = list(self.subscribers.values())
+        for subscriber in subscribers:
+            subscriber.offer(event)
+        return event
+
+    # === 轮询 ===
+
+    def _ensure_poller(self) -> None:
+        """调用方持有 self._lock"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._poll_loop, name='analytics-hub-poller', daemon=True)
+            self._thread.start()
+
+    def _get_client(self):
+        if self._client is None:
+            from clickhouse_driver import Client
+            self._client = Client.from_url(settings.CLICKHOUSE_URL)
+        return self._client
+
+    def _fetch_new_events(self, since: datetime) -> list:
+        breaker = get_breaker("clickhouse", failure_threshold=5, recovery_timeout=30, rolling_window=60)
+        return breaker.call(
+            self._get_client().execute, NEW_EVENTS_SQL, {"timestamp": since, "limit": POLL_BATCH_SIZE}
+        )
+
+    def _poll_loop(self) -> None:
+        # 只推送订阅开始之后的新事件
+        if self.last_ts is None:
+            self.last_ts = datetime.now(timezone.utc)
+        logger.debug("Analytics hub poller started")
+
+        while True:
+            with self._lock:
+                if not self.subscribers:
+                    # 在锁内退出，subscribe 随后会重新启动线程
+                    self._thread = None
+                    break
+            try:
+                rows = self._fetch_new_events(self.last_ts)
+                self.polls += 1
+            except Exception as e:
+                self.poll_errors += 1
+                self._client = None
+                logger.warning("Analytics hub poll failed: %s", e)
+                rows = []
+
+            server_time = datetime.now(timezone.utc).isoformat()
+            for ts, event, article_id, channel, user_id, dwell_ms in rows:
+                self.last_ts = ts
+                self.publish({
+                    "ts": str(ts),
+                    "event": event,
+                    "article_id": article_id,
+                    "channel": channel,
+                    "user_id": user_id,
+                    "dwell_ms": dwell_ms,
+                    "server_time": server_time,
+                })
+
+            # 本轮取满时立即继续，尽快追上积压
+            if len(rows) < POLL_BATCH_SIZE:
+                time.sleep(self.poll_interval)
+
+        logger.debug("Analytics hub poller stopped: no subscribers")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self.subscribers),
+            "max_subscribers": self._subscriber_limit(),
+            "poller_running": self._thread is not None and self._thread.is_alive(),
+            "last_event_id": self.last_event_id,
+            "last_event_ts": str(self.last_ts) if self.last_ts else None,
+            "buffered_events": len(self.buffer),
+            "polls": self.polls,
+            "poll_errors": self.poll_errors,
+            "subscriber_stats": [s.stats() for s in list(self.subscribers.values())],
+        }
+
+
+# 进程级单例
+hub = AnalyticsEventHub()
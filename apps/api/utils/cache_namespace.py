@@ -0,0 +1,144 @@
+"""
+版本化缓存命名空间
+
+每个命名空间（站点、频道、标签、专题、文章、评论、聚合内容）维护一个代数计数器，
+缓存键中嵌入相关命名空间的当前代数。失效时只需对计数器做一次 INCR：
+旧代数的缓存键不再被读取，随各自的 TTL 自然过期，无需 SCAN/delete_pattern。
+
+用法：
+    key = versioned_key("categories_list:ab12cd34", [site_ns(site)])
+    bump_namespaces([site_ns(site), channel_ns("tech")])
+"""
+import logging
+from typing import Iterable, List, Sequence, Tuple
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+Namespace = Tuple[str, str]
+
+# 计数器长期保留；丢失后从 1 重新开始，最坏情况是一次额外的缓存未命中
+NAMESPACE_TIMEOUT = None
+
+# 所有允许聚合的文章共享的命名空间：聚合内容会出现在任意站点的列表中
+AGGREGATE_NS: Namespace = ("aggregate", "all")
+
+
+def site_ns(site) -> Namespace:
+    """站点命名空间，接受 Site 对象或主机名"""
+    return ("site", getattr(site, "hostname", site))
+
+
+def channel_ns(slug) -> Namespace:
+    return ("channel", slug)
+
+
+def tag_ns(slug) -> Namespace:
+    return ("tag", slug)
+
+
+def topic_ns(slug) -> Namespace:
+    return ("topic", slug)
+
+
+def article_ns(article_id) -> Namespace:
+    return ("article", article_id)
+
+
+def comment_ns(article_id) -> Namespace:
+    """文章评论线程命名空间，新评论/审核状态变化时失效"""
+    return ("comments", article_id)
+
+
+def _counter_key(namespace: Namespace) -> str:
+    scope, ident = namespace
+    return f"ns:{scope}:{ident}"
+
+
+def get_namespace_versions(namespaces: Sequence[Namespace]) -> List[int]:
+    """一次 get_many 取回所有命名空间的当前代数，缺失的视为 1"""
+    keys = [_counter_key(ns) for ns in namespaces]
+    try:
+        found = cache.get_many(keys)
+    except Exception as e:
+        logger.warning(f"Failed to read cache namespace versions: {e}")
+        found = {}
+    return [int(found.get(key) or 1) for key in keys]
+
+
+def versioned_key(base_key: str, namespaces: Sequence[Namespace]) -> str:
+    """在缓存键后附加相关命名空间的代数"""
+    if not namespaces:
+        return base_key
+    versions = get_namespace_versions(namespaces)
+    return f"{base_key}:v" + ".".join(str(v) for v in versions)
+
+
+def bump_namespace(namespace: Namespace) -> int:
+    """使一个命名空间下的全部缓存失效（单次 INCR）"""
+    key = _counter_key(namespace)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # 计数器尚不存在：从 1 开始，直接写入 2 使已有（代数 1）的缓存失效
+        if cache.add(key, 2, timeout=NAMESPACE_TIMEOUT):
+            return 2
+        return cache.incr(key)
+
+
+def bump_namespaces(namespaces: Iterable[Namespace]) -> None:
+    for namespace in dict.fromkeys(namespaces):
+        try:
+            bump_namespace(namespace)
+        except Exception as e:
+            logger.warning(f"Failed to bump cache namespace {namespace}: {e}")
+
+
+def _scoped_namespaces(channels=(), tags=(), topics=()) -> List[Namespace]:
+    return (
+        [channel_ns(slug) for slug in channels if slug]
+        + [tag_ns(slug) for slug in tags if slug]
+        + [topic_ns(slug) for slug in topics if slug]
+    )
+
+
+def listing_namespaces(site, channels=(), tags=(), topics=()) -> List[Namespace]:
+    """
+    文章列表缓存依赖的命名空间
+
+    按频道/标签/专题过滤的列表只包含这些频道/标签/专题下的文章，只依赖对应命名空间，
+    其他频道的发布不会使其失效；未过滤的列表依赖站点与聚合内容命名空间。
+    """
+    return _scoped_namespaces(channels, tags, topics) or [site_ns(site), AGGREGATE_NS]
+
+
+def listing_membership(article) -> dict:
+    """文章所属的频道、标签（slug 与名称均可用于过滤）与专题"""
+    channel = getattr(article, "channel", None)
+    membership = {"channel": getattr(channel, "slug", None), "tags": [], "topics": []}
+    try:
+        for tag in article.tags.all():
+            membership["tags"].extend([tag.slug, tag.name])
+        membership["topics"] = [topic.slug for topic in article.topics.all()]
+    except Exception:
+        pass
+    return membership
+
+
+def article_namespaces(article, site=None, previous=None) -> List[Namespace]:
+    """
+    文章发布/下线时需要失效的全部命名空间
+
+    previous 为保存前数据库中的 listing_membership：文章移出的频道/标签/专题的列表同样失效。
+    """
+    namespaces = [article_ns(article.id)]
+    if site is not None:
+        namespaces.append(site_ns(site))
+    if getattr(article, "allow_aggregate", False):
+        namespaces.append(AGGREGATE_NS)
+    for membership in (listing_membership(article), previous or {}):
+        namespaces.extend(_scoped_namespaces(
+            [membership.get("channel")], membership.get("tags", ()), membership.get("topics", ()),
+        ))
+    return list(dict.fromkeys(namespaces))
@@ -0,0 +1,218 @@
+"""
+信息流候选池
+
+同一 (站点, 模板, 频道集合, 时间窗) 的召回结果在一分钟内几乎不变，没必要每个请求都执行 function_score 查询：
+- 请求把参数组合的热度累加到 Redis 有序集合（按分钟减半衰减），定时任务为热度最高的组合预先查询前
+  POOL_SIZE 篇候选，压缩打包后连同版本号写入 Redis
+- 请求先读版本号，本进程已解码同一版本时直接复用；从池中剔除已读文章即得到召回结果，之后照常个性化排序
+- 没有池（长尾组合、任务未运行）或剔除已读后不足一批时返回 None，调用方照常查询 OpenSearch
+- 命中/未命中/耗尽次数累计在 Redis 哈希中，供监控计算命中率
+"""
+import hashlib
+import json
+import logging
+import time
+import zlib
+
+from apps.core.utils.redis_client import get_redis, redis_key
+
+logger = logging.getLogger(__name__)
+
+# 每个池保存的候选数（默认召回量 500 + 游标中最多 500 篇已读）
+POOL_SIZE = 1000
+# 同时维护的池数量上限与最低热度（热度每分钟减半，3 约相当于每分钟 1.5 次请求）
+MAX_POOLS = 50
+MIN_DEMAND = 3.0
+DEMAND_DECAY = 0.5
+# 池数据的过期时间：任务停止后池自然失效，请求回到 OpenSearch
+POOL_TTL = 300
+
+
+def _demand_key():
+    return redis_key('feed_pool', 'demand')
+
+
+def _specs_key():
+    return redis_key('feed_pool', 'specs')
+
+
+def _stats_key():
+    return redis_key('feed_pool', 'stats')
+
+
+def _version_key(pool_id):
+    return redis_key('feed_pool', pool_id, 'version')
+
+
+def _data_key(pool_id):
+    return redis_key('feed_pool', pool_id, 'data')
+
+
+def pool_spec(site, template, channels, hours):
+    return {"site": site, "template": template, "channels": sorted(set(channels or [])), "hours": int(hours)}
+
+
+def pool_id_for(spec):
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def candidate_from_hit(doc_id, score, source):
+    """召回文档 -> 候选字典"""
+    item = {"id": doc_id, "score": score, **source}
+    # 确保前端兼容性：如果publish_at为空，使用publish_time
+    if not item.get("publish_at") and item.get("publish_time"):
+        item["publish_at"] = item["publish_time"]
+    return item
+
+
+# 本进程已解码的池：pool_id -> (版本号, 池)
+_decoded = {}
+
+
+def _pack(pool):
+    return zlib.compress(json.dumps(pool, ensure_ascii=False, separators=(',', ':')).encode())
+
+
+def _unpack(data):
+    return json.loads(zlib.decompress(data))
+
+
+def _record(client, outcome):
+    try:
+        client.hincrby(_stats_key(), outcome, 1)
+    except Exception as e:
+        logger.warning(f"Failed to record candidate pool {outcome}: {e}")
+
+
+def recall_from_pool(site, template, channels, hours, exclude_ids, size):
+    """
+    从候选池召回
+
+    Returns:
+        (candidates, total_hits, returned_hits)；没有池或剔除已读后不足 size 篇时返回 None
+    """
+    client = get_redis()
+    if client is None:
+        return None
+    spec = pool_spec(site, template, channels, hours)
+    pool_id = pool_id_for(spec)
+    try:
+        pipe = client.pipeline(transaction=False)
+        pipe.get(_version_key(pool_id))
+        pipe.zincrby(_demand_key(), 1, pool_id)
+        pipe.hsetnx(_specs_key(), pool_id, json.dumps(spec))
+        version = pipe.execute()[0]
+        if version is None:
+            _record(client, 'miss')
+            return None
+        version = int(version)
+
+        local = _decoded.get(pool_id)
+        if local is not None and local[0] == version:
+            pool = local[1]
+        else:
+            data = client.get(_data_key(pool_id))
+            if data is None:
+                _record(client, 'miss')
+                return None
+            pool = _unpack(data)
+            if len(_decoded) >= MAX_POOLS * 2:
+                _decoded.clear()
+            _decoded[pool_id] = (version, pool)
+    except Exception as e:
+        logger.warning(f"Candidate pool read failed: {e}")
+        return None
+
+    candidates = []
+    for doc_id, score, source in pool["items"]:
+        if doc_id in exclude_ids:
+            continue
+        candidates.append(candidate_from_hit(doc_id, score, source))
+        if len(candidates) >= size:
+            break
+    # 池已包含全部命中文档时，结果与查询 OpenSearch 一致，不足一批也可直接使用
+    if len(candidates) < size and pool["total"] > len(pool["items"]):
+        _record(client, 'exhausted')
+        return None
+    _record(client, 'hit')
+    return candidates, pool["total"], len(candidates)
+
+
+def build_pool(spec):
+    """按组合参数查询 OpenSearch，返回待写入的池"""
+    from apps.searchapp.client import get_client, index_name_for
+    from apps.searchapp.indexer import LISTING_SOURCE_EXCLUDES
+    from apps.searchapp.queries import build_query
+
+    body = build_query(
+        spec["template"], site=spec["site"], channels=spec["channels"], hours=spec["hours"],
+        seen_ids=[], size=POOL_SIZE,
+    )
+    body["_source"] = {"excludes": LISTING_SOURCE_EXCLUDES}
+    resp = get_client().search(index=index_name_for(spec["site"]), body=body)
+    hits = resp.get("hits", {})
+    return {
+        "total": hits.get("total", {}).get("value", 0),
+        "items": [[h["_id"], h.get("_score") or 0.0, h["_source"]] for h in hits.get("hits", [])],
+    }
+
+
+def refresh_pools():
+    """为热度最高的组合重建候选池，并衰减热度、清理冷门组合"""
+    client = get_redis()
+    if client is None:
+        return {"refreshed": 0, "failed": 0, "dropped": 0}
+
+    ranked = client.zrevrangebyscore(_demand_key(), '+inf', MIN_DEMAND, start=0, num=MAX_POOLS)
+    pool_ids = [p.decode() if isinstance(p, bytes) else p for p in ranked]
+    specs = client.hmget(_specs_key(), pool_ids) if pool_ids else []
+
+    refreshed = failed = 0
+    for pool_id, raw_spec in zip(pool_ids, specs):
+        if raw_spec is None:
+            continue
+        try:
+            pool = build_pool(json.loads(raw_spec))
+        except Exception as e:
+            failed += 1
+            logger.warning(f"Candidate pool {pool_id} build failed: {e}")
+            continue
+        pipe = client.pipeline(transaction=True)
+        pipe.set(_data_key(pool_id), _pack(pool), ex=POOL_TTL)
+        pipe.set(_version_key(pool_id), time.time_ns(), ex=POOL_TTL)
+        pipe.execute()
+        refreshed += 1
+
+    # 热度减半；衰减到可忽略的组合连同参数一并删除
+    client.zunionstore(_demand_key(), {_demand_key(): DEMAND_DECAY})
+    cold = client.zrangebyscore(_demand_key(), '-inf', MIN_DEMAND * DEMAND_DECAY ** 4)
+    if cold:
+        pipe = client.pipeline(transaction=False)
+        pipe.zrem(_demand_key(), *cold)
+        pipe.hdel(_specs_key(), *cold)
+        pipe.execute()
+
+    summary = {"refreshed": refreshed, "failed": failed, "dropped": len(cold)}
+    logger.info(f"Candidate pools refreshed: {summary}")
+    return summary
+
+
+def get_pool_stats():
+    """候选池命中/未命中/耗尽次数与命中率"""
+    client = get_redis()
+    if client is None:
+        return {}
+    try:
+        counters = {
+            (k.decode() if isinstance(k, bytes) else k): int(v) for k, v in client.hgetall(_stats_key()).items()
+        }
+        pools = client.zcount(_demand_key(), MIN_DEMAND, '+inf')
+    except Exception as e:
+        logger.warning(f"Failed to read candidate pool stats: {e}")
+        return {}
+    total = sum(counters.get(k, 0) for k in ('hit', 'miss', 'exhausted'))
+    return {
+        **counters,
+        "hit_ratio": round(counters.get('hit', 0) / total, 4) if total else None,
+        "active_pools": pools,
+    }
@@ -14,8 +14,8 @@ class HttpClient:
         t = timeout or self.timeout
         return self.breaker.call(self.session.get, url, headers=headers, params=params, timeout=t)
 
-    def post(self, url: str, *, headers: Optional[Dict[str, str]] = None, json: Optional[Dict[str, Any]] = None, timeout: Optional[int] = None):
+    def post(self, url: str, *, headers: Optional[Dict[str, str]] = None, json: Optional[Dict[str, Any]] = None, data: Optional[bytes] = None, timeout: Optional[int] = None):
         t = timeout or self.timeout
-        return self.breaker.call(self.session.post, url, headers=headers, json=json, timeout=t)
+        return self.breaker.call(self.session.post, url, headers=headers, json=json, data=data, timeout=t)
 
 http_client = HttpClient()
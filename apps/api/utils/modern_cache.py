@@ -8,7 +8,7 @@ import hashlib
 import json
 from enum import Enum
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Sequence, Union
 from datetime import datetime, timedelta
 from django.core.cache import cache
 from django.conf import settings
@@ -291,11 +291,11 @@ class ModernCacheManager:
         """设置缓存"""
         try:
             if timeout <= 0:
-                logger.debug(f"Cache SKIP: {key} (TTL: {timeout}s, Type: {content_type.value})")
+                logger.debug("Cache SKIP: %s (TTL: %ss, Type: %s)", key, timeout, content_type.value)
                 return False
             
             cache.set(key, value, timeout)
-            logger.info(f"Cache SET: {key} (TTL: {timeout}s, Type: {content_type.value})")
+            logger.debug("Cache SET: %s (TTL: %ss, Type: %s)", key, timeout, content_type.value)
             return True
         except Exception as e:
             logger.error(f"Cache SET error: {e}")
@@ -343,14 +343,22 @@ def generate_cache_key(content_type: Union[str, ContentType],
                       layer: Union[str, CacheLayer],
                       site: str, 
                       params: Dict[str, Any], 
-                      user_id: Optional[str] = None) -> str:
-    """生成缓存Key（便捷函数）"""
+                      user_id: Optional[str] = None,
+                      channels: Sequence[str] = ()) -> str:
+    """
+    生成缓存Key（便捷函数），嵌入列表依赖的命名空间代数
+
+    按频道过滤时只依赖这些频道的命名空间，否则依赖站点与聚合内容。
+    """
+    from .cache_namespace import versioned_key, listing_namespaces
+
     if isinstance(content_type, str):
         content_type = ContentType(content_type)
     if isinstance(layer, str):
         layer = CacheLayer(layer)
     
-    return SmartCacheKey.generate(content_type, layer, site, params, user_id)
+    key = SmartCacheKey.generate(content_type, layer, site, params, user_id)
+    return versioned_key(key, listing_namespaces(site, channels=channels))
 
 
 def should_cache(content_type: Union[str, ContentType], layer: Union[str, CacheLayer]) -> bool:
@@ -0,0 +1,165 @@
+"""
+文章实时滑动窗口计数
+
+每篇文章一个 Redis 哈希，按分钟保存 60 个槽位的曝光/点击数（环形缓冲），由埋点接口写入：
+- 槽位号为分钟数对 60 取模，槽位同时记录所属分钟，写入新分钟时先清零，过期数据不会累加
+- 哈希中另存窗口内的滚动合计（ti/tc），写入时随槽位增减；读取时每篇文章每分钟至多清扫一次
+  移出窗口的槽位，之后只返回两个合计值，不必把 180 个字段传回应用汇总
+- 读写都是 EVALSHA（register_script），任意数量的文章只需一次管道往返
+- 计数开始不足一小时（站点级起始时间）或 Redis 不可用时，窗口不完整，调用方退回 ClickHouse
+"""
+import logging
+import time
+from collections import defaultdict
+
+from apps.core.utils.redis_client import get_redis, redis_key
+
+logger = logging.getLogger(__name__)
+
+WINDOW_MINUTES = 60
+# 哈希过期时间：超过窗口后没有新事件的文章自然淘汰，缺失即视为窗口内无事件
+COUNTER_TTL = (WINDOW_MINUTES + 5) * 60
+
+# 计入的事件类型 -> 槽位字段前缀
+COUNTED_EVENTS = {'impression': 'i', 'click': 'c'}
+
+# ARGV: 分钟, 槽位, 曝光数, 点击数, 过期秒数
+_INCR_SCRIPT = """
+local slot = ARGV[2]
+local held = redis.call('HGET', KEYS[1], 'm' .. slot)
+if held and tonumber(held) > tonumber(ARGV[1]) then
+    return 0
+end
+if held ~= ARGV[1] then
+    if held then
+        local old = redis.call('HMGET', KEYS[1], 'i' .. slot, 'c' .. slot)
+        redis.call('HINCRBY', KEYS[1], 'ti', -tonumber(old[1] or 0))
+        redis.call('HINCRBY', KEYS[1], 'tc', -tonumber(old[2] or 0))
+    end
+    redis.call('HSET', KEYS[1], 'm' .. slot, ARGV[1], 'i' .. slot, 0, 'c' .. slot, 0)
+end
+redis.call('HINCRBY', KEYS[1], 'i' .. slot, ARGV[3])
+redis.call('HINCRBY', KEYS[1], 'c' .. slot, ARGV[4])
+redis.call('HINCRBY', KEYS[1], 'ti', ARGV[3])
+redis.call('HINCRBY', KEYS[1], 'tc', ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return 1
+"""
+
+# ARGV: 当前分钟, 窗口分钟数；返回 {曝光合计, 点击合计}
+_READ_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return {0, 0}
+end
+local now = tonumber(ARGV[1])
+local swept = tonumber(redis.call('HGET', KEYS[1], 'sw') or -1)
+if swept ~= now then
+    local oldest = now - tonumber(ARGV[2])
+    for slot = 0, tonumber(ARGV[2]) - 1 do
+        local held = redis.call('HGET', KEYS[1], 'm' .. slot)
+        if held and tonumber(held) <= oldest then
+            local old = redis.call('HMGET', KEYS[1], 'i' .. slot, 'c' .. slot)
+            redis.call('HINCRBY', KEYS[1], 'ti', -tonumber(old[1] or 0))
+            redis.call('HINCRBY', KEYS[1], 'tc', -tonumber(old[2] or 0))
+            redis.call('HDEL', KEYS[1], 'm' .. slot, 'i' .. slot, 'c' .. slot)
+        end
+    end
+    redis.call('HSET', KEYS[1], 'sw', now)
+end
+local totals = redis.call('HMGET', KEYS[1], 'ti', 'tc')
+return {tonumber(totals[1] or 0), tonumber(totals[2] or 0)}
+"""
+
+
+# v2：哈希中带滚动合计；旧格式的哈希没有合计，换用新前缀后起始时间重新计算，
+# 上线后的第一个窗口内退回 ClickHouse
+def counter_key(site, article_id):
+    return redis_key('rt_counters', 'v2', site, article_id)
+
+
+def _since_key(site):
+    return redis_key('rt_counters', 'v2', site, 'since')
+
+
+def _current_minute():
+    return int(time.time()) // 60
+
+
+def record_events(events):
+    """
+    累加曝光/点击计数
+
+    Args:
+        events: 可迭代的 (site, article_id, event, ts) ，ts 为 datetime
+    """
+    now_minute = _current_minute()
+    counts = defaultdict(lambda: [0, 0])
+    for site, article_id, event, ts in events:
+        field = COUNTED_EVENTS.get(event)
+        if field is None:
+            continue
+        minute = int(ts.timestamp()) // 60
+        # 窗口之外（或时钟超前）的事件不计入
+        if minute <= now_minute - WINDOW_MINUTES or minute > now_minute + 1:
+            continue
+        counts[(site, str(article_id), minute)][0 if field == 'i' else 1] += 1
+    if not counts:
+        return
+
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        incr = client.register_script(_INCR_SCRIPT)
+        pipe = client.pipeline(transaction=False)
+        for site in {site for site, _, _ in counts}:
+            pipe.set(_since_key(site), now_minute, nx=True)
+        for (site, article_id, minute), (impressions, clicks) in counts.items():
+            incr(
+                keys=[counter_key(site, article_id)],
+                args=[minute, minute % WINDOW_MINUTES, impressions, clicks, COUNTER_TTL],
+                client=pipe,
+            )
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to record realtime counters: {e}")
+
+
+def read_window_features(site, article_ids):
+    """
+    批量读取最近一小时的 ctr_1h / pop_1h
+
+    Returns:
+        dict | None: {article_id: {"ctr_1h", "pop_1h"}}，只含窗口内有事件的文章；
+        计数窗口不完整或 Redis 不可用时返回 None
+    """
+    client = get_redis()
+    if client is None:
+        return None
+    now_minute = _current_minute()
+    try:
+        read = client.register_script(_READ_SCRIPT)
+        pipe = client.pipeline(transaction=False)
+        pipe.get(_since_key(site))
+        for article_id in article_ids:
+            read(keys=[counter_key(site, article_id)], args=[now_minute, WINDOW_MINUTES], client=pipe)
+        since, *totals = pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to read realtime counters: {e}")
+        return None
+
+    # 计数开始不足一个窗口，结果会偏小
+    if since is None or int(since) > now_minute - WINDOW_MINUTES:
+        return None
+
+    # 窗口内没有事件的文章不返回，排序时沿用召回文档中的特征
+    features = {}
+    for article_id, (impressions, clicks) in zip(article_ids, totals):
+        impressions, clicks = int(impressions), int(clicks)
+        if not impressions and not clicks:
+            continue
+        features[str(article_id)] = {
+            "ctr_1h": clicks / impressions if impressions else 0.0,
+            "pop_1h": float(clicks),
+        }
+    return features
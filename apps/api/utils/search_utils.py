@@ -2,10 +2,23 @@
 from apps.core.jieba_config import get_jieba_instance
 jieba = get_jieba_instance()
 
+import re
+from django.db import connection
 from django.db.models import Q, Case, When, Value, IntegerField, F
 from functools import reduce
 import operator
 
+# 全文检索使用 simple 配置：分词由 jieba 预先完成，PostgreSQL 只负责按空格切分
+SEARCH_CONFIG = 'simple'
+
+# 预计算检索向量覆盖的字段及其权重等级（与 build_search_query 的默认字段一致）
+SEARCH_VECTOR_FIELDS = (('title', 'A'), ('excerpt', 'B'), ('body', 'C'))
+
+# 正文参与索引的最大字符数，避免超长正文撑爆 tsvector（上限 1MB）
+SEARCH_BODY_MAX_CHARS = 20000
+
+_TAG_RE = re.compile(r'<[^>]+>')
+
 def segment_text(text):
     """
     对文本进行中文分词
@@ -17,6 +30,91 @@ def segment_text(text):
     # 过滤掉停用词和空白
     return [w.strip() for w in words if w.strip() and len(w.strip()) > 1]
 
+def segment_for_index(text):
+    """
+    对待索引文本进行搜索引擎模式分词，返回以空格连接的词串
+
+    使用 cut_for_search 同时产出长词和其中的短词，保证查询侧精确分词的
+    结果都能在索引中命中。
+    """
+    if not text:
+        return ''
+    words = jieba.cut_for_search(text)
+    return ' '.join(w.strip() for w in words if w.strip() and len(w.strip()) > 1)
+
+
+def build_search_document(article):
+    """
+    为文章构建分词后的检索文档
+
+    Returns:
+        {字段名: 分词后的文本} 字典，键与 SEARCH_VECTOR_FIELDS 对应
+    """
+    body = _TAG_RE.sub(' ', str(getattr(article, 'body', '') or ''))
+    return {
+        'title': segment_for_index(getattr(article, 'title', '') or ''),
+        'excerpt': segment_for_index(getattr(article, 'excerpt', '') or ''),
+        'body': segment_for_index(body[:SEARCH_BODY_MAX_CHARS]),
+    }
+
+
+def build_search_vector(document):
+    """根据分词文档构建带权重的 SearchVector 表达式"""
+    from django.contrib.postgres.search import SearchVector
+
+    vectors = [
+        SearchVector(Value(document.get(field_name, '')), weight=weight, config=SEARCH_CONFIG)
+        for field_name, weight in SEARCH_VECTOR_FIELDS
+    ]
+    return reduce(operator.add, vectors)
+
+
+def fulltext_search_available():
+    """当前数据库是否支持全文检索列（仅 PostgreSQL）"""
+    return connection.vendor == 'postgresql'
+
+
+def update_search_vector(article):
+    """
+    重新计算并写入单篇文章的 search_vector
+
+    使用 queryset.update 直接写列，不会再次触发 save 及其信号。
+    """
+    if not fulltext_search_available() or not getattr(article, 'pk', None):
+        return
+    from apps.news.models import ArticlePage
+
+    ArticlePage.objects.filter(pk=article.pk).update(
+        search_vector=build_search_vector(build_search_document(article))
+    )
+
+
+def apply_fulltext_search(queryset, search_text):
+    """
+    基于预计算 search_vector 的全文检索
+
+    过滤命中 GIN 索引，排序在 SQL 中完成：
+    - phrase_priority: 完整短语（按分词顺序相邻）的相关度
+    - search_rank: 任意分词命中的加权相关度（标题 > 摘要 > 正文）
+    """
+    from django.contrib.postgres.search import SearchQuery, SearchRank
+
+    words = segment_text(search_text)
+    if not words:
+        return queryset
+
+    any_word_query = reduce(
+        operator.or_,
+        [SearchQuery(word, config=SEARCH_CONFIG, search_type='plain') for word in words]
+    )
+    phrase_query = SearchQuery(' '.join(words), config=SEARCH_CONFIG, search_type='phrase')
+
+    return queryset.filter(search_vector=any_word_query).annotate(
+        search_rank=SearchRank(F('search_vector'), any_word_query),
+        phrase_priority=SearchRank(F('search_vector'), phrase_query),
+    ).order_by('-phrase_priority', '-search_rank', '-last_published_at')
+
+
 def build_search_query(search_text, fields=None):
     """
     构建搜索查询
@@ -32,9 +130,10 @@ def build_search_query(search_text, fields=None):
     if not fields:
         fields = [('title', 10), ('introduction', 5), ('body', 1)]
     
-    # 对搜索文本进行分词
+    # 对搜索文本进行分词；单字查询分不出词时只做整串匹配
     words = segment_text(search_text)
-    if not words:
+    search_text = (search_text or '').strip()
+    if not search_text:
         return None, None
     
     # 构建每个字段的查询条件
@@ -99,6 +198,8 @@ def build_search_query(search_text, fields=None):
 def apply_search(queryset, search_text, fields=None):
     """
     应用搜索条件到查询集
+
+    PostgreSQL 下且字段被 search_vector 覆盖时使用全文索引，否则回退到 icontains。
     
     Args:
         queryset: Django查询集
@@ -110,7 +211,12 @@ def apply_search(queryset, search_text, fields=None):
     """
     if not search_text:
         return queryset
-        
+
+    # 默认字段且数据库支持时走全文索引，避免 icontains 全表扫描；
+    # 单字词不进入检索向量（分词时过滤），分不出词的查询（如单字）走 icontains
+    if _uses_vector_fields(fields) and fulltext_search_available() and segment_text(search_text):
+        return apply_fulltext_search(queryset, search_text)
+
     search_query, rank_annotation = build_search_query(search_text, fields)
     if not search_query:
         return queryset
@@ -135,4 +241,12 @@ def apply_search(queryset, search_text, fields=None):
     return queryset.filter(search_query).annotate(
         search_rank=rank_annotation,
         phrase_priority=phrase_priority
-    ).order_by('-phrase_priority', '-search_rank', '-last_published_at')
\ No newline at end of file
+    ).order_by('-phrase_priority', '-search_rank', '-last_published_at')
+
+
+def _uses_vector_fields(fields):
+    """检查请求的搜索字段是否被预计算的 search_vector 覆盖"""
+    if not fields:
+        return True
+    indexed = {field_name for field_name, _ in SEARCH_VECTOR_FIELDS}
+    return all(field_name in indexed for field_name, _ in fields)
@@ -0,0 +1,153 @@
+"""
+请求内阶段编排
+
+把一次请求拆成若干阶段，互不依赖的阶段提交到共享线程池并发执行：
+- 每个阶段有自己的截止时间，超时或出错时返回调用方给定的降级结果，不拖垮整个请求
+- 每个阶段的耗时与状态（ok/timeout/error）写入 debug，并累计到按管道分组的指标中
+- 超时的阶段无法被中断，会在后台跑完后丢弃结果；阶段函数应自带客户端超时
+
+用法：
+    runner = StageRunner('feed')
+    profile = runner.submit('profile', load_profile, deadline_ms=300, fallback=None)
+    recall = runner.submit('recall', search, deadline_ms=800, fallback=[])
+    profile_value, recall_value = runner.result(profile), runner.result(recall)
+    runner.export_metrics()
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from django.db import close_old_connections
+
+from apps.core.utils.latency_metrics import latency_namespaces, latency_summary, record_latencies
+
+logger = logging.getLogger(__name__)
+
+# 所有请求共享的阶段线程池（按 gunicorn worker 进程各一个）
+MAX_STAGE_WORKERS = 16
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=MAX_STAGE_WORKERS, thread_name_prefix='stage')
+    return _executor
+
+
+def _run_in_worker(fn, args, kwargs):
+    """
+    在线程池中执行阶段
+
+    池线程长期存在，像请求线程一样在阶段前后调用 close_old_connections：
+    复用未超过 CONN_MAX_AGE 的持久连接，只关闭过期或出错的连接。
+    """
+    close_old_connections()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+class StageHandle:
+    """已提交阶段的句柄"""
+
+    def __init__(self, name, future, deadline_at, fallback, started):
+        self.name = name
+        self.future = future
+        self.deadline_at = deadline_at
+        self.fallback = fallback
+        self.started = started
+
+
+class StageRunner:
+    """一次请求内的阶段编排与计时"""
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.started = time.perf_counter()
+        self.timings = {}
+
+    def _record(self, name, started, status):
+        self.timings[name] = {
+            'ms': round((time.perf_counter() - started) * 1000, 1),
+            'status': status,
+        }
+
+    def submit(self, name, fn, *args, deadline_ms, fallback=None, **kwargs):
+        """提交一个并发阶段，立即返回句柄"""
+        started = time.perf_counter()
+        future = _get_executor().submit(_run_in_worker, fn, args, kwargs)
+        return StageHandle(name, future, started + deadline_ms / 1000.0, fallback, started)
+
+    def result(self, handle):
+        """等待阶段结果；超过截止时间或出错时返回降级结果"""
+        remaining = max(0.0, handle.deadline_at - time.perf_counter())
+        try:
+            value = handle.future.result(timeout=remaining)
+        except FutureTimeout:
+            logger.warning(f"{self.pipeline} stage '{handle.name}' exceeded its deadline, using fallback")
+            self._record(handle.name, handle.started, 'timeout')
+            return handle.fallback
+        except Exception as e:
+            logger.warning(f"{self.pipeline} stage '{handle.name}' failed, using fallback: {e}")
+            self._record(handle.name, handle.started, 'error')
+            return handle.fallback
+        self._record(handle.name, handle.started, 'ok')
+        return value
+
+    def run(self, name, fn, *args, fallback=None, **kwargs):
+        """在当前线程执行一个串行阶段（计时并在出错时降级）"""
+        started = time.perf_counter()
+        try:
+            value = fn(*args, **kwargs)
+        except Exception as e:
+            logger.warning(f"{self.pipeline} stage '{name}' failed, using fallback: {e}")
+            self._record(name, started, 'error')
+            return fallback
+        self._record(name, started, 'ok')
+        return value
+
+    def skip(self, name):
+        self.timings[name] = {'ms': 0.0, 'status': 'skipped'}
+
+    def debug(self):
+        return {
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 1),
+            'stages': dict(self.timings),
+        }
+
+    def export_metrics(self):
+        """把本次请求的阶段耗时与状态累计到指标中"""
+        record_stage_metrics(self.pipeline, self.debug())
+
+
+def _namespace(pipeline, stage):
+    return f"stages:{pipeline}:{stage}"
+
+
+def record_stage_metrics(pipeline, debug):
+    """累计每个阶段的状态计数与最近耗时样本"""
+    stages = dict(debug['stages'], total={'ms': debug['total_ms'], 'status': 'ok'})
+    record_latencies([
+        (_namespace(pipeline, stage), timing['status'], None if timing['status'] == 'skipped' else timing['ms'])
+        for stage, timing in stages.items()
+    ])
+
+
+def get_stage_metrics(pipeline):
+    """读取管道各阶段的状态计数与 p50/p95 耗时"""
+    prefix = _namespace(pipeline, '')
+    stages = {}
+    for namespace in latency_namespaces(prefix):
+        summary = latency_summary(namespace)
+        stage = {'counts': summary['counts']}
+        if summary['samples']:
+            stage.update({'samples': summary['samples'], 'p50_ms': summary['p50'], 'p95_ms': summary['p95']})
+        stages[namespace[len(prefix):]] = stage
+    return stages
@@ -34,4 +34,10 @@ class CoreConfig(AppConfig):
             logger = logging.getLogger(__name__)
             logger.warning(f"jieba配置失败: {e}")
         
+        # 日志改由后台线程写出
+        from django.conf import settings
+        if getattr(settings, 'LOG_QUEUE_ENABLED', False):
+            from .utils.structured_logging import start_queue_logging
+            start_queue_logging()
+        
         # 已移除：Collection 扩展 hooks
\ No newline at end of file
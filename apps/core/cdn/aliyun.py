@@ -16,6 +16,9 @@ from apps.api.utils.http import http_client
 class AliyunCDNProvider(BaseCDNProvider):
     """阿里云CDN服务提供商"""
     
+    # RefreshObjectCaches 单次请求的URL上限
+    max_purge_urls = 100
+    
     def __init__(self, config: Dict[str, Any]):
         super().__init__(config)
         self.access_key_id = self.api_key
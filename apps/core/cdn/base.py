@@ -12,6 +12,9 @@ from django.conf import settings
 class BaseCDNProvider(ABC):
     """CDN服务提供商抽象基类"""
     
+    # 单次 purge_cache 调用允许的最大URL数，子类按提供商限制覆盖
+    max_purge_urls = 100
+    
     def __init__(self, config: Dict[str, Any]):
         """
         初始化CDN服务提供商
@@ -84,6 +84,9 @@ class CDNManager:
         """
         清除站点CDN缓存
         
+        URL按提供商的单次上限（max_purge_urls）分块提交，部分块失败时返回失败的URL。
+        常规发布流程应通过 apps.core.tasks.revalidation.enqueue_revalidation 异步批量刷新。
+        
         Args:
             site_hostname: 站点主机名
             urls: 需要清除缓存的URL列表
@@ -100,19 +103,18 @@ class CDNManager:
                     'site': site_hostname
                 }
             
-            # 清除缓存
-            success = provider.purge_cache(urls)
+            # 按提供商限制分块清除缓存
+            failed_urls = []
+            chunk_size = max(1, provider.max_purge_urls)
+            for i in range(0, len(urls), chunk_size):
+                chunk = urls[i:i + chunk_size]
+                if not provider.purge_cache(chunk):
+                    failed_urls.extend(chunk)
             
-            if success:
-                # 更新最后清除时间
-                cdn_config = self.get_site_cdn_config(site_hostname)
-                if cdn_config:
-                    cdn_config.last_cache_purge = timezone.now()
-                    cdn_config.save()
-                
-                # 清除配置缓存
-                cache.delete(f"cdn_config:{site_hostname}")
-                
+            if len(failed_urls) < len(urls):
+                self.mark_cache_purged(site_hostname)
+            
+            if not failed_urls:
                 return {
                     'success': True,
                     'message': 'Cache purge initiated successfully',
@@ -126,7 +128,8 @@ class CDNManager:
                     'success': False,
                     'error': 'Failed to purge cache',
                     'site': site_hostname,
-                    'urls': urls
+                    'urls': urls,
+                    'failed_urls': failed_urls
                 }
                 
         except Exception as e:
@@ -137,6 +140,13 @@ class CDNManager:
                 'urls': urls
             }
     
+    def mark_cache_purged(self, site_hostname: str) -> None:
+        """记录站点最后一次CDN缓存清除时间"""
+        SiteCDNConfig.objects.filter(
+            site__hostname=site_hostname, is_active=True
+        ).update(last_cache_purge=timezone.now())
+        cache.delete(f"cdn_config:{site_hostname}")
+    
     def get_site_performance_metrics(self, site_hostname: str) -> Dict[str, Any]:
         """
         获取站点CDN性能指标
@@ -11,9 +11,13 @@ def _env_int(key:str, default:int)->int:
 
 FLAGS = {
     "feed.use_lgbm": _env_bool("FF_FEED_USE_LGBM", False),
+    "feed.ranker.p99_budget_ms": _env_int("FF_FEED_RANKER_P99_BUDGET_MS", 5),
     "feed.diversity.limit_author": _env_int("FF_FEED_DIVERSITY_AUTHOR_LIMIT", 3),
     "feed.diversity.limit_topic": _env_int("FF_FEED_DIVERSITY_TOPIC_LIMIT", 3),
     "recall.window_hours": _env_int("FF_RECALL_WINDOW_HOURS", 72),
+    "feed.deadline.profile_ms": _env_int("FF_FEED_DEADLINE_PROFILE_MS", 300),
+    "feed.deadline.recall_ms": _env_int("FF_FEED_DEADLINE_RECALL_MS", 800),
+    "feed.deadline.enrich_ms": _env_int("FF_FEED_DEADLINE_ENRICH_MS", 300),
 }
 
 def flag(name, default=None): return FLAGS.get(name, default)
@@ -0,0 +1,63 @@
+"""
+管理命令：创建文章指标分级预聚合表（1分钟 → 1小时 → 1天）
+
+建表语句与物化视图定义见 apps.core.services.metrics_rollups。
+物化视图只同步创建之后写入的数据，首次创建时可用 --backfill 回填历史数据。
+
+使用方法：
+python manage.py init_metrics_rollups
+python manage.py init_metrics_rollups --backfill --days 30
+python manage.py init_metrics_rollups --dry-run
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from clickhouse_driver import Client
+
+from apps.core.services.metrics_rollups import TABLES_CACHE_KEY, backfill_sql, rollup_ddl
+
+
+class Command(BaseCommand):
+    help = '创建文章指标分级预聚合表与物化视图'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backfill',
+            action='store_true',
+            help='用 article_metrics_agg 回填分级表'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=30,
+            help='回填最近N天的数据 (默认: 30)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='只打印语句，不执行'
+        )
+
+    def handle(self, *args, **options):
+        statements = rollup_ddl()
+        if options['dry_run']:
+            for statement in statements + [backfill_sql()]:
+                self.stdout.write(f'{statement};\n')
+            return
+
+        client = Client.from_url(settings.CLICKHOUSE_URL)
+        # 视图创建前的最后一个完整分钟，回填只处理此前的数据
+        until = int(time.time()) // 60 * 60
+        for statement in statements:
+            client.execute(statement)
+            self.stdout.write(statement.splitlines()[0])
+        cache.delete(TABLES_CACHE_KEY)
+
+        if options['backfill']:
+            self.stdout.write(f"回填最近 {options['days']} 天数据...")
+            client.execute(backfill_sql(), {'days': options['days'], 'until': until})
+
+        self.stdout.write(self.style.SUCCESS('✅ 分级预聚合表已就绪'))
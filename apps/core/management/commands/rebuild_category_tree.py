@@ -0,0 +1,43 @@
+"""
+管理命令：重建分类物化路径与已发布文章数
+
+正常情况下路径由 Category.save 维护、文章数由发布/下线信号维护；
+批量导入数据或直接改库后运行本命令校正。
+
+使用方法：
+python manage.py rebuild_category_tree
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.core.models import Category
+
+
+class Command(BaseCommand):
+    help = '重建分类的物化路径、深度与已发布文章数'
+
+    def handle(self, *args, **options):
+        categories = {c.id: c for c in Category.objects.all().only('id', 'parent_id', 'path', 'depth')}
+        children = {}
+        for category in categories.values():
+            children.setdefault(category.parent_id, []).append(category)
+
+        changed = []
+        stack = [(category, '') for category in children.get(None, [])]
+        while stack:
+            category, parent_path = stack.pop()
+            path = Category.build_path(category.id, parent_path)
+            if path != category.path:
+                category.path = path
+                category.depth = path.count('/')
+                changed.append(category)
+            stack.extend((child, path) for child in children.get(category.id, []))
+
+        with transaction.atomic():
+            if changed:
+                Category.objects.bulk_update(changed, ['path', 'depth'], batch_size=500)
+            counts_changed = Category.refresh_live_article_counts()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ 共 {len(categories)} 个分类，修正路径 {len(changed)} 个，修正文章数 {counts_changed} 个'
+        ))
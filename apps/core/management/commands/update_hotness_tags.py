@@ -57,6 +57,12 @@ class Command(BaseCommand):
             help='单篇文章测试时的文章ID'
         )
         
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='增量模式：只处理上次运行以来指标有变化或新发布的文章'
+        )
+        
         parser.add_argument(
             '--dry-run',
             action='store_true',
@@ -196,7 +202,8 @@ class Command(BaseCommand):
         result = update_article_hotness_tags(
             site=site, 
             hours_back=hours, 
-            batch_size=batch_size
+            batch_size=batch_size,
+            incremental=options['incremental']
         )
         self._display_result(result)
 
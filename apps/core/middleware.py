@@ -3,9 +3,13 @@
 """
 import threading
 import logging
+import random
+import time
 import uuid
 from django.utils.deprecation import MiddlewareMixin
 
+access_logger = logging.getLogger('apps.core.access')
+
 
 class CorrelationIdMiddleware(MiddlewareMixin):
     """
@@ -27,6 +31,10 @@ class CorrelationIdMiddleware(MiddlewareMixin):
         
         # 设置响应头
         request.correlation_id_for_response = correlation_id
+
+        # 请求计时与采样点（同一请求的日志共用一个采样点，见 structured_logging.SamplingFilter）
+        request.log_started = time.perf_counter()
+        request.log_sample_point = random.random()
         
         return None
     
@@ -35,6 +43,21 @@ class CorrelationIdMiddleware(MiddlewareMixin):
         # 将关联ID添加到响应头
         if hasattr(request, 'correlation_id_for_response'):
             response['X-Correlation-ID'] = request.correlation_id_for_response
+
+        # 访问日志（按采样率输出；线程本地请求此时已清理，上下文字段直接传入）
+        started = getattr(request, 'log_started', None)
+        if started is not None and access_logger.isEnabledFor(logging.INFO):
+            duration_ms = round((time.perf_counter() - started) * 1000, 1)
+            access_logger.info(
+                "%s %s %s %sms", request.method, request.path, response.status_code, duration_ms,
+                extra={
+                    'correlation_id': request.correlation_id,
+                    'path': request.path,
+                    'elapsed_ms': duration_ms,
+                    'sample_point': request.log_sample_point,
+                    'fields': {'method': request.method, 'status': response.status_code},
+                },
+            )
         
         return response
     
@@ -74,12 +97,20 @@ class ThreadLocalRequestMiddleware(MiddlewareMixin):
 class RequestLogContextFilter(logging.Filter):
     """
     日志过滤器：为日志记录添加请求上下文信息
+
+    已带 correlation_id 的记录不再覆盖（调用方通过 extra 传入，或已在请求线程中经过本过滤器，
+    见 structured_logging.start_queue_logging）。
     """
     
     def filter(self, record):
         """
         为日志记录添加请求相关信息
         """
+        if hasattr(record, 'correlation_id'):
+            for name in ('request_id', 'user_id', 'ip_address'):
+                if not hasattr(record, name):
+                    setattr(record, name, 'N/A')
+            return True
         try:
             current_request = getattr(threading.current_thread(), 'request', None)
             if current_request:
@@ -88,6 +119,11 @@ class RequestLogContextFilter(logging.Filter):
                 record.request_id = getattr(current_request, 'META', {}).get('HTTP_X_REQUEST_ID', 'N/A')
                 record.user_id = getattr(current_request.user, 'id', 'anonymous') if hasattr(current_request, 'user') else 'N/A'
                 record.ip_address = current_request.META.get('REMOTE_ADDR', 'N/A')
+                record.path = getattr(current_request, 'path', None)
+                record.sample_point = getattr(current_request, 'log_sample_point', None)
+                started = getattr(current_request, 'log_started', None)
+                if started is not None:
+                    record.elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
             else:
                 # 没有请求上下文时的默认值
                 record.correlation_id = 'N/A'
@@ -0,0 +1,63 @@
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_category_paths(apps, schema_editor):
+    """按层级自上而下回填物化路径与深度，并统计已发布文章数"""
+    Category = apps.get_model('core', 'Category')
+
+    categories = {c.id: c for c in Category.objects.all().only('id', 'parent_id')}
+    children = {}
+    for category in categories.values():
+        children.setdefault(category.parent_id, []).append(category)
+
+    stack = [(category, '') for category in children.get(None, [])]
+    while stack:
+        category, parent_path = stack.pop()
+        segment = str(category.id).zfill(8)
+        category.path = f"{parent_path}/{segment}" if parent_path else segment
+        category.depth = category.path.count('/')
+        stack.extend((child, category.path) for child in children.get(category.id, []))
+
+    counts = dict(
+        Category.objects.annotate(
+            n=Count('articles', filter=Q(articles__live=True), distinct=True)
+        ).values_list('id', 'n')
+    )
+    for category in categories.values():
+        category.live_article_count = counts.get(category.id, 0)
+
+    Category.objects.bulk_update(
+        list(categories.values()), ['path', 'depth', 'live_article_count'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0035_channeltemplate_remove_channel_channel_config_and_more'),
+        ('news', '0014_articlepage_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255, verbose_name='层级路径'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='层级深度'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='live_article_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='已发布文章数'),
+        ),
+        migrations.RunPython(backfill_category_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['path'], name='category_path', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -61,6 +61,13 @@ class Category(ClusterableModel):
     order = models.IntegerField(default=0, verbose_name="排序")
     is_active = models.BooleanField(default=True, verbose_name="是否启用")
     
+    # 物化路径：从根分类到本分类的ID链（定长补零、以/分隔），保存时自动维护
+    path = models.CharField(max_length=255, blank=True, default='', editable=False, verbose_name="层级路径")
+    depth = models.PositiveSmallIntegerField(default=0, editable=False, verbose_name="层级深度")
+    
+    # 已发布文章数（直接归属本分类），由文章发布/下线信号维护
+    live_article_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="已发布文章数")
+    
     # 时间字段
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
@@ -100,6 +107,7 @@ class Category(ClusterableModel):
             models.Index(fields=['slug']),
             models.Index(fields=['parent', 'order']),
             models.Index(fields=['is_active', 'order']),
+            models.Index(fields=['path'], name='category_path', opclasses=['varchar_pattern_ops']),
         ]
     
     def __str__(self):
@@ -107,9 +115,48 @@ class Category(ClusterableModel):
             return f"{self.parent.name} > {self.name}"
         return self.name
         
+    # 路径中每段ID的位数
+    PATH_SEGMENT_WIDTH = 8
+    
+    @classmethod
+    def build_path(cls, category_id, parent_path=''):
+        segment = str(category_id).zfill(cls.PATH_SEGMENT_WIDTH)
+        return f"{parent_path}/{segment}" if parent_path else segment
+    
+    @property
+    def ancestor_ids(self):
+        """从路径解析出祖先ID（由根到父）"""
+        if not self.path:
+            return []
+        return [int(segment) for segment in self.path.split('/')[:-1]]
+    
     def save(self, *args, **kwargs):
+        old_path = self.path
         super().save(*args, **kwargs)
+        self._sync_path(old_path)
         self.clear_cache()
+    
+    def _sync_path(self, old_path):
+        """根据父分类重算路径；父分类变化时用一条 UPDATE 平移整棵子树"""
+        from django.db.models import F, Value
+        from django.db.models.functions import Concat, Substr
+        
+        parent_path = ''
+        if self.parent_id:
+            parent_path = type(self).objects.filter(pk=self.parent_id).values_list('path', flat=True).first() or ''
+        new_path = self.build_path(self.pk, parent_path)
+        if new_path == old_path:
+            return
+        
+        new_depth = new_path.count('/')
+        type(self).objects.filter(pk=self.pk).update(path=new_path, depth=new_depth)
+        if old_path:
+            type(self).objects.filter(path__startswith=f"{old_path}/").update(
+                path=Concat(Value(new_path), Substr('path', len(old_path) + 1)),
+                depth=F('depth') + (new_depth - self.depth),
+            )
+        self.path = new_path
+        self.depth = new_depth
         
     def delete(self, *args, **kwargs):
         self.clear_cache()
@@ -122,41 +169,43 @@ class Category(ClusterableModel):
         ])
     
     def get_ancestors(self):
-        """获取所有祖先分类"""
-        ancestors = []
-        current = self.parent
-        while current:
-            ancestors.append(current)
-            current = current.parent
-        return list(reversed(ancestors))
+        """获取所有祖先分类（由根到父，一次查询）"""
+        ids = self.ancestor_ids
+        if not ids:
+            return []
+        return list(type(self).objects.filter(id__in=ids).order_by('depth'))
     
     def get_descendants(self):
-        """获取所有后代分类"""
+        """获取所有启用的后代分类（一次查询；停用分类的整棵子树一并排除）"""
+        if not self.path:
+            return []
+        nodes = list(
+            type(self).objects.filter(path__startswith=f"{self.path}/").order_by('path')
+        )
+        reachable = {self.pk}
         descendants = []
-        for child in self.children.filter(is_active=True):
-            descendants.append(child)
-            descendants.extend(child.get_descendants())
+        for node in nodes:
+            if node.is_active and node.parent_id in reachable:
+                reachable.add(node.pk)
+                descendants.append(node)
         return descendants
     
     @property
     def level(self):
         """获取分类层级深度"""
-        return len(self.get_ancestors())
+        return self.depth
     
     def clean(self):
         """数据验证"""
         from django.core.exceptions import ValidationError
         super().clean()
         
-        # 检查循环依赖
+        # 检查循环依赖：父分类不能是自己或自己的后代
         if self.parent:
-            current = self.parent
-            while current:
-                if current == self:
-                    raise ValidationError({'parent': '不能将自己设置为上级分类'})
-                if current.parent == self:
-                    raise ValidationError({'parent': '检测到循环依赖，请检查分类层级关系'})
-                current = current.parent
+            if self.pk and self.parent.pk == self.pk:
+                raise ValidationError({'parent': '不能将自己设置为上级分类'})
+            if self.pk and self.path and self.parent.path.startswith(f"{self.path}/"):
+                raise ValidationError({'parent': '检测到循环依赖，请检查分类层级关系'})
     
     @property
     def full_path(self):
@@ -179,26 +228,83 @@ class Category(ClusterableModel):
         return queryset.order_by('order', 'name')
     
     @classmethod
-    def get_tree(cls, site=None, channel=None):
-        """获取分类树结构"""
-        def build_tree(categories, parent=None):
-            tree = []
-            for category in categories:
-                if category.parent == parent:
-                    children = build_tree(categories, category)
-                    tree.append({
-                        'category': category,
-                        'children': children
-                    })
-            return tree
-        
-        queryset = cls.objects.filter(is_active=True).select_related('parent')
+    def load_subtrees(cls, roots, max_depth=None):
+        """
+        一次查询加载给定根分类下任意深度的启用子分类
         
-        if site:
-            queryset = queryset.filter(sites=site)
+        子节点列表挂在每个节点的 tree_children 属性上（按 order、name 排序），
+        停用分类及其子树被排除。
         
-        if channel:
-            queryset = queryset.filter(channels=channel)
+        Args:
+            roots: 根分类列表或查询集
+            max_depth: 相对根分类的最大深度，None 表示不限
+            
+        Returns:
+            list: 挂好子树的根分类
+        """
+        from django.db.models import Q
+        
+        roots = list(roots)
+        for root in roots:
+            root.tree_children = []
+        if not roots or max_depth == 0:
+            return roots
+        
+        prefix_q = Q()
+        for root in roots:
+            prefix_q |= Q(path__startswith=f"{root.path}/")
+        queryset = cls.objects.filter(prefix_q, is_active=True)
+        if max_depth is not None:
+            queryset = queryset.filter(depth__lte=max(root.depth for root in roots) + max_depth)
+        
+        nodes = {root.pk: root for root in roots}
+        root_depth = {root.pk: root.depth for root in roots}
+        for node in queryset.order_by('depth', 'order', 'name'):
+            parent = nodes.get(node.parent_id)
+            if parent is None:
+                continue
+            root_depth[node.pk] = root_depth[parent.pk]
+            if max_depth is not None and node.depth - root_depth[node.pk] > max_depth:
+                continue
+            node.tree_children = []
+            parent.tree_children.append(node)
+            nodes[node.pk] = node
+        return roots
+    
+    @classmethod
+    def refresh_live_article_counts(cls, category_ids=None):
+        """
+        重算分类的已发布文章数（一条聚合查询），只写回发生变化的行
+        
+        Args:
+            category_ids: 需要重算的分类ID，None 表示全部
             
-        categories = list(queryset.order_by('order', 'name'))
-        return build_tree(categories)
+        Returns:
+            int: 发生变化的分类数
+        """
+        from django.db.models import Count, Q
+        
+        queryset = cls.objects.all()
+        if category_ids is not None:
+            queryset = queryset.filter(id__in=list(category_ids))
+        changed = []
+        for category in queryset.annotate(
+            fresh_count=Count('articles', filter=Q(articles__live=True), distinct=True)
+        ).only('id', 'live_article_count'):
+            if category.fresh_count != category.live_article_count:
+                category.live_article_count = category.fresh_count
+                changed.append(category)
+        if changed:
+            cls.objects.bulk_update(changed, ['live_article_count'])
+        return len(changed)
+    
+    @classmethod
+    def get_tree(cls, site=None, channel=None):
+        """获取分类树结构"""
+        def to_dict(category):
+            return {
+                'category': category,
+                'children': [to_dict(child) for child in category.tree_children],
+            }
+        
+        return [to_dict(root) for root in cls.load_subtrees(cls.get_root_categories(site, channel))]
@@ -13,6 +13,8 @@ from django.conf import settings
 from django.utils import timezone as django_timezone
 from clickhouse_driver import Client as ClickHouseClient
 
+from .metrics_rollups import avg_column, pick_tier
+
 logger = logging.getLogger(__name__)
 
 
@@ -256,41 +258,50 @@ class HotnessCalculator:
             return {aid: HotnessMetrics(article_id=aid) for aid in article_ids}
         
         try:
-            # 构建查询
-            ids_str = "','".join(article_ids)
-            # 🔥 使用增强的ClickHouse schema，包含完整的社交和行为指标
+            # 🔥 按窗口选择分级预聚合表：72小时/24小时走小时级表，1小时走分钟级表
+            long_tier = pick_tier(72, ch)
+            short_tier = pick_tier(1, ch)
+            params = {"site": site, "ids": tuple(str(aid) for aid in article_ids), "h72": 72, "h24": 24, "h1": 1}
             query = f"""
             SELECT 
                 article_id,
                 sum(clicks) as total_clicks,
                 sum(impressions) as total_impressions,
-                sumIf(clicks, window_start >= now() - INTERVAL 1 HOUR) as clicks_1h,
-                sumIf(impressions, window_start >= now() - INTERVAL 1 HOUR) as impressions_1h,
-                sumIf(clicks, window_start >= now() - INTERVAL 24 HOUR) as clicks_24h,
-                sumIf(impressions, window_start >= now() - INTERVAL 24 HOUR) as impressions_24h,
+                sumIf(clicks, {long_tier.window_condition('h24')}) as clicks_24h,
+                sumIf(impressions, {long_tier.window_condition('h24')}) as impressions_24h,
                 sum(shares) as share_count,
                 sum(comments) as comment_count,
                 sum(likes) as like_count,
                 sum(favorites) as favorite_count,
-                avg(reading_completion_rate) as avg_completion_rate,
-                avg(bounce_rate) as avg_bounce_rate,
-                avg(social_score) as avg_social_score,
+                {avg_column(long_tier, 'reading_completion_rate')} as avg_completion_rate,
+                {avg_column(long_tier, 'bounce_rate')} as avg_bounce_rate,
+                {avg_column(long_tier, 'social_score')} as avg_social_score,
                 sum(dwell_ms_sum) as total_dwell_ms
-            FROM article_metrics_agg 
-            WHERE article_id IN ('{ids_str}') 
+            FROM {long_tier.table}
+            WHERE article_id IN %(ids)s
+              AND site = %(site)s
+              AND {long_tier.window_condition('h72')}
+            GROUP BY article_id
+            """
+            recent_query = f"""
+            SELECT article_id, sum(clicks) as clicks_1h, sum(impressions) as impressions_1h
+            FROM {short_tier.table}
+            WHERE article_id IN %(ids)s
               AND site = %(site)s
-              AND window_start >= now() - INTERVAL 72 HOUR
+              AND {short_tier.window_condition('h1')}
             GROUP BY article_id
             """
             
-            rows = ch.execute(query, {"site": site})
+            rows = ch.execute(query, params)
+            recent = {str(aid): (clicks, impressions) for aid, clicks, impressions in ch.execute(recent_query, params)}
             
             metrics_dict = {}
             for row in rows:
-                article_id, total_clicks, total_impressions, clicks_1h, impressions_1h, \
+                article_id, total_clicks, total_impressions, \
                 clicks_24h, impressions_24h, share_count, comment_count, like_count, \
                 favorite_count, avg_completion_rate, avg_bounce_rate, avg_social_score, \
                 total_dwell_ms = row
+                clicks_1h, impressions_1h = recent.get(str(article_id), (0, 0))
                 
                 # 计算点击率
                 ctr_1h = (clicks_1h / impressions_1h) if impressions_1h > 0 else 0.0
@@ -326,6 +337,32 @@ class HotnessCalculator:
             logger.error(f"获取文章指标失败: {e}")
             return {aid: HotnessMetrics(article_id=aid) for aid in article_ids}
     
+    def fetch_active_article_ids(self, since: datetime, site: str = None) -> Optional[set]:
+        """
+        获取自 since 以来有新指标写入的文章ID，用于增量热度更新
+
+        Returns:
+            文章ID集合；ClickHouse 不可用时返回 None，调用方应退化为全量处理
+        """
+        site = site or getattr(settings, 'SITE_HOSTNAME', 'localhost')
+        ch = self.get_clickhouse_client()
+        if not ch:
+            return None
+        
+        try:
+            rows = ch.execute(
+                """
+                SELECT DISTINCT article_id
+                FROM article_metrics_agg
+                WHERE site = %(site)s AND window_start >= %(since)s
+                """,
+                {"site": site, "since": since},
+            )
+            return {str(row[0]) for row in rows}
+        except Exception as e:
+            logger.error(f"获取活跃文章失败: {e}")
+            return None
+    
     def batch_classify_articles(self, article_data: List[Dict], site: str = None) -> List[Dict]:
         """
         批量分类文章
@@ -0,0 +1,178 @@
+"""
+文章指标分级预聚合（ClickHouse）
+
+article_metrics_agg 是按分钟的明细表，72小时窗口要扫描上千个分钟桶，代价随流量线性增长。
+这里定义 1分钟 → 1小时 → 1天 三级 AggregatingMergeTree 表，由物化视图逐级同步：
+- 计数类指标使用 SimpleAggregateFunction(sum)，查询时 sum()/sumIf() 即可
+- 阅读完成率、跳出率、社交评分使用 avgIf 状态，只统计有上报值的行，查询时 avgIfMerge()
+- 查询方按窗口调用 pick_tier() 选择能覆盖窗口的最粗粒度表
+
+表结构由管理命令 init_metrics_rollups 创建。
+"""
+import logging
+from dataclasses import dataclass
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+SOURCE_TABLE = 'article_metrics_agg'
+
+
+@dataclass(frozen=True)
+class RollupTier:
+    """一级预聚合表"""
+    table: str
+    granularity_seconds: int
+    retention_hours: int
+    # 将时间对齐到本级桶起点的 ClickHouse 函数
+    floor_function: str
+
+    def window_condition(self, hours_param: str) -> str:
+        """窗口起点对齐到桶边界的过滤条件（参数为小时数）"""
+        return f"window_start >= {self.floor_function}(now() - INTERVAL %({hours_param})s HOUR)"
+
+
+# 由细到粗排列
+TIERS = (
+    RollupTier('article_metrics_1m', 60, 48, 'toStartOfMinute'),
+    RollupTier('article_metrics_1h', 3600, 30 * 24, 'toStartOfHour'),
+    RollupTier('article_metrics_1d', 86400, 400 * 24, 'toStartOfDay'),
+)
+
+# 分级表尚未创建时退回明细表（分钟粒度）
+SOURCE_TIER = RollupTier(SOURCE_TABLE, 60, 10 ** 6, 'toStartOfMinute')
+
+# 窗口至少要包含的桶数：对齐到桶边界带来的误差不超过约 1/24
+MIN_BUCKETS_PER_WINDOW = 24
+
+# 已创建表的缓存
+TABLES_CACHE_KEY = 'metrics_rollups:tables'
+TABLES_CACHE_TIMEOUT = 600
+
+
+def available_tables(client):
+    """ClickHouse 中已存在的分级表（缓存10分钟）"""
+    tables = cache.get(TABLES_CACHE_KEY)
+    if tables is None:
+        try:
+            rows = client.execute(
+                "SELECT name FROM system.tables WHERE database = currentDatabase() AND name IN %(names)s",
+                {'names': tuple(tier.table for tier in TIERS)},
+            )
+            tables = sorted(row[0] for row in rows)
+        except Exception as e:
+            logger.warning(f"Failed to list metrics rollup tables: {e}")
+            return set()
+        cache.set(TABLES_CACHE_KEY, tables, TABLES_CACHE_TIMEOUT)
+    return set(tables)
+
+
+def pick_tier(window_hours: float, client=None) -> RollupTier:
+    """
+    选择覆盖窗口的最粗粒度表
+
+    条件：保留期覆盖窗口，且窗口内至少有 MIN_BUCKETS_PER_WINDOW 个桶。
+    传入 client 时只考虑已创建的表；都不满足时退回明细表。
+    """
+    existing = available_tables(client) if client is not None else None
+    window_seconds = window_hours * 3600
+    for tier in reversed(TIERS):
+        if existing is not None and tier.table not in existing:
+            continue
+        if tier.retention_hours >= window_hours and window_seconds >= tier.granularity_seconds * MIN_BUCKETS_PER_WINDOW:
+            return tier
+    return SOURCE_TIER
+
+
+def avg_column(tier: RollupTier, column: str) -> str:
+    """均值列的聚合表达式：分级表合并 avgIf 状态，明细表直接取均值"""
+    if tier is SOURCE_TIER:
+        return f"avgIf({column}, {column} > 0)"
+    return f"avgIfMerge({column})"
+
+
+# ---- 表结构（由 init_metrics_rollups 命令执行） ----
+
+# 社交采集任务写入明细表的列（init_clickhouse.sql 中未声明）
+SOURCE_COLUMNS_DDL = [
+    f"ALTER TABLE {SOURCE_TABLE} ADD COLUMN IF NOT EXISTS {column} {column_type}"
+    for column, column_type in (
+        ('shares', 'UInt64 DEFAULT 0'),
+        ('comments', 'UInt64 DEFAULT 0'),
+        ('likes', 'UInt64 DEFAULT 0'),
+        ('favorites', 'UInt64 DEFAULT 0'),
+        ('reading_completion_rate', 'Float64 DEFAULT 0'),
+        ('bounce_rate', 'Float64 DEFAULT 0'),
+        ('social_score', 'Float64 DEFAULT 0'),
+    )
+]
+
+COUNT_COLUMNS = ('impressions', 'clicks', 'dwell_ms_sum', 'shares', 'comments', 'likes', 'favorites')
+AVG_COLUMNS = ('reading_completion_rate', 'bounce_rate', 'social_score')
+
+
+def tier_table_ddl(tier: RollupTier) -> str:
+    columns = [f"  {column} SimpleAggregateFunction(sum, UInt64)" for column in COUNT_COLUMNS]
+    columns += [f"  {column} AggregateFunction(avgIf, Float64, UInt8)" for column in AVG_COLUMNS]
+    partition = 'toDate(window_start)' if tier.granularity_seconds < 86400 else 'toYYYYMM(window_start)'
+    return (
+        f"CREATE TABLE IF NOT EXISTS {tier.table}\n(\n"
+        "  window_start DateTime,\n  site String,\n  channel String,\n  article_id String,\n"
+        + ",\n".join(columns)
+        + f"\n)\nENGINE = AggregatingMergeTree\nPARTITION BY {partition}\n"
+        "ORDER BY (site, window_start, article_id, channel)\n"
+        f"TTL window_start + INTERVAL {tier.retention_hours} HOUR"
+    )
+
+
+def _tier_select(tier: RollupTier, source: str, from_source: bool) -> str:
+    """从上一级（或明细表）聚合到本级的 SELECT"""
+    counts = [f"sum(src.{column}) AS {column}" for column in COUNT_COLUMNS]
+    if from_source:
+        avgs = [
+            f"avgIfState(toFloat64(src.{column}), src.{column} > 0) AS {column}" for column in AVG_COLUMNS
+        ]
+    else:
+        avgs = [f"avgIfMergeState(src.{column}) AS {column}" for column in AVG_COLUMNS]
+    # 时间列使用表限定名，避免与同名别名循环引用
+    return (
+        f"SELECT {tier.floor_function}(src.window_start) AS window_start, "
+        "src.site AS site, src.channel AS channel, src.article_id AS article_id, "
+        + ", ".join(counts + avgs)
+        + f" FROM {source} AS src"
+    )
+
+
+def tier_view_ddl(tier: RollupTier, source: str) -> str:
+    select = _tier_select(tier, source, from_source=source == SOURCE_TABLE)
+    return (
+        f"CREATE MATERIALIZED VIEW IF NOT EXISTS mv_{tier.table} TO {tier.table} AS\n"
+        f"{select}\nGROUP BY window_start, site, channel, article_id"
+    )
+
+
+def rollup_ddl():
+    """建表与物化视图语句（按依赖顺序）"""
+    statements = list(SOURCE_COLUMNS_DDL)
+    source = SOURCE_TABLE
+    for tier in TIERS:
+        statements.append(tier_table_ddl(tier))
+        statements.append(tier_view_ddl(tier, source))
+        source = tier.table
+    return statements
+
+
+def backfill_sql() -> str:
+    """
+    用明细表回填分钟级表
+
+    写入分钟级表会经由物化视图逐级同步到小时/天级表，因此只需回填第一级。
+    只回填视图创建之前的分钟，避免与视图同步的数据重复。
+    """
+    select = _tier_select(TIERS[0], SOURCE_TABLE, from_source=True)
+    return (
+        f"INSERT INTO {TIERS[0].table}\n{select}\n"
+        "WHERE src.window_start >= now() - INTERVAL %(days)s DAY AND src.window_start < toDateTime(%(until)s)\n"
+        "GROUP BY window_start, site, channel, article_id"
+    )
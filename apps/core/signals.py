@@ -0,0 +1,14 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from wagtail.models import Site
+
+from .models import SiteSettings
+from .site_registry import site_registry
+
+
+# 站点或站点配置变化时使各进程的站点注册表失效（事务提交后，避免其他进程在提交前重新加载旧数据）
+@receiver([post_save, post_delete], sender=Site)
+@receiver([post_save, post_delete], sender=SiteSettings)
+def invalidate_site_registry(sender, **kwargs):
+    transaction.on_commit(site_registry.invalidate)
@@ -3,7 +3,7 @@
 
 这个模块提供了一个中心化的站点配置管理框架，支持：
 - 层级化配置（全局 → 站点 → 用户）
-- 动态配置加载和缓存
+- 动态配置加载和进程内缓存（见 site_registry）
 - 配置验证和类型安全
 - 环境变量覆盖
 - 热重载支持
@@ -14,7 +14,6 @@ import json
 import re
 from typing import Dict, Any, Optional, Union, List, TypeVar, Generic
 from dataclasses import dataclass, field, asdict
-from django.core.cache import cache
 from django.conf import settings
 import logging
 
@@ -345,27 +344,22 @@ class SiteConfigManager:
     
     def __init__(self):
         self.loader = ConfigLoader()
-        self._cache_prefix = "site_config"
-        self._cache_timeout = 300  # 5分钟
         
     def get_config(self, site_id: str, use_cache: bool = True) -> SiteConfig:
-        """获取站点配置"""
-        cache_key = f"{self._cache_prefix}:{site_id}"
-        
+        """
+        获取站点配置
+
+        use_cache 时从进程内站点注册表读取（每个注册表版本只构建一次，返回的对象只读）；
+        否则直接从数据库构建。
+        """
         if use_cache:
-            cached_config = cache.get(cache_key)
-            if cached_config:
-                return cached_config
-        
-        # 加载配置
+            from .site_registry import site_registry
+            return site_registry.get_config(site_id, self._build_config)
+        return self._build_config(site_id)
+    
+    def _build_config(self, site_id: str) -> SiteConfig:
         config_data = self._load_site_config(site_id)
-        config = self._create_site_config(site_id, config_data)
-        
-        # 缓存配置
-        if use_cache:
-            cache.set(cache_key, config, self._cache_timeout)
-            
-        return config
+        return self._create_site_config(site_id, config_data)
     
     def update_config(self, site_id: str, updates: Dict[str, Any]) -> bool:
         """更新站点配置"""
@@ -384,9 +378,7 @@ class SiteConfigManager:
             
             # 保存到数据库
             if self.loader.save_to_database(site_id, config_dict):
-                # 清除缓存
-                cache_key = f"{self._cache_prefix}:{site_id}"
-                cache.delete(cache_key)
+                # SiteSettings 保存信号会使站点注册表失效
                 logger.info(f"Updated config in database for site: {site_id}")
                 return True
             else:
@@ -425,12 +417,9 @@ class SiteConfigManager:
             
             site = Site.objects.get(hostname=site_id)
             settings = SiteSettings.objects.get(site=site)
+            # SiteSettings 删除信号会使站点注册表失效
             settings.delete()
             
-            # 清除缓存
-            cache_key = f"{self._cache_prefix}:{site_id}"
-            cache.delete(cache_key)
-            
             logger.info(f"Deleted config for site: {site_id}")
             return True
             
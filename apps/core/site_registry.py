@@ -0,0 +1,137 @@
+"""
+进程内站点注册表
+
+站点识别在每个 API 请求上都会执行，原先每次都要读缓存（反序列化 Site）或查库。
+这里每个进程持有一份站点快照，站点解析不再产生网络 I/O：
+- 快照包含全部 Wagtail Site（root_page 预先加载）与各站点的 SiteConfig，按 主机名 / 主机名:端口 / slug / id
+  建立索引，SITE_MAPPINGS 中的别名映射到对应站点
+- Site 或 SiteSettings 变化时信号处理器递增缓存中的版本号；各进程最多每 VERSION_CHECK_INTERVAL 秒读一次版本号，
+  变化时重新加载。批量 update() 不触发信号，快照最长 MAX_SNAPSHOT_AGE 秒后也会重新加载
+- 快照中的对象在线程间共享，调用方只读不改
+"""
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'site_registry:version'
+VERSION_CHECK_INTERVAL = 5
+MAX_SNAPSHOT_AGE = 300
+# 未登记站点（如 ?site= 传入的任意值）的配置最多缓存的数量
+MAX_EXTRA_CONFIGS = 256
+
+
+class SiteSnapshot:
+    """某一版本的站点索引"""
+
+    def __init__(self, version, sites, aliases):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.by_id = {}
+        self.by_host_port = {}
+        self.by_hostname = {}
+        self.default = None
+        for site in sites:
+            hostname = site.hostname.lower()
+            self.by_id[site.id] = site
+            self.by_host_port[(hostname, site.port)] = site
+            # 同一主机名有多个端口时，优先默认站点
+            if hostname not in self.by_hostname or site.is_default_site:
+                self.by_hostname[hostname] = site
+            if site.is_default_site:
+                self.default = site
+        for site in sites:
+            slug = getattr(site, 'slug', None)
+            if slug:
+                self.by_hostname.setdefault(slug.lower(), site)
+        for alias, hostname in aliases.items():
+            site = self.by_hostname.get(hostname.lower())
+            if site is not None:
+                self.by_hostname.setdefault(alias.lower(), site)
+        if self.default is None and sites:
+            self.default = sites[0]
+        # 站点配置按需构建，随快照一起失效
+        self.configs = {}
+
+    def find(self, hostname, port=None):
+        """按主机名（及端口）查找站点，找不到时返回 None"""
+        hostname = (hostname or '').lower()
+        if port is not None:
+            site = self.by_host_port.get((hostname, port))
+            if site is not None:
+                return site
+        return self.by_hostname.get(hostname)
+
+
+class SiteRegistry:
+    def __init__(self):
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self, version):
+        from wagtail.models import Site
+        from .site_utils import SITE_MAPPINGS
+
+        sites = list(Site.objects.select_related('root_page').order_by('id'))
+        return SiteSnapshot(version, sites, SITE_MAPPINGS)
+
+    def snapshot(self):
+        """当前快照；版本号变化或快照过期时重新加载"""
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is not None and now - self._checked_at < VERSION_CHECK_INTERVAL:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and time.monotonic() - self._checked_at < VERSION_CHECK_INTERVAL:
+                return snapshot
+            version = cache.get(VERSION_KEY, 0)
+            if snapshot is None or snapshot.version != version or now - snapshot.loaded_at >= MAX_SNAPSHOT_AGE:
+                snapshot = self._load(version)
+                self._snapshot = snapshot
+            self._checked_at = time.monotonic()
+        return snapshot
+
+    def invalidate(self):
+        """递增版本号，各进程在下次检查时重新加载；本进程立即失效"""
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, 1, None)
+        self._snapshot = None
+
+    # ---- 查询 ----
+
+    def get_by_id(self, site_id):
+        return self.snapshot().by_id.get(site_id)
+
+    def get_by_hostname(self, hostname):
+        return self.snapshot().find(hostname)
+
+    def find_for_host(self, host):
+        """按 Host 头查找站点：主机名+端口 → 主机名/别名 → 默认站点"""
+        host = (host or '').lower()
+        hostname, _, port = host.partition(':')
+        snapshot = self.snapshot()
+        site = (
+            snapshot.find(hostname, int(port) if port.isdigit() else 80)
+            or snapshot.find(host)
+        )
+        return site or snapshot.default
+
+    def get_config(self, site_id, build):
+        """站点配置：每个快照版本只构建一次"""
+        snapshot = self.snapshot()
+        config = snapshot.configs.get(site_id)
+        if config is None:
+            config = build(site_id)
+            if site_id in snapshot.by_hostname or len(snapshot.configs) < MAX_EXTRA_CONFIGS:
+                snapshot.configs[site_id] = config
+        return config
+
+
+site_registry = SiteRegistry()
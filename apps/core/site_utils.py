@@ -2,10 +2,10 @@
 站点识别和管理工具
 """
 from django.conf import settings
-from django.core.cache import cache
-from wagtail.models import Site
 import logging
 
+from .site_registry import site_registry
+
 logger = logging.getLogger(__name__)
 
 # 导入配置管理器
@@ -100,33 +100,18 @@ def get_wagtail_site_from_request(request):
     """
     获取对应的Wagtail Site对象
     
+    从进程内站点注册表按 Host 匹配（主机名+端口 → 主机名/别名 → 默认站点），不产生网络 I/O。
+    返回的 Site 对象在请求间共享，只读不改。
+    
     Args:
         request: Django request对象
         
     Returns:
         Site: Wagtail Site对象
     """
-    cache_key = f"wagtail_site_{request.get_host()}"
-    site = cache.get(cache_key)
-    
+    site = site_registry.find_for_host(request.get_host())
     if site is None:
-        try:
-            # 尝试使用Wagtail的站点查找
-            site = Site.find_for_request(request)
-        except Site.DoesNotExist:
-            # 如果找不到，使用默认站点
-            try:
-                site = Site.objects.get(is_default_site=True)
-            except Site.DoesNotExist:
-                # 如果连默认站点都没有，创建一个
-                site = Site.objects.first()
-                if not site:
-                    logger.error("No Wagtail sites found in database")
-                    return None
-        
-        # 缓存结果5分钟
-        cache.set(cache_key, site, 300)
-    
+        logger.error("No Wagtail sites found in database")
     return site
 
 def normalize_site_identifier(site: str) -> str:
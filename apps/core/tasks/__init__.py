@@ -28,6 +28,9 @@ from .media_tasks import (
     batch_migrate_collection_files,
 )
 
+# 导入缓存失效队列任务
+from .revalidation import flush_revalidation_queue
+
 __all__ = [
     'batch_sync_article_weights',
     'sync_articles_to_opensearch_batch', 
@@ -45,4 +48,5 @@ __all__ = [
     'generate_specific_renditions_for_images',
     'migrate_image_files_on_collection_change',
     'batch_migrate_collection_files',
+    'flush_revalidation_queue',
 ]
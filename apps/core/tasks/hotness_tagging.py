@@ -10,7 +10,7 @@
 
 import logging
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import Dict, Optional
 from django.conf import settings
 from django.utils import timezone
 from celery import shared_task
@@ -23,23 +23,112 @@ from apps.core.utils.circuit_breaker import get_breaker
 logger = logging.getLogger(__name__)
 
 
+# 每篇文章上次写入的热度状态，用于跳过未变化的更新
+HOTNESS_STATE_TTL = 3600
+# 增量模式的上次运行时间
+HOTNESS_LAST_RUN_TTL = 86400
+
+
+def _hotness_state_key(site: str, article_id: str) -> str:
+    return f"hotness_sync:{site}:{article_id}"
+
+
+def _hotness_last_run_key(site: str) -> str:
+    return f"hotness_last_run:{site}"
+
+
+def _hotness_retry_key(site: str) -> str:
+    """上次运行中写入失败、需要在下次增量运行中重试的文章"""
+    return f"hotness_retry:{site}"
+
+
+def _build_hotness_doc(item: Dict, original_channel: str) -> Dict:
+    """根据分类结果构建ES局部更新文档"""
+    category = item['hotness_category']
+    update_doc = {
+        'hotness_score': item['hotness_score'],
+        'hotness_category': category,
+        'ctr_1h': item['ctr_1h'],
+        'pop_1h': item['pop_1h'],
+    }
+    
+    # 🎯 关键：根据分类动态设置channel字段
+    if category in ('hot', 'trending'):
+        update_doc['channel'] = category
+        update_doc['original_channel'] = original_channel
+    else:
+        # normal分类：恢复原始频道
+        update_doc['channel'] = original_channel
+    return update_doc
+
+
+def _iter_hotness_docs(rows, calculator, site: str, batch_size: int, pending_state: Dict, stats: Dict):
+    """
+    按批计算热度并产出需要写入ES的 (article_id, doc)，跳过与上次写入状态相同的文章
+    """
+    from django.core.cache import cache
+    
+    for batch_start in range(0, len(rows), batch_size):
+        batch = rows[batch_start:batch_start + batch_size]
+        # 频道查找表：article_id -> channel slug
+        channel_by_id = {str(row['id']): row['channel__slug'] or 'recommend' for row in batch}
+        
+        try:
+            classified = calculator.batch_classify_articles([
+                {'id': row['id'], 'publish_time': row['first_published_at'], 'quality_score': 1.0}
+                for row in batch
+            ], site)
+        except Exception as e:
+            logger.error(f"批次处理失败 {batch_start}-{batch_start + len(batch)}: {e}")
+            stats['errors'] += len(batch)
+            stats['failed_ids'].extend(channel_by_id)
+            continue
+        
+        stats['processed'] += len(classified)
+        synced = cache.get_many([_hotness_state_key(site, aid) for aid in channel_by_id])
+        
+        for item in classified:
+            article_id = str(item['id'])
+            doc = _build_hotness_doc(item, channel_by_id.get(article_id, 'recommend'))
+            fingerprint = (
+                doc['hotness_category'], round(doc['hotness_score'], 1),
+                round(doc['ctr_1h'], 4), doc['pop_1h'], doc['channel'],
+            )
+            if synced.get(_hotness_state_key(site, article_id)) == fingerprint:
+                stats['unchanged'] += 1
+                continue
+            pending_state[article_id] = fingerprint
+            yield article_id, doc
+
+
 @shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=3)
-def update_article_hotness_tags(self, site: str = None, hours_back: int = 72, batch_size: int = 100):
+def update_article_hotness_tags(self, site: str = None, hours_back: int = 72, batch_size: int = 100,
+                                incremental: bool = False):
     """
     更新文章热度标记
     
+    所有批次以流的方式写入ES，过程中不刷新索引，全部完成后统一刷新一次。
+    
     Args:
         site: 站点标识符
         hours_back: 回溯小时数，只处理这个时间内的文章
         batch_size: 批处理大小
+        incremental: 增量模式，只处理上次运行以来有新指标或新发布的文章
     """
+    from django.core.cache import cache
+    from django.db.models import Q
+    from apps.searchapp.bulk import bulk_partial_update
+    
     site = site or getattr(settings, 'SITE_HOSTNAME', 'localhost')
     
     try:
-        logger.info(f"开始更新文章热度标记: site={site}, hours_back={hours_back}")
+        logger.info(f"开始更新文章热度标记: site={site}, hours_back={hours_back}, incremental={incremental}")
+        
+        run_started = timezone.now()
+        calculator = HotnessCalculator()
         
         # 获取需要更新的文章
-        since = timezone.now() - timedelta(hours=hours_back)
+        since = run_started - timedelta(hours=hours_back)
         
         # 查询最近发布的文章
         articles_qs = ArticlePage.objects.live().filter(
@@ -55,104 +144,56 @@ def update_article_hotness_tags(self, site: str = None, hours_back: int = 72, ba
             # 单站点模式或站点不存在时不过滤
             pass
         
-        total_articles = articles_qs.count()
+        # 增量模式：只处理上次运行后有指标变化、新发布或上次写入失败的文章
+        last_run = cache.get(_hotness_last_run_key(site)) if incremental else None
+        if last_run:
+            active_ids = calculator.fetch_active_article_ids(last_run, site)
+            if active_ids is not None:
+                retry_ids = cache.get(_hotness_retry_key(site)) or []
+                active_pks = [int(aid) for aid in [*active_ids, *retry_ids] if aid.isdigit()]
+                articles_qs = articles_qs.filter(Q(id__in=active_pks) | Q(first_published_at__gte=last_run))
+        
+        rows = list(articles_qs.values('id', 'first_published_at', 'channel__slug'))
+        total_articles = len(rows)
         logger.info(f"找到 {total_articles} 篇文章需要更新热度标记")
         
         if total_articles == 0:
             logger.info("没有需要更新的文章")
+            cache.set(_hotness_last_run_key(site), run_started, timeout=HOTNESS_LAST_RUN_TTL)
+            cache.delete(_hotness_retry_key(site))
             return {"processed": 0, "updated": 0, "errors": 0}
         
-        # 初始化统计
-        processed = 0
-        updated = 0
-        errors = 0
+        stats = {'processed': 0, 'unchanged': 0, 'errors': 0, 'failed_ids': []}
+        pending_state = {}
         
-        # 分批处理
-        calculator = HotnessCalculator()
-        es_client = get_client()
-        write_index = get_index_name(site)  # 🎯 使用简化索引
+        # 流式批量写入，最后统一刷新一次
+        bulk_result = bulk_partial_update(
+            get_client(),
+            get_index_name(site),  # 🎯 使用简化索引
+            _iter_hotness_docs(rows, calculator, site, batch_size, pending_state, stats),
+            chunk_size=batch_size,
+            refresh="true",
+        )
         
-        for batch_start in range(0, total_articles, batch_size):
-            batch_articles = list(articles_qs[batch_start:batch_start + batch_size])
-            
-            try:
-                # 批量计算热度
-                article_data = []
-                for article in batch_articles:
-                    article_data.append({
-                        'id': article.id,
-                        'publish_time': article.first_published_at,
-                        'quality_score': getattr(article, 'quality_score', 1.0),
-                    })
-                
-                # 计算热度分类
-                classified = calculator.batch_classify_articles(article_data, site)
-                
-                # 批量更新ES索引
-                bulk_body = []
-                for item in classified:
-                    article_id = str(item['id'])
-                    category = item['hotness_category']
-                    
-                    # 准备更新文档
-                    update_doc = {
-                        'hotness_score': item['hotness_score'],
-                        'hotness_category': category,
-                        'ctr_1h': item['ctr_1h'],
-                        'pop_1h': item['pop_1h'],
-                    }
-                    
-                    # 🎯 关键：根据分类动态设置channel字段
-                    if category == 'hot':
-                        update_doc['channel'] = 'hot'
-                        update_doc['original_channel'] = item.get('primary_channel_slug', 'recommend')
-                    elif category == 'trending':
-                        update_doc['channel'] = 'trending'
-                        update_doc['original_channel'] = item.get('primary_channel_slug', 'recommend')
-                    else:
-                        # normal分类：恢复原始频道
-                        original_channel = _get_article_original_channel(batch_articles, article_id)
-                        update_doc['channel'] = original_channel
-                        if 'original_channel' in update_doc:
-                            del update_doc['original_channel']
-                    
-                    # 添加到批量操作
-                    bulk_body.extend([
-                        {"update": {"_index": write_index, "_id": article_id}},
-                        {"doc": update_doc, "doc_as_upsert": True}
-                    ])
-                
-                # 执行批量更新
-                if bulk_body:
-                    response = es_client.bulk(body=bulk_body, refresh=True)
-                    
-                    # 检查更新结果
-                    batch_updated = 0
-                    batch_errors = 0
-                    
-                    for item in response.get('items', []):
-                        if 'update' in item:
-                            if item['update'].get('status') in [200, 201]:
-                                batch_updated += 1
-                            else:
-                                batch_errors += 1
-                                logger.warning(f"ES更新失败: {item}")
-                    
-                    updated += batch_updated
-                    errors += batch_errors
-                    
-                    logger.info(f"批次处理完成: {len(classified)}篇文章, 更新成功{batch_updated}, 失败{batch_errors}")
-                
-                processed += len(classified)
-                
-            except Exception as e:
-                logger.error(f"批次处理失败 {batch_start}-{batch_start + len(batch_articles)}: {e}")
-                errors += len(batch_articles)
+        if bulk_result.succeeded:
+            cache.set_many(
+                {_hotness_state_key(site, aid): pending_state[aid] for aid in bulk_result.succeeded},
+                timeout=HOTNESS_STATE_TTL,
+            )
+        # 失败的文章记入重试列表，下次增量运行即使没有新指标也会重新处理
+        failed_ids = sorted(set(stats['failed_ids']) | set(bulk_result.failed))
+        if failed_ids:
+            cache.set(_hotness_retry_key(site), failed_ids, timeout=HOTNESS_LAST_RUN_TTL)
+        else:
+            cache.delete(_hotness_retry_key(site))
+        cache.set(_hotness_last_run_key(site), run_started, timeout=HOTNESS_LAST_RUN_TTL)
         
         result = {
-            "processed": processed,
-            "updated": updated,
-            "errors": errors,
+            "processed": stats['processed'],
+            "updated": len(bulk_result.succeeded),
+            "unchanged": stats['unchanged'],
+            "missing": len(bulk_result.missing),
+            "errors": stats['errors'] + len(bulk_result.failed),
             "total_articles": total_articles
         }
         
@@ -164,26 +205,13 @@ def update_article_hotness_tags(self, site: str = None, hours_back: int = 72, ba
         raise
 
 
-def _get_article_original_channel(articles: List[ArticlePage], article_id: str) -> str:
-    """获取文章的原始频道slug"""
-    try:
-        article = next((a for a in articles if str(a.id) == article_id), None)
-        if article and hasattr(article, 'channel') and article.channel:
-            return article.channel.slug
-    except:
-        pass
-    return 'recommend'
-
-
 @shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=2)
 def refresh_hot_trending_articles(self, site: str = None):
     """
     快速刷新hot/trending文章标记
     只处理最近1小时的文章，用于实时响应热点
     """
-    return update_article_hotness_tags.apply_async(
-        kwargs={'site': site, 'hours_back': 1, 'batch_size': 50}
-    ).get()
+    return update_article_hotness_tags(site=site, hours_back=1, batch_size=50, incremental=True)
 
 
 @shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=2)
@@ -219,39 +247,25 @@ def daily_hotness_cleanup(self, site: str = None):
         if total_old == 0:
             return {"cleaned": 0}
         
-        # 批量恢复原始频道
-        es_client = get_client()
-        write_index = get_index_name(site)  # 🎯 使用简化索引
-        cleaned = 0
+        # 批量恢复原始频道，全部写完后统一刷新一次
+        from apps.searchapp.bulk import bulk_partial_update
         
-        for batch_start in range(0, total_old, 100):
-            batch_articles = list(old_articles[batch_start:batch_start + 100])
-            bulk_body = []
-            
-            for article in batch_articles:
-                original_channel = 'recommend'
-                if hasattr(article, 'channel') and article.channel:
-                    original_channel = article.channel.slug
-                
-                bulk_body.extend([
-                    {"update": {"_index": write_index, "_id": str(article.id)}},
-                    {
-                        "doc": {
-                            "channel": original_channel,
-                            "hotness_category": "normal",
-                            "hotness_score": 0.0
-                        },
-                        "doc_as_upsert": True
-                    }
-                ])
-            
-            if bulk_body:
-                try:
-                    es_client.bulk(body=bulk_body, refresh=True)
-                    cleaned += len(batch_articles)
-                    logger.info(f"清理批次完成: {len(batch_articles)}篇文章")
-                except Exception as e:
-                    logger.error(f"清理批次失败: {e}")
+        def iter_cleanup_docs():
+            for row in old_articles.values('id', 'channel__slug').iterator(chunk_size=1000):
+                yield str(row['id']), {
+                    "channel": row['channel__slug'] or 'recommend',
+                    "hotness_category": "normal",
+                    "hotness_score": 0.0
+                }
+        
+        bulk_result = bulk_partial_update(
+            get_client(),
+            get_index_name(site),  # 🎯 使用简化索引
+            iter_cleanup_docs(),
+            chunk_size=100,
+            refresh="true",
+        )
+        cleaned = len(bulk_result.succeeded)
         
         result = {"cleaned": cleaned, "total_old": total_old}
         logger.info(f"每日热度清理完成: {result}")
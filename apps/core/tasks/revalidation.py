@@ -0,0 +1,335 @@
+"""
+缓存失效队列
+
+发布事件与 Webhook 只把需要失效的 tag/path 写入按站点划分的 Redis 集合，
+由短延迟的批处理任务统一下发：
+- 去重窗口内重复的 tag/path 只下发一次
+- Next.js revalidate 端点按块批量调用，CDN 刷新按各提供商的单次 URL 上限分块
+- 每个块按指数退避重试，最终失败的条目放回队列等待下一次调度
+- 入队量、去重数、下发数、失败数与端到端延迟记录在 Redis 中，供 revalidate_status 查询
+"""
+import hashlib
+import hmac
+import json
+import logging
+import time
+import uuid
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.core.utils.latency_metrics import latency_summary, record_latency
+from apps.core.utils.redis_client import get_redis, redis_key
+
+logger = logging.getLogger(__name__)
+
+# 去重窗口（秒）：窗口内的失效请求合并为一次下发
+REVALIDATION_WINDOW_SECONDS = 2
+# 每次调用 Next.js revalidate 端点携带的 tag/path 数
+NEXT_BATCH_SIZE = 100
+# 单块最大重试次数与首次退避秒数
+MAX_RETRIES = 3
+INITIAL_BACKOFF = 0.5
+
+PENDING_SITES_KEY = redis_key('revalidate', 'sites')
+STATS_KEY = redis_key('revalidate', 'stats')
+LATENCY_NAMESPACE = 'revalidate'
+FLUSH_SCHEDULED_KEY = 'revalidate:flush_scheduled'
+LOCAL_STATS_KEY = 'revalidate:stats'
+
+
+def _queue_key(kind, site):
+    return redis_key('revalidate', kind, site)
+
+
+def _since_key(site):
+    return redis_key('revalidate', 'since', site)
+
+
+def _decode(values):
+    return [v.decode() if isinstance(v, bytes) else v for v in values]
+
+
+# === 统计 ===
+
+def _incr_stats(client=None, **fields):
+    fields = {k: v for k, v in fields.items() if v}
+    if not fields:
+        return
+    if client is not None:
+        try:
+            pipe = client.pipeline(transaction=False)
+            for field, amount in fields.items():
+                pipe.hincrby(STATS_KEY, field, amount)
+            pipe.execute()
+            return
+        except Exception as e:
+            logger.warning(f"Failed to record revalidation stats: {e}")
+    stats = cache.get(LOCAL_STATS_KEY) or {}
+    for field, amount in fields.items():
+        stats[field] = stats.get(field, 0) + amount
+    cache.set(LOCAL_STATS_KEY, stats, None)
+
+
+def _record_latency(client, latency_ms):
+    _incr_stats(client, flushes=1)
+    record_latency(LATENCY_NAMESPACE, 'ok', latency_ms)
+
+
+def get_revalidation_stats():
+    """读取累计计数、最近延迟分位数和当前积压"""
+    client = get_redis()
+    pending = {}
+    if client is not None:
+        raw = {k.decode() if isinstance(k, bytes) else k: v.decode() if isinstance(v, bytes) else v
+               for k, v in client.hgetall(STATS_KEY).items()}
+        for site in _decode(client.smembers(PENDING_SITES_KEY)):
+            pending[site] = client.scard(_queue_key('tags', site)) + client.scard(_queue_key('paths', site))
+    else:
+        raw = cache.get(LOCAL_STATS_KEY) or {}
+
+    latency = latency_summary(LATENCY_NAMESPACE)
+    # 旧版本把最近下发时间写在计数哈希中
+    counters = {k: int(v) for k, v in raw.items() if k != 'last_flush_at'}
+    sent = counters.get('items_sent', 0)
+    failed = counters.get('items_failed', 0)
+    return {
+        'counters': counters,
+        'pending': pending,
+        'last_flush_at': latency['last_at'],
+        'latency_ms': {key: latency[key] for key in ('samples', 'p50', 'p95', 'max')},
+        'success_rate': round(sent / (sent + failed), 4) if sent + failed else 1.0,
+    }
+
+
+# === 入队 ===
+
+def enqueue_revalidation(site, tags=(), paths=()):
+    """
+    把站点需要失效的 tag/path 加入队列，并确保去重窗口内只调度一次下发
+
+    Redis 不可用时（如测试环境的本地缓存）交给 Celery 任务立即下发，
+    不在发布请求中等待 Next.js/CDN 与重试退避。
+
+    Returns:
+        dict: 本次新入队与被去重的条目数
+    """
+    tags = [t for t in dict.fromkeys(tags) if t]
+    paths = [p for p in dict.fromkeys(paths) if p]
+    if not site or not (tags or paths):
+        return {'queued': 0, 'deduplicated': 0}
+
+    client = get_redis()
+    if client is None:
+        dispatch_revalidation_task.delay(site, tags, paths, started_at=time.time())
+        return {'queued': len(tags) + len(paths), 'deduplicated': 0}
+
+    try:
+        pipe = client.pipeline(transaction=False)
+        if tags:
+            pipe.sadd(_queue_key('tags', site), *tags)
+        if paths:
+            pipe.sadd(_queue_key('paths', site), *paths)
+        pipe.sadd(PENDING_SITES_KEY, site)
+        pipe.set(_since_key(site), time.time(), nx=True)
+        results = pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to enqueue revalidation for {site}, dispatching via task: {e}")
+        dispatch_revalidation_task.delay(site, tags, paths, started_at=time.time())
+        return {'queued': len(tags) + len(paths), 'deduplicated': 0}
+
+    added = sum(results[:int(bool(tags)) + int(bool(paths))])
+    deduplicated = len(tags) + len(paths) - added
+    _incr_stats(client, enqueued=added, deduplicated=deduplicated)
+
+    if cache.add(FLUSH_SCHEDULED_KEY, 1, timeout=REVALIDATION_WINDOW_SECONDS):
+        flush_revalidation_queue.apply_async(countdown=REVALIDATION_WINDOW_SECONDS)
+    return {'queued': added, 'deduplicated': deduplicated}
+
+
+def article_revalidation_targets(article, site_hostname):
+    """文章发布/下线时需要失效的 Next.js tag 与页面路径"""
+    tags = [f"site:{site_hostname}", f"page:{article.id}"]
+    paths = ["/", "/news"]
+    channel = getattr(article, 'channel', None)
+    if channel is not None:
+        tags.append(f"channel:{channel.slug}")
+        paths.append(f"/channel/{channel.slug}")
+    if getattr(article, 'slug', None):
+        paths.append(f"/news/{article.slug}")
+    return tags, paths
+
+
+# === 下发 ===
+
+def _with_retries(send, label):
+    """执行一次下发，失败时按指数退避重试；返回 (是否成功, 重试次数)"""
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            if send():
+                return True, attempt
+        except Exception as e:
+            logger.warning(f"{label} failed (attempt {attempt + 1}): {e}")
+        if attempt < MAX_RETRIES:
+            time.sleep(INITIAL_BACKOFF * (2 ** attempt))
+    return False, MAX_RETRIES
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _post_next_batch(site, tags, paths):
+    """调用 Next.js revalidate 端点；请求体整体用 HMAC-SHA256 签名并放在请求头中"""
+    from apps.api.utils.http import http_client
+
+    body = {
+        'event': 'batch',
+        'site': site,
+        'entity': 'batch',
+        'tags': tags,
+        'paths': paths,
+        'timestamp': int(time.time() * 1000),
+        'nonce': uuid.uuid4().hex,
+    }
+    raw = json.dumps(body, sort_keys=True, separators=(',', ':'))
+    signature = hmac.new(settings.WEBHOOK_SECRET_KEY.encode(), raw.encode(), hashlib.sha256).hexdigest()
+    response = http_client.post(
+        settings.FRONTEND_REVALIDATE_URL,
+        data=raw.encode(),
+        headers={'Content-Type': 'application/json', 'X-Webhook-Signature': signature},
+    )
+    response.raise_for_status()
+    return True
+
+
+def _cdn_urls(provider, paths):
+    """把路径展开为 CDN 完整URL；返回 (url, 原路径) 对，未配置域名的站内路径被跳过"""
+    domain = (provider.domain or '').rstrip('/')
+    pairs = []
+    for path in paths:
+        if path.startswith(('http://', 'https://')):
+            pairs.append((path, path))
+        elif domain:
+            prefix = domain if domain.startswith(('http://', 'https://')) else f"https://{domain}"
+            pairs.append((f"{prefix}{path}", path))
+    return pairs
+
+
+def dispatch_revalidation(site, tags, paths, started_at=None):
+    """
+    把一个站点的 tag/path 批量下发到 Next.js 与 CDN
+
+    Returns:
+        (失败的 tags, 失败的 paths)
+    """
+    from apps.core.cdn import CDNManager
+
+    client = get_redis()
+    failed_tags, failed_paths = [], []
+    retries = requests = 0
+
+    # 1. Next.js：tag 与站内路径合并在同一批请求中；完整URL只用于CDN刷新
+    items = [('tag', t) for t in sorted(tags)] + [
+        ('path', p) for p in sorted(paths) if not p.startswith(('http://', 'https://'))
+    ]
+    for chunk in _chunks(items, NEXT_BATCH_SIZE):
+        chunk_tags = [v for kind, v in chunk if kind == 'tag']
+        chunk_paths = [v for kind, v in chunk if kind == 'path']
+        ok, attempts = _with_retries(
+            lambda: _post_next_batch(site, chunk_tags, chunk_paths), f"Next.js revalidate for {site}"
+        )
+        requests += attempts + 1
+        retries += attempts
+        if not ok:
+            failed_tags.extend(chunk_tags)
+            failed_paths.extend(chunk_paths)
+
+    # 2. CDN：只刷新路径，按提供商单次上限分块
+    cdn_purged = cdn_requests = 0
+    manager = CDNManager()
+    provider = manager.create_cdn_provider(site) if paths else None
+    if provider is not None:
+        for chunk in _chunks(_cdn_urls(provider, sorted(paths)), provider.max_purge_urls):
+            urls = [url for url, _ in chunk]
+            ok, attempts = _with_retries(lambda: provider.purge_cache(urls), f"CDN purge for {site}")
+            cdn_requests += attempts + 1
+            retries += attempts
+            if ok:
+                cdn_purged += len(chunk)
+            else:
+                failed_paths.extend(path for _, path in chunk)
+        if cdn_purged:
+            manager.mark_cache_purged(site)
+
+    failed_paths = list(dict.fromkeys(failed_paths))
+    sent = len(tags) + len(paths) - len(failed_tags) - len(failed_paths)
+    _incr_stats(
+        client,
+        items_sent=sent,
+        items_failed=len(failed_tags) + len(failed_paths),
+        next_requests=requests,
+        cdn_requests=cdn_requests,
+        cdn_urls_purged=cdn_purged,
+        retries=retries,
+    )
+    if started_at is not None:
+        _record_latency(client, (time.time() - started_at) * 1000)
+
+    logger.info(
+        f"Revalidated {site}: {len(tags)} tags, {len(paths)} paths, "
+        f"{cdn_purged} CDN urls, {len(failed_tags) + len(failed_paths)} failed"
+    )
+    return failed_tags, failed_paths
+
+
+@shared_task(ignore_result=True)
+def dispatch_revalidation_task(site, tags, paths, started_at=None):
+    """无 Redis 队列时的后台下发：不做跨请求去重，失败条目只记录日志"""
+    failed_tags, failed_paths = dispatch_revalidation(site, tags, paths, started_at=started_at)
+    if failed_tags or failed_paths:
+        logger.error(f"Dropped {len(failed_tags) + len(failed_paths)} revalidation items for {site}")
+
+
+@shared_task(ignore_result=True)
+def flush_revalidation_queue():
+    """取出所有站点的待失效条目并批量下发；失败的条目放回队列"""
+    client = get_redis()
+    if client is None:
+        return 0
+
+    # 先释放调度标记：下发期间新到的失效请求会调度下一次批处理
+    cache.delete(FLUSH_SCHEDULED_KEY)
+    total = 0
+    for site in _decode(client.smembers(PENDING_SITES_KEY)):
+        pipe = client.pipeline(transaction=True)
+        pipe.smembers(_queue_key('tags', site))
+        pipe.smembers(_queue_key('paths', site))
+        pipe.get(_since_key(site))
+        pipe.delete(_queue_key('tags', site), _queue_key('paths', site), _since_key(site))
+        pipe.srem(PENDING_SITES_KEY, site)
+        tags, paths, since, _, _ = pipe.execute()
+        tags, paths = _decode(tags), _decode(paths)
+        if not (tags or paths):
+            continue
+
+        started_at = float(since) if since else time.time()
+        failed_tags, failed_paths = dispatch_revalidation(site, tags, paths, started_at=started_at)
+        total += len(tags) + len(paths)
+
+        if failed_tags or failed_paths:
+            # 保留最早的入队时间，延迟统计反映真实的端到端耗时
+            pipe = client.pipeline(transaction=False)
+            if failed_tags:
+                pipe.sadd(_queue_key('tags', site), *failed_tags)
+            if failed_paths:
+                pipe.sadd(_queue_key('paths', site), *failed_paths)
+            pipe.set(_since_key(site), started_at, nx=True)
+            pipe.sadd(PENDING_SITES_KEY, site)
+            pipe.execute()
+            logger.error(
+                f"Requeued {len(failed_tags) + len(failed_paths)} revalidation items for {site}"
+            )
+    return total
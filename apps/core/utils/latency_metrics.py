@@ -0,0 +1,115 @@
+"""
+Shared latency recorder.
+
+Each namespace keeps a per-status counter hash, the last LATENCY_SAMPLES
+latency samples and the time of the last sample in Redis. Several
+namespaces can be recorded in one pipeline round trip. Without Redis
+(e.g. LocMemCache in tests) the same data lives in the Django cache.
+"""
+import logging
+import time
+
+from django.core.cache import cache
+
+from .redis_client import get_redis, redis_key
+
+logger = logging.getLogger(__name__)
+
+LATENCY_SAMPLES = 200
+
+NAMESPACES_KEY = 'latency:namespaces'
+
+
+def _counts_key(namespace):
+    return redis_key('latency', namespace, 'counts')
+
+
+def _samples_key(namespace):
+    return redis_key('latency', namespace, 'samples')
+
+
+def _local_key(namespace):
+    return f"latency:{namespace}"
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def record_latencies(entries):
+    """
+    Record several (namespace, status, ms) entries in one round trip.
+
+    ms=None only counts the status (e.g. a skipped stage).
+    """
+    entries = [(namespace, status, None if ms is None else round(ms, 2)) for namespace, status, ms in entries]
+    if not entries:
+        return
+    now = time.time()
+    client = get_redis()
+    if client is not None:
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.sadd(redis_key(NAMESPACES_KEY), *{namespace for namespace, _, _ in entries})
+            for namespace, status, ms in entries:
+                pipe.hincrby(_counts_key(namespace), status, 1)
+                if ms is not None:
+                    pipe.lpush(_samples_key(namespace), ms)
+                    pipe.ltrim(_samples_key(namespace), 0, LATENCY_SAMPLES - 1)
+                    pipe.hset(_counts_key(namespace), 'last_at', now)
+            pipe.execute()
+            return
+        except Exception as e:
+            logger.warning(f"Failed to record latency metrics: {e}")
+
+    namespaces = cache.get(NAMESPACES_KEY) or set()
+    for namespace, status, ms in entries:
+        stats = cache.get(_local_key(namespace)) or {'counts': {}, 'samples': [], 'last_at': None}
+        stats['counts'][status] = stats['counts'].get(status, 0) + 1
+        if ms is not None:
+            stats['samples'] = ([ms] + stats['samples'])[:LATENCY_SAMPLES]
+            stats['last_at'] = now
+        cache.set(_local_key(namespace), stats, None)
+        namespaces.add(namespace)
+    cache.set(NAMESPACES_KEY, namespaces, None)
+
+
+def record_latency(namespace, status, ms):
+    record_latencies([(namespace, status, ms)])
+
+
+def _percentile(samples, pct):
+    return samples[min(len(samples) - 1, int(len(samples) * pct))] if samples else None
+
+
+def latency_summary(namespace):
+    """Status counts, p50/p95/max of the recent samples and the time of the last sample."""
+    client = get_redis()
+    if client is not None:
+        raw = {_decode(k): _decode(v) for k, v in client.hgetall(_counts_key(namespace)).items()}
+        last_at = raw.pop('last_at', None)
+        counts = {status: int(count) for status, count in raw.items()}
+        samples = [float(v) for v in client.lrange(_samples_key(namespace), 0, -1)]
+    else:
+        stats = cache.get(_local_key(namespace)) or {'counts': {}, 'samples': [], 'last_at': None}
+        counts, samples, last_at = stats['counts'], stats['samples'], stats['last_at']
+
+    samples = sorted(samples)
+    return {
+        'counts': counts,
+        'samples': len(samples),
+        'p50': _percentile(samples, 0.5),
+        'p95': _percentile(samples, 0.95),
+        'max': samples[-1] if samples else None,
+        'last_at': float(last_at) if last_at else None,
+    }
+
+
+def latency_namespaces(prefix=''):
+    """Recorded namespaces starting with prefix."""
+    client = get_redis()
+    if client is not None:
+        namespaces = {_decode(v) for v in client.smembers(redis_key(NAMESPACES_KEY))}
+    else:
+        namespaces = cache.get(NAMESPACES_KEY) or set()
+    return sorted(namespace for namespace in namespaces if namespace.startswith(prefix))
@@ -0,0 +1,49 @@
+import threading
+
+from django.conf import settings
+
+# One client per cache alias; redis-py clients are thread-safe and their
+# connection pools reset themselves after fork.
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_redis(alias: str = "default"):
+    """
+    Return a redis-py client for the Redis server behind the given cache alias.
+
+    Used where the Django cache API is not enough (sets, sorted sets, pipelines,
+    pub/sub). The client is built from the alias' LOCATION with the public
+    redis-py API and reused per process. Returns None when the cache backend is
+    not Redis (e.g. LocMemCache in tests), so callers must keep a non-Redis
+    fallback.
+    """
+    client = _clients.get(alias)
+    if client is not None:
+        return client
+    config = settings.CACHES.get(alias, {})
+    if "redis" not in config.get("BACKEND", "").lower():
+        return None
+    location = config.get("LOCATION")
+    if isinstance(location, str):
+        location = location.split(",")
+    if isinstance(location, (list, tuple)):
+        # With several servers the first one is the primary.
+        location = location[0].strip() if location else None
+    if not location:
+        return None
+    try:
+        import redis
+        with _clients_lock:
+            client = _clients.get(alias)
+            if client is None:
+                client = _clients[alias] = redis.Redis.from_url(location)
+        return client
+    except Exception:
+        return None
+
+
+def redis_key(*parts) -> str:
+    """Build a raw Redis key under the same prefix as the default cache."""
+    prefix = settings.CACHES.get("default", {}).get("KEY_PREFIX", "idp_cms")
+    return ":".join([prefix, *[str(p) for p in parts]])
@@ -0,0 +1,201 @@
+"""
+结构化、可采样、非阻塞的日志
+
+- 请求上下文：CorrelationIdMiddleware 为每个请求记下开始时间与采样点，RequestLogContextFilter 把
+  correlation_id、path、elapsed_ms（请求开始至今的毫秒数）和采样点写入日志记录
+- 采样：SamplingFilter 按 logger 名最长前缀匹配采样率（settings.LOG_SAMPLING_RATES），只作用于 INFO 及以下级别；
+  采样点按请求生成，同一请求在同一采样率下的日志要么全部保留、要么全部丢弃
+- 延迟格式化：日志参数一律用 %s 占位传入，不要用 f-string；lazy_json 包装的对象只在真正输出时才序列化
+- 非阻塞输出：start_queue_logging 把指定 logger 的处理器换成 QueueHandler，由后台 QueueListener 线程
+  执行格式化与写入；请求线程只做过滤与入队。处理器相同的 logger 共用一个队列与监听线程，各 logger
+  的日志仍只写到它原来的处理器；队列满时丢弃并计数（dropped_log_records），不阻塞也不打印错误
+- JsonFormatter 输出单行 JSON，extra={"fields": {...}} 中的字段原样并入
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+# 未配置采样率的 logger 全部保留
+DEFAULT_SAMPLE_RATE = 1.0
+QUEUE_SIZE = 10000
+
+
+class lazy_json:
+    """只在日志真正输出时才执行 json.dumps"""
+
+    __slots__ = ('obj',)
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def __str__(self):
+        return json.dumps(self.obj, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """按 logger 前缀采样 INFO 及以下级别的日志（WARNING 及以上始终保留）"""
+
+    def __init__(self, rates=None):
+        super().__init__()
+        if rates is None:
+            from django.conf import settings
+            rates = getattr(settings, 'LOG_SAMPLING_RATES', {})
+        self.rates = dict(rates)
+        self._resolved = {}
+
+    def rate_for(self, name):
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = DEFAULT_SAMPLE_RATE
+            prefix = name
+            while prefix:
+                if prefix in self.rates:
+                    rate = self.rates[prefix]
+                    break
+                prefix = prefix.rpartition('.')[0]
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate_for(record.name)
+        if rate >= 1.0:
+            return True
+        if rate <= 0.0:
+            return False
+        # 请求外的日志随机取采样点并记在记录上，队列模式下处理器上的过滤器再次判断时结果一致
+        point = getattr(record, 'sample_point', None)
+        if point is None:
+            point = record.sample_point = random.random()
+        return point < rate
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    进程内队列处理器：不在调用线程格式化消息
+
+    标准 QueueHandler.prepare 会先格式化再入队（为了可以跨进程序列化），这里队列只在进程内使用，
+    记录原样入队，由监听线程格式化。日志参数入队后不应再被修改。
+    有界队列已满时直接丢弃并计数：标准实现会经 handleError 为每条丢弃的记录打印一次堆栈。
+    """
+
+    def __init__(self, queue):
+        super().__init__(queue)
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """单行 JSON 日志"""
+
+    CONTEXT_FIELDS = ('correlation_id', 'path', 'elapsed_ms', 'user_id')
+
+    def format(self, record):
+        payload = {
+            'ts': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for name in self.CONTEXT_FIELDS:
+            value = getattr(record, name, None)
+            if value not in (None, 'N/A'):
+                payload[name] = value
+        fields = getattr(record, 'fields', None)
+        if fields:
+            payload.update(fields)
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+# 每组处理器一个 (队列处理器, 监听线程)
+_listeners = []
+# 接入队列前各 logger 的处理器，停止时恢复
+_original_handlers = {}
+_hooks_registered = False
+
+
+def start_queue_logging(logger_names=('', 'django', 'apps')):
+    """
+    把各 logger 的处理器换成队列处理器，由后台线程写出
+
+    处理器列表相同的 logger 共用一个队列与监听线程，其余各自一个，路由与同步写出时一致：
+    每条记录只写到所属 logger 原来的处理器，向上传播时再由上级 logger 的队列处理。
+    请求上下文与采样过滤器挂在队列处理器上，在调用线程执行（线程本地的请求只在调用线程可见）；
+    目标处理器上的同名过滤器在监听线程中沿用记录上已填好的上下文与采样点。
+    """
+    global _hooks_registered
+    if _listeners:
+        return
+
+    from apps.core.middleware import RequestLogContextFilter
+
+    groups = {}
+    for name in logger_names:
+        logger = logging.getLogger(name or None)
+        if logger.handlers:
+            groups.setdefault(tuple(logger.handlers), []).append(logger)
+    if not groups:
+        return
+
+    for handlers, loggers in groups.items():
+        log_queue = queue.Queue(QUEUE_SIZE)
+        queue_handler = DeferredQueueHandler(log_queue)
+        queue_handler.addFilter(RequestLogContextFilter())
+        queue_handler.addFilter(SamplingFilter())
+        for logger in loggers:
+            _original_handlers[logger] = list(logger.handlers)
+            logger.handlers = [queue_handler]
+        listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        _listeners.append((queue_handler, listener))
+
+    if not _hooks_registered:
+        atexit.register(stop_queue_logging)
+        # gunicorn 预加载后 fork 出的 worker 没有监听线程，需要重新启动
+        os.register_at_fork(after_in_child=_restart_listeners)
+        _hooks_registered = True
+
+
+def _restart_listeners():
+    for _, listener in _listeners:
+        listener._thread = None
+        listener.start()
+
+
+def dropped_log_records():
+    """队列已满而丢弃的日志条数（本进程累计）"""
+    return sum(queue_handler.dropped for queue_handler, _ in _listeners)
+
+
+def stop_queue_logging(restore=False):
+    """
+    停止监听线程（写完队列中剩余的日志）
+
+    restore=True 时恢复各 logger 原来的处理器，回到同步写出
+    """
+    for _, listener in _listeners:
+        if listener._thread is not None:
+            listener.stop()
+    if restore:
+        for logger, handlers in _original_handlers.items():
+            logger.handlers = handlers
+        _original_handlers.clear()
+        _listeners.clear()
@@ -0,0 +1,66 @@
+"""
+管理命令：对比发布时两种缓存失效方式的耗时
+
+- pattern:   旧实现，delete_pattern('page_*_<id>_*') + delete_pattern('article_list_*')
+- namespace: 新实现，对相关命名空间计数器各执行一次 INCR
+
+使用方法（需要 Redis 缓存后端，会写入大量测试键，请勿在生产库运行）：
+python manage.py benchmark_publish_invalidation --keys 1000000
+"""
+
+import time
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from apps.api.utils.cache_namespace import (
+    AGGREGATE_NS, article_ns, bump_namespaces, channel_ns, site_ns,
+)
+from apps.core.utils.redis_client import get_redis
+
+
+class Command(BaseCommand):
+    help = '在给定缓存键规模下对比 delete_pattern 与命名空间 INCR 的发布失效延迟'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keys', type=int, default=1000000, help='预先写入的缓存键数量（默认100万）')
+        parser.add_argument('--runs', type=int, default=5, help='每种方式的执行次数（默认5）')
+        parser.add_argument('--skip-populate', action='store_true', help='跳过写入测试键')
+
+    def handle(self, *args, **options):
+        client = get_redis()
+        if client is None or not hasattr(cache, 'delete_pattern'):
+            self.stdout.write(self.style.WARNING('⚠️ 当前缓存后端不支持 delete_pattern，只测试命名空间方式'))
+
+        if client is not None and not options['skip_populate']:
+            self._populate(client, options['keys'])
+        if client is not None:
+            self.stdout.write(f'📊 当前 Redis 键数量: {client.dbsize()}')
+
+        runs = options['runs']
+        if hasattr(cache, 'delete_pattern'):
+            self._report('pattern', runs, lambda i: (
+                cache.delete_pattern(f'page_*_bench{i}_*'),
+                cache.delete_pattern('article_list_bench_*'),
+            ))
+        self._report('namespace', runs, lambda i: bump_namespaces([
+            article_ns(f'bench{i}'), site_ns('bench.local'), AGGREGATE_NS, channel_ns('bench'),
+        ]))
+
+    def _populate(self, client, total):
+        self.stdout.write(f'✍️ 写入 {total} 个测试键...')
+        pipe = client.pipeline(transaction=False)
+        for i in range(total):
+            pipe.set(f'bench:filler:{i}', b'1', ex=3600)
+            if i % 10000 == 9999:
+                pipe.execute()
+        pipe.execute()
+
+    def _report(self, label, runs, invalidate):
+        timings = []
+        for i in range(runs):
+            started = time.perf_counter()
+            invalidate(i)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        self.stdout.write(
+            f'  {label:<10} p50={timings[len(timings) // 2]:.2f}ms max={timings[-1]:.2f}ms'
+        )
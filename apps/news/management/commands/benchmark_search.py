@@ -0,0 +1,61 @@
+"""
+管理命令：对比数据库搜索两种实现的耗时
+
+- legacy:   逐词 icontains + Case/When 排序（旧实现）
+- fulltext: search_vector GIN 索引 + SearchRank（新实现）
+
+使用方法：
+python manage.py benchmark_search
+python manage.py benchmark_search --query 国务院 --query 经济形势 --runs 20
+"""
+
+import time
+from django.core.management.base import BaseCommand
+from apps.news.models.article import ArticlePage
+from apps.api.utils.search_utils import (
+    apply_fulltext_search,
+    build_search_query,
+    fulltext_search_available,
+)
+
+DEFAULT_QUERIES = ['国务院', '经济形势', '人工智能发展', '教育改革政策']
+
+
+class Command(BaseCommand):
+    help = '对比 icontains 与全文索引两种数据库搜索的延迟（建议在百万级数据的压测库上运行）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--query', action='append', dest='queries', help='搜索词，可重复指定')
+        parser.add_argument('--runs', type=int, default=10, help='每个搜索词的执行次数（默认10）')
+        parser.add_argument('--size', type=int, default=20, help='每次取回的结果数（默认20）')
+
+    def handle(self, *args, **options):
+        if not fulltext_search_available():
+            self.stdout.write(self.style.ERROR('❌ 全文检索需要 PostgreSQL'))
+            return
+
+        queries = options['queries'] or DEFAULT_QUERIES
+        runs = options['runs']
+        size = options['size']
+        base = ArticlePage.objects.live()
+
+        self.stdout.write(f'📊 文章总数: {base.count()}，每个搜索词执行 {runs} 次')
+
+        for label, runner in (('legacy', self._legacy), ('fulltext', apply_fulltext_search)):
+            timings = []
+            for q in queries:
+                for _ in range(runs):
+                    started = time.perf_counter()
+                    list(runner(base, q).values_list('id', flat=True)[:size])
+                    timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            p50 = timings[len(timings) // 2]
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(f'  {label:<9} p50={p50:.1f}ms p95={p95:.1f}ms max={timings[-1]:.1f}ms')
+
+    def _legacy(self, queryset, q):
+        fields = [('title', 10), ('excerpt', 5), ('body', 1)]
+        search_query, rank_annotation = build_search_query(q, fields)
+        return queryset.filter(search_query).annotate(
+            search_rank=rank_annotation
+        ).order_by('-search_rank', '-last_published_at')
@@ -0,0 +1,59 @@
+"""
+管理命令：回填文章全文检索向量
+
+使用方法：
+python manage.py update_search_vectors
+python manage.py update_search_vectors --only-missing
+python manage.py update_search_vectors --batch-size 1000
+"""
+
+from django.core.management.base import BaseCommand
+from apps.news.models.article import ArticlePage
+from apps.api.utils.search_utils import fulltext_search_available, update_search_vector
+
+
+class Command(BaseCommand):
+    help = '按批次重建 ArticlePage.search_vector（数据库全文检索列）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--only-missing',
+            action='store_true',
+            help='只处理 search_vector 为空的文章',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='批处理大小（默认500）',
+        )
+
+    def handle(self, *args, **options):
+        if not fulltext_search_available():
+            self.stdout.write(self.style.ERROR('❌ 当前数据库不支持全文检索列（需要 PostgreSQL）'))
+            return
+
+        batch_size = options['batch_size']
+        queryset = ArticlePage.objects.order_by('id')
+        if options['only_missing']:
+            queryset = queryset.filter(search_vector__isnull=True)
+
+        total = queryset.count()
+        self.stdout.write(f'📊 需要处理 {total} 篇文章，批大小: {batch_size}')
+
+        processed = 0
+        last_id = 0
+        while True:
+            # 基于主键的游标分页，避免大偏移量扫描
+            batch = list(
+                queryset.filter(id__gt=last_id).only('id', 'title', 'excerpt', 'body')[:batch_size]
+            )
+            if not batch:
+                break
+            for article in batch:
+                update_search_vector(article)
+            processed += len(batch)
+            last_id = batch[-1].id
+            self.stdout.write(f'  ✓ {processed}/{total}')
+
+        self.stdout.write(self.style.SUCCESS(f'✅ 已更新 {processed} 篇文章的检索向量'))
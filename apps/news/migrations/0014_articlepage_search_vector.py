@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2025-10-02 10:12
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0013_alter_articlepage_categories_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='articlepage',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='检索向量'),
+        ),
+        migrations.AddIndex(
+            model_name='articlepage',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='art_search_vector_gin'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+BATCH_SIZE = 500
+
+
+def backfill_search_vectors(apps, schema_editor):
+    """为已有文章计算 search_vector，避免切换到全文检索后旧文章从 ?q= 结果中消失"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    from apps.api.utils.search_utils import build_search_document, build_search_vector
+
+    ArticlePage = apps.get_model('news', 'ArticlePage')
+    queryset = ArticlePage.objects.filter(search_vector__isnull=True).order_by('id')
+    last_id = 0
+    while True:
+        batch = list(queryset.filter(id__gt=last_id).only('id', 'title', 'excerpt', 'body')[:BATCH_SIZE])
+        if not batch:
+            break
+        for article in batch:
+            ArticlePage.objects.filter(pk=article.pk).update(
+                search_vector=build_search_vector(build_search_document(article))
+            )
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+    # 逐条提交，大表回填不会长时间持有一个事务
+    atomic = False
+
+    dependencies = [
+        ('news', '0014_articlepage_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 from django import forms
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from wagtail.fields import RichTextField
 from wagtail.models import Page, Site
 from wagtail.admin.panels import (
@@ -182,6 +184,10 @@ class ArticlePage(Page):
                                      help_text="实际发布时间，可不同于创建时间")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
     
+    # === 全文检索 ===
+    # 由 jieba 预分词后生成的 tsvector，保存时自动维护（见 news.signals）
+    search_vector = SearchVectorField(null=True, editable=False, verbose_name="检索向量")
+    
     @property
     def effective_publish_time(self):
         """
@@ -411,6 +417,8 @@ class ArticlePage(Page):
             # Hero轮播相关索引
             models.Index(fields=['is_hero', 'weight', 'publish_at'], name='art_hero_weight_pub'),
             models.Index(fields=['is_hero', 'cover'], name='art_hero_cover'),
+            # 全文检索索引
+            GinIndex(fields=['search_vector'], name='art_search_vector_gin'),
         ]
     
     def __str__(self):
@@ -200,9 +200,63 @@ class Topic(ClusterableModel):
         
         if limit:
             queryset = queryset[:limit]
-            
+
         return queryset
 
+    @classmethod
+    def load_recent_articles(cls, topics, limit=5):
+        """
+        一次查询加载多个专题各自最近发布的文章
+
+        在文章-专题关联表上按专题分区做 ROW_NUMBER() 窗口排序，只取每个专题的前 limit 篇，
+        结果以字典列表挂在每个专题的 recent_article_list 属性上。
+
+        Args:
+            topics: 专题列表或查询集
+            limit: 每个专题的文章数量
+
+        Returns:
+            list: 挂好最近文章的专题
+        """
+        from django.db.models import F, Window
+        from django.db.models.functions import RowNumber
+
+        topics = list(topics)
+        by_id = {topic.pk: topic for topic in topics}
+        for topic in topics:
+            topic.recent_article_list = []
+        if not topics or limit <= 0:
+            return topics
+
+        through = cls.articles.through
+        rows = (
+            through.objects.filter(topic_id__in=by_id.keys(), articlepage__live=True)
+            .annotate(rank=Window(
+                RowNumber(),
+                partition_by=[F('topic_id')],
+                order_by=[
+                    F('articlepage__first_published_at').desc(nulls_last=True),
+                    F('articlepage_id').desc(),
+                ],
+            ))
+            .filter(rank__lte=limit)
+            .order_by('topic_id', 'rank')
+            .values(
+                'topic_id', 'articlepage_id', 'articlepage__title', 'articlepage__slug',
+                'articlepage__excerpt', 'articlepage__first_published_at', 'articlepage__author_name',
+            )
+        )
+        for row in rows:
+            by_id[row['topic_id']].recent_article_list.append({
+                'id': row['articlepage_id'],
+                'title': row['articlepage__title'],
+                'slug': row['articlepage__slug'],
+                'excerpt': row['articlepage__excerpt'],
+                'publish_date': row['articlepage__first_published_at'],
+                'author_name': row['articlepage__author_name'],
+            })
+        return topics
+
 
 # 现在设置表单的 Meta 类
 TopicForm.Meta.model = Topic
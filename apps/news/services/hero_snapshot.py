@@ -0,0 +1,205 @@
+"""
+首页 Hero 轮播快照
+
+轮播内容只在 is_hero 变化或文章发布/下线时才会改变，不必每次请求都查库和生成图片：
+- 后台任务按站点物化完整的轮播数据（封面规格在任务中生成，保证URL可用），长期保存在缓存中
+- 接口只读一次快照；快照缺失时用已存在的规格临时拼装（不在请求内生成图片），并调度重建
+- 快照只为 Wagtail 站点维护；请求中的站点标识经站点注册表解析，未知值使用默认站点的快照
+"""
+import logging
+
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# 快照物化的最大条数（接口 size 上限）
+MAX_HERO_ITEMS = 10
+# 轮播使用的封面规格：image_url 保持原有的 width-800，另附桌面/移动端规格
+HERO_IMAGE_SPEC = 'width-800'
+HERO_RENDITIONS = ('hero_desktop', 'hero_mobile')
+# 临时快照的有效期：只为挡住重建完成前的并发请求
+FALLBACK_SNAPSHOT_TIMEOUT = 60
+# 合并短时间内的多次重建请求
+REBUILD_DELAY = 5
+REBUILD_PENDING_TIMEOUT = 60
+
+
+def _snapshot_key(site_name):
+    return f"hero_snapshot:{site_name}"
+
+
+def _pending_key():
+    return "hero_snapshot:pending"
+
+
+def _article_ids_key():
+    return "hero_snapshot:article_ids"
+
+
+def get_snapshot(site_name):
+    """读取站点的轮播快照，不存在时返回 None"""
+    return cache.get(_snapshot_key(site_name))
+
+
+def snapshot_article_ids():
+    """当前各站点快照中的文章ID（用于判断取消 Hero 的文章是否需要重建）"""
+    return set(cache.get(_article_ids_key()) or [])
+
+
+def store_snapshot_article_ids(snapshots):
+    ids = {item['id'] for snapshot in snapshots for item in snapshot['items']}
+    cache.set(_article_ids_key(), sorted(ids), None)
+
+
+def snapshot_sites():
+    """需要维护快照的站点（Wagtail 站点的主机名）"""
+    from wagtail.models import Site
+
+    return set(Site.objects.values_list('hostname', flat=True))
+
+
+def resolve_site_name(site_name):
+    """把请求中的站点标识解析为 Wagtail 站点的主机名，未知值退回默认站点"""
+    from apps.core.site_registry import site_registry
+
+    site = site_registry.get_by_hostname(site_name) or site_registry.snapshot().default
+    return site.hostname if site is not None else site_name
+
+
+def _hero_queryset(site_name):
+    from wagtail.models import Site
+    from apps.news.models.article import ArticlePage
+
+    site_obj = Site.objects.filter(hostname=site_name).select_related('root_page').first()
+    if site_obj is None:
+        return ArticlePage.objects.none()
+    qs = ArticlePage.objects.live().filter(is_hero=True).descendant_of(site_obj.root_page)
+    return qs.select_related('channel', 'cover').prefetch_related(
+        'tags', 'topics', 'cover__renditions'
+    ).order_by('-first_published_at')
+
+
+def _existing_rendition_url(image, spec):
+    """只取已生成的规格（依赖预取的 renditions，不触发生成）"""
+    for rendition in image.renditions.all():
+        if rendition.filter_spec == spec:
+            return rendition.url
+    return None
+
+
+def _cover_urls(image, generate):
+    """
+    轮播封面URL
+
+    generate=True 时（后台任务）生成缺失的规格；否则只使用已存在的规格，缺失时退回原图。
+    """
+    from apps.core.signals_media import NEWS_IMAGE_RENDITIONS
+
+    def url_for(spec):
+        if generate:
+            try:
+                return image.get_rendition(spec).url
+            except Exception as e:
+                logger.warning(f"Hero rendition {spec} failed for image {image.pk}: {e}")
+                return None
+        return _existing_rendition_url(image, spec)
+
+    try:
+        original_url = image.file.url
+    except Exception:
+        original_url = None
+    renditions = {}
+    for name in HERO_RENDITIONS:
+        renditions[name] = url_for(NEWS_IMAGE_RENDITIONS[name]) or original_url
+    return url_for(HERO_IMAGE_SPEC) or original_url, renditions
+
+
+def _serialize_hero(article, generate):
+    if not article.cover:
+        return None
+    image_url, renditions = _cover_urls(article.cover, generate)
+    # 跳过没有封面图的文章
+    if not image_url:
+        return None
+
+    published = article.first_published_at.isoformat() if article.first_published_at else ''
+    tags = list(article.tags.all())
+    item = {
+        'id': str(article.id),
+        'article_id': str(article.id),
+        'title': article.title,
+        'excerpt': article.search_description or article.excerpt or '',
+        'image_url': image_url,
+        'image_renditions': renditions,
+        'publish_time': published,
+        'publish_at': published,
+        'slug': article.slug,
+        'author': getattr(article, 'author_name', '') or '',
+        'source': getattr(article, 'source', '') or '本站',
+        'is_breaking': getattr(article, 'is_breaking', False),
+        'is_live': getattr(article, 'is_live', False),
+        'is_event_mode': getattr(article, 'is_event_mode', False),
+        'has_video': getattr(article, 'has_video', False),
+        'tags': [tag.name for tag in tags],
+    }
+
+    if article.channel:
+        item['channel'] = {
+            'id': article.channel.slug,
+            'name': article.channel.name,
+            'slug': article.channel.slug,
+        }
+
+    # 主题取第一个专题，没有专题时从标签推断（均使用预取结果）
+    topics = list(article.topics.all())
+    if topics:
+        item['topic'] = {'id': topics[0].slug, 'name': topics[0].title, 'slug': topics[0].slug}
+    elif tags:
+        item['topic'] = {'id': tags[0].slug, 'name': tags[0].name, 'slug': tags[0].slug}
+    return item
+
+
+def build_snapshot(site_name, generate=True):
+    """拼装站点的轮播数据"""
+    items = []
+    for article in _hero_queryset(site_name)[:MAX_HERO_ITEMS * 2]:
+        item = _serialize_hero(article, generate)
+        if item:
+            items.append(item)
+        if len(items) >= MAX_HERO_ITEMS:
+            break
+    return {'site': site_name, 'items': items, 'prerendered': generate}
+
+
+def rebuild_snapshot(site_name):
+    """物化站点的轮播快照（后台任务调用，会生成缺失的封面规格）"""
+    snapshot = build_snapshot(site_name, generate=True)
+    cache.set(_snapshot_key(site_name), snapshot, None)
+    return snapshot
+
+
+def fallback_snapshot(site_name):
+    """快照缺失时的临时快照：不生成图片，短期缓存并调度重建"""
+    snapshot = build_snapshot(site_name, generate=False)
+    cache.set(_snapshot_key(site_name), snapshot, FALLBACK_SNAPSHOT_TIMEOUT)
+    schedule_rebuild()
+    return snapshot
+
+
+def schedule_rebuild():
+    """在事务提交后调度全部站点的快照重建，短时间内的多次调用只发一次任务"""
+    from apps.news.tasks import rebuild_hero_snapshots
+
+    if cache.add(_pending_key(), 1, timeout=REBUILD_PENDING_TIMEOUT):
+        transaction.on_commit(lambda: rebuild_hero_snapshots.apply_async(countdown=REBUILD_DELAY))
+
+
+def release_pending():
+    cache.delete(_pending_key())
+
+
+def article_changed(article):
+    """文章保存后判断是否影响轮播：仍是 Hero，或刚从快照中的 Hero 取消"""
+    if article.is_hero or str(article.id) in snapshot_article_ids():
+        schedule_rebuild()
@@ -0,0 +1,87 @@
+"""
+标签建议结果缓存
+
+标签建议（jieba TextRank + 实体抽取 + 标签表匹配）代价较高，不在编辑页构建时同步计算：
+- 文章保存后由后台任务按修订版本计算，结果按"标题+正文"的内容哈希缓存
+- 编辑页只放一个占位面板，由浏览器异步请求已缓存的结果
+- 内容未变化的修订复用同一份结果，不重复计算
+"""
+import hashlib
+import logging
+
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# 建议结果缓存时间：内容哈希不变结果就不变，可长期保留
+SUGGESTION_CACHE_TIMEOUT = 7 * 24 * 3600
+# 计算中标记的有效期：任务异常丢失后允许重新调度
+PENDING_TIMEOUT = 300
+# 编辑页展示的建议门槛与数量
+MIN_CONFIDENCE = 0.6
+MAX_SUGGESTIONS = 6
+
+
+def content_hash(title, body):
+    """标题与正文的内容哈希"""
+    payload = f"{title or ''}\n{body or ''}".encode('utf-8')
+    return hashlib.sha1(payload).hexdigest()
+
+
+def revision_content_hash(revision):
+    """修订版本的内容哈希（直接取修订序列化内容，不反序列化页面）"""
+    content = revision.content or {}
+    return content_hash(content.get('title', ''), content.get('body', ''))
+
+
+def _result_key(digest):
+    return f"tag_suggestions:{digest}"
+
+
+def _pending_key(digest):
+    return f"tag_suggestions:pending:{digest}"
+
+
+def get_cached_suggestions(digest):
+    """读取已计算的建议结果，未计算时返回 None"""
+    return cache.get(_result_key(digest))
+
+
+def store_suggestions(digest, result):
+    cache.set(_result_key(digest), result, SUGGESTION_CACHE_TIMEOUT)
+    release_pending(digest)
+
+
+def release_pending(digest):
+    cache.delete(_pending_key(digest))
+
+
+def top_suggestions(result):
+    """筛选编辑页展示的高置信度建议"""
+    if not result or not result.get('success'):
+        return []
+    return [
+        s for s in result.get('suggestions', [])
+        if s.get('confidence', 0) > MIN_CONFIDENCE
+    ][:MAX_SUGGESTIONS]
+
+
+def schedule_suggestions(revision):
+    """
+    为修订版本调度建议计算
+
+    结果已缓存或已在计算中时不重复调度；任务在事务提交后发出，保证能读到修订。
+
+    Returns:
+        str: 修订的内容哈希
+    """
+    from apps.news.tasks import compute_tag_suggestions
+
+    digest = revision_content_hash(revision)
+    if get_cached_suggestions(digest) is not None:
+        return digest
+    if cache.add(_pending_key(digest), 1, timeout=PENDING_TIMEOUT):
+        revision_id = revision.pk
+        transaction.on_commit(lambda: compute_tag_suggestions.delay(revision_id))
+    return digest
@@ -1,21 +1,65 @@
 from django.dispatch import receiver
 from wagtail.signals import page_published, page_unpublished
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, pre_save
 from django.db import transaction
+from wagtail.images import get_image_model
 from .models.article import ArticlePage
+from .models.topic import Topic
 from apps.searchapp.tasks import upsert_article_doc, delete_article_doc
+from apps.api.utils.search_utils import SEARCH_VECTOR_FIELDS
+from .services import hero_snapshot
+from .tasks import update_article_search_vector
+
+def refresh_category_counts(article):
+    """重算文章当前及保存前（见 remember_previous_listing）所属分类的已发布文章数"""
+    from apps.core.models import Category
+
+    current = set(article.categories.values_list("id", flat=True))
+    previous = getattr(article, "_previous_category_ids", set())
+    Category.refresh_live_article_counts(current | previous)
+
 
 @receiver(page_published)
 def on_publish(sender, **kwargs):
     page = kwargs.get("instance")
     if isinstance(page, ArticlePage):
         upsert_article_doc.delay(page.id)
+        transaction.on_commit(lambda: refresh_category_counts(page))
+        hero_snapshot.article_changed(page)
 
 @receiver(page_unpublished)
 def on_unpublish(sender, **kwargs):
     page = kwargs.get("instance")
     if isinstance(page, ArticlePage):
         delete_article_doc.delay(page.id)
+        transaction.on_commit(lambda: refresh_category_counts(page))
+        hero_snapshot.article_changed(page)
+
+@receiver(pre_save, sender=ArticlePage)
+def remember_previous_listing(sender, instance, update_fields=None, **kwargs):
+    """
+    发布前从数据库读取文章原来所属的频道/标签/专题/分类
+
+    发布时整页保存，此时数据库中仍是上一次发布的内容；只更新部分字段的保存
+    （save_revision、下线）不改变所属关系，跳过查询。
+    """
+    from apps.api.utils.cache_namespace import listing_membership
+
+    if instance.pk is None or update_fields is not None:
+        return
+    previous = ArticlePage.objects.select_related("channel").filter(pk=instance.pk).first()
+    if previous is not None:
+        instance._previous_listing = listing_membership(previous)
+        instance._previous_category_ids = set(previous.categories.values_list("id", flat=True))
+
+
+@receiver(post_save, sender=Topic)
+def on_topic_save(sender, instance, **kwargs):
+    """专题信息变化后使专题详情缓存失效"""
+    from apps.api.utils.cache_namespace import bump_namespaces, topic_ns
+
+    bump_namespaces([topic_ns(instance.slug)])
+
 
 @receiver(post_save, sender=ArticlePage)
 def on_article_save(sender, instance, created, **kwargs):
@@ -27,3 +71,39 @@ def on_article_save(sender, instance, created, **kwargs):
     if instance.live:
         # 使用事务提交后的回调来确保数据已保存
         transaction.on_commit(lambda: upsert_article_doc.delay(instance.id))
+
+
+@receiver(post_save, sender=ArticlePage)
+def on_article_save_update_search_vector(sender, instance, update_fields=None, **kwargs):
+    """
+    保存文章后异步刷新数据库全文检索向量（OpenSearch 不可用时的检索路径）
+
+    只更新修订指针等字段的保存（如 save_revision）不涉及检索字段，跳过分词。
+    """
+    if update_fields is not None and not set(update_fields) & {name for name, _ in SEARCH_VECTOR_FIELDS}:
+        return
+    transaction.on_commit(lambda: update_article_search_vector.delay(instance.id))
+
+
+@receiver(post_save, sender=ArticlePage)
+def on_article_save_update_hero_snapshot(sender, instance, **kwargs):
+    """
+    is_hero 切换或 Hero 文章更新后重建轮播快照
+    """
+    hero_snapshot.article_changed(instance)
+
+
+@receiver(post_save, sender=get_image_model())
+def on_cover_image_save(sender, instance, created, **kwargs):
+    """
+    封面图片更新后重建引用它的已发布文章的索引文档
+
+    索引文档中反范式存储了封面原图与常用规格的URL，图片文件或标题变化后需要刷新。
+    """
+    if created:
+        return
+    article_ids = list(
+        ArticlePage.objects.live().filter(cover_id=instance.pk).values_list("id", flat=True)
+    )
+    for article_id in article_ids:
+        transaction.on_commit(lambda article_id=article_id: upsert_article_doc.delay(article_id))
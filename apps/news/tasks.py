@@ -0,0 +1,87 @@
+"""
+新闻内容后台任务
+"""
+import logging
+
+from celery import shared_task
+
+from .services.tag_suggestion import tag_suggestion_api
+from .services.tag_suggestion_store import (
+    get_cached_suggestions,
+    release_pending,
+    revision_content_hash,
+    store_suggestions,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def compute_tag_suggestions(revision_id):
+    """按修订版本计算标签建议，结果按内容哈希缓存"""
+    from wagtail.models import Revision
+
+    try:
+        revision = Revision.objects.get(pk=revision_id)
+    except Revision.DoesNotExist:
+        return
+
+    digest = revision_content_hash(revision)
+    if get_cached_suggestions(digest) is not None:
+        return
+
+    page = revision.as_object()
+    title = getattr(page, 'title', '') or ''
+    body = str(page.body) if getattr(page, 'body', None) else ''
+    site = page.get_site() if hasattr(page, 'get_site') else None
+
+    try:
+        result = tag_suggestion_api.get_suggestions_for_article({
+            'title': title,
+            'body': body,
+            'site_id': site.id if site else None,
+        })
+    except Exception as e:
+        # 失败结果不缓存，释放计算中标记以便下次打开编辑页时重试
+        logger.warning(f"Tag suggestion failed for revision {revision_id}: {e}")
+        release_pending(digest)
+        return
+    store_suggestions(digest, result)
+
+
+@shared_task(ignore_result=True)
+def rebuild_hero_snapshots():
+    """重建各站点的 Hero 轮播快照（生成缺失的封面规格）"""
+    from .services import hero_snapshot
+
+    # 先释放调度标记，重建期间的新变更会再调度一次
+    hero_snapshot.release_pending()
+    snapshots = []
+    for site_name in hero_snapshot.snapshot_sites():
+        try:
+            snapshots.append(hero_snapshot.rebuild_snapshot(site_name))
+        except Exception as e:
+            logger.warning(f"Hero snapshot rebuild failed for {site_name}: {e}")
+    hero_snapshot.store_snapshot_article_ids(snapshots)
+
+
+@shared_task(ignore_result=True)
+def update_article_search_vector(article_id):
+    """重新分词并写入文章的数据库全文检索向量"""
+    from apps.api.utils.search_utils import update_search_vector
+    from .models.article import ArticlePage
+
+    article = ArticlePage.objects.filter(pk=article_id).only('id', 'title', 'excerpt', 'body').first()
+    if article is not None:
+        update_search_vector(article)
+
+
+@shared_task(ignore_result=True)
+def refresh_all_category_counts():
+    """兜底重算全部分类的已发布文章数（正常由发布/下线按分类增量重算）"""
+    from apps.core.models import Category
+
+    changed = Category.refresh_live_article_counts()
+    if changed:
+        logger.info(f"Corrected live article counts for {changed} categories")
+    return changed
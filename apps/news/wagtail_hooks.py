@@ -7,7 +7,6 @@ from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 from django.dispatch import receiver
 from wagtail.signals import page_published, page_unpublished
-from .services.tag_suggestion import tag_suggestion_api
 
 
 def apply_site_filtering_to_form(form, site):
@@ -70,74 +69,15 @@ def enhance_article_editing_form(page, form_class, edit_handler):
 
 
 def _inject_tag_suggestions_to_panels(page):
-    """直接在页面的content_panels中注入标签建议"""
+    """
+    在页面的content_panels中注入标签建议占位面板
+
+    建议由保存后的后台任务计算，面板只在浏览器中异步拉取结果，
+    编辑页构建不再做任何分词或标签匹配。
+    """
     from wagtail.admin.panels import HelpPanel
-    from django.utils.html import format_html
-    from django.utils.safestring import mark_safe
-    
-    # 获取文章内容
-    title = getattr(page, 'title', '') or ''
-    body_content = ''
-    
-    if hasattr(page, 'body') and page.body:
-        body_content = str(page.body)
-    
-    
-    if not title and not body_content:
-        suggestions_html = format_html(
-            '<div class="help-block" style="margin-top: 10px; padding: 12px; background: #f0f7ff; border-left: 4px solid #007cba; border-radius: 4px;">'
-            '<strong style="color: #495057; display: block; margin-bottom: 8px;">🤖 AI标签建议</strong>'
-            '<p style="margin: 0; font-size: 12px; color: #6c757d;">请先填写标题和正文内容，保存后重新编辑即可看到AI生成的标签建议</p>'
-            '</div>'
-        )
-    else:
-        # 生成实际建议
-        try:
-            result = tag_suggestion_api.get_suggestions_for_article({
-                'title': title,
-                'body': body_content
-            })
-            
-            if result.get('success') and result.get('suggestions'):
-                good_suggestions = [
-                    s for s in result['suggestions'] 
-                    if s.get('confidence', 0) > 0.6
-                ][:6]
-                
-                if good_suggestions:
-                    suggestions_html = _render_pure_python_suggestions(good_suggestions)
-                    suggestions_html = format_html(
-                        '<div class="help-block" style="margin-top: 10px; padding: 12px; background: #f8f9fa; border-left: 4px solid #007cba; border-radius: 4px;">'
-                        '<strong style="color: #495057; display: block; margin-bottom: 8px;">🤖 AI标签建议</strong>'
-                        '<p style="margin: 0 0 10px 0; font-size: 12px; color: #6c757d;">点击建议标签直接添加到标签字段</p>'
-                        '{suggestions}'
-                        '</div>',
-                        suggestions=mark_safe(suggestions_html)
-                        )
-                else:
-                    suggestions_html = format_html(
-                        '<div class="help-block">'
-                        '<strong>🤖 AI标签建议</strong>'
-                        '<p>暂无高质量建议</p>'
-                        '</div>'
-                    )
-            else:
-                suggestions_html = format_html(
-                    '<div class="help-block">'
-                    '<strong>🤖 AI标签建议</strong>'
-                    '<p>AI服务暂不可用</p>'
-                    '</div>'
-                )
-        except Exception as e:
-            suggestions_html = format_html(
-                '<div class="help-block">'
-                '<strong>🤖 AI标签建议</strong>'
-                '<p>生成建议时出错</p>'
-                '</div>'
-            )
     
-    # 创建帮助面板
-    help_panel = HelpPanel(mark_safe(suggestions_html))
+    help_panel = HelpPanel(_tag_suggestions_placeholder_html(page))
     
     # 将帮助面板添加到页面的content_panels中
     if hasattr(page, 'content_panels'):
@@ -152,6 +92,32 @@ def _inject_tag_suggestions_to_panels(page):
         page.content_panels = new_panels
 
 
+def _tag_suggestions_placeholder_html(page):
+    """标签建议占位HTML：已保存的文章异步拉取建议，新建文章提示先保存"""
+    from django.urls import reverse
+    
+    if not page.pk:
+        return format_html(
+            '<div class="help-block" style="margin-top: 10px; padding: 12px; background: #f0f7ff; border-left: 4px solid #007cba; border-radius: 4px;">'
+            '<strong style="color: #495057; display: block; margin-bottom: 8px;">🤖 AI标签建议</strong>'
+            '<p style="margin: 0; font-size: 12px; color: #6c757d;">请先填写标题和正文内容，保存后重新编辑即可看到AI生成的标签建议</p>'
+            '</div>'
+        )
+    
+    return format_html(
+        '<div class="help-block" style="margin-top: 10px; padding: 12px; background: #f8f9fa; border-left: 4px solid #007cba; border-radius: 4px;">'
+        '<strong style="color: #495057; display: block; margin-bottom: 8px;">🤖 AI标签建议</strong>'
+        '<p style="margin: 0 0 10px 0; font-size: 12px; color: #6c757d;">点击建议标签直接添加到标签字段</p>'
+        '<div id="tag-suggestions-async" data-url="{url}">'
+        '<p style="margin: 0; font-size: 12px; color: #999;">正在加载标签建议...</p>'
+        '</div>'
+        '</div>'
+        '{script}',
+        url=reverse('article-tag-suggestions', args=[page.pk]),
+        script=_tag_suggestions_script(),
+    )
+
+
 def _apply_site_filtering(form, site):
     """应用站点过滤"""
     if site:
@@ -177,120 +143,81 @@ def _add_tag_suggestions_to_enhanced_form(form):
     if not instance or not hasattr(instance, 'tags'):
         return
     
+    original_help = form.fields['tags'].help_text or ''
+    form.fields['tags'].help_text = format_html(
+        '{original_help}{placeholder}',
+        original_help=original_help,
+        placeholder=_tag_suggestions_placeholder_html(instance),
+    )
+
+
+@hooks.register('after_create_page')
+@hooks.register('after_edit_page')
+def schedule_article_tag_suggestions(request, page):
+    """文章保存后按最新修订调度标签建议计算"""
+    from apps.news.models.article import ArticlePage
+    from .services.tag_suggestion_store import schedule_suggestions
     
-    # 获取文章内容
-    title = getattr(instance, 'title', '') or ''
-    body_content = ''
-    
-    if hasattr(instance, 'body') and instance.body:
-        body_content = str(instance.body)
-    
-    
-    # 如果没有内容，显示提示
-    if not title and not body_content:
-        original_help = form.fields['tags'].help_text or ''
-        form.fields['tags'].help_text = format_html(
-            '{original_help}'
-            '<div class="help-block" style="margin-top: 10px; padding: 12px; background: #f0f7ff; border-left: 4px solid #007cba; border-radius: 4px;">'
-            '<strong style="color: #495057; display: block; margin-bottom: 8px;">🤖 AI标签建议</strong>'
-            '<p style="margin: 0; font-size: 12px; color: #6c757d;">请先填写标题和正文内容，保存后重新编辑即可看到AI生成的标签建议</p>'
-            '</div>',
-            original_help=original_help
-        )
+    if not isinstance(page, ArticlePage):
+        return
+    revision = page.get_latest_revision()
+    if revision is None:
         return
-    
-    # 生成标签建议
     try:
-        result = tag_suggestion_api.get_suggestions_for_article({
-            'title': title,
-            'body': body_content
-        })
-        
-        
-        if result.get('success') and result.get('suggestions'):
-            # 过滤高质量建议
-            good_suggestions = [
-                s for s in result['suggestions'] 
-                if s.get('confidence', 0) > 0.6
-            ][:6]
-            
-            
-            if good_suggestions:
-                _inject_suggestions_into_form(form, good_suggestions)
-            
+        schedule_suggestions(revision)
     except Exception as e:
-        pass
-
-
+        # 建议计算失败不应该影响保存流程
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.warning(f"调度标签建议时出错: {str(e)}")
 
 
 # ========== 页面发布和取消发布的清缓存功能 ==========
 
-def get_all_site_cache_keys(instance):
+def invalidate_article_cache_namespaces(instance):
     """
-    获取所有站点相关的缓存键
-    
-    为了支持多站点聚合，我们需要清理所有相关站点的缓存
+    使文章相关的缓存命名空间失效
+
+    站点、聚合内容、频道、标签、专题、文章各自是一个版本计数器，每个只需一次 INCR；
+    旧键不再被读取，随 TTL 自然过期，不做任何 SCAN/delete_pattern。
+    文章原属的频道/标签/专题（保存前记录）一并失效。
     """
-    cache_keys = []
-    
-    # 基础缓存键模式
-    base_patterns = [
-        'headlines_*',
-        'hot_articles_*', 
-        'topics_*',
-        'channels_*',
-        'categories_*'
-    ]
-    
-    # 当前站点的缓存
+    from apps.api.utils.cache_namespace import article_namespaces, bump_namespaces
+
     try:
-        current_site = instance.get_site()
-        site_id = current_site.id
-        
-        for pattern in base_patterns:
-            cache_keys.append(pattern.replace('*', f'site_{site_id}'))
-            
-    except:
-        pass
-    
-    # 聚合站点的缓存（所有允许聚合的站点）
-    if hasattr(instance, 'allow_aggregate') and instance.allow_aggregate:
-        from wagtail.models import Site
-        all_sites = Site.objects.all()
-        
-        for site in all_sites:
-            for pattern in base_patterns:
-                cache_keys.append(pattern.replace('*', f'site_{site.id}'))
-    
-    return cache_keys
+        site = instance.get_site()
+    except Exception:
+        site = None
+    bump_namespaces(article_namespaces(instance, site, getattr(instance, "_previous_listing", None)))
+
+
+def queue_article_edge_revalidation(instance):
+    """
+    把文章相关的 Next.js tag 与页面路径加入失效队列
+
+    由后台任务去重后批量下发到 Next.js 与 CDN，不阻塞编辑发布。
+    """
+    from apps.core.tasks.revalidation import article_revalidation_targets, enqueue_revalidation
+
+    site = instance.get_site()
+    if site is None:
+        return
+    tags, paths = article_revalidation_targets(instance, site.hostname)
+    enqueue_revalidation(site.hostname, tags=tags, paths=paths)
 
 
 @receiver(page_published, sender='news.ArticlePage')
 def clear_cache_on_article_publish(sender, **kwargs):
     """
-    文章发布时清理相关缓存
+    文章发布时失效相关缓存
     
-    这个信号处理器会在文章发布时清理所有相关的缓存，
     确保新内容能及时在前端显示
     """
     instance = kwargs['instance']
     
     try:
-        # 获取需要清理的缓存键
-        cache_keys = get_all_site_cache_keys(instance)
-        
-        # 清理缓存
-        from django.core.cache import cache
-        for key in cache_keys:
-            cache.delete(key)
-            
-        # 清理页面级缓存
-        if hasattr(cache, 'delete_pattern'):
-            # 如果使用 Redis 等支持模式删除的缓存后端
-            cache.delete_pattern(f'page_*_{instance.id}_*')
-            cache.delete_pattern(f'article_list_*')
-            
+        invalidate_article_cache_namespaces(instance)
+        queue_article_edge_revalidation(instance)
     except Exception as e:
         # 缓存清理失败不应该影响发布流程
         import logging
@@ -301,26 +228,15 @@ def clear_cache_on_article_publish(sender, **kwargs):
 @receiver(page_unpublished, sender='news.ArticlePage')  
 def clear_cache_on_article_unpublish(sender, **kwargs):
     """
-    文章取消发布时清理相关缓存
+    文章取消发布时失效相关缓存
     
     确保取消发布的文章不再出现在前端列表中
     """
     instance = kwargs['instance']
     
     try:
-        # 获取需要清理的缓存键
-        cache_keys = get_all_site_cache_keys(instance)
-        
-        # 清理缓存
-        from django.core.cache import cache
-        for key in cache_keys:
-            cache.delete(key)
-            
-        # 清理页面级缓存
-        if hasattr(cache, 'delete_pattern'):
-            cache.delete_pattern(f'page_*_{instance.id}_*')
-            cache.delete_pattern(f'article_list_*')
-            
+        invalidate_article_cache_namespaces(instance)
+        queue_article_edge_revalidation(instance)
     except Exception as e:
         import logging
         logger = logging.getLogger(__name__)
@@ -534,6 +450,38 @@ def toggle_featured_status(request, article_id):
         return JsonResponse({'success': False, 'error': str(e)})
 
 
+@staff_member_required
+def article_tag_suggestions(request, article_id):
+    """
+    返回文章最新修订的标签建议（供编辑页异步拉取）
+
+    只读取按内容哈希缓存的结果；尚未计算时调度后台任务并返回 pending。
+    """
+    from .models.article import ArticlePage
+    from .services.tag_suggestion_store import (
+        get_cached_suggestions, revision_content_hash, schedule_suggestions, top_suggestions,
+    )
+    
+    article = get_object_or_404(ArticlePage, id=article_id)
+    revision = article.get_latest_revision()
+    if revision is None:
+        return JsonResponse({'status': 'empty'})
+    
+    result = get_cached_suggestions(revision_content_hash(revision))
+    if result is None:
+        schedule_suggestions(revision)
+        return JsonResponse({'status': 'pending'})
+    
+    suggestions = top_suggestions(result)
+    if not suggestions:
+        return JsonResponse({'status': 'empty'})
+    return JsonResponse({
+        'status': 'ready',
+        'suggestions': suggestions,
+        'html': _render_pure_python_suggestions(suggestions),
+    })
+
+
 @hooks.register('register_admin_urls')
 def register_article_management_urls():
     """注册独立的文章管理URL"""
@@ -544,6 +492,7 @@ def register_article_management_urls():
         path('articles/drafts/', article_list_view, {'filter_type': 'draft'}, name='article-list-drafts'),
         path('articles/toggle-hero/<int:article_id>/', toggle_hero_status, name='toggle-hero'),
         path('articles/toggle-featured/<int:article_id>/', toggle_featured_status, name='toggle-featured'),
+        path('articles/<int:article_id>/tag-suggestions/', article_tag_suggestions, name='article-tag-suggestions'),
     ]
 
 
@@ -563,32 +512,8 @@ def add_article_management_menu(request, menu_items, **kwargs):
 
 
 
-def _inject_suggestions_into_form(form, suggestions):
-    """将建议注入到表单的标签字段"""
-    
-    if 'tags' not in form.fields:
-        return
-    
-    # 生成建议HTML
-    suggestions_html = _render_pure_python_suggestions(suggestions)
-    
-    # 更新标签字段的help_text
-    original_help = form.fields['tags'].help_text or ''
-    
-    form.fields['tags'].help_text = format_html(
-        '{original_help}'
-        '<div class="help-block" style="margin-top: 10px; padding: 12px; background: #f8f9fa; border-left: 4px solid #007cba; border-radius: 4px;">'
-        '<strong style="color: #495057; display: block; margin-bottom: 8px;">🤖 AI标签建议</strong>'
-        '<p style="margin: 0 0 10px 0; font-size: 12px; color: #6c757d;">点击建议标签直接添加到上方标签字段</p>'
-        '{suggestions}'
-        '</div>',
-        original_help=original_help,
-        suggestions=mark_safe(suggestions_html)
-    )
-
-
 def _render_pure_python_suggestions(suggestions):
-    """纯Python渲染标签建议HTML（使用Wagtail默认样式）"""
+    """纯Python渲染标签建议按钮HTML（使用Wagtail默认样式）"""
     
     suggestion_buttons = []
     
@@ -613,7 +538,7 @@ def _render_pure_python_suggestions(suggestions):
         # 生成按钮HTML
         button_html = format_html(
             '<button type="button" class="{button_class}" style="margin: 2px; {button_style}" '
-            'onclick="addTagToField(\'{tag_text}\')" '
+            'onclick="addTagToField(\'{tag_text}\', this)" '
             'title="置信度: {confidence_percent}%">'
             '{tag_text} <small>({confidence_percent}% {type_badge})</small>'
             '</button>',
@@ -626,37 +551,66 @@ def _render_pure_python_suggestions(suggestions):
         
         suggestion_buttons.append(button_html)
     
-    # 添加必要的JavaScript函数
-    script_html = format_html('''
+    return ''.join(suggestion_buttons)
+
+
+def _tag_suggestions_script():
+    """异步拉取标签建议并支持点击添加的脚本（结果未就绪时短暂轮询）"""
+    return mark_safe('''
         <script>
-        function addTagToField(tagText) {{
+        function addTagToField(tagText, button) {
             var tagInput = document.querySelector('input[name="tags"]') || document.querySelector('#id_tags');
-            if (!tagInput) {{
+            if (!tagInput) {
                 alert('未找到标签字段');
                 return;
-            }}
+            }
             
             var currentTags = tagInput.value.trim();
-            var existingTags = currentTags ? currentTags.split(',').map(function(t) {{ return t.trim(); }}) : [];
+            var existingTags = currentTags ? currentTags.split(',').map(function(t) { return t.trim(); }) : [];
             
-            if (existingTags.indexOf(tagText) !== -1) {{
+            if (existingTags.indexOf(tagText) !== -1) {
                 alert('标签 "' + tagText + '" 已存在');
                 return;
-            }}
+            }
             
             var newValue = currentTags ? currentTags + ', ' + tagText : tagText;
             tagInput.value = newValue;
             
             // 触发change事件
-            var event = new Event('change', {{ bubbles: true }});
-            tagInput.dispatchEvent(event);
+            tagInput.dispatchEvent(new Event('change', { bubbles: true }));
             
             // 禁用按钮
-            event.target.disabled = true;
-            event.target.style.opacity = '0.6';
-            event.target.innerHTML += ' ✓';
-        }}
+            if (button) {
+                button.disabled = true;
+                button.style.opacity = '0.6';
+                button.innerHTML += ' ✓';
+            }
+        }
+        
+        (function() {
+            var container = document.getElementById('tag-suggestions-async');
+            if (!container) return;
+            var attempts = 0;
+            
+            function load() {
+                fetch(container.dataset.url, { credentials: 'same-origin' })
+                    .then(function(response) { return response.json(); })
+                    .then(function(data) {
+                        if (data.status === 'pending' && attempts++ < 10) {
+                            setTimeout(load, 2000);
+                        } else if (data.status === 'ready' && data.html) {
+                            container.innerHTML = data.html;
+                        } else if (data.status === 'pending') {
+                            container.innerHTML = '<p style="margin: 0; font-size: 12px; color: #999;">标签建议仍在生成中，请稍后刷新</p>';
+                        } else {
+                            container.innerHTML = '<p style="margin: 0; font-size: 12px; color: #999;">暂无高质量建议</p>';
+                        }
+                    })
+                    .catch(function() {
+                        container.innerHTML = '<p style="margin: 0; font-size: 12px; color: #999;">获取建议失败，请稍后重试</p>';
+                    });
+            }
+            load();
+        })();
         </script>
     ''')
-    
-    return ''.join(suggestion_buttons) + script_html
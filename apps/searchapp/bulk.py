@@ -0,0 +1,160 @@
+"""
+OpenSearch 批量局部更新
+
+以流的方式消费 (doc_id, doc) 序列，按块发送 `_bulk` update 请求：
+- 并发度有上限（同时在途的批次数不超过 concurrency）
+- 对 429/5xx 等可重试的单条失败按指数退避重试
+- 不使用 doc_as_upsert，索引中不存在的文档只记为 missing，不会产生孤儿文档
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUSES = {429, 502, 503, 504}
+
+
+@dataclass
+class BulkUpdateResult:
+    succeeded: List[str] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+    requests: int = 0
+    retries: int = 0
+
+    def merge(self, other: "BulkUpdateResult") -> None:
+        self.succeeded.extend(other.succeeded)
+        self.missing.extend(other.missing)
+        self.failed.extend(other.failed)
+        self.requests += other.requests
+        self.retries += other.retries
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "updated": len(self.succeeded),
+            "missing": len(self.missing),
+            "failed": len(self.failed),
+            "requests": self.requests,
+            "retries": self.retries,
+        }
+
+
+def _chunks(items: Iterable[Tuple[str, Dict[str, Any]]], size: int):
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _send_chunk(
+    client,
+    index: str,
+    chunk: List[Tuple[str, Dict[str, Any]]],
+    max_retries: int,
+    initial_backoff: float,
+) -> BulkUpdateResult:
+    """发送一个批次，只对可重试的单条失败重发"""
+    result = BulkUpdateResult()
+    pending = chunk
+    attempt = 0
+
+    while pending:
+        body = []
+        for doc_id, doc in pending:
+            body.append({"update": {"_index": index, "_id": str(doc_id)}})
+            body.append({"doc": doc})
+
+        result.requests += 1
+        try:
+            response = client.bulk(body=body)
+            items = response.get("items", [])
+        except Exception as e:
+            # 整个请求失败（连接错误、超时等），按整批可重试处理
+            logger.warning("Bulk request failed (attempt %s): %s", attempt + 1, e)
+            items = [{"update": {"status": 503}} for _ in pending]
+
+        retry = []
+        for (doc_id, doc), item in zip(pending, items):
+            status = item.get("update", {}).get("status", 500)
+            if status in (200, 201):
+                result.succeeded.append(str(doc_id))
+            elif status == 404:
+                result.missing.append(str(doc_id))
+            elif status in RETRYABLE_STATUSES:
+                retry.append((doc_id, doc))
+            else:
+                result.failed.append(str(doc_id))
+                logger.warning("Bulk update failed for %s: %s", doc_id, item)
+
+        if not retry:
+            break
+        if attempt >= max_retries:
+            result.failed.extend(str(doc_id) for doc_id, _ in retry)
+            break
+
+        time.sleep(initial_backoff * (2 ** attempt))
+        attempt += 1
+        result.retries += len(retry)
+        pending = retry
+
+    return result
+
+
+def bulk_partial_update(
+    client,
+    index: str,
+    docs: Iterable[Tuple[str, Dict[str, Any]]],
+    *,
+    chunk_size: int = 500,
+    concurrency: int = 4,
+    max_retries: int = 3,
+    initial_backoff: float = 0.5,
+    refresh: Optional[str] = None,
+) -> BulkUpdateResult:
+    """
+    流式批量局部更新文档
+
+    Args:
+        client: OpenSearch 客户端
+        index: 索引名称
+        docs: (doc_id, 局部文档) 的可迭代对象，可以是生成器
+        chunk_size: 每个 `_bulk` 请求包含的文档数
+        concurrency: 同时在途的批次数上限
+        max_retries: 可重试失败的最大重试次数
+        initial_backoff: 首次重试前的等待秒数，之后指数增长
+        refresh: 全部批次完成后执行的刷新方式；None 表示不刷新，"true" 表示执行一次 indices.refresh
+
+    Returns:
+        BulkUpdateResult
+    """
+    result = BulkUpdateResult()
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        in_flight = set()
+        for chunk in _chunks(docs, chunk_size):
+            if len(in_flight) >= concurrency:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result.merge(future.result())
+            in_flight.add(executor.submit(_send_chunk, client, index, chunk, max_retries, initial_backoff))
+
+        for future in in_flight:
+            result.merge(future.result())
+
+    if refresh and result.succeeded:
+        try:
+            client.indices.refresh(index=index)
+        except Exception as e:
+            logger.warning("Index refresh failed for %s: %s", index, e)
+
+    return result
@@ -1,3 +1,99 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 列表类接口常用的封面规格（名称对应 apps.core.signals_media.NEWS_IMAGE_RENDITIONS），索引时预先生成并写入文档
+INDEX_COVER_RENDITIONS = ('card_small', 'card_medium', 'card_large', 'hero_desktop', 'hero_mobile', 'mobile_card')
+
+# 列表类接口不需要的大字段，查询时通过 _source 过滤排除
+LISTING_SOURCE_EXCLUDES = ['body']
+
+
+# 反范式化之前索引的文档缺少这些字段；列表接口对这类文档回查数据库补齐，
+# 执行 reindex_all_articles 重建索引后不再回查
+LISTING_DB_FALLBACK_FIELDS = (
+    'cover_url', 'view_count', 'comment_count', 'like_count', 'favorite_count', 'reading_time',
+)
+
+
+def fill_missing_listing_fields(sources) -> int:
+    """
+    为缺少封面/计数字段的文档从数据库补齐（原地修改）
+
+    所有缺字段的文档合并为一次查询；返回补齐的文档数。
+    """
+    missing = {}
+    for src in sources:
+        if any(field not in src for field in LISTING_DB_FALLBACK_FIELDS):
+            article_id = str(src.get('article_id') or src.get('id') or '')
+            if article_id.isdigit():
+                missing.setdefault(int(article_id), []).append(src)
+    if not missing:
+        return 0
+
+    from apps.news.models.article import ArticlePage
+
+    pages = ArticlePage.objects.filter(id__in=list(missing)).select_related('cover').only(
+        'id', 'view_count', 'comment_count', 'like_count', 'favorite_count', 'reading_time',
+        'cover__file', 'cover__title',
+    )
+    filled = 0
+    for page in pages:
+        cover = page.cover
+        try:
+            cover_url = cover.file.url if cover else ''
+        except Exception:
+            cover_url = ''
+        fields = {
+            'cover_url': cover_url,
+            'cover_title': getattr(cover, 'title', '') or '',
+            'cover_renditions': {},
+            'view_count': page.view_count or 0,
+            'comment_count': page.comment_count or 0,
+            'like_count': page.like_count or 0,
+            'favorite_count': page.favorite_count or 0,
+            'reading_time': page.reading_time or 1,
+        }
+        for src in missing[page.id]:
+            for field, value in fields.items():
+                src.setdefault(field, value)
+            filled += 1
+    return filled
+
+
+def cover_fields(page) -> dict:
+    """
+    封面原图与常用规格的URL
+
+    列表接口直接从 _source 读取，不再回查数据库。
+    """
+    cover = getattr(page, 'cover', None)
+    if not cover:
+        return {'cover_url': '', 'cover_title': '', 'cover_renditions': {}}
+
+    from apps.core.signals_media import NEWS_IMAGE_RENDITIONS
+
+    renditions = {}
+    for name in INDEX_COVER_RENDITIONS:
+        try:
+            rendition = cover.get_rendition(NEWS_IMAGE_RENDITIONS[name])
+            if '/c0-uncategorized/' in rendition.file.name or '/default/' in rendition.file.name:
+                # 新生成的规格会被信号搬运到稳定路径，重新读取搬运后的文件名
+                rendition.refresh_from_db(fields=['file'])
+            renditions[name] = rendition.url
+        except Exception as e:
+            logger.warning(f"封面规格 {name} 生成失败 (image {cover.pk}): {e}")
+    try:
+        cover_url = cover.file.url
+    except Exception:
+        cover_url = ''
+    return {
+        'cover_url': cover_url,
+        'cover_title': getattr(cover, 'title', '') or '',
+        'cover_renditions': renditions,
+    }
+
+
 class ArticleIndexer:
     """文章索引器 - 将 Wagtail 页面转换为 OpenSearch 文档"""
     
@@ -37,12 +133,24 @@ class ArticleIndexer:
         
         # 频道信息
         primary_channel_slug = None
+        channel_name = ""
         try:
             if getattr(page, "channel", None):
                 primary_channel_slug = getattr(page.channel, "slug", None)
+                channel_name = getattr(page.channel, "name", "") or ""
         except Exception:
             primary_channel_slug = None
         
+        # 专题（取第一个专题作为展示专题）
+        topic_slugs, topic_title = [], ""
+        try:
+            if hasattr(page, "topics"):
+                topics = list(page.topics.order_by("order", "-created_at").values_list("slug", "title"))
+                topic_slugs = [slug for slug, _ in topics]
+                topic_title = topics[0][1] if topics else ""
+        except Exception:
+            topic_slugs, topic_title = [], ""
+        
         # URL 与时间
         try:
             url = page.url
@@ -99,6 +207,17 @@ class ArticleIndexer:
             "is_hero": bool(getattr(page, "is_hero", False)),
             "is_featured": bool(getattr(page, "is_featured", False)),
             "weight": float(getattr(page, "weight", 0)),
+            # 列表接口渲染所需的反范式字段
+            "channel_name": channel_name,
+            "topic": topic_slugs[0] if topic_slugs else "",
+            "topics": topic_slugs,
+            "topic_title": topic_title,
+            "view_count": int(getattr(page, "view_count", 0) or 0),
+            "comment_count": int(getattr(page, "comment_count", 0) or 0),
+            "like_count": int(getattr(page, "like_count", 0) or 0),
+            "favorite_count": int(getattr(page, "favorite_count", 0) or 0),
+            "reading_time": int(getattr(page, "reading_time", 0) or 1),
+            **cover_fields(page),
         }
         
         # 🔥 热度标记：动态计算并添加虚拟频道标签
@@ -2,6 +2,8 @@ import json, pathlib
 import logging
 from django.conf import settings
 
+from apps.core.utils.structured_logging import lazy_json
+
 # Fix the path to point to the correct configs directory
 TEMPLATES_DIR = pathlib.Path("/app/configs/search_templates")
 
@@ -156,7 +158,7 @@ def build_query(name:str, **params)->dict:
                         bool_query["filter"] = []
                     bool_query["filter"].append(filter_condition)
     
-    # Debug: log the final object before returning
-    logger.info(f"DEBUG: Final object: {json.dumps(obj, ensure_ascii=False)}")
+    # 查询体只在 DEBUG 级别且真正输出时才序列化
+    logger.debug("Final query: %s", lazy_json(obj))
     
     return obj
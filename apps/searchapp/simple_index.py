@@ -90,6 +90,15 @@ ARTICLE_MAPPING = {
             "favorite_count": {"type": "long"},
             "reading_time": {"type": "integer"},
             
+            # === 列表渲染用的反范式字段（只存储不检索） ===
+            "channel_name": {"type": "keyword"},
+            "topic": {"type": "keyword"},
+            "topics": {"type": "keyword"},
+            "topic_title": {"type": "keyword"},
+            "cover_url": {"type": "keyword", "index": False},
+            "cover_title": {"type": "keyword", "index": False},
+            "cover_renditions": {"type": "object", "enabled": False},
+            
             # === 实时热度数据 ===
             "pop_1h": {"type": "float"},
             "pop_24h": {"type": "float"},
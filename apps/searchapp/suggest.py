@@ -0,0 +1,250 @@
+"""
+搜索建议前缀索引
+
+每个 worker 进程按站点维护一棵内存前缀树，补全请求只需沿前缀走到节点并返回预先排好的候选：
+- 词条来源：近期文章标题、文章标签、用户搜索词（ClickHouse search_terms_minute 预聚合）
+- 权重：搜索词按近期频次（24小时半衰期）加权，标题与标签提供基础权重
+- 每个节点保存按权重排序的前 TOP_K 个词条，查询耗时与词条总数无关
+- 每分钟从预聚合表增量读取新的完整分钟的搜索次数；每小时全量重建以衰减旧权重、纳入新文章
+- 构建与刷新都在后台线程进行，请求线程只读当前索引；首次构建完成前返回空结果
+- 站点经站点注册表解析，未知的 ?site= 值使用默认站点的索引，索引数量有上限
+"""
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+TOP_K = 10
+MAX_TERM_LENGTH = 30
+MAX_TITLES = 5000
+MAX_TAGS = 2000
+QUERY_LOOKBACK_HOURS = 7 * 24
+QUERY_HALF_LIFE_HOURS = 24
+QUERY_WEIGHT = 10.0
+TITLE_WEIGHT = 1.0
+TAG_WEIGHT = 2.0
+INCREMENTAL_INTERVAL = 60
+REBUILD_INTERVAL = 3600
+# 每个进程最多保留的站点索引数量
+MAX_ENGINES = 32
+
+# 近期搜索词：按小时衰减求和（参数化查询）
+QUERY_TERMS_SQL = """
+SELECT query, toUnixTimestamp(toStartOfHour(minute)) AS hour, sum(searches)
+FROM search_terms_minute
+WHERE site = %(site)s AND minute >= toDateTime(%(since)s) AND minute < toDateTime(%(until)s)
+GROUP BY query, hour
+"""
+
+
+class _Node:
+    __slots__ = ('children', 'top')
+
+    def __init__(self):
+        self.children = {}
+        self.top = []
+
+
+class PrefixTrie:
+    """带权前缀树：每个节点缓存子树中权重最高的 TOP_K 个词条"""
+
+    def __init__(self, top_k=TOP_K):
+        self.top_k = top_k
+        self.root = _Node()
+        self.weights = {}
+        self.kinds = {}
+
+    def __len__(self):
+        return len(self.weights)
+
+    def add(self, term, weight, kind):
+        """累加词条权重并更新路径上各节点的候选"""
+        term = term.strip()
+        if not term or len(term) > MAX_TERM_LENGTH:
+            return
+        self.weights[term] = self.weights.get(term, 0.0) + weight
+        # 搜索词优先标注为热门搜索
+        if kind == 'query' or term not in self.kinds:
+            self.kinds[term] = kind
+
+        node = self.root
+        for char in term.lower():
+            node = node.children.setdefault(char, _Node())
+            self._promote(node, term)
+
+    def _promote(self, node, term):
+        top = node.top
+        if term not in top:
+            if len(top) >= self.top_k and self.weights[top[-1]] >= self.weights[term]:
+                return
+            top = top + [term]
+        # 整体替换列表，并发读取的请求线程不会看到排序中的中间状态
+        node.top = sorted(top, key=lambda t: -self.weights[t])[:self.top_k]
+
+    def complete(self, prefix, limit=TOP_K):
+        node = self.root
+        for char in prefix.lower():
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return [(term, self.weights[term], self.kinds[term]) for term in node.top[:limit]]
+
+
+def _clickhouse_client():
+    try:
+        from clickhouse_driver import Client
+        return Client.from_url(settings.CLICKHOUSE_URL)
+    except Exception as e:
+        logger.warning(f"ClickHouse client error: {e}")
+        return None
+
+
+def _decayed(count, age_hours):
+    return count * math.pow(0.5, max(0.0, age_hours) / QUERY_HALF_LIFE_HOURS)
+
+
+class SuggestionEngine:
+    """单个站点的搜索建议索引"""
+
+    def __init__(self, site):
+        self.site = site
+        self.trie = PrefixTrie()
+        self.built_at = 0.0
+        self.refreshed_at = 0.0
+        # 已计入的搜索词截止分钟（Unix 时间戳，不含）
+        self.watermark = None
+        self._lock = threading.Lock()
+
+    # ---- 数据源 ----
+
+    def _site_articles(self):
+        from apps.core.site_registry import site_registry
+        from apps.news.models import ArticlePage
+
+        site_obj = site_registry.get_by_hostname(self.site)
+        if site_obj is None:
+            return ArticlePage.objects.none()
+        return ArticlePage.objects.live().descendant_of(site_obj.root_page)
+
+    def _load_titles(self, trie):
+        now = timezone.now()
+        rows = self._site_articles().order_by('-first_published_at').values_list(
+            'title', 'first_published_at'
+        )[:MAX_TITLES]
+        for title, published in rows:
+            # 30天内的标题线性加权
+            age_days = (now - published).days if published else 30
+            trie.add(title or '', TITLE_WEIGHT * (1.0 + max(0.0, 1.0 - age_days / 30.0)), 'title')
+
+    def _load_tags(self, trie):
+        from django.db.models import Count
+        from apps.news.models.article import ArticlePageTag
+
+        rows = ArticlePageTag.objects.filter(
+            content_object__in=self._site_articles()
+        ).values('tag__name').annotate(uses=Count('id')).order_by('-uses')[:MAX_TAGS]
+        for row in rows:
+            trie.add(row['tag__name'] or '', TAG_WEIGHT * (1.0 + math.log1p(row['uses'])), 'tag')
+
+    def _load_queries(self, trie, since, until):
+        client = _clickhouse_client()
+        if client is None:
+            return False
+        try:
+            rows = client.execute(QUERY_TERMS_SQL, {'site': self.site, 'since': since, 'until': until})
+        except Exception as e:
+            logger.warning(f"Search terms rollup query failed for {self.site}: {e}")
+            return False
+        now_ts = time.time()
+        for query, hour_ts, searches in rows:
+            trie.add(query, QUERY_WEIGHT * _decayed(searches, (now_ts - hour_ts) / 3600.0), 'query')
+        return True
+
+    # ---- 构建与刷新 ----
+
+    def _current_minute(self):
+        return int(time.time()) // 60 * 60
+
+    def rebuild(self):
+        """全量重建：标题 + 标签 + 近7天搜索词"""
+        started = time.perf_counter()
+        trie = PrefixTrie()
+        until = self._current_minute()
+        try:
+            self._load_titles(trie)
+            self._load_tags(trie)
+        except Exception as e:
+            logger.warning(f"Suggestion index content load failed for {self.site}: {e}")
+        self._load_queries(trie, until - QUERY_LOOKBACK_HOURS * 3600, until)
+
+        self.trie = trie
+        self.watermark = until
+        self.built_at = self.refreshed_at = time.time()
+        logger.info(
+            f"Suggestion index for {self.site} rebuilt: {len(trie)} terms "
+            f"in {(time.perf_counter() - started) * 1000:.0f}ms"
+        )
+
+    def refresh_incremental(self):
+        """把水位线之后的完整分钟的搜索次数累加到当前索引"""
+        until = self._current_minute()
+        if self.watermark is None or until <= self.watermark:
+            return
+        if self._load_queries(self.trie, self.watermark, until):
+            self.watermark = until
+        self.refreshed_at = time.time()
+
+    def _refresh(self):
+        try:
+            if time.time() - self.built_at >= REBUILD_INTERVAL:
+                self.rebuild()
+            else:
+                self.refresh_incremental()
+        except Exception as e:
+            logger.warning(f"Suggestion index refresh failed for {self.site}: {e}")
+        finally:
+            connections.close_all()
+            self._lock.release()
+
+    def ensure_fresh(self):
+        """首次构建与到期刷新都在后台线程进行，不阻塞请求"""
+        if self.built_at and time.time() - self.refreshed_at < INCREMENTAL_INTERVAL:
+            return
+        if self._lock.acquire(blocking=False):
+            threading.Thread(target=self._refresh, name=f'suggest-refresh-{self.site}', daemon=True).start()
+
+    def suggest(self, prefix, limit=TOP_K):
+        self.ensure_fresh()
+        return self.trie.complete(prefix, limit)
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def resolve_site(site):
+    """把请求中的站点标识解析为已登记站点的主机名，未知值退回默认站点"""
+    from apps.core.site_registry import site_registry
+
+    site_obj = site_registry.get_by_hostname(site) or site_registry.snapshot().default
+    return site_obj.hostname if site_obj is not None else settings.SITE_HOSTNAME
+
+
+def get_engine(site):
+    site = resolve_site(site)
+    engine = _engines.get(site)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(site)
+            if engine is None:
+                if len(_engines) >= MAX_ENGINES:
+                    # 淘汰最早创建的索引
+                    _engines.pop(next(iter(_engines)))
+                engine = _engines[site] = SuggestionEngine(site)
+    return engine
@@ -28,41 +28,130 @@ def delete_article_doc(page_id:int):
     except Exception:
         pass
 
+# 上次同步值的缓存有效期：过期后即使数值未变也会重新写入，用于重建索引后的自愈
+CTR_SYNC_STATE_TTL = 600
+CTR_SYNC_STATE_CHUNK = 1000
+
+# 1小时与24小时窗口分别从能覆盖窗口的最粗粒度预聚合表读取，合并为一行
+CTR_FEATURES_SQL = """
+SELECT article_id,
+       sum(clicks_1h) / nullIf(sum(impressions_1h), 0) AS ctr_1h,
+       sum(clicks_1h) AS pop_1h,
+       sum(clicks_24h) / nullIf(sum(impressions_24h), 0) AS ctr_24h,
+       sum(clicks_24h) AS pop_24h
+FROM (
+    SELECT article_id, sum(clicks) AS clicks_1h, sum(impressions) AS impressions_1h,
+           toUInt64(0) AS clicks_24h, toUInt64(0) AS impressions_24h
+    FROM {short_table}
+    WHERE {short_window} AND site = %(site)s
+    GROUP BY article_id
+    UNION ALL
+    SELECT article_id, toUInt64(0), toUInt64(0), sum(clicks), sum(impressions)
+    FROM {long_table}
+    WHERE {long_window} AND site = %(site)s
+    GROUP BY article_id
+)
+GROUP BY article_id
+"""
+
+
+def ctr_features_sql(client) -> str:
+    from apps.core.services.metrics_rollups import pick_tier
+
+    short_tier, long_tier = pick_tier(1, client), pick_tier(24, client)
+    return CTR_FEATURES_SQL.format(
+        short_table=short_tier.table,
+        short_window=short_tier.window_condition("h1"),
+        long_table=long_tier.table,
+        long_window=long_tier.window_condition("h24"),
+    )
+
+
+def _ctr_sync_state_key(site: str, article_id: str) -> str:
+    return f"ctr_sync:{site}:{article_id}"
+
+
+def _iter_changed_ctr_docs(rows, site: str, pending_state: dict):
+    """
+    将 ClickHouse 行流转换为待更新文档流，跳过与上次同步值相同的文章
+
+    pending_state 收集本轮要写入的状态，只有写入成功后才落到缓存。
+    """
+    from django.core.cache import cache
+
+    def flush(chunk):
+        keys = {_ctr_sync_state_key(site, aid): aid for aid, _ in chunk}
+        synced = cache.get_many(list(keys))
+        for aid, doc in chunk:
+            fingerprint = tuple(doc.values())
+            if synced.get(_ctr_sync_state_key(site, aid)) == fingerprint:
+                continue
+            pending_state[aid] = fingerprint
+            yield aid, doc
+
+    chunk = []
+    for aid, ctr1h, pop1h, ctr24h, pop24h in rows:
+        doc = {
+            "ctr_1h": round(float(ctr1h or 0.0), 6),
+            "pop_1h": float(pop1h or 0.0),
+            "ctr_24h": round(float(ctr24h or 0.0), 6),
+            "pop_24h": float(pop24h or 0.0),
+        }
+        chunk.append((str(aid), doc))
+        if len(chunk) >= CTR_SYNC_STATE_CHUNK:
+            yield from flush(chunk)
+            chunk = []
+    if chunk:
+        yield from flush(chunk)
+
+
 @app.task
-def update_ctr_features(site:str=None):
+def update_ctr_features(site:str=None, chunk_size:int=500, concurrency:int=4):
+    """
+    将 ClickHouse 中的 CTR/热度特征同步到 OpenSearch
+
+    - 流式读取 ClickHouse 结果，按块通过 `_bulk` 局部更新，并发度有上限
+    - 跳过与上次同步值相同的文章
+    - 不使用 doc_as_upsert，未被索引的文章不会生成孤儿文档
+    """
+    from django.core.cache import cache
+    from .bulk import bulk_partial_update
+    import logging
+
     site = site or settings.SITE_HOSTNAME
     breaker = get_breaker("clickhouse", failure_threshold=5, recovery_timeout=30, rolling_window=60)
     ch = Client.from_url(settings.CLICKHOUSE_URL)
-    q = """
-    SELECT site, article_id,
-           sum(clicks)/nullIf(sum(impressions),0) AS ctr_1h,
-           sum(clicks) AS clicks_1h
-    FROM article_metrics_agg
-    WHERE window_start >= now() - INTERVAL 1 HOUR AND site = %(site)s
-    GROUP BY site, article_id
-    """
-    rows = breaker.call(ch.execute, q, {"site": site})
-    os = get_client()
-    index_name = get_index_name(site)  # 🎯 简化：直接使用索引名称
-    for site, aid, ctr1h, c1h in rows:
-        # 🎯 使用update方法进行部分更新，保留文档的其他字段（如is_hero等）
-        try:
-            os.update(
-                index=index_name, 
-                id=aid, 
-                body={
-                    "doc": {
-                        "ctr_1h": float(ctr1h or 0.0), 
-                        "pop_1h": float(c1h or 0.0)
-                    }
-                },
-                doc_as_upsert=True  # 如果文档不存在则创建
-            )
-        except Exception as e:
-            # 如果update失败（如文档不存在），记录日志但继续处理
-            import logging
-            logging.getLogger(__name__).warning(f"更新文章 {aid} CTR特征失败: {e}")
-            continue
+    rows = breaker.call(
+        ch.execute_iter, ctr_features_sql(ch), {"site": site, "h1": 1, "h24": 24},
+        settings={"max_block_size": 10000},
+    )
+
+    pending_state = {}
+    result = bulk_partial_update(
+        get_client(),
+        get_index_name(site),  # 🎯 简化：直接使用索引名称
+        _iter_changed_ctr_docs(rows, site, pending_state),
+        chunk_size=chunk_size,
+        concurrency=concurrency,
+    )
+
+    if result.succeeded:
+        cache.set_many(
+            {_ctr_sync_state_key(site, aid): pending_state[aid] for aid in result.succeeded},
+            timeout=CTR_SYNC_STATE_TTL,
+        )
+
+    summary = dict(result.as_dict(), site=site, changed=len(pending_state))
+    logging.getLogger(__name__).info("CTR features synced: %s", summary)
+    return summary
+
+
+@app.task
+def refresh_candidate_pools():
+    """为请求热度最高的召回参数组合重建信息流候选池"""
+    from apps.api.utils.candidate_pools import refresh_pools
+
+    return refresh_pools()
 
 
 @app.task(autoretry_for=(Exception,), retry_backoff=True, max_retries=3)
@@ -35,7 +35,7 @@ class UserProfileAdmin(admin.ModelAdmin):
 
 @admin.register(ReadingHistory)
 class ReadingHistoryAdmin(admin.ModelAdmin):
-    list_display = ['user', 'article_title', 'article_channel', 'read_time', 'read_duration', 'read_progress']
+    list_display = ['user', 'article_title', 'article_channel', 'read_time', 'read_duration', 'read_progress', 'read_count']
     list_filter = ['article_channel', 'read_time']
     search_fields = ['user__username', 'article_title', 'article_channel']
 
@@ -0,0 +1,163 @@
+"""
+用户互动状态集合缓存
+
+每个用户的点赞（按目标类型）与收藏各存为一个 Redis 集合，集合中带一个哨兵成员表示
+"已从数据库完整加载"。查询任意数量的目标ID只需一次管道往返（SMISMEMBER）；
+互动写入后由信号在集合已加载时同步 SADD/SREM，未加载的集合留待下次查询时重建。
+每个集合带一个版本计数器，互动写入时递增；重建时先写临时键，只有版本在读库期间
+未变化才 RENAME 覆盖，避免并发的点赞/取消被重建覆盖后在 TTL 内一直返回旧状态。
+Redis 不可用时退回数据库，每类互动只查询一次并在内存中构建集合。
+"""
+import logging
+import uuid
+
+from apps.core.utils.redis_client import get_redis, redis_key
+
+logger = logging.getLogger(__name__)
+
+# 标记集合已完整加载的哨兵成员（不会与真实ID冲突）
+LOADED_SENTINEL = '__loaded__'
+# 集合过期时间：冷用户的集合自然淘汰，下次访问时重建
+INTERACTION_SET_TTL = 24 * 3600
+# 重建用临时键的过期时间，进程中途退出时自动清理
+REBUILD_TMP_TTL = 60
+
+# 递增版本使进行中的重建作废；仅在集合已加载时同步增删，避免写出不完整的数据
+_SYNC_SCRIPT = """
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+if redis.call('SISMEMBER', KEYS[1], ARGV[1]) == 1 then
+    if ARGV[2] == 'add' then
+        redis.call('SADD', KEYS[1], ARGV[3])
+    else
+        redis.call('SREM', KEYS[1], ARGV[3])
+    end
+    return 1
+end
+return 0
+"""
+
+# 版本与读库前一致时用临时键原子替换集合，否则丢弃临时键
+_STORE_SCRIPT = """
+local current = redis.call('GET', KEYS[3]) or ''
+if current == ARGV[1] then
+    redis.call('RENAME', KEYS[1], KEYS[2])
+    redis.call('EXPIRE', KEYS[2], ARGV[2])
+    return 1
+end
+redis.call('DEL', KEYS[1])
+return 0
+"""
+
+
+def like_set_key(user_id, target_type):
+    return redis_key('user_interactions', user_id, 'like', target_type)
+
+
+def favorite_set_key(user_id):
+    return redis_key('user_interactions', user_id, 'favorite')
+
+
+def _version_key(key):
+    return f"{key}:version"
+
+
+def _load_like_ids(user_id, target_type, target_ids=None):
+    from .models import UserInteraction
+    qs = UserInteraction.objects.filter(user_id=user_id, target_type=target_type, interaction_type='like')
+    if target_ids is not None:
+        qs = qs.filter(target_id__in=target_ids)
+    return set(qs.values_list('target_id', flat=True))
+
+
+def _load_favorite_ids(user_id, target_ids=None):
+    from .models import UserFavorite
+    qs = UserFavorite.objects.filter(user_id=user_id)
+    if target_ids is not None:
+        qs = qs.filter(article_id__in=target_ids)
+    return set(qs.values_list('article_id', flat=True))
+
+
+def _read_version(client, key):
+    version = client.get(_version_key(key))
+    return version.decode() if isinstance(version, bytes) else (version or '')
+
+
+def _store_set(client, key, members, version):
+    """写入重建的集合；读库期间有互动写入（版本变化）时放弃，返回是否写入"""
+    tmp_key = f"{key}:rebuild:{uuid.uuid4().hex}"
+    pipe = client.pipeline(transaction=False)
+    pipe.sadd(tmp_key, LOADED_SENTINEL, *members)
+    pipe.expire(tmp_key, REBUILD_TMP_TTL)
+    client.register_script(_STORE_SCRIPT)(
+        keys=[tmp_key, key, _version_key(key)], args=[version, INTERACTION_SET_TTL], client=pipe
+    )
+    return bool(pipe.execute()[-1])
+
+
+def get_interaction_status(user_id, target_type, target_ids):
+    """
+    批量查询用户对目标的点赞/收藏状态
+
+    Returns:
+        dict: {target_id: {'liked': bool, 'favorited': bool}}
+    """
+    target_ids = list(dict.fromkeys(target_ids))
+    liked = favorited = None
+
+    client = get_redis()
+    if client is not None:
+        like_key = like_set_key(user_id, target_type)
+        fav_key = favorite_set_key(user_id)
+        members = [LOADED_SENTINEL, *target_ids]
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.smismember(like_key, members)
+            pipe.smismember(fav_key, members)
+            like_flags, fav_flags = pipe.execute()
+
+            if like_flags[0]:
+                liked = {tid for tid, flag in zip(target_ids, like_flags[1:]) if flag}
+            else:
+                version = _read_version(client, like_key)
+                liked = _load_like_ids(user_id, target_type)
+                _store_set(client, like_key, liked, version)
+
+            if fav_flags[0]:
+                favorited = {tid for tid, flag in zip(target_ids, fav_flags[1:]) if flag}
+            else:
+                version = _read_version(client, fav_key)
+                favorited = _load_favorite_ids(user_id)
+                _store_set(client, fav_key, favorited, version)
+        except Exception as e:
+            logger.warning(f"Interaction set cache unavailable for user {user_id}: {e}")
+            liked = favorited = None
+
+    if liked is None:
+        liked = _load_like_ids(user_id, target_type, target_ids)
+    if favorited is None:
+        favorited = _load_favorite_ids(user_id, target_ids)
+
+    return {
+        tid: {'liked': tid in liked, 'favorited': tid in favorited}
+        for tid in target_ids
+    }
+
+
+def sync_interaction_member(key, member, added):
+    """互动写入（事务提交）后递增集合版本，并在集合已加载时同步增删"""
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        client.register_script(_SYNC_SCRIPT)(
+            keys=[key, _version_key(key)],
+            args=[LOADED_SENTINEL, 'add' if added else 'remove', str(member), INTERACTION_SET_TTL],
+        )
+    except Exception as e:
+        # 同步失败时删除集合，下次查询从数据库重建，避免返回过期状态
+        logger.warning(f"Failed to sync interaction set {key}: {e}")
+        try:
+            client.delete(key)
+        except Exception:
+            pass
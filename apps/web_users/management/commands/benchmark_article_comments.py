@@ -0,0 +1,96 @@
+"""
+管理命令：测量文章评论分页接口的延迟
+
+在一个合成文章ID下写入指定数量的评论（根评论与多层回复混合），
+分别测量缓存未命中（每次递增命名空间代数）与缓存命中时的 p50/p95，
+并统计每页的SQL查询数。结束后删除合成数据。
+
+使用方法（请在压测库上运行）：
+python manage.py benchmark_article_comments --comments 10000
+"""
+
+import random
+import time
+
+from django.db import connection, transaction
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from apps.api.rest.article_comments import get_article_comments
+from apps.api.utils.cache_namespace import bump_namespaces, comment_ns
+from apps.web_users.models import UserComment, WebUser
+
+BENCH_ARTICLE_ID = 'bench-comments'
+
+
+class Command(BaseCommand):
+    help = '测量拥有大量评论的文章的评论分页延迟（p50/p95）与每页查询数'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--comments', type=int, default=10000, help='合成评论数量（默认10000）')
+        parser.add_argument('--reply-ratio', type=float, default=0.7, help='回复占比（默认0.7）')
+        parser.add_argument('--runs', type=int, default=50, help='每种场景的请求次数（默认50）')
+        parser.add_argument('--limit', type=int, default=20, help='每页根评论数（默认20）')
+        parser.add_argument('--keep', action='store_true', help='保留合成数据')
+
+    def handle(self, *args, **options):
+        user, _ = WebUser.objects.get_or_create(
+            username='bench_commenter', defaults={'email': 'bench_commenter@example.com', 'password_hash': '!'}
+        )
+        try:
+            self._seed(user, options['comments'], options['reply_ratio'])
+            pages = self._collect_cursors(options['limit'])
+            self.stdout.write(f'📊 {options["comments"]} 条评论，{len(pages)} 页根评论')
+
+            self._report('cold', pages, options, cold=True)
+            self._report('warm', pages, options, cold=False)
+        finally:
+            if not options['keep']:
+                UserComment.objects.filter(article_id=BENCH_ARTICLE_ID).delete()
+
+    def _seed(self, user, total, reply_ratio):
+        UserComment.objects.filter(article_id=BENCH_ARTICLE_ID).delete()
+        created = []
+        with transaction.atomic():
+            for _ in range(total):
+                parent = random.choice(created) if created and random.random() < reply_ratio else None
+                created.append(UserComment.objects.create(
+                    user=user, article_id=BENCH_ARTICLE_ID, article_title='bench', article_slug='bench',
+                    article_channel='bench', content='benchmark comment', parent=parent, status='published',
+                ))
+
+    def _request(self, limit, cursor=None):
+        params = {'limit': limit}
+        if cursor:
+            params['cursor'] = cursor
+        request = RequestFactory().get(f'/api/articles/{BENCH_ARTICLE_ID}/comments/', params)
+        return get_article_comments(request, BENCH_ARTICLE_ID)
+
+    def _collect_cursors(self, limit):
+        import json
+        cursors = [None]
+        while True:
+            body = json.loads(self._request(limit, cursors[-1]).content)
+            if not body['pagination']['has_next']:
+                return cursors
+            cursors.append(body['pagination']['next_cursor'])
+
+    def _report(self, label, pages, options, cold):
+        timings = []
+        max_queries = 0
+        for i in range(options['runs']):
+            cursor = pages[i % len(pages)]
+            if cold:
+                bump_namespaces([comment_ns(BENCH_ARTICLE_ID)])
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                self._request(options['limit'], cursor)
+                timings.append((time.perf_counter() - started) * 1000)
+            max_queries = max(max_queries, len(ctx.captured_queries))
+        timings.sort()
+        p50 = timings[len(timings) // 2]
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f'  {label:<5} p50={p50:.1f}ms p95={p95:.1f}ms max={timings[-1]:.1f}ms queries/page<={max_queries}'
+        )
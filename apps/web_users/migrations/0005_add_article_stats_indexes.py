@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2025-10-02 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('web_users', '0004_remove_unique_constraint_reading_history'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usercomment',
+            index=models.Index(fields=['article_id', 'status'], name='comment_article_status'),
+        ),
+        migrations.AddIndex(
+            model_name='userfavorite',
+            index=models.Index(fields=['article_id'], name='favorite_article'),
+        ),
+        migrations.AddIndex(
+            model_name='userinteraction',
+            index=models.Index(fields=['target_type', 'target_id', 'interaction_type'], name='interaction_target'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    # 只有结构变更；已有评论的路径回填见 0008（非原子迁移，避免自关联外键的
+    # 延迟约束触发器与 ALTER TABLE 处于同一事务）
+
+    dependencies = [
+        ('web_users', '0005_add_article_stats_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usercomment',
+            name='path',
+            field=models.CharField(blank=True, default='', editable=False, max_length=500, verbose_name='线程路径'),
+        ),
+        migrations.AddField(
+            model_name='usercomment',
+            name='thread_root',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='thread_comments', to='web_users.usercomment', verbose_name='根评论'),
+        ),
+        migrations.AddIndex(
+            model_name='usercomment',
+            index=models.Index(fields=['article_id', 'status', 'parent', 'created_at'], name='comment_thread_page'),
+        ),
+        migrations.AddIndex(
+            model_name='usercomment',
+            index=models.Index(fields=['thread_root', 'path'], name='comment_thread_path'),
+        ),
+    ]
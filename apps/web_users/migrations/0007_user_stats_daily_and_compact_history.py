@@ -0,0 +1,145 @@
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+
+
+USER_BATCH_SIZE = 500
+RECENT_DAYS = 7
+
+
+def _user_batches(ReadingHistory):
+    user_ids = list(ReadingHistory.objects.order_by().values_list('user_id', flat=True).distinct())
+    user_ids.sort()
+    for i in range(0, len(user_ids), USER_BATCH_SIZE):
+        yield user_ids[i:i + USER_BATCH_SIZE]
+
+
+def backfill_user_stats(apps, schema_editor):
+    """按用户分批，从未压缩的阅读历史生成逐日汇总行（必须在压缩之前执行）"""
+    ReadingHistory = apps.get_model('web_users', 'ReadingHistory')
+    UserStatsDaily = apps.get_model('web_users', 'UserStatsDaily')
+
+    for user_ids in _user_batches(ReadingHistory):
+        daily = (
+            ReadingHistory.objects.filter(user_id__in=user_ids)
+            .annotate(day=TruncDate('read_time'))
+            .values('user_id', 'day', 'article_channel')
+            .annotate(reads=Count('id'), duration=Sum('read_duration'))
+            .order_by('user_id', 'day')
+        )
+        rows = {}
+        for item in daily:
+            row = rows.setdefault((item['user_id'], item['day']), {
+                'reads': 0, 'duration': 0, 'channels': {},
+            })
+            row['reads'] += item['reads']
+            row['duration'] += item['duration'] or 0
+            if item['article_channel']:
+                row['channels'][item['article_channel']] = (
+                    row['channels'].get(item['article_channel'], 0) + item['reads']
+                )
+
+        objs = []
+        running = {}
+        for (user_id, day), row in sorted(rows.items()):
+            state = running.setdefault(user_id, {
+                'total_reads': 0, 'total_duration': 0, 'channels': {}, 'recent': {},
+            })
+            state['total_reads'] += row['reads']
+            state['total_duration'] += row['duration']
+            for channel, count in row['channels'].items():
+                state['channels'][channel] = state['channels'].get(channel, 0) + count
+            start = (day - timedelta(days=RECENT_DAYS - 1)).isoformat()
+            state['recent'][day.isoformat()] = row['reads']
+            state['recent'] = {d: c for d, c in state['recent'].items() if d >= start}
+            objs.append(UserStatsDaily(
+                user_id=user_id,
+                day=day,
+                reads=row['reads'],
+                read_duration=row['duration'],
+                total_reads=state['total_reads'],
+                total_read_duration=state['total_duration'],
+                channel_reads=dict(state['channels']),
+                recent_reads=dict(state['recent']),
+            ))
+        UserStatsDaily.objects.bulk_create(objs, batch_size=1000)
+
+
+def compact_reading_history(apps, schema_editor):
+    """按用户分批把同一用户/文章的多条阅读记录合并为一行"""
+    ReadingHistory = apps.get_model('web_users', 'ReadingHistory')
+
+    for user_ids in _user_batches(ReadingHistory):
+        duplicates = (
+            ReadingHistory.objects.filter(user_id__in=user_ids)
+            .values('user_id', 'article_id')
+            .annotate(
+                n=Count('id'), keep_id=Max('id'), duration=Sum('read_duration'),
+                progress=Max('read_progress'), last_read=Max('read_time'),
+            )
+            .filter(n__gt=1)
+            .order_by()
+        )
+        for dup in duplicates:
+            ReadingHistory.objects.filter(id=dup['keep_id']).update(
+                read_count=dup['n'],
+                read_duration=dup['duration'] or 0,
+                read_progress=dup['progress'] or 0,
+                read_time=dup['last_read'],
+            )
+            ReadingHistory.objects.filter(
+                user_id=dup['user_id'], article_id=dup['article_id']
+            ).exclude(id=dup['keep_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('web_users', '0006_usercomment_thread_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='readinghistory',
+            name='read_count',
+            field=models.IntegerField(default=1, verbose_name='阅读次数'),
+        ),
+        migrations.CreateModel(
+            name='UserStatsDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='日期')),
+                ('reads', models.IntegerField(default=0, verbose_name='当天阅读数')),
+                ('read_duration', models.IntegerField(default=0, verbose_name='当天阅读时长(秒)')),
+                ('total_reads', models.IntegerField(default=0, verbose_name='累计阅读数')),
+                ('total_read_duration', models.IntegerField(default=0, verbose_name='累计阅读时长(秒)')),
+                ('channel_reads', models.JSONField(default=dict, verbose_name='各频道累计阅读数')),
+                ('recent_reads', models.JSONField(default=dict, verbose_name='最近7天逐日阅读数')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stats_daily', to='web_users.webuser')),
+            ],
+            options={
+                'verbose_name': '用户统计日汇总',
+                'verbose_name_plural': '用户统计日汇总',
+                'db_table': 'web_user_stats_daily',
+                'constraints': [models.UniqueConstraint(fields=('user', 'day'), name='user_stats_daily_user_day')],
+            },
+        ),
+        migrations.RunPython(backfill_user_stats, migrations.RunPython.noop),
+        migrations.RunPython(compact_reading_history, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='readinghistory',
+            constraint=models.UniqueConstraint(fields=('user', 'article_id'), name='reading_history_user_article'),
+        ),
+        migrations.AddIndex(
+            model_name='readinghistory',
+            index=models.Index(fields=['user', 'read_time'], name='reading_history_user_time'),
+        ),
+        migrations.AddIndex(
+            model_name='readinghistory',
+            index=models.Index(fields=['user', 'article_channel'], name='reading_history_user_channel'),
+        ),
+    ]
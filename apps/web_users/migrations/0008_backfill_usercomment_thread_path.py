@@ -0,0 +1,42 @@
+from django.db import migrations
+
+
+BATCH_SIZE = 2000
+
+
+def backfill_thread_paths(apps, schema_editor):
+    """按ID升序回填：父评论总是先于回复创建，处理到回复时父路径已确定"""
+    UserComment = apps.get_model('web_users', 'UserComment')
+    paths = {}
+    roots = {}
+    batch = []
+    for comment in UserComment.objects.order_by('id').only('id', 'parent_id').iterator(chunk_size=BATCH_SIZE):
+        segment = str(comment.id).zfill(10)
+        if comment.parent_id and comment.parent_id in paths:
+            comment.path = f"{paths[comment.parent_id]}/{segment}"
+            comment.thread_root_id = roots[comment.parent_id]
+        else:
+            comment.path = segment
+            comment.thread_root_id = comment.id
+        paths[comment.id] = comment.path
+        roots[comment.id] = comment.thread_root_id
+        batch.append(comment)
+        if len(batch) >= BATCH_SIZE:
+            UserComment.objects.bulk_update(batch, ['path', 'thread_root'])
+            batch = []
+    if batch:
+        UserComment.objects.bulk_update(batch, ['path', 'thread_root'])
+
+
+class Migration(migrations.Migration):
+    # 按批自动提交：thread_root 是自关联外键，回填与建索引放在同一事务中时
+    # PostgreSQL 会因延迟的外键约束触发器报 "pending trigger events"
+    atomic = False
+
+    dependencies = [
+        ('web_users', '0007_user_stats_daily_and_compact_history'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_thread_paths, migrations.RunPython.noop),
+    ]
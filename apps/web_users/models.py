@@ -7,6 +7,7 @@
 from django.db import models
 from django.contrib.auth.hashers import make_password, check_password
 from django.utils import timezone
+from datetime import date, timedelta
 
 
 class WebUser(models.Model):
@@ -102,18 +103,76 @@ class ReadingHistory(models.Model):
     read_time = models.DateTimeField('阅读时间', auto_now_add=True)
     read_duration = models.IntegerField('阅读时长(秒)', default=0)
     read_progress = models.IntegerField('阅读进度(%)', default=0)
+    read_count = models.IntegerField('阅读次数', default=1)
     
     class Meta:
         db_table = 'web_reading_history'
         verbose_name = '阅读历史'
         verbose_name_plural = '阅读历史'
         ordering = ['-read_time']
-        # 移除unique_together限制，允许同一用户多次阅读同一文章的记录
+        # 每个用户/文章只保留一行：重复阅读累加次数与时长，read_time 为最近一次阅读
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'article_id'], name='reading_history_user_article'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'read_time'], name='reading_history_user_time'),
+            models.Index(fields=['user', 'article_channel'], name='reading_history_user_channel'),
+        ]
     
     def __str__(self):
         return f'{self.user.username} 阅读 {self.article_title}'
 
 
+class UserStatsDaily(models.Model):
+    """
+    用户阅读统计日汇总
+
+    每个用户每天一行，写入阅读记录时增量更新。除当天的阅读数/时长外，
+    每行还携带截至当天的累计值与最近7天的逐日阅读数，
+    统计接口只需读取该用户最新的一行。
+    """
+    
+    # 最近活动窗口（天）
+    RECENT_DAYS = 7
+    
+    user = models.ForeignKey(WebUser, on_delete=models.CASCADE, related_name='stats_daily')
+    day = models.DateField('日期')
+    
+    # 当天
+    reads = models.IntegerField('当天阅读数', default=0)
+    read_duration = models.IntegerField('当天阅读时长(秒)', default=0)
+    
+    # 截至当天的累计
+    total_reads = models.IntegerField('累计阅读数', default=0)
+    total_read_duration = models.IntegerField('累计阅读时长(秒)', default=0)
+    channel_reads = models.JSONField('各频道累计阅读数', default=dict)
+    recent_reads = models.JSONField('最近7天逐日阅读数', default=dict)
+    
+    updated_at = models.DateTimeField('更新时间', auto_now=True)
+    
+    class Meta:
+        db_table = 'web_user_stats_daily'
+        verbose_name = '用户统计日汇总'
+        verbose_name_plural = '用户统计日汇总'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'day'], name='user_stats_daily_user_day'),
+        ]
+    
+    def __str__(self):
+        return f'{self.user.username} {self.day}'
+    
+    def recent_activity(self, today):
+        """最近7天（含今天）的阅读数"""
+        start = today - timedelta(days=self.RECENT_DAYS - 1)
+        return sum(count for day, count in self.recent_reads.items() if date.fromisoformat(day) >= start)
+    
+    @property
+    def favorite_channel(self):
+        if not self.channel_reads:
+            return None
+        return max(self.channel_reads.items(), key=lambda item: item[1])[0]
+
+
 class UserComment(models.Model):
     """用户评论"""
     
@@ -134,6 +193,11 @@ class UserComment(models.Model):
     parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, 
                               related_name='replies', verbose_name='父评论')
     
+    # 物化路径：从根评论到本评论的ID链（定长补零、以/分隔），按 path 排序即为线程内的深度优先顺序
+    thread_root = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE,
+                                    related_name='thread_comments', verbose_name='根评论')
+    path = models.CharField('线程路径', max_length=500, blank=True, default='', editable=False)
+    
     # 父评论信息（用于显示）
     parent_content = models.TextField('父评论内容', blank=True)
     parent_author = models.CharField('父评论作者', max_length=150, blank=True)
@@ -151,9 +215,41 @@ class UserComment(models.Model):
         verbose_name = '用户评论'
         verbose_name_plural = '用户评论'
         ordering = ['-created_at']
+        indexes = [
+            # 文章评论数聚合
+            models.Index(fields=['article_id', 'status'], name='comment_article_status'),
+            # 根评论分页（parent IS NULL + 时间游标）
+            models.Index(fields=['article_id', 'status', 'parent', 'created_at'], name='comment_thread_page'),
+            # 按根评论取整个线程
+            models.Index(fields=['thread_root', 'path'], name='comment_thread_path'),
+        ]
+    
+    # 路径中每段ID的位数
+    PATH_SEGMENT_WIDTH = 10
+    # 线程最大深度：每层占 PATH_SEGMENT_WIDTH + 1 个字符，32 层不超过 path 的 500 字符
+    MAX_THREAD_DEPTH = 32
     
     def __str__(self):
         return f'{self.user.username}: {self.content[:50]}...'
+    
+    @classmethod
+    def build_path(cls, comment_id, parent_path=''):
+        segment = str(comment_id).zfill(cls.PATH_SEGMENT_WIDTH)
+        return f'{parent_path}/{segment}' if parent_path else segment
+    
+    def save(self, *args, **kwargs):
+        # 超过最大深度的回复挂到最深一层评论的父评论下（parent_content/parent_author 仍指向被回复的评论）
+        if self.pk is None and self.parent_id and not self.path:
+            segments = self.parent.path.split('/') if self.parent.path else []
+            if len(segments) >= self.MAX_THREAD_DEPTH:
+                self.parent = UserComment.objects.get(pk=int(segments[self.MAX_THREAD_DEPTH - 2]))
+        super().save(*args, **kwargs)
+        # 新评论在获得ID后补写线程路径
+        if not self.path:
+            parent = self.parent
+            self.path = self.build_path(self.pk, parent.path if parent else '')
+            self.thread_root_id = (parent.thread_root_id or parent.pk) if parent else self.pk
+            UserComment.objects.filter(pk=self.pk).update(path=self.path, thread_root_id=self.thread_root_id)
 
 
 class UserFavorite(models.Model):
@@ -176,6 +272,10 @@ class UserFavorite(models.Model):
         verbose_name_plural = '用户收藏'
         ordering = ['-created_at']
         unique_together = ['user', 'article_id']
+        indexes = [
+            # 文章收藏数聚合
+            models.Index(fields=['article_id'], name='favorite_article'),
+        ]
     
     def __str__(self):
         return f'{self.user.username} 收藏 {self.article_title}'
@@ -207,6 +307,10 @@ class UserInteraction(models.Model):
         verbose_name_plural = '用户互动'
         ordering = ['-created_at']
         unique_together = ['user', 'target_type', 'target_id', 'interaction_type']
+        indexes = [
+            # 文章点赞数聚合
+            models.Index(fields=['target_type', 'target_id', 'interaction_type'], name='interaction_target'),
+        ]
     
     def __str__(self):
         return f'{self.user.username} {self.get_interaction_type_display()} {self.target_type}#{self.target_id}'
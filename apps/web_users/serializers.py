@@ -132,9 +132,9 @@ class ReadingHistorySerializer(serializers.ModelSerializer):
         model = ReadingHistory
         fields = [
             'id', 'article_id', 'article_title', 'article_slug', 
-            'article_channel', 'read_time', 'read_duration', 'read_progress'
+            'article_channel', 'read_time', 'read_duration', 'read_progress', 'read_count'
         ]
-        read_only_fields = ['id', 'read_time']
+        read_only_fields = ['id', 'read_time', 'read_count']
 
 
 class UserCommentSerializer(serializers.ModelSerializer):
@@ -1,63 +1,38 @@
 """
 Web Users 系统的 Django 信号处理器
-用于在用户互动时自动同步 ArticlePage 的统计字段
+用于在用户互动时标记 ArticlePage 的统计字段待重算（批量聚合见 tasks.py），
+并同步用户互动状态集合缓存（见 interaction_cache.py）
 """
 import logging
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.db import transaction
 from .models import UserInteraction, UserFavorite, UserComment
+from .tasks import mark_article_dirty
+from .interaction_cache import favorite_set_key, like_set_key, sync_interaction_member
 
 logger = logging.getLogger(__name__)
 
 
 def update_article_stats(article_id):
     """
-    更新指定文章的统计数据
+    标记指定文章的统计数据需要重算
+
+    实际重算由 tasks.flush_dirty_article_stats 在去抖窗口后批量完成。
     
     Args:
         article_id (str): 文章ID
     """
     try:
-        from apps.news.models.article import ArticlePage
-        
-        # 统计各种互动数据
-        like_count = UserInteraction.objects.filter(
-            target_type='article',
-            target_id=str(article_id),
-            interaction_type='like'
-        ).count()
-
-        favorite_count = UserFavorite.objects.filter(
-            article_id=str(article_id)
-        ).count()
-
-        comment_count = UserComment.objects.filter(
-            article_id=str(article_id),
-            status='published'
-        ).count()
-
-        # 更新 ArticlePage 的统计字段和动态权重
-        try:
-            article = ArticlePage.objects.get(id=article_id)
-            article.like_count = like_count
-            article.favorite_count = favorite_count
-            article.comment_count = comment_count
-            
-            # 🚀 更新动态权重
-            old_weight = article.weight
-            article.update_dynamic_weight()
-            new_weight = article.weight
-            
-            article.save(update_fields=['like_count', 'favorite_count', 'comment_count', 'weight'])
-            
-            logger.info(f"Updated stats for article {article_id}: "
-                       f"likes={like_count}, favorites={favorite_count}, comments={comment_count}, weight={old_weight}→{new_weight}")
-        except ArticlePage.DoesNotExist:
-            logger.warning(f"Article {article_id} not found when updating stats")
-            
+        mark_article_dirty(article_id)
     except Exception as e:
-        logger.error(f"Failed to update stats for article {article_id}: {str(e)}")
+        logger.error(f"Failed to mark stats dirty for article {article_id}: {str(e)}")
+
+
+def invalidate_comment_threads(article_id):
+    """使文章评论线程的分页缓存失效"""
+    from apps.api.utils.cache_namespace import bump_namespaces, comment_ns
+    bump_namespaces([comment_ns(article_id)])
 
 
 @receiver(post_save, sender=UserInteraction)
@@ -65,6 +40,9 @@ def on_user_interaction_saved(sender, instance, created, **kwargs):
     """
     用户互动记录保存后的信号处理
     """
+    if created and instance.interaction_type == 'like':
+        key = like_set_key(instance.user_id, instance.target_type)
+        transaction.on_commit(lambda: sync_interaction_member(key, instance.target_id, added=True))
     if instance.target_type == 'article':
         # 使用事务确保数据一致性
         transaction.on_commit(lambda: update_article_stats(instance.target_id))
@@ -75,6 +53,9 @@ def on_user_interaction_deleted(sender, instance, **kwargs):
     """
     用户互动记录删除后的信号处理
     """
+    if instance.interaction_type == 'like':
+        key = like_set_key(instance.user_id, instance.target_type)
+        transaction.on_commit(lambda: sync_interaction_member(key, instance.target_id, added=False))
     if instance.target_type == 'article':
         # 使用事务确保数据一致性
         transaction.on_commit(lambda: update_article_stats(instance.target_id))
@@ -85,6 +66,9 @@ def on_user_favorite_saved(sender, instance, created, **kwargs):
     """
     用户收藏记录保存后的信号处理
     """
+    if created:
+        key = favorite_set_key(instance.user_id)
+        transaction.on_commit(lambda: sync_interaction_member(key, instance.article_id, added=True))
     # 使用事务确保数据一致性
     transaction.on_commit(lambda: update_article_stats(instance.article_id))
 
@@ -94,6 +78,8 @@ def on_user_favorite_deleted(sender, instance, **kwargs):
     """
     用户收藏记录删除后的信号处理
     """
+    key = favorite_set_key(instance.user_id)
+    transaction.on_commit(lambda: sync_interaction_member(key, instance.article_id, added=False))
     # 使用事务确保数据一致性
     transaction.on_commit(lambda: update_article_stats(instance.article_id))
 
@@ -103,6 +89,8 @@ def on_user_comment_saved(sender, instance, created, **kwargs):
     """
     用户评论保存后的信号处理
     """
+    # 新评论或审核状态变化都会影响线程展示
+    transaction.on_commit(lambda: invalidate_comment_threads(instance.article_id))
     # 只有当评论状态为已发布时才更新统计
     if instance.status == 'published':
         # 使用事务确保数据一致性
@@ -115,4 +103,5 @@ def on_user_comment_deleted(sender, instance, **kwargs):
     用户评论删除后的信号处理
     """
     # 使用事务确保数据一致性
+    transaction.on_commit(lambda: invalidate_comment_threads(instance.article_id))
     transaction.on_commit(lambda: update_article_stats(instance.article_id))
@@ -0,0 +1,107 @@
+"""
+用户阅读记录与统计汇总
+
+- 阅读历史按用户/文章压缩为一行，重复阅读累加次数与时长
+- 每次阅读同时增量更新 UserStatsDaily 当天的汇总行（携带累计值与最近7天逐日阅读数）
+"""
+import logging
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import ReadingHistory, UserStatsDaily
+
+logger = logging.getLogger(__name__)
+
+
+def record_reading(user, data):
+    """
+    写入一次阅读：压缩后的阅读历史 + 当天统计汇总
+
+    Args:
+        user: WebUser
+        data: 已校验的阅读数据（article_id、article_title、article_slug、
+              article_channel、read_duration、read_progress）
+
+    Returns:
+        ReadingHistory: 该用户/文章的阅读记录
+    """
+    now = timezone.now()
+    duration = max(int(data.get('read_duration') or 0), 0)
+    progress = int(data.get('read_progress') or 0)
+    article_fields = {
+        'article_title': data.get('article_title', ''),
+        'article_slug': data.get('article_slug', ''),
+        'article_channel': data.get('article_channel', ''),
+    }
+
+    with transaction.atomic():
+        updated = ReadingHistory.objects.filter(user=user, article_id=data['article_id']).update(
+            read_time=now,
+            read_count=F('read_count') + 1,
+            read_duration=F('read_duration') + duration,
+            read_progress=Greatest(F('read_progress'), progress),
+            **article_fields,
+        )
+        if not updated:
+            try:
+                with transaction.atomic():
+                    ReadingHistory.objects.create(
+                        user=user, article_id=data['article_id'], read_duration=duration,
+                        read_progress=progress, **article_fields,
+                    )
+            except IntegrityError:
+                # 并发的首次阅读：另一请求已创建该行，改为累加
+                ReadingHistory.objects.filter(user=user, article_id=data['article_id']).update(
+                    read_time=now,
+                    read_count=F('read_count') + 1,
+                    read_duration=F('read_duration') + duration,
+                    read_progress=Greatest(F('read_progress'), progress),
+                )
+        update_daily_stats(user, article_fields['article_channel'], duration, timezone.localdate(now))
+
+    return ReadingHistory.objects.get(user=user, article_id=data['article_id'])
+
+
+def _roll_recent(recent_reads, today):
+    """只保留最近7天的逐日阅读数"""
+    start = today - timedelta(days=UserStatsDaily.RECENT_DAYS - 1)
+    return {day: count for day, count in recent_reads.items() if day >= start.isoformat()}
+
+
+def update_daily_stats(user, channel, duration, today):
+    """在当天的汇总行上累加一次阅读；当天首次阅读时从最近一行继承累计值"""
+    row = (
+        UserStatsDaily.objects.select_for_update()
+        .filter(user=user)
+        .order_by('-day')
+        .first()
+    )
+    if row is None or row.day != today:
+        previous = row
+        row = UserStatsDaily(user=user, day=today)
+        if previous is not None:
+            row.total_reads = previous.total_reads
+            row.total_read_duration = previous.total_read_duration
+            row.channel_reads = dict(previous.channel_reads)
+            row.recent_reads = dict(previous.recent_reads)
+
+    row.reads += 1
+    row.read_duration += duration
+    row.total_reads += 1
+    row.total_read_duration += duration
+    if channel:
+        row.channel_reads[channel] = row.channel_reads.get(channel, 0) + 1
+    key = today.isoformat()
+    row.recent_reads[key] = row.recent_reads.get(key, 0) + 1
+    row.recent_reads = _roll_recent(row.recent_reads, today)
+    try:
+        with transaction.atomic():
+            row.save()
+    except IntegrityError:
+        # 当天的行已由并发请求创建：重新加锁后累加
+        logger.debug(f"Concurrent stats row for user {user.pk} on {today}, retrying")
+        update_daily_stats(user, channel, duration, today)
@@ -0,0 +1,170 @@
+"""
+文章互动统计聚合
+
+点赞/收藏/评论写入后只把文章标记为"脏"，由短延迟的批处理任务统一重算：
+- 多次互动在去抖窗口内合并为一次重算
+- 每批文章的点赞/收藏/评论数用一条带子查询的 SQL 取回
+- 计数与动态权重通过 bulk_update 写回，OpenSearch 统计字段批量局部更新
+"""
+import logging
+from celery import shared_task
+from django.core.cache import cache
+from django.db.models import CharField, Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Coalesce
+
+from apps.core.utils.redis_client import get_redis, redis_key
+from .models import UserInteraction, UserFavorite, UserComment
+
+logger = logging.getLogger(__name__)
+
+# 去抖窗口（秒）：窗口内的互动合并为一次重算
+STATS_DEBOUNCE_SECONDS = 5
+# 每批重算的文章数
+STATS_BATCH_SIZE = 500
+# 批次失败后重新调度的延迟（秒）
+STATS_RETRY_SECONDS = 60
+
+DIRTY_SET_KEY = redis_key('article_stats', 'dirty')
+FLUSH_SCHEDULED_KEY = 'article_stats:flush_scheduled'
+
+STATS_FIELDS = ['like_count', 'favorite_count', 'comment_count', 'weight']
+
+
+def mark_article_dirty(article_id):
+    """
+    标记文章统计需要重算，并确保去抖窗口内只调度一次批处理任务
+
+    Redis 不可用时（如测试环境的本地缓存）直接同步重算。
+    """
+    if not article_id:
+        return
+    client = get_redis()
+    if client is None:
+        recompute_article_stats([article_id])
+        return
+    try:
+        client.sadd(DIRTY_SET_KEY, str(article_id))
+    except Exception as e:
+        logger.warning(f"Failed to mark article {article_id} dirty, recomputing inline: {e}")
+        recompute_article_stats([article_id])
+        return
+    if cache.add(FLUSH_SCHEDULED_KEY, 1, timeout=STATS_DEBOUNCE_SECONDS):
+        flush_dirty_article_stats.apply_async(countdown=STATS_DEBOUNCE_SECONDS)
+
+
+def _count_subquery(queryset, key_field):
+    """按文章ID聚合计数的相关子查询（互动表中的文章ID是字符串）"""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{key_field: Cast(OuterRef('id'), CharField())})
+            .order_by()
+            .values(key_field)
+            .annotate(c=Count('id'))
+            .values('c')[:1],
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def recompute_article_stats(article_ids):
+    """
+    批量重算文章的点赞/收藏/评论数与动态权重
+
+    Returns:
+        实际发生变化的文章列表
+    """
+    from apps.news.models.article import ArticlePage
+
+    ids = sorted({int(aid) for aid in article_ids if str(aid).isdigit()})
+    if not ids:
+        return []
+
+    articles = list(
+        ArticlePage.objects.filter(id__in=ids).annotate(
+            new_like_count=_count_subquery(
+                UserInteraction.objects.filter(target_type='article', interaction_type='like'),
+                'target_id',
+            ),
+            new_favorite_count=_count_subquery(UserFavorite.objects.all(), 'article_id'),
+            new_comment_count=_count_subquery(
+                UserComment.objects.filter(status='published'), 'article_id'
+            ),
+        ).only('id', 'path', 'weight', 'view_count', 'like_count', 'favorite_count',
+               'comment_count', 'first_published_at')
+    )
+
+    changed = []
+    for article in articles:
+        before = tuple(getattr(article, field) for field in STATS_FIELDS)
+        article.like_count = article.new_like_count
+        article.favorite_count = article.new_favorite_count
+        article.comment_count = article.new_comment_count
+        article.update_dynamic_weight()
+        if tuple(getattr(article, field) for field in STATS_FIELDS) != before:
+            changed.append(article)
+
+    if changed:
+        ArticlePage.objects.bulk_update(changed, STATS_FIELDS)
+        _sync_stats_to_search_index(changed)
+
+    logger.info(f"Recomputed stats for {len(articles)} articles, {len(changed)} changed")
+    return changed
+
+
+def _sync_stats_to_search_index(articles):
+    """按站点分组，把变化的统计字段批量局部更新到 OpenSearch"""
+    from wagtail.models import Site
+    from apps.searchapp.client import get_client
+    from apps.searchapp.simple_index import get_index_name
+    from apps.searchapp.bulk import bulk_partial_update
+
+    # 按根页面路径长度倒序，保证嵌套站点取最深的匹配
+    sites = sorted(
+        Site.objects.select_related('root_page'),
+        key=lambda s: len(s.root_page.path),
+        reverse=True,
+    )
+    docs_by_site = {}
+    for article in articles:
+        site = next((s for s in sites if article.path.startswith(s.root_page.path)), None)
+        if not site:
+            continue
+        docs_by_site.setdefault(site.hostname, []).append((str(article.id), {
+            field: getattr(article, field) for field in STATS_FIELDS
+        }))
+
+    try:
+        client = get_client()
+        for hostname, docs in docs_by_site.items():
+            bulk_partial_update(client, get_index_name(hostname), docs)
+    except Exception as e:
+        logger.warning(f"Failed to sync article stats to OpenSearch: {e}")
+
+
+@shared_task(ignore_result=True)
+def flush_dirty_article_stats():
+    """取出所有脏文章并分批重算"""
+    client = get_redis()
+    if client is None:
+        return 0
+
+    # 先释放调度标记：处理期间新到的互动会调度下一次批处理，不会滞留在集合中
+    cache.delete(FLUSH_SCHEDULED_KEY)
+    total = 0
+    while True:
+        batch = client.spop(DIRTY_SET_KEY, STATS_BATCH_SIZE)
+        if not batch:
+            break
+        ids = [aid.decode() if isinstance(aid, bytes) else aid for aid in batch]
+        try:
+            recompute_article_stats(ids)
+        except Exception as e:
+            # 失败的批次放回集合并延迟重新调度；期间的新互动不再另行调度
+            logger.error(f"Article stats batch failed, requeueing {len(ids)} ids: {e}")
+            client.sadd(DIRTY_SET_KEY, *ids)
+            cache.set(FLUSH_SCHEDULED_KEY, 1, timeout=STATS_RETRY_SECONDS)
+            flush_dirty_article_stats.apply_async(countdown=STATS_RETRY_SECONDS)
+            raise
+        total += len(ids)
+    return total
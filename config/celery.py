@@ -67,6 +67,37 @@ app.conf.beat_schedule = {
         'kwargs': {'site': os.environ.get('SITE_HOSTNAME', 'localhost'), 'hours_back': 2}
     },
     
+    # 每分钟同步 CTR/热度特征到 OpenSearch（批量、仅变化值）
+    'sync-ctr-features': {
+        'task': 'apps.searchapp.tasks.update_ctr_features',
+        'schedule': 60.0,  # 1分钟
+        'kwargs': {'site': os.environ.get('SITE_HOSTNAME', 'localhost')}
+    },
+    
+    # 兜底下发失效队列中重试失败后放回的条目
+    'flush-revalidation-queue': {
+        'task': 'apps.core.tasks.revalidation.flush_revalidation_queue',
+        'schedule': 30.0,  # 30秒
+    },
+    
+    # 每分钟重建热门召回参数组合的信息流候选池
+    'refresh-feed-candidate-pools': {
+        'task': 'apps.searchapp.tasks.refresh_candidate_pools',
+        'schedule': 60.0,  # 1分钟
+    },
+    
+    # 兜底重建 Hero 轮播快照（正常由 is_hero 变化和发布触发）
+    'rebuild-hero-snapshots': {
+        'task': 'apps.news.tasks.rebuild_hero_snapshots',
+        'schedule': 900.0,  # 15分钟
+    },
+    
+    # 每天凌晨兜底校正分类已发布文章数（正常由发布/下线增量重算）
+    'refresh-category-counts': {
+        'task': 'apps.news.tasks.refresh_all_category_counts',
+        'schedule': crontab(hour=3, minute=30),  # 每天3:30
+    },
+    
     # 原有的任务保持不变...
 }
 
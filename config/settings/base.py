@@ -298,6 +298,9 @@ REST_FRAMEWORK = {
     }
 }
 
+# 信息流排序模型目录（alias.json 指向现行模型文件，见 apps.api.ml.lgbm_ranker）
+FEED_RANKER_MODEL_DIR = os.getenv("FEED_RANKER_MODEL_DIR", str(BASE_DIR / "models"))
+
 # CORS配置
 CORS_ALLOWED_ORIGINS = EnvValidator.get_list("CORS_ALLOWED_ORIGINS", ["http://localhost:3000", "http://localhost:3001"])
 CORS_ALLOW_CREDENTIALS = True
@@ -410,19 +413,25 @@ LOGGING = {
             "format": "{levelname} cid={correlation_id} {message}",
             "style": "{",
         },
+        "json": {
+            "()": "apps.core.utils.structured_logging.JsonFormatter",
+        },
     },
     "handlers": {
         "console": {
             "level": "DEBUG",
             "class": "logging.StreamHandler",
             "formatter": "simple",
-            "filters": ["request_context"],
+            "filters": ["request_context", "sampling"],
         },
     },
     "filters": {
         "request_context": {
             "()": "apps.core.middleware.RequestLogContextFilter",
-        }
+        },
+        "sampling": {
+            "()": "apps.core.utils.structured_logging.SamplingFilter",
+        },
     },
     "root": {
         "handlers": ["console"],
@@ -454,14 +463,35 @@ if USE_FILE_LOGGING:
         "class": "logging.FileHandler", 
         "filename": LOG_FILE_PATH,
         "formatter": "verbose",
-        "filters": ["request_context"],
+        "filters": ["request_context", "sampling"],
     }
     # 为apps logger添加文件处理器
     LOGGING["loggers"]["apps"]["handlers"].append("file")
 
+# 实时分析 SSE：每个进程同时保持的连接数上限（每个连接占用一个 WSGI 工作线程）
+ANALYTICS_STREAM_MAX_SUBSCRIBERS = EnvValidator.get_int("ANALYTICS_STREAM_MAX_SUBSCRIBERS", 8)
+
+# 日志输出格式：text 或 json（单行 JSON，便于日志平台解析）
+if EnvValidator.get_str("DJANGO_LOG_FORMAT", "text") == "json":
+    for _handler in LOGGING["handlers"].values():
+        _handler["formatter"] = "json"
+
+# 日志采样率（按 logger 名最长前缀匹配，只作用于 INFO 及以下级别；未配置的 logger 全部输出）
+LOG_SAMPLING_RATES = {
+    "apps.core.access": float(EnvValidator.get_str("LOG_SAMPLE_RATE_ACCESS", "0.1")),
+    "apps.api.rest.media_proxy": float(EnvValidator.get_str("LOG_SAMPLE_RATE_MEDIA_PROXY", "0.01")),
+    "apps.api.rest.feed": float(EnvValidator.get_str("LOG_SAMPLE_RATE_FEED", "0.1")),
+}
+# 日志经队列由后台线程写出，请求线程不阻塞在 I/O 上
+LOG_QUEUE_ENABLED = EnvValidator.get_bool("DJANGO_LOG_QUEUE", True)
+
 # 自定义配置
 WEBHOOK_SECRET_KEY = EnvValidator.get_str("WEBHOOK_SECRET_KEY", "webhook-secret-key")
 SITE_HOSTNAME = EnvValidator.get_str("SITE_HOSTNAME", "localhost")
+FRONTEND_REVALIDATE_URL = EnvValidator.get_str(
+    "FRONTEND_REVALIDATE_URL",
+    EnvValidator.get_str("FRONTEND_BASE_URL", "http://localhost:3000").rstrip("/") + "/api/revalidate",
+)
 
 # 安全配置
 if not DEBUG:
@@ -43,6 +43,7 @@ LOGGING = {
         "handlers": ["null"],
     },
 }
+LOG_QUEUE_ENABLED = False
 
 # 媒体文件（测试环境使用临时目录）
 import tempfile
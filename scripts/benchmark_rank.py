@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+"""
+基准测试：候选排序与多样性控制
+
+对比逐条字典循环的旧实现与列式 NumPy 实现在 500 / 5k / 50k 候选下的耗时，
+并校验两者返回的首页一致。不依赖数据库与 Django 配置。
+
+使用方法：
+python scripts/benchmark_rank.py
+python scripts/benchmark_rank.py --sizes 500 5000 50000 --page 20 --repeat 20
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from apps.api.rest.rank import score_and_diversify, score_and_diversify_anonymous  # noqa: E402
+from apps.core.flags import flag  # noqa: E402
+
+
+def legacy_score_and_diversify(cands, agg_feats, sort_by="final_score"):
+    """旧实现（逐条循环 + 两次排序）"""
+    for c in cands:
+        ctr = agg_feats.get(c["id"], {}).get("ctr_1h", c.get("ctr_1h", 0.0))
+        c["final_score"] = 0.6*c.get("score",0) + 0.3*ctr + 0.1*c.get("quality_score",1.0)
+    sort_field = {"popularity": "pop_24h", "hot": "pop_1h", "ctr": "ctr_24h"}.get(sort_by, sort_by)
+    cands.sort(key=lambda x: x.get(sort_field, 0), reverse=True)
+    limit_author = flag("feed.diversity.limit_author", 3)
+    limit_topic = flag("feed.diversity.limit_topic", 3)
+    seen_author = defaultdict(int); seen_topic = defaultdict(int)
+    out = []
+    for c in cands:
+        a = c.get("author") or "na"; t = c.get("topic") or "na"
+        if seen_author[a] >= limit_author or seen_topic[t] >= limit_topic: continue
+        out.append(c); seen_author[a]+=1; seen_topic[t]+=1
+    return out
+
+
+def legacy_score_and_diversify_anonymous(candidates, agg_features, sort_by="final_score", strategy=None):
+    """旧实现（个性化策略分支）"""
+    diversity_boost = strategy.get("diversity_boost", 0.2)
+    channel_weights = strategy.get("weights", {})
+    for c in candidates:
+        ctr = agg_features.get(c["id"], {}).get("ctr_1h", c.get("ctr_1h", 0.0))
+        c["final_score"] = (0.4 * c.get("score", 0.0) + 0.3 * ctr + 0.2 * c.get("quality_score", 1.0)
+                            + 0.1 * channel_weights.get(c.get("channel", "unknown"), 1.0))
+    candidates.sort(key=lambda x: x.get(sort_by, 0), reverse=True)
+    limit_author, limit_topic, limit_channel = 20, 30, 20
+    seen_author = defaultdict(int); seen_topic = defaultdict(int); seen_channel = defaultdict(int)
+    result = []
+    for c in candidates:
+        author = c.get("author") or "unknown"
+        topic = c.get("topic") or "unknown"
+        channel = c.get("channel") or "unknown"
+        if ((author != "unknown" and seen_author[author] >= limit_author) or
+            (topic != "unknown" and seen_topic[topic] >= limit_topic) or
+            seen_channel[channel] >= limit_channel):
+            continue
+        bonus = 0
+        if seen_author[author] == 0: bonus += diversity_boost * 0.3
+        if seen_topic[topic] == 0: bonus += diversity_boost * 0.3
+        if seen_channel[channel] == 0: bonus += diversity_boost * 0.4
+        c["final_score"] += bonus
+        result.append(c)
+        seen_author[author] += 1; seen_topic[topic] += 1; seen_channel[channel] += 1
+    result.sort(key=lambda x: x.get("final_score", 0), reverse=True)
+    return result
+
+
+def make_candidates(n, seed=7):
+    rng = random.Random(seed)
+    return [{
+        "id": str(i),
+        "score": rng.random() * 10,
+        "quality_score": rng.random(),
+        "ctr_1h": rng.random() * 0.1,
+        "pop_24h": rng.randint(0, 5000),
+        "author": f"author-{rng.randint(0, max(1, n // 20))}",
+        "topic": f"topic-{rng.randint(0, 200)}" if rng.random() > 0.2 else None,
+        "channel": f"channel-{rng.randint(0, 30)}",
+        "title": f"标题 {i}",
+    } for i in range(n)]
+
+
+def timed(fn, n, repeat):
+    samples = []
+    for _ in range(repeat):
+        cands = make_candidates(n)
+        agg = {c["id"]: {"ctr_1h": c["ctr_1h"] * 1.1} for c in cands[::3]}
+        started = time.perf_counter()
+        result = fn(cands, agg)
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(samples), max(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 5000, 50000])
+    parser.add_argument("--page", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    strategy = {"type": "personalized", "diversity_boost": 0.2, "weights": {"channel-1": 1.5}}
+    cases = [
+        ("登录用户", legacy_score_and_diversify,
+         lambda c, a: score_and_diversify(c, a, limit=args.page)),
+        ("匿名用户", lambda c, a: legacy_score_and_diversify_anonymous(c, a, strategy=strategy),
+         lambda c, a: score_and_diversify_anonymous(c, a, strategy=strategy, limit=args.page)),
+    ]
+    print(f"{'场景':<8}{'候选数':>8}{'旧实现 p50/max ms':>22}{'新实现 p50/max ms':>22}{'加速':>8}  首页一致")
+    for name, legacy, vectorised in cases:
+        for n in args.sizes:
+            old, old_p50, old_max = timed(legacy, n, args.repeat)
+            new, new_p50, new_max = timed(vectorised, n, args.repeat)
+            same = [c["id"] for c in old[:args.page]] == [c["id"] for c in new]
+            print(f"{name:<8}{n:>8}{old_p50:>13.2f} / {old_max:<7.2f}{new_p50:>13.2f} / {new_max:<7.2f}"
+                  f"{old_p50 / new_p50:>7.1f}x  {'是' if same else '否'}")
+
+
+if __name__ == "__main__":
+    main()
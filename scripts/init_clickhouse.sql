@@ -37,3 +37,102 @@ SELECT
   sumIf(dwell_ms, event='dwell') AS dwell_ms_sum
 FROM events
 GROUP BY window_start, site, channel, article_id;
+
+-- 匿名用户画像：设备×频道按天预聚合，画像构建只需按 (site, device_id) 前缀点查
+CREATE TABLE IF NOT EXISTS device_channel_daily
+(
+  day Date,
+  site String,
+  device_id String,
+  channel String,
+  views AggregateFunction(count),
+  avg_dwell AggregateFunction(avg, UInt32),
+  last_view SimpleAggregateFunction(max, DateTime64(3, 'UTC')),
+  unique_articles AggregateFunction(uniq, String)
+)
+ENGINE = AggregatingMergeTree
+PARTITION BY toYYYYMM(day)
+ORDER BY (site, device_id, day, channel)
+TTL day + INTERVAL 30 DAY;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_device_channel_daily TO device_channel_daily AS
+SELECT
+  toDate(ts) AS day,
+  site, device_id, channel,
+  countState() AS views,
+  avgState(dwell_ms) AS avg_dwell,
+  max(ts) AS last_view,
+  uniqState(article_id) AS unique_articles
+FROM events
+WHERE event = 'view'
+GROUP BY day, site, device_id, channel;
+
+-- 匿名用户画像：会话×频道按小时预聚合（只保留1天）
+CREATE TABLE IF NOT EXISTS session_channel_hourly
+(
+  hour DateTime,
+  site String,
+  session_id String,
+  channel String,
+  events SimpleAggregateFunction(sum, UInt64),
+  view_dwell_ms SimpleAggregateFunction(sum, UInt64),
+  last_event SimpleAggregateFunction(max, DateTime64(3, 'UTC'))
+)
+ENGINE = AggregatingMergeTree
+PARTITION BY toDate(hour)
+ORDER BY (site, session_id, hour, channel)
+TTL hour + INTERVAL 1 DAY;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_session_channel_hourly TO session_channel_hourly AS
+SELECT
+  toStartOfHour(ts) AS hour,
+  site, session_id, channel,
+  count() AS events,
+  sumIf(dwell_ms, event = 'view') AS view_dwell_ms,
+  max(ts) AS last_event
+FROM events
+GROUP BY hour, site, session_id, channel;
+
+-- 已有数据回填（物化视图只处理创建之后写入的事件）：
+-- INSERT INTO device_channel_daily
+-- SELECT toDate(ts), site, device_id, channel, countState(), avgState(dwell_ms), max(ts), uniqState(article_id)
+-- FROM events WHERE event = 'view' AND ts >= now() - INTERVAL 7 DAY
+-- GROUP BY toDate(ts), site, device_id, channel;
+
+-- 搜索埋点写入的查询词（track 接口已写入该列）
+ALTER TABLE events ADD COLUMN IF NOT EXISTS search_query String DEFAULT '';
+
+-- 搜索词按分钟预聚合：热搜榜按窗口求和，搜索建议按水位线增量读取
+CREATE TABLE IF NOT EXISTS search_terms_minute
+(
+  minute DateTime,
+  site String,
+  channel String,
+  query String,
+  searches SimpleAggregateFunction(sum, UInt64),
+  unique_users AggregateFunction(uniq, String)
+)
+ENGINE = AggregatingMergeTree
+PARTITION BY toDate(minute)
+ORDER BY (site, minute, channel, query)
+TTL minute + INTERVAL 7 DAY;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_search_terms_minute TO search_terms_minute AS
+SELECT
+  toStartOfMinute(ts) AS minute,
+  site, channel,
+  lower(trim(BOTH ' ' FROM search_query)) AS query,
+  count() AS searches,
+  uniqState(device_id) AS unique_users
+FROM events
+WHERE event = 'search' AND search_query != ''
+GROUP BY minute, site, channel, query;
+
+-- 已有数据回填：
+-- INSERT INTO search_terms_minute
+-- SELECT toStartOfMinute(ts), site, channel, lower(trim(BOTH ' ' FROM search_query)), count(), uniqState(device_id)
+-- FROM events WHERE event = 'search' AND search_query != '' AND ts >= now() - INTERVAL 7 DAY
+-- GROUP BY toStartOfMinute(ts), site, channel, lower(trim(BOTH ' ' FROM search_query));
+
+-- 文章指标分级预聚合（1分钟 → 1小时 → 1天）由管理命令创建：
+--   python manage.py init_metrics_rollups --backfill
@@ -19,13 +19,16 @@ import {
 interface WebhookPayload {
   event: RevalidationEvent;
   site: string;
-  entity: "page" | "settings" | "channel" | "region";
+  entity: "page" | "settings" | "channel" | "region" | "batch";
   pageId?: string;
   slug?: string;
   channel?: string;
   region?: string;
+  // 批量失效（entity 为 "batch" 时）
+  tags?: string[];
+  paths?: string[];
   timestamp: number;
-  signature: string;
+  signature?: string;
   nonce: string;
 }
 
@@ -66,6 +69,20 @@ function verifyTimestamp(timestamp: number): boolean {
 async function performRevalidation(payload: WebhookPayload): Promise<string[]> {
   const actions: string[] = [];
 
+  // 批量失效：后端队列已去重并选定 tag/path，逐一执行即可
+  if (payload.entity === "batch") {
+    for (const tag of payload.tags ?? []) {
+      revalidateTag(tag);
+    }
+    for (const path of payload.paths ?? []) {
+      revalidatePath(path);
+    }
+    actions.push(
+      `Revalidated batch: ${payload.tags?.length ?? 0} tags, ${payload.paths?.length ?? 0} paths`
+    );
+    return actions;
+  }
+
   try {
     // 1. 总是失效站点级别的缓存
     revalidateTag(`site:${payload.site}`);
@@ -165,9 +182,13 @@ export async function POST(request: NextRequest) {
       );
     }
 
+    // 签名可放在请求头中（对完整请求体签名），也可放在载荷中
+    const signature =
+      request.headers.get("x-webhook-signature") || payload.signature;
+
     // 验证必要字段
     if (
-      !payload.signature ||
+      !signature ||
       !payload.site ||
       !payload.event ||
       !payload.timestamp
@@ -187,7 +208,7 @@ export async function POST(request: NextRequest) {
     }
 
     // 验证签名
-    if (!verifySignature(rawBody, payload.signature)) {
+    if (!verifySignature(rawBody, signature)) {
       return NextResponse.json({ error: "Invalid signature" }, { status: 401 });
     }
 
@@ -254,7 +275,8 @@ export async function OPTIONS() {
     headers: {
       "Access-Control-Allow-Origin": "*",
       "Access-Control-Allow-Methods": "POST, GET, OPTIONS",
-      "Access-Control-Allow-Headers": "Content-Type, Authorization",
+      "Access-Control-Allow-Headers":
+        "Content-Type, Authorization, X-Webhook-Signature",
     },
   });
 }
@@ -0,0 +1,90 @@
+"""
+分析事件广播中心测试
+"""
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+
+from apps.api.utils.analytics_hub import AnalyticsEventHub, HubFull, Subscriber
+
+
+class AnalyticsEventHubTestCase(TestCase):
+    """测试广播、续传、有界队列与连接上限"""
+
+    def setUp(self):
+        self.hub = AnalyticsEventHub(ring_size=3, max_subscribers=2)
+        # 不启动真实的 ClickHouse 轮询
+        patcher = patch.object(AnalyticsEventHub, '_ensure_poller')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_publish_broadcasts_to_all_subscribers(self):
+        """一条事件投递给每个订阅者"""
+        first = self.hub.subscribe()
+        second = self.hub.subscribe()
+        self.hub.publish({'event': 'click'})
+
+        self.assertEqual(first.next_event(0.1)['id'], 1)
+        self.assertEqual(second.next_event(0.1)['id'], 1)
+
+    def test_publish_from_poller_thread_wakes_subscriber(self):
+        """订阅者在请求线程等待，事件由轮询线程发布"""
+        subscriber = self.hub.subscribe()
+        threading.Timer(0.05, self.hub.publish, args=({'event': 'view'},)).start()
+
+        self.assertEqual(subscriber.next_event(2)['event'], 'view')
+
+    def test_resume_replays_from_ring_buffer(self):
+        """Last-Event-ID 之后且仍在缓冲区内的事件会被回放"""
+        for i in range(5):
+            self.hub.publish({'event': f'e{i}'})
+        subscriber = self.hub.subscribe(last_event_id=3)
+
+        self.assertEqual([subscriber.next_event(0.1)['id'] for _ in range(2)], [4, 5])
+        # 缓冲区只保留最近3条
+        self.assertEqual([e['id'] for e in self.hub.replay(0)], [3, 4, 5])
+
+    def test_subscriber_limit(self):
+        """达到上限后拒绝新订阅，注销后恢复"""
+        first = self.hub.subscribe()
+        self.hub.subscribe()
+        with self.assertRaises(HubFull):
+            self.hub.subscribe()
+
+        self.hub.unsubscribe(first)
+        self.hub.subscribe()
+
+    def test_full_queue_drops_oldest(self):
+        """慢订阅者只丢弃自己最旧的事件"""
+        subscriber = Subscriber(queue_size=2)
+        for i in range(1, 4):
+            subscriber.offer({'id': i})
+
+        self.assertEqual(subscriber.next_event(0.1)['id'], 2)
+        self.assertEqual(subscriber.dropped, 1)
+
+    def test_next_event_times_out_for_heartbeat(self):
+        """无事件时返回 None，由调用方发送心跳"""
+        self.assertIsNone(Subscriber().next_event(0.01))
+
+
+class PollerLifecycleTestCase(TestCase):
+    """轮询线程随订阅者启动，无订阅者时退出"""
+
+    def test_poller_thread_stops_without_subscribers(self):
+        hub = AnalyticsEventHub(poll_interval=0.01, max_subscribers=1)
+        polled = threading.Event()
+
+        def fetch(since):
+            polled.set()
+            return []
+
+        with patch.object(hub, '_fetch_new_events', side_effect=fetch):
+            subscriber = hub.subscribe()
+            self.assertTrue(polled.wait(1))
+            thread = hub._thread
+            hub.unsubscribe(subscriber)
+            thread.join(1)
+
+        self.assertFalse(thread.is_alive())
+        self.assertIsNone(hub._thread)
@@ -0,0 +1,67 @@
+"""
+匿名用户画像查询测试
+"""
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.api.rest import anonymous_recommendation
+
+
+class AnonymousProfileTestCase(TestCase):
+    """画像构建走一次预聚合点查，站点趋势按站点共享"""
+
+    def setUp(self):
+        cache.clear()
+        patcher = patch.object(anonymous_recommendation, 'Client')
+        self.client_cls = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.engine = anonymous_recommendation.AnonymousRecommendationEngine()
+        breaker_patcher = patch.object(
+            self.engine.breaker, 'call', side_effect=lambda fn, *args, **kwargs: fn(*args, **kwargs)
+        )
+        breaker_patcher.start()
+        self.addCleanup(breaker_patcher.stop)
+        self.execute = self.client_cls.from_url.return_value.execute
+
+    def _respond(self, query, params):
+        last = datetime.now(timezone.utc)
+        if query is anonymous_recommendation.PROFILE_QUERY:
+            return [
+                ('device', 'tech', 12, 25000.0, last, 9),
+                ('device', 'sports', 3, 8000.0, last, 3),
+                ('session', 'tech', 4, 6000.0, last, 0),
+            ]
+        return [('tech', 100, 20000.0, 40)]
+
+    def test_profile_uses_single_point_query(self):
+        self.execute.side_effect = self._respond
+
+        profile = self.engine.get_anonymous_user_profile('dev-1', 'sess-1', 'a.local')
+
+        profile_calls = [c for c in self.execute.call_args_list if c.args[0] is anonymous_recommendation.PROFILE_QUERY]
+        self.assertEqual(len(profile_calls), 1)
+        self.assertEqual(profile_calls[0].args[1]['device_id'], 'dev-1')
+        self.assertEqual(profile['preferred_channels'][0][0], 'tech')
+        self.assertGreater(profile['confidence_score'], 0.5)
+
+    def test_site_trends_shared_across_devices(self):
+        self.execute.side_effect = self._respond
+
+        self.engine.get_anonymous_user_profile('dev-1', 'sess-1', 'a.local')
+        self.engine.get_anonymous_user_profile('dev-2', 'sess-2', 'a.local')
+
+        trend_calls = [c for c in self.execute.call_args_list if c.args[0] is anonymous_recommendation.SITE_TRENDS_QUERY]
+        self.assertEqual(len(trend_calls), 1)
+
+    def test_records_cache_hits(self):
+        self.execute.side_effect = self._respond
+
+        self.engine.get_anonymous_user_profile('dev-1', 'sess-1', 'a.local')
+        self.engine.get_anonymous_user_profile('dev-1', 'sess-1', 'a.local')
+
+        metrics = anonymous_recommendation.get_profile_metrics()
+        self.assertEqual((metrics['hits'], metrics['misses']), (1, 1))
+        self.assertEqual(metrics['latency_ms']['samples'], 2)
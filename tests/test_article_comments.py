@@ -0,0 +1,89 @@
+"""
+文章评论线程分页测试
+"""
+import json
+
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+
+from apps.api.rest.article_comments import get_article_comments
+from apps.web_users.models import UserComment, WebUser
+
+
+class ArticleCommentThreadsTestCase(TestCase):
+    """测试物化路径线程、键集分页与单查询取页"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.user = WebUser.objects.create(username='reader', email='reader@example.com', password_hash='x')
+
+    def _comment(self, parent=None, status='published'):
+        return UserComment.objects.create(
+            user=self.user, article_id='42', article_title='t', article_slug='t',
+            article_channel='c', content='hello', parent=parent, status=status,
+        )
+
+    def _get(self, **params):
+        request = self.factory.get('/api/articles/42/comments/', params)
+        return json.loads(get_article_comments(request, '42').content)
+
+    def test_path_is_materialised_on_create(self):
+        """回复的路径以父评论路径为前缀，并指向同一根评论"""
+        root = self._comment()
+        reply = self._comment(parent=root)
+        nested = self._comment(parent=reply)
+
+        self.assertTrue(nested.path.startswith(reply.path + '/'))
+        self.assertEqual(nested.thread_root_id, root.id)
+
+    def test_deep_replies_stay_within_max_depth(self):
+        """超过最大深度的回复成为最深一层的兄弟评论，路径不超出列宽"""
+        comment = self._comment()
+        for _ in range(UserComment.MAX_THREAD_DEPTH + 5):
+            comment = self._comment(parent=comment)
+
+        deepest = max(UserComment.objects.values_list('path', flat=True), key=len)
+        self.assertEqual(len(deepest.split('/')), UserComment.MAX_THREAD_DEPTH)
+        self.assertLessEqual(len(deepest), UserComment._meta.get_field('path').max_length)
+        self.assertEqual(comment.parent.path.count('/') + 2, UserComment.MAX_THREAD_DEPTH)
+
+    def test_page_is_one_query_and_builds_tree(self):
+        """一页线程只需一条查询，且隐藏未发布父评论下的回复"""
+        root = self._comment()
+        reply = self._comment(parent=root)
+        self._comment(parent=reply)
+        hidden = self._comment(parent=root, status='pending')
+        self._comment(parent=hidden)
+
+        with self.assertNumQueries(1):
+            body = self._get(limit=10)
+
+        self.assertEqual(len(body['data']), 1)
+        self.assertEqual(len(body['data'][0]['replies']), 1)
+        self.assertEqual(len(body['data'][0]['replies'][0]['replies']), 1)
+
+    def test_keyset_pagination_walks_all_roots(self):
+        """按 next_cursor 翻页不重复也不遗漏根评论"""
+        roots = [self._comment() for _ in range(5)]
+
+        seen = []
+        params = {'limit': 2}
+        while True:
+            body = self._get(**params)
+            seen.extend(c['id'] for c in body['data'])
+            if not body['pagination']['has_next']:
+                break
+            params = {'limit': 2, 'cursor': body['pagination']['next_cursor']}
+
+        self.assertEqual(seen, [r.id for r in reversed(roots)])
+
+    def test_new_comment_invalidates_cached_page(self):
+        """新评论提交后立即可见"""
+        self._comment()
+        self.assertEqual(len(self._get()['data']), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._comment()
+
+        self.assertEqual(len(self._get()['data']), 2)
@@ -0,0 +1,95 @@
+"""
+文章互动统计批量重算测试
+"""
+from unittest.mock import patch
+
+from django.test import TestCase
+from wagtail.models import Site
+
+from apps.news.models import ArticlePage
+from apps.web_users import tasks
+from apps.web_users.models import UserComment, UserFavorite, UserInteraction, WebUser
+
+
+class FakeRedisSet:
+    """只实现脏集合用到的 SADD / SPOP"""
+
+    def __init__(self):
+        self.members = set()
+
+    def sadd(self, key, *values):
+        self.members.update(str(v).encode() for v in values)
+
+    def spop(self, key, count):
+        popped = [self.members.pop() for _ in range(min(count, len(self.members)))]
+        return popped or None
+
+
+class ArticleStatsFlushTestCase(TestCase):
+    """标记为脏的文章在批处理中一次性重算计数"""
+
+    def setUp(self):
+        root_page = Site.objects.get(is_default_site=True).root_page
+        self.articles = [
+            root_page.add_child(instance=ArticlePage(title=f'文章{i}', slug=f'stats-{i}', body='<p>正文</p>'))
+            for i in range(2)
+        ]
+        self.users = [
+            WebUser.objects.create(username=f'u{i}', email=f'u{i}@example.com', password_hash='x')
+            for i in range(3)
+        ]
+        self.redis = FakeRedisSet()
+        self.sync_index = self._patch(tasks, '_sync_stats_to_search_index')
+        self._patch(tasks, 'get_redis', return_value=self.redis)
+        self.schedule_flush = self._patch(tasks.flush_dirty_article_stats, 'apply_async')
+
+    def _patch(self, target, attribute, **kwargs):
+        patcher = patch.object(target, attribute, **kwargs)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def _article_meta(self, article):
+        return {
+            'article_id': str(article.id), 'article_title': article.title,
+            'article_slug': article.slug, 'article_channel': 'news',
+        }
+
+    def test_flush_recomputes_marked_articles(self):
+        first, second = self.articles
+        for user in self.users:
+            UserInteraction.objects.create(
+                user=user, target_type='article', target_id=str(first.id), interaction_type='like'
+            )
+        UserFavorite.objects.create(user=self.users[0], **self._article_meta(first))
+        UserComment.objects.create(user=self.users[1], content='好', status='published', **self._article_meta(second))
+        UserComment.objects.create(user=self.users[2], content='待审', status='pending', **self._article_meta(second))
+
+        for article in self.articles:
+            tasks.mark_article_dirty(article.id)
+        self.assertEqual(len(self.redis.members), 2)
+
+        self.assertEqual(tasks.flush_dirty_article_stats(), 2)
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.like_count, first.favorite_count, first.comment_count), (3, 1, 0))
+        self.assertEqual((second.like_count, second.favorite_count, second.comment_count), (0, 0, 1))
+        self.assertEqual(self.redis.members, set())
+        synced = {a.id for a in self.sync_index.call_args.args[0]}
+        self.assertEqual(synced, {first.id, second.id})
+
+    def test_unchanged_articles_are_not_written(self):
+        self.assertEqual(tasks.recompute_article_stats([a.id for a in self.articles]), [])
+        self.sync_index.assert_not_called()
+
+    def test_failed_batch_is_requeued_and_rescheduled(self):
+        for article in self.articles:
+            tasks.mark_article_dirty(article.id)
+        self.schedule_flush.reset_mock()
+
+        with patch.object(tasks, 'recompute_article_stats', side_effect=Exception('db down')):
+            with self.assertRaises(Exception):
+                tasks.flush_dirty_article_stats()
+
+        self.assertEqual(len(self.redis.members), 2)
+        self.schedule_flush.assert_called_once_with(countdown=tasks.STATS_RETRY_SECONDS)
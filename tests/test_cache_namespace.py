@@ -0,0 +1,84 @@
+"""
+版本化缓存命名空间测试
+"""
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+from wagtail.models import Site
+
+from apps.api.utils.cache_namespace import (
+    AGGREGATE_NS, bump_namespace, bump_namespaces, channel_ns, listing_namespaces, site_ns, versioned_key,
+)
+from apps.core.models import Channel
+from apps.news.models import ArticlePage
+from apps.news.wagtail_hooks import invalidate_article_cache_namespaces
+
+
+class CacheNamespaceTestCase(TestCase):
+    """测试命名空间代数嵌入与失效"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_key_is_stable_until_bumped(self):
+        """未失效时键保持不变"""
+        namespaces = [site_ns('a.local'), AGGREGATE_NS]
+        self.assertEqual(versioned_key('list', namespaces), versioned_key('list', namespaces))
+
+    def test_bump_changes_dependent_keys_only(self):
+        """失效一个站点只影响依赖它的键"""
+        key_a = versioned_key('list', [site_ns('a.local')])
+        key_b = versioned_key('list', [site_ns('b.local')])
+
+        bump_namespace(site_ns('a.local'))
+
+        self.assertNotEqual(versioned_key('list', [site_ns('a.local')]), key_a)
+        self.assertEqual(versioned_key('list', [site_ns('b.local')]), key_b)
+
+    def test_first_bump_invalidates_default_generation(self):
+        """计数器不存在时的首次失效也会生效"""
+        before = versioned_key('list', [AGGREGATE_NS])
+        bump_namespaces([AGGREGATE_NS, AGGREGATE_NS])
+        after = versioned_key('list', [AGGREGATE_NS])
+        self.assertNotEqual(before, after)
+        self.assertTrue(after.endswith(':v2'))
+
+
+class ListingNamespaceTestCase(TestCase):
+    """按频道过滤的列表只随该频道（含文章移出的原频道）的发布失效"""
+
+    def setUp(self):
+        cache.clear()
+        self.site = Site.objects.get(is_default_site=True)
+        self.tech = Channel.objects.create(name='科技', slug='tech')
+        self.sports = Channel.objects.create(name='体育', slug='sports')
+        for channel in (self.tech, self.sports):
+            channel.sites.add(self.site)
+        self.article = self.site.root_page.add_child(
+            instance=ArticlePage(title='文章', slug='ns-article', body='<p>正文</p>', channel=self.tech)
+        )
+        for target in ('apps.news.signals.upsert_article_doc', 'apps.news.signals.update_article_search_vector'):
+            patcher = patch(target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _key(self, channel=None):
+        return versioned_key('list', listing_namespaces(self.site, channels=[channel]))
+
+    def test_filtered_lists_do_not_depend_on_site(self):
+        self.assertEqual(listing_namespaces(self.site, channels=['tech']), [channel_ns('tech')])
+        self.assertEqual(listing_namespaces(self.site, channels=[None]), [site_ns(self.site), AGGREGATE_NS])
+
+    def test_publish_invalidates_current_and_previous_channel_only(self):
+        unrelated = versioned_key('list', listing_namespaces(self.site, channels=['world']))
+        before = {slug: self._key(slug) for slug in ('tech', 'sports', None)}
+
+        self.article.channel = self.sports
+        self.article.save()
+        self.assertEqual(self.article._previous_listing['channel'], 'tech')
+        invalidate_article_cache_namespaces(self.article)
+
+        for slug, key in before.items():
+            self.assertNotEqual(self._key(slug), key)
+        self.assertEqual(versioned_key('list', listing_namespaces(self.site, channels=['world'])), unrelated)
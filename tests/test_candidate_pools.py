@@ -0,0 +1,63 @@
+"""
+信息流候选池测试
+"""
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase
+
+from apps.api.utils import candidate_pools
+
+
+def _pool(ids, total=None):
+    return {
+        "total": len(ids) if total is None else total,
+        "items": [[i, 1.0 / (n + 1), {"title": i, "publish_time": "2026-10-18T00:00:00"}] for n, i in enumerate(ids)],
+    }
+
+
+class CandidatePoolTestCase(SimpleTestCase):
+    """命中时从本进程解码的池中剔除已读，池不足一批时交给 OpenSearch"""
+
+    def setUp(self):
+        candidate_pools._decoded.clear()
+
+    def _client(self, version, pool):
+        client = MagicMock()
+        client.pipeline.return_value.execute.return_value = [version, 1.0, 1]
+        client.get.return_value = candidate_pools._pack(pool) if pool is not None else None
+        return client
+
+    def _recall(self, client, exclude_ids=(), size=2):
+        with patch.object(candidate_pools, 'get_redis', return_value=client):
+            return candidate_pools.recall_from_pool(
+                'example.com', 'recommend_default', ['tech'], 72, set(exclude_ids), size
+            )
+
+    def test_hit_skips_seen_and_reuses_decoded_pool(self):
+        client = self._client(b'7', _pool(['a', 'b', 'c', 'd']))
+
+        items, total, returned = self._recall(client, exclude_ids={'a'})
+        self._recall(client)
+
+        self.assertEqual([item['id'] for item in items], ['b', 'c'])
+        self.assertEqual(items[0]['publish_at'], '2026-10-18T00:00:00')
+        self.assertEqual((total, returned), (4, 2))
+        # 同一版本只解码一次
+        client.get.assert_called_once()
+        client.hincrby.assert_called_with(candidate_pools._stats_key(), 'hit', 1)
+
+    def test_missing_pool_falls_back(self):
+        client = self._client(None, None)
+
+        self.assertIsNone(self._recall(client))
+        client.hincrby.assert_called_with(candidate_pools._stats_key(), 'miss', 1)
+
+    def test_exhausted_pool_falls_back_unless_pool_holds_all_hits(self):
+        exhausted = self._client(b'1', _pool(['a', 'b'], total=500))
+        self.assertIsNone(self._recall(exhausted, exclude_ids={'a'}))
+        exhausted.hincrby.assert_called_with(candidate_pools._stats_key(), 'exhausted', 1)
+
+        candidate_pools._decoded.clear()
+        complete = self._client(b'1', _pool(['a', 'b']))
+        items, total, _ = self._recall(complete, exclude_ids={'a'})
+        self.assertEqual(([item['id'] for item in items], total), (['b'], 2))
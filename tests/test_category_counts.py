@@ -0,0 +1,37 @@
+"""
+分类已发布文章数重算测试
+"""
+from unittest.mock import patch
+
+from django.test import TestCase
+from wagtail.models import Site
+
+from apps.core.models import Category
+from apps.news.models import ArticlePage
+from apps.news.signals import refresh_category_counts
+
+
+class CategoryCountsTestCase(TestCase):
+    """文章移出的分类从数据库中得知，不依赖缓存"""
+
+    def setUp(self):
+        for target in ('apps.news.signals.upsert_article_doc', 'apps.news.signals.update_article_search_vector'):
+            patcher = patch(target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.old = Category.objects.create(name='旧分类', slug='old')
+        self.new = Category.objects.create(name='新分类', slug='new')
+        root_page = Site.objects.get(is_default_site=True).root_page
+        self.article = root_page.add_child(instance=ArticlePage(title='文章', slug='counted', body='<p>正文</p>'))
+        self.article.categories.set([self.old])
+        self.article.save()
+        Category.refresh_live_article_counts()
+
+    def test_moving_article_recounts_previous_category(self):
+        self.article.categories.set([self.new])
+        self.article.save()
+        refresh_category_counts(self.article)
+
+        self.old.refresh_from_db()
+        self.new.refresh_from_db()
+        self.assertEqual((self.old.live_article_count, self.new.live_article_count), (0, 1))
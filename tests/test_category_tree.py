@@ -0,0 +1,52 @@
+"""
+分类物化路径测试
+"""
+from django.test import TestCase
+
+from apps.core.models import Category
+
+
+class CategoryPathTestCase(TestCase):
+    """测试路径维护、子树平移与单查询加载整棵树"""
+
+    def _category(self, slug, parent=None, **kwargs):
+        return Category.objects.create(name=slug, slug=slug, parent=parent, **kwargs)
+
+    def setUp(self):
+        self.root = self._category('root')
+        self.a = self._category('a', self.root)
+        self.b = self._category('b', self.a)
+        self.c = self._category('c', self.b)
+        self.d = self._category('d', self.c)
+
+    def test_path_and_depth(self):
+        self.assertEqual(self.d.depth, 4)
+        self.assertEqual(self.d.ancestor_ids, [self.root.id, self.a.id, self.b.id, self.c.id])
+        with self.assertNumQueries(1):
+            self.assertEqual([c.slug for c in self.d.get_ancestors()], ['root', 'a', 'b', 'c'])
+
+    def test_moving_parent_rewrites_subtree(self):
+        other = self._category('other')
+        self.b.parent = other
+        self.b.save()
+
+        self.d.refresh_from_db()
+        self.assertEqual(self.d.ancestor_ids, [other.id, self.b.id, self.c.id])
+        self.assertEqual(self.d.depth, 3)
+
+    def test_load_subtrees_any_depth_in_one_query(self):
+        self._category('inactive', self.root, is_active=False)
+        roots = list(Category.objects.filter(parent=None, slug='root'))
+
+        with self.assertNumQueries(1):
+            Category.load_subtrees(roots)
+
+        node, depth = roots[0], 0
+        while node.tree_children:
+            self.assertEqual(len(node.tree_children), 1)
+            node, depth = node.tree_children[0], depth + 1
+        self.assertEqual(depth, 4)
+
+    def test_descendants_skip_inactive_subtrees(self):
+        Category.objects.filter(pk=self.b.pk).update(is_active=False)
+        self.assertEqual([c.slug for c in self.root.get_descendants()], ['a'])
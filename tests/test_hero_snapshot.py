@@ -0,0 +1,67 @@
+"""
+Hero 轮播快照测试
+"""
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from apps.core.site_registry import SiteSnapshot
+from apps.news.services import hero_snapshot
+
+
+class HeroSnapshotTestCase(SimpleTestCase):
+    """快照拼装不在请求内生成图片，且只在影响轮播时重建"""
+
+    def setUp(self):
+        cache.clear()
+
+    def _image(self, existing_specs):
+        image = Mock(pk=1)
+        image.file.url = '/media/original_images/hero.jpg'
+        image.renditions.all.return_value = [
+            Mock(filter_spec=spec, url=f'/media/renditions/{spec}.jpg') for spec in existing_specs
+        ]
+        return image
+
+    def test_fallback_uses_existing_renditions_only(self):
+        image = self._image([hero_snapshot.HERO_IMAGE_SPEC])
+
+        image_url, renditions = hero_snapshot._cover_urls(image, generate=False)
+
+        image.get_rendition.assert_not_called()
+        self.assertEqual(image_url, f'/media/renditions/{hero_snapshot.HERO_IMAGE_SPEC}.jpg')
+        # 未生成的规格退回原图
+        self.assertEqual(renditions['hero_desktop'], '/media/original_images/hero.jpg')
+
+    def test_builder_generates_renditions(self):
+        image = self._image([])
+        image.get_rendition.side_effect = lambda spec: Mock(url=f'/media/renditions/{spec}.jpg')
+
+        image_url, _ = hero_snapshot._cover_urls(image, generate=True)
+
+        self.assertEqual(image_url, f'/media/renditions/{hero_snapshot.HERO_IMAGE_SPEC}.jpg')
+
+    @patch.object(hero_snapshot, 'schedule_rebuild')
+    def test_rebuild_only_when_hero_changes(self, schedule):
+        hero_snapshot.store_snapshot_article_ids([{'items': [{'id': '7'}]}])
+
+        hero_snapshot.article_changed(Mock(id=3, is_hero=False))
+        schedule.assert_not_called()
+
+        hero_snapshot.article_changed(Mock(id=7, is_hero=False))
+        hero_snapshot.article_changed(Mock(id=3, is_hero=True))
+        self.assertEqual(schedule.call_count, 2)
+
+    @patch.object(hero_snapshot, 'schedule_rebuild')
+    @patch.object(hero_snapshot, 'build_snapshot', side_effect=lambda name, generate: {'site': name, 'items': []})
+    def test_unknown_sites_use_the_default_snapshot(self, build, schedule):
+        sites = [SimpleNamespace(id=1, hostname='localhost', port=80, slug=None, is_default_site=True)]
+        with patch('apps.core.site_registry.site_registry.snapshot', return_value=SiteSnapshot(1, sites, {})):
+            site_name = hero_snapshot.resolve_site_name('junk.example.com')
+        hero_snapshot.fallback_snapshot(site_name)
+
+        self.assertEqual(site_name, 'localhost')
+        self.assertIsNotNone(hero_snapshot.get_snapshot('localhost'))
+        self.assertIsNone(hero_snapshot.get_snapshot('junk.example.com'))
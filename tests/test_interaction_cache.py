@@ -0,0 +1,122 @@
+"""
+用户互动状态批量查询测试
+"""
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from apps.web_users import interaction_cache
+from apps.web_users.interaction_cache import get_interaction_status, like_set_key, sync_interaction_member
+from apps.web_users.models import UserFavorite, UserInteraction, WebUser
+
+
+class InteractionStatusTestCase(TestCase):
+    """测试无 Redis 时的数据库回退：每类互动只查询一次"""
+
+    def setUp(self):
+        self.user = WebUser.objects.create(username='reader', email='reader@example.com', password_hash='x')
+        UserInteraction.objects.create(user=self.user, target_type='article', target_id='1', interaction_type='like')
+        UserInteraction.objects.create(user=self.user, target_type='article', target_id='2', interaction_type='share')
+        UserFavorite.objects.create(user=self.user, article_id='2', article_title='t', article_slug='t', article_channel='c')
+
+    def test_statuses_for_many_ids_in_two_queries(self):
+        ids = [str(i) for i in range(1, 51)]
+
+        with self.assertNumQueries(2):
+            result = get_interaction_status(self.user.id, 'article', ids)
+
+        self.assertEqual(len(result), 50)
+        self.assertEqual(result['1'], {'liked': True, 'favorited': False})
+        self.assertEqual(result['2'], {'liked': False, 'favorited': True})
+        self.assertEqual(result['3'], {'liked': False, 'favorited': False})
+
+
+class FakeRedis:
+    """内存实现：集合、字符串与两个 Lua 脚本的等价逻辑，管道按顺序立即执行"""
+
+    def __init__(self):
+        self.data = {}
+        self._results = []
+
+    def pipeline(self, transaction=False):
+        self._results = []
+        return self
+
+    def execute(self):
+        results, self._results = self._results, []
+        return results
+
+    def _record(self, value):
+        self._results.append(value)
+        return value
+
+    def smismember(self, key, members):
+        stored = self.data.get(key, set())
+        return self._record([int(str(m) in stored) for m in members])
+
+    def sadd(self, key, *members):
+        self.data.setdefault(key, set()).update(str(m) for m in members)
+        return self._record(len(members))
+
+    def expire(self, key, ttl):
+        return self._record(True)
+
+    def get(self, key):
+        value = self.data.get(key)
+        return None if value is None else str(value).encode()
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def register_script(self, source):
+        def run(keys, args, client=None):
+            if source == interaction_cache._SYNC_SCRIPT:
+                key, version_key = keys
+                self.data[version_key] = int(self.data.get(version_key, 0)) + 1
+                if args[0] in self.data.get(key, set()):
+                    (self.data[key].add if args[1] == 'add' else self.data[key].discard)(args[2])
+                return 1
+            tmp_key, key, version_key = keys
+            current = str(self.data[version_key]) if version_key in self.data else ''
+            if current == args[0]:
+                self.data[key] = self.data.pop(tmp_key)
+                return self._record(1)
+            self.data.pop(tmp_key, None)
+            return self._record(0)
+        return run
+
+
+class InteractionSetRebuildTestCase(TestCase):
+    """集合重建期间提交的点赞不会被旧快照覆盖"""
+
+    def setUp(self):
+        self.user = WebUser.objects.create(username='liker', email='liker@example.com', password_hash='x')
+        self.redis = FakeRedis()
+        patcher = patch.object(interaction_cache, 'get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.key = like_set_key(self.user.id, 'article')
+
+    def test_rebuild_is_dropped_when_a_like_lands_during_the_load(self):
+        load = interaction_cache._load_like_ids
+
+        def load_then_like(*args, **kwargs):
+            snapshot = load(*args, **kwargs)
+            UserInteraction.objects.create(user=self.user, target_type='article', target_id='7', interaction_type='like')
+            sync_interaction_member(self.key, '7', added=True)
+            return snapshot
+
+        with patch.object(interaction_cache, '_load_like_ids', side_effect=load_then_like):
+            get_interaction_status(self.user.id, 'article', ['7'])
+
+        self.assertNotIn(self.key, self.redis.data)
+        self.assertTrue(get_interaction_status(self.user.id, 'article', ['7'])['7']['liked'])
+
+    def test_rebuilt_set_serves_later_reads(self):
+        UserInteraction.objects.create(user=self.user, target_type='article', target_id='3', interaction_type='like')
+        get_interaction_status(self.user.id, 'article', ['3'])
+
+        self.assertEqual(self.redis.data[self.key], {interaction_cache.LOADED_SENTINEL, '3'})
+        with self.assertNumQueries(0):
+            self.assertTrue(get_interaction_status(self.user.id, 'article', ['3'])['3']['liked'])
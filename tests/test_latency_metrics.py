@@ -0,0 +1,37 @@
+"""
+共享延迟指标测试
+"""
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from apps.core.utils import latency_metrics
+from apps.core.utils.latency_metrics import latency_namespaces, latency_summary, record_latencies, record_latency
+
+
+class LatencyMetricsTestCase(SimpleTestCase):
+    """无 Redis 时退回本地缓存：按状态计数、保留最近样本并计算分位数"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_counts_statuses_and_summarises_samples(self):
+        for ms in range(1, 101):
+            record_latency('test', 'ok', ms)
+        record_latency('test', 'error', 500)
+
+        summary = latency_summary('test')
+
+        self.assertEqual(summary['counts'], {'ok': 100, 'error': 1})
+        self.assertEqual(summary['samples'], 101)
+        self.assertEqual(summary['p50'], 51)
+        self.assertEqual(summary['max'], 500)
+        self.assertIsNotNone(summary['last_at'])
+
+    def test_keeps_recent_samples_and_lists_namespaces(self):
+        record_latencies([('stages:feed:a', 'ok', 1.0), ('stages:feed:b', 'skipped', None), ('other', 'ok', 2.0)])
+        for _ in range(latency_metrics.LATENCY_SAMPLES + 10):
+            record_latency('other', 'ok', 3.0)
+
+        self.assertEqual(latency_namespaces('stages:feed:'), ['stages:feed:a', 'stages:feed:b'])
+        self.assertEqual(latency_summary('stages:feed:b')['samples'], 0)
+        self.assertEqual(latency_summary('other')['samples'], latency_metrics.LATENCY_SAMPLES)
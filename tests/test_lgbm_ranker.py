@@ -0,0 +1,85 @@
+"""
+学习排序模型加载、热切换与延迟保护测试
+"""
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from apps.api.ml import lgbm_ranker
+
+
+def _write_model(model_dir, name, weights):
+    np.savez(os.path.join(model_dir, name), weights=np.asarray(weights, dtype=np.float64))
+    with open(os.path.join(model_dir, lgbm_ranker.ALIAS_FILE), "w", encoding="utf-8") as f:
+        json.dump({"current": name}, f)
+
+
+def _weights(**named):
+    return [named.get(name, 0.0) for name in lgbm_ranker.FEATURE_NAMES]
+
+
+CANDS = [
+    {"id": "1", "score": 1.0, "ctr_24h": 0.1, "publish_time": "2026-01-01T00:00:00+00:00"},
+    {"id": "2", "score": 0.5, "ctr_24h": 0.9},
+]
+
+
+class LearnedRankerTestCase(SimpleTestCase):
+    """alias.json 指向的模型按需加载，文件变化时替换，延迟超预算时回退"""
+
+    def setUp(self):
+        self.model_dir = tempfile.mkdtemp()
+
+    def test_feature_matrix_prefers_realtime_features(self):
+        matrix = lgbm_ranker.feature_matrix(CANDS, {"2": {"ctr_1h": 0.4, "pop_1h": 7.0}}, now=1767225600 + 7200)
+
+        self.assertEqual(matrix.shape, (2, len(lgbm_ranker.FEATURE_NAMES)))
+        self.assertEqual(matrix[1, 1:3].tolist(), [0.4, 7.0])
+        self.assertAlmostEqual(matrix[0, lgbm_ranker.FEATURE_NAMES.index("age_hours")], 2.0)
+        self.assertTrue(np.isnan(matrix[1, lgbm_ranker.FEATURE_NAMES.index("age_hours")]))
+
+    def test_hot_swaps_model_when_alias_changes(self):
+        _write_model(self.model_dir, "v1.npz", _weights(recall_score=1.0))
+        ranker = lgbm_ranker.LearnedRanker(self.model_dir)
+
+        self.assertEqual(ranker.score(CANDS, {}).tolist(), [1.0, 0.5])
+
+        _write_model(self.model_dir, "v2.npz", _weights(ctr_24h=1.0))
+        ranker.model.load()
+
+        self.assertEqual(ranker.score(CANDS, {}).tolist(), [0.1, 0.9])
+
+    def test_keeps_previous_model_when_new_file_is_invalid(self):
+        _write_model(self.model_dir, "v1.npz", _weights(recall_score=1.0))
+        ranker = lgbm_ranker.LearnedRanker(self.model_dir)
+        ranker.model.load()
+
+        _write_model(self.model_dir, "v2.npz", [1.0, 2.0])
+        ranker.model.load()
+
+        self.assertEqual(ranker.model.backend.path, os.path.join(self.model_dir, "v1.npz"))
+
+    def test_missing_model_returns_none(self):
+        self.assertIsNone(lgbm_ranker.LearnedRanker(self.model_dir).score(CANDS, {}))
+
+    def test_guard_pauses_model_when_p99_exceeds_budget(self):
+        guard = lgbm_ranker.LatencyGuard()
+        for _ in range(lgbm_ranker.LATENCY_MIN_SAMPLES - 1):
+            guard.record(1.0, 500, budget_ms=5)
+        self.assertTrue(guard.allow())
+
+        with patch.object(lgbm_ranker.logger, "warning"):
+            guard.record(50.0, 500, budget_ms=5)
+
+        self.assertFalse(guard.allow())
+
+    def test_backend_without_predict_fails_on_construction(self):
+        class IncompleteBackend(lgbm_ranker.ModelBackend):
+            pass
+
+        with self.assertRaises(TypeError):
+            IncompleteBackend('model.bin')
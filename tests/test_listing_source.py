@@ -0,0 +1,149 @@
+"""
+列表字段索引时反范式化测试
+"""
+from concurrent.futures import Future
+from unittest.mock import Mock, patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIRequestFactory
+from wagtail.models import Site
+
+from apps.api.rest import articles, feed, headlines
+from apps.api.rest.headlines import _cover_from_source
+from apps.api.utils import stages
+from apps.news.models import ArticlePage
+from apps.searchapp.indexer import INDEX_COVER_RENDITIONS, cover_fields
+
+
+class ListingSourceTestCase(SimpleTestCase):
+    """封面在索引时写入文档，列表接口只读 _source"""
+
+    def _cover(self):
+        cover = Mock(pk=1, title='封面')
+        cover.file.url = '/media/original_images/cover.jpg'
+        cover.get_rendition.side_effect = self._rendition
+        return cover
+
+    def _rendition(self, spec):
+        rendition = Mock(url=f'/media/renditions/{spec}.jpg')
+        # Mock 的 name 参数有特殊含义，文件名需单独赋值
+        rendition.file.name = f'images/renditions/{spec}.jpg'
+        return rendition
+
+    def test_cover_fields_include_renditions(self):
+        fields = cover_fields(Mock(cover=self._cover()))
+
+        self.assertEqual(fields['cover_url'], '/media/original_images/cover.jpg')
+        self.assertEqual(set(fields['cover_renditions']), set(INDEX_COVER_RENDITIONS))
+
+    def test_cover_fields_without_cover(self):
+        fields = cover_fields(Mock(cover=None))
+
+        self.assertEqual(fields, {'cover_url': '', 'cover_title': '', 'cover_renditions': {}})
+
+    def test_cover_from_source_prefers_card_rendition(self):
+        src = {'cover_url': '/original.jpg', 'cover_renditions': {'card_large': '/card.jpg'}}
+
+        self.assertEqual(_cover_from_source(src), '/card.jpg')
+        self.assertEqual(_cover_from_source({'cover_url': '/original.jpg'}), '/original.jpg')
+        self.assertIsNone(_cover_from_source({}))
+
+
+class InlineExecutor:
+    """在测试线程中执行阶段，使阶段内的查询计入 assertNumQueries"""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+class ListingQueryCountTestCase(TestCase):
+    """列表接口与命中数无关：最多一次查询补齐反范式化之前索引的旧文档"""
+
+    def setUp(self):
+        cache.clear()
+        root_page = Site.objects.get(is_default_site=True).root_page
+        with patch('apps.news.signals.upsert_article_doc'), patch('apps.news.signals.update_article_search_vector'):
+            self.articles = [
+                root_page.add_child(instance=ArticlePage(
+                    title=f'列表文章{i}', slug=f'listing-{i}', body='<p>正文</p>', like_count=i,
+                ))
+                for i in range(6)
+            ]
+        self.factory = APIRequestFactory()
+        self._patch(stages, '_get_executor', return_value=InlineExecutor())
+        self._patch(stages, 'close_old_connections')
+
+    def _patch(self, target, attribute, **kwargs):
+        patcher = patch.object(target, attribute, **kwargs)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def _hits(self, legacy=()):
+        """索引命中；legacy 中的文章模拟反范式化之前的文档（缺封面/计数/slug）"""
+        hits = []
+        for article in self.articles:
+            src = {
+                'article_id': str(article.id), 'title': article.title, 'channel': 'tech',
+                'first_published_at': '2026-10-01T00:00:00+00:00', 'publish_time': '2026-10-01T00:00:00+00:00',
+            }
+            if article.id not in legacy:
+                src.update(
+                    slug=article.slug, cover_url='/media/cover.jpg', cover_renditions={'card_large': '/media/card.jpg'},
+                    view_count=1, comment_count=0, like_count=article.like_count, favorite_count=0, reading_time=1,
+                )
+            hits.append({'_id': str(article.id), '_score': 1.0, '_source': src})
+        return {'hits': {'total': {'value': len(hits)}, 'hits': hits}}
+
+    def _search(self, module, legacy=()):
+        if hasattr(module, 'build_query'):
+            self._patch(module, 'build_query', return_value={})
+        client = self._patch(module, 'get_client').return_value
+        client.search.return_value = self._hits(legacy)
+        return client
+
+    def _get(self, view, path):
+        return view(self.factory.get(path, HTTP_HOST='localhost'))
+
+    def test_headlines(self):
+        self._search(headlines)
+        with self.assertNumQueries(0):
+            self.assertEqual(self._get(headlines.headlines, '/api/headlines/?size=6&diversity=low').status_code, 200)
+
+        cache.clear()
+        legacy = self.articles[0]
+        self._search(headlines, legacy={legacy.id})
+        with self.assertNumQueries(1):
+            response = self._get(headlines.headlines, '/api/headlines/?size=6&diversity=low')
+        self.assertIn(str(legacy.id), {str(item['id']) for item in response.data['items']})
+
+    def test_feed(self):
+        self._patch(feed, 'recall_from_pool', return_value=None)
+        self._patch(feed, 'fetch_agg_features', return_value={})
+        self._patch(feed, 'get_anonymous_recommendation_config', return_value=None)
+        self._search(feed)
+        with self.assertNumQueries(0):
+            self.assertEqual(self._get(feed.feed, '/api/feed/?size=6').status_code, 200)
+
+        cache.clear()
+        legacy = self.articles[0]
+        self._search(feed, legacy={legacy.id})
+        with self.assertNumQueries(1):
+            response = self._get(feed.feed, '/api/feed/?size=6')
+        slugs = {str(item['id']): item['slug'] for item in response.data['items']}
+        self.assertEqual(slugs[str(legacy.id)], legacy.slug)
+
+    def test_portal_articles(self):
+        legacy = self.articles[2]
+        self._search(articles, legacy={legacy.id})
+        with self.assertNumQueries(1):
+            response = self._get(articles.portal_articles, '/api/portal/articles/?size=6')
+        items = {str(item['id']): item for item in response.data['items']}
+        self.assertEqual(len(items), 6)
+        self.assertEqual(items[str(legacy.id)]['like_count'], legacy.like_count)
+        self.assertEqual(items[str(self.articles[1].id)]['cover_url'], '/media/cover.jpg')
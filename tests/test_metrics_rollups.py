@@ -0,0 +1,36 @@
+"""
+文章指标分级预聚合选表测试
+"""
+from unittest.mock import Mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from apps.core.services.metrics_rollups import SOURCE_TIER, TIERS, pick_tier, rollup_ddl
+
+
+class PickTierTestCase(SimpleTestCase):
+    """按窗口选择覆盖窗口的最粗粒度表"""
+
+    def setUp(self):
+        cache.clear()
+
+    def _client(self, tables):
+        return Mock(execute=Mock(return_value=[(name,) for name in tables]))
+
+    def test_coarsest_tier_for_window(self):
+        tables = [tier.table for tier in TIERS]
+
+        self.assertEqual(pick_tier(1, self._client(tables)).table, 'article_metrics_1m')
+        self.assertEqual(pick_tier(72, self._client(tables)).table, 'article_metrics_1h')
+        self.assertEqual(pick_tier(30 * 24, self._client(tables)).table, 'article_metrics_1d')
+
+    def test_falls_back_to_source_table_without_rollups(self):
+        self.assertIs(pick_tier(72, self._client([])), SOURCE_TIER)
+
+    def test_views_chain_tiers_in_order(self):
+        views = [s for s in rollup_ddl() if s.startswith('CREATE MATERIALIZED VIEW')]
+
+        self.assertIn('FROM article_metrics_agg AS src', views[0])
+        self.assertIn('FROM article_metrics_1m AS src', views[1])
+        self.assertIn('FROM article_metrics_1h AS src', views[2])
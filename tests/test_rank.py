@@ -0,0 +1,53 @@
+"""
+候选排序与多样性控制测试
+"""
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from apps.api.rest import rank
+
+
+def _cand(i, score, author, topic="t", channel="c"):
+    return {"id": str(i), "score": score, "author": author, "topic": topic, "channel": channel}
+
+
+class ScoreAndDiversifyTestCase(SimpleTestCase):
+    """列式打分后按作者/话题上限挑选，取满一页即停止"""
+
+    def setUp(self):
+        limits = {"feed.diversity.limit_author": 2, "feed.diversity.limit_topic": 2}
+        patcher = patch.object(rank, "flag", side_effect=lambda name, default=None: limits.get(name, default))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_caps_author_and_uses_realtime_ctr(self):
+        cands = [_cand(i, 1.0 - i * 0.1, "a", topic=f"t{i}") for i in range(4)]
+        cands.append(_cand(9, 0.0, "b", topic="x"))
+
+        result = rank.score_and_diversify(cands, {"9": {"ctr_1h": 10.0}})
+
+        self.assertEqual([c["id"] for c in result], ["9", "0", "1"])
+        self.assertAlmostEqual(result[0]["final_score"], 3.1)
+        # 未入选的候选不写入分数
+        self.assertNotIn("final_score", cands[2])
+
+    def test_limit_and_dedup_key(self):
+        cands = [_cand(i, 1.0 - i * 0.01, f"a{i}", topic=f"t{i}") for i in range(6)]
+        cands[1]["title"] = cands[0]["title"] = "same"
+
+        result = rank.score_and_diversify(
+            cands, {}, limit=3, dedup_key=lambda c: c.get("title") or c["id"]
+        )
+
+        self.assertEqual([c["id"] for c in result], ["0", "2", "3"])
+
+    def test_anonymous_bonus_reorders_and_exempts_unknown_author(self):
+        cands = [_cand(i, 1.0, None, topic=None) for i in range(3)]
+        cands.append(_cand(3, 0.95, "b", topic="x", channel="other"))
+        strategy = {"type": "hybrid", "diversity_boost": 0.2}
+
+        result = rank.score_and_diversify_anonymous(cands, {}, strategy=strategy)
+
+        # 新作者/话题/频道的奖励让低分候选排到同分的重复候选之前；未知作者不受上限约束
+        self.assertEqual([c["id"] for c in result], ["0", "3", "1", "2"])
@@ -0,0 +1,60 @@
+"""
+实时滑动窗口计数测试
+"""
+from datetime import datetime, timezone as dt_timezone
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase
+
+from apps.api.utils import realtime_counters
+
+
+class RealtimeCountersTestCase(SimpleTestCase):
+    """一次管道读取窗口计数，窗口不完整时交给 ClickHouse"""
+
+    NOW_MINUTE = 1_000_000
+
+    def _client(self, since, totals):
+        client = MagicMock()
+        client.pipeline.return_value.execute.return_value = [since, *totals]
+        return client
+
+    def _read(self, client, ids):
+        with patch.object(realtime_counters, 'get_redis', return_value=client), \
+                patch.object(realtime_counters, '_current_minute', return_value=self.NOW_MINUTE):
+            return realtime_counters.read_window_features('example.com', ids)
+
+    def test_reads_rolling_totals_with_one_script_call_per_article(self):
+        client = self._client(str(self.NOW_MINUTE - 120).encode(), [[10, 3], [0, 0]])
+
+        features = self._read(client, ['1', '2'])
+
+        self.assertEqual(features, {'1': {'ctr_1h': 0.3, 'pop_1h': 3.0}})
+        client.pipeline.return_value.execute.assert_called_once()
+        client.register_script.assert_called_once_with(realtime_counters._READ_SCRIPT)
+        read = client.register_script.return_value
+        self.assertEqual(read.call_count, 2)
+        self.assertEqual(read.call_args.kwargs['args'], [self.NOW_MINUTE, realtime_counters.WINDOW_MINUTES])
+
+    def test_record_events_uses_registered_script(self):
+        client = MagicMock()
+        now = datetime.fromtimestamp(self.NOW_MINUTE * 60, tz=dt_timezone.utc)
+        events = [('example.com', 1, 'impression', now), ('example.com', 1, 'click', now),
+                  ('example.com', 1, 'share', now)]
+        with patch.object(realtime_counters, 'get_redis', return_value=client), \
+                patch.object(realtime_counters, '_current_minute', return_value=self.NOW_MINUTE):
+            realtime_counters.record_events(events)
+
+        client.register_script.assert_called_once_with(realtime_counters._INCR_SCRIPT)
+        incr = client.register_script.return_value
+        incr.assert_called_once()
+        self.assertEqual(incr.call_args.kwargs['args'][2:4], [1, 1])
+        client.pipeline.return_value.eval.assert_not_called()
+
+    def test_incomplete_window_falls_back(self):
+        client = self._client(str(self.NOW_MINUTE - 10).encode(), [[0, 0]])
+
+        self.assertIsNone(self._read(client, ['1']))
+
+    def test_without_redis_falls_back(self):
+        self.assertIsNone(self._read(None, ['1']))
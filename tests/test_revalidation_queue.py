@@ -0,0 +1,96 @@
+"""
+缓存失效队列下发测试
+"""
+from unittest.mock import Mock, patch
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.core.tasks import revalidation
+
+
+class DispatchRevalidationTestCase(TestCase):
+    """测试批量下发的分块、重试与统计"""
+
+    def setUp(self):
+        cache.clear()
+        patcher = patch.object(revalidation, 'INITIAL_BACKOFF', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _provider(self, max_purge_urls=2):
+        provider = Mock(domain='cdn.example.com', max_purge_urls=max_purge_urls)
+        provider.purge_cache.return_value = True
+        return provider
+
+    @patch('apps.core.cdn.CDNManager')
+    @patch.object(revalidation, '_post_next_batch', return_value=True)
+    def test_chunks_cdn_purges_by_provider_limit(self, post_next, manager_cls):
+        """CDN 刷新按提供商单次上限分块，Next.js 只收到一次批量请求"""
+        provider = self._provider(max_purge_urls=2)
+        manager_cls.return_value.create_cdn_provider.return_value = provider
+
+        failed = revalidation.dispatch_revalidation(
+            'a.local', ['site:a.local'], ['/', '/news', '/news/x'], started_at=0
+        )
+
+        self.assertEqual(failed, ([], []))
+        self.assertEqual(post_next.call_count, 1)
+        self.assertEqual(provider.purge_cache.call_count, 2)
+        self.assertEqual(provider.purge_cache.call_args_list[0].args[0][0], 'https://cdn.example.com/')
+
+    @patch('apps.core.cdn.CDNManager')
+    @patch.object(revalidation, '_post_next_batch', side_effect=[Exception('503'), True])
+    def test_retries_failed_chunk(self, post_next, manager_cls):
+        """失败的块在退避后重试，重试次数计入统计"""
+        manager_cls.return_value.create_cdn_provider.return_value = None
+
+        failed = revalidation.dispatch_revalidation('a.local', ['page:1'], [], started_at=0)
+
+        self.assertEqual(failed, ([], []))
+        stats = revalidation.get_revalidation_stats()
+        self.assertEqual(stats['counters']['retries'], 1)
+        self.assertEqual(stats['counters']['items_sent'], 1)
+        self.assertEqual(stats['latency_ms']['samples'], 1)
+
+    @patch('apps.core.cdn.CDNManager')
+    @patch.object(revalidation, '_post_next_batch', side_effect=Exception('down'))
+    def test_reports_items_that_exhaust_retries(self, post_next, manager_cls):
+        """重试耗尽后返回失败条目，供调用方放回队列"""
+        manager_cls.return_value.create_cdn_provider.return_value = None
+
+        failed_tags, failed_paths = revalidation.dispatch_revalidation(
+            'a.local', ['page:1'], ['/news/x'], started_at=0
+        )
+
+        self.assertEqual(failed_tags, ['page:1'])
+        self.assertEqual(failed_paths, ['/news/x'])
+        self.assertEqual(post_next.call_count, revalidation.MAX_RETRIES + 1)
+        self.assertLess(revalidation.get_revalidation_stats()['success_rate'], 1.0)
+
+    @patch('apps.core.cdn.CDNManager')
+    @patch.object(revalidation, '_post_next_batch', return_value=True)
+    def test_failed_cdn_chunk_maps_urls_to_their_paths(self, post_next, manager_cls):
+        """站内路径没有 CDN 域名而被跳过时，失败的完整URL仍对应回原路径"""
+        provider = self._provider(max_purge_urls=10)
+        provider.domain = ''
+        provider.purge_cache.return_value = False
+        manager_cls.return_value.create_cdn_provider.return_value = provider
+
+        _, failed_paths = revalidation.dispatch_revalidation(
+            'a.local', [], ['/news/x', 'https://a.local/news/y'], started_at=0
+        )
+
+        self.assertEqual(failed_paths, ['https://a.local/news/y'])
+
+    @patch.object(revalidation, 'get_redis', return_value=None)
+    @patch.object(revalidation, 'dispatch_revalidation')
+    @patch.object(revalidation.dispatch_revalidation_task, 'delay')
+    def test_enqueue_without_redis_defers_to_task(self, delay, dispatch, get_redis):
+        """没有 Redis 队列时不在请求中同步下发"""
+        result = revalidation.enqueue_revalidation('a.local', ['page:1'], ['/news/x'])
+
+        self.assertEqual(result['queued'], 2)
+        dispatch.assert_not_called()
+        delay.assert_called_once()
+        self.assertEqual(delay.call_args.args, ('a.local', ['page:1'], ['/news/x']))
@@ -0,0 +1,66 @@
+"""
+OpenSearch 批量局部更新测试
+"""
+from unittest import TestCase
+from unittest.mock import Mock
+
+from apps.searchapp.bulk import bulk_partial_update
+
+
+def _bulk_response(*statuses):
+    return {"items": [{"update": {"status": status}} for status in statuses]}
+
+
+class BulkPartialUpdateTestCase(TestCase):
+    """测试批量局部更新的分块、重试与缺失处理"""
+
+    def test_splits_stream_into_chunks(self):
+        """生成器输入按 chunk_size 分批发送"""
+        client = Mock()
+        client.bulk.side_effect = lambda body: _bulk_response(*[200] * (len(body) // 2))
+
+        docs = ((str(i), {"ctr_1h": 0.1}) for i in range(5))
+        result = bulk_partial_update(client, "articles_test", docs, chunk_size=2, concurrency=1)
+
+        self.assertEqual(client.bulk.call_count, 3)
+        self.assertEqual(sorted(result.succeeded), ["0", "1", "2", "3", "4"])
+
+    def test_never_upserts_missing_documents(self):
+        """不存在的文档记为 missing，且请求中不包含 doc_as_upsert"""
+        client = Mock()
+        client.bulk.return_value = _bulk_response(200, 404)
+
+        result = bulk_partial_update(client, "articles_test", [("1", {"a": 1}), ("2", {"a": 2})])
+
+        body = client.bulk.call_args.kwargs["body"]
+        self.assertNotIn("doc_as_upsert", body[1])
+        self.assertEqual(result.succeeded, ["1"])
+        self.assertEqual(result.missing, ["2"])
+
+    def test_retries_only_retryable_items(self):
+        """部分失败时只重发 429 的条目"""
+        client = Mock()
+        client.bulk.side_effect = [_bulk_response(200, 429, 400), _bulk_response(200)]
+
+        result = bulk_partial_update(
+            client, "articles_test", [("1", {}), ("2", {}), ("3", {})], initial_backoff=0
+        )
+
+        self.assertEqual(client.bulk.call_count, 2)
+        retried_body = client.bulk.call_args_list[1].kwargs["body"]
+        self.assertEqual(retried_body[0]["update"]["_id"], "2")
+        self.assertEqual(sorted(result.succeeded), ["1", "2"])
+        self.assertEqual(result.failed, ["3"])
+        self.assertEqual(result.retries, 1)
+
+    def test_gives_up_after_max_retries(self):
+        """超过最大重试次数后记为失败"""
+        client = Mock()
+        client.bulk.return_value = _bulk_response(503)
+
+        result = bulk_partial_update(
+            client, "articles_test", [("1", {})], max_retries=2, initial_backoff=0
+        )
+
+        self.assertEqual(client.bulk.call_count, 3)
+        self.assertEqual(result.failed, ["1"])
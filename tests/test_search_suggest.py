@@ -0,0 +1,73 @@
+"""
+搜索建议前缀索引测试
+"""
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from apps.core.site_registry import SiteSnapshot
+from apps.searchapp import suggest
+from apps.searchapp.suggest import PrefixTrie
+
+
+class PrefixTrieTestCase(SimpleTestCase):
+    """前缀补全按权重排序，增量累加后候选随之更新"""
+
+    def setUp(self):
+        self.trie = PrefixTrie(top_k=3)
+        self.trie.add('人工智能', 5.0, 'title')
+        self.trie.add('人工智能大会', 2.0, 'tag')
+        self.trie.add('人口普查', 3.0, 'title')
+        self.trie.add('AI芯片', 1.0, 'title')
+
+    def test_completes_by_weight(self):
+        terms = [term for term, _, _ in self.trie.complete('人')]
+
+        self.assertEqual(terms, ['人工智能', '人口普查', '人工智能大会'])
+        self.assertEqual(self.trie.complete('不存在'), [])
+
+    def test_prefix_is_case_insensitive(self):
+        self.assertEqual(self.trie.complete('ai')[0][0], 'AI芯片')
+
+    def test_incremental_query_counts_promote_terms(self):
+        self.trie.add('人民币汇率', 1.0, 'title')
+        self.assertNotIn('人民币汇率', [t for t, _, _ in self.trie.complete('人')])
+
+        self.trie.add('人民币汇率', 10.0, 'query')
+
+        term, weight, kind = self.trie.complete('人')[0]
+        self.assertEqual((term, weight, kind), ('人民币汇率', 11.0, 'query'))
+
+
+class SuggestionEngineRegistryTestCase(SimpleTestCase):
+    """未知站点共用默认站点的索引，首次构建不在请求线程中进行"""
+
+    def setUp(self):
+        sites = [
+            SimpleNamespace(id=1, hostname='localhost', port=80, slug=None, is_default_site=True),
+            SimpleNamespace(id=2, hostname='beijing.aivoya.com', port=80, slug='beijing', is_default_site=False),
+        ]
+        snapshot = SiteSnapshot(1, sites, {})
+        for patcher in (
+            patch('apps.core.site_registry.site_registry.snapshot', return_value=snapshot),
+            patch.object(suggest, '_engines', {}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_unknown_sites_share_the_default_engine(self):
+        engines = {suggest.get_engine(f'junk-{i}.example.com') for i in range(50)}
+
+        self.assertEqual([engine.site for engine in engines], ['localhost'])
+        self.assertEqual(suggest.get_engine('beijing').site, 'beijing.aivoya.com')
+        self.assertEqual(len(suggest._engines), 2)
+
+    def test_first_build_runs_in_background(self):
+        engine = suggest.get_engine('localhost')
+        with patch.object(suggest.threading, 'Thread') as thread, \
+                patch.object(suggest.SuggestionEngine, 'rebuild') as rebuild:
+            self.assertEqual(engine.suggest('人'), [])
+
+        rebuild.assert_not_called()
+        thread.return_value.start.assert_called_once()
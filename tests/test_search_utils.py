@@ -0,0 +1,75 @@
+"""
+数据库检索分词与路由测试
+"""
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from apps.api.rest import search_os
+from apps.api.utils import search_utils
+from apps.api.utils.search_utils import apply_search, build_search_document, segment_for_index, segment_text
+
+
+class SegmentationTestCase(SimpleTestCase):
+    """查询侧精确分词的结果都能在索引侧分词中找到"""
+
+    def test_query_words_are_indexed(self):
+        indexed = segment_for_index('中华人民共和国国务院发布通知').split()
+        for word in segment_text('国务院发布通知'):
+            self.assertIn(word, indexed)
+
+    def test_single_characters_are_dropped(self):
+        self.assertEqual(segment_text('车'), [])
+        self.assertEqual(segment_text('  '), [])
+
+    def test_document_strips_html(self):
+        article = MagicMock(title='人工智能', excerpt='', body='<p>机器学习</p>')
+        document = build_search_document(article)
+        self.assertIn('人工智能', document['title'])
+        self.assertNotIn('<p>', document['body'])
+
+
+class ApplySearchRoutingTestCase(SimpleTestCase):
+    """可分词的查询走全文索引；单字查询与非默认字段走 icontains"""
+
+    def setUp(self):
+        patcher = patch.object(search_utils, 'fulltext_search_available', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.queryset = MagicMock()
+
+    def test_segmented_query_uses_search_vector(self):
+        with patch.object(search_utils, 'apply_fulltext_search') as fulltext:
+            apply_search(self.queryset, '人工智能', fields=[('title', 10), ('excerpt', 5), ('body', 1)])
+        fulltext.assert_called_once_with(self.queryset, '人工智能')
+
+    def test_single_character_query_still_filters(self):
+        with patch.object(search_utils, 'apply_fulltext_search') as fulltext:
+            apply_search(self.queryset, '车', fields=[('title', 10), ('excerpt', 5)])
+        fulltext.assert_not_called()
+        self.queryset.filter.assert_called_once()
+        self.assertIn(('title__icontains', '车'), self.queryset.filter.call_args.args[0].children)
+
+    def test_unindexed_fields_use_icontains(self):
+        with patch.object(search_utils, 'apply_fulltext_search') as fulltext:
+            apply_search(self.queryset, '人工智能', fields=[('slug', 1)])
+        fulltext.assert_not_called()
+        self.queryset.filter.assert_called_once()
+
+
+class DatabaseFallbackSinceTestCase(SimpleTestCase):
+    """OpenSearch 不可用时，数据库降级路径沿用 since 时间过滤"""
+
+    @patch.object(search_os, '_search_database', return_value={'items': []})
+    @patch.object(search_os, 'get_client', side_effect=Exception('breaker open'))
+    @patch.object(search_os, 'validate_site_parameter')
+    def test_since_is_passed_to_database_search(self, validate_site, get_client, search_database):
+        validate_site.return_value = MagicMock(hostname='a.local')
+        request = APIRequestFactory().get('/api/search/os/', {'q': '人工智能', 'since': '24h'})
+
+        search_os.search_os(request)
+
+        since = search_database.call_args.kwargs['since']
+        self.assertAlmostEqual((timezone.now() - since).total_seconds(), 24 * 3600, delta=60)
@@ -0,0 +1,93 @@
+"""
+进程内站点注册表测试
+"""
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase
+from wagtail.models import Site
+
+from apps.core import site_registry as registry_module
+from apps.core.site_registry import SiteRegistry, SiteSnapshot
+
+
+def _site(site_id, hostname, port=80, slug=None, is_default=False):
+    return SimpleNamespace(id=site_id, hostname=hostname, port=port, slug=slug, is_default_site=is_default)
+
+
+SITES = [
+    _site(1, 'localhost', is_default=True),
+    _site(2, 'beijing.aivoya.com', slug='beijing'),
+    _site(3, 'beijing.aivoya.com', port=8443),
+]
+
+
+class SiteSnapshotTestCase(SimpleTestCase):
+    """主机名、端口、slug 与别名都指向同一份站点对象"""
+
+    def setUp(self):
+        self.snapshot = SiteSnapshot(1, SITES, {'127.0.0.1': 'localhost'})
+
+    def test_lookup_by_host_port_alias_and_slug(self):
+        self.assertIs(self.snapshot.find('beijing.aivoya.com', 8443), SITES[2])
+        self.assertIs(self.snapshot.find('Beijing.aivoya.com'), SITES[1])
+        self.assertIs(self.snapshot.find('beijing'), SITES[1])
+        self.assertIs(self.snapshot.find('127.0.0.1'), SITES[0])
+        self.assertIsNone(self.snapshot.find('unknown.example.com'))
+        self.assertIs(self.snapshot.by_id[3], SITES[2])
+
+
+class SiteRegistryTestCase(SimpleTestCase):
+    """版本号变化时重新加载，否则复用快照"""
+
+    def setUp(self):
+        self.registry = SiteRegistry()
+        self.loads = []
+
+        def load(version):
+            self.loads.append(version)
+            return SiteSnapshot(version, SITES, {})
+
+        patcher = patch.object(self.registry, '_load', side_effect=load)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reuses_snapshot_until_version_changes(self):
+        with patch.object(registry_module, 'cache') as cache, \
+                patch.object(registry_module, 'VERSION_CHECK_INTERVAL', 0):
+            cache.get.return_value = 1
+            self.assertIs(self.registry.find_for_host('beijing.aivoya.com:8443'), SITES[2])
+            self.assertIs(self.registry.find_for_host('other.example.com'), SITES[0])
+
+            cache.get.return_value = 2
+            self.registry.get_by_id(2)
+
+        self.assertEqual(self.loads, [1, 2])
+
+    def test_config_built_once_per_snapshot(self):
+        build = lambda site_id: {'site_id': site_id}
+        with patch.object(registry_module, 'cache') as cache:
+            cache.get.return_value = 1
+            first = self.registry.get_config('localhost', build)
+            second = self.registry.get_config('localhost', build)
+
+            self.registry.invalidate()
+            third = self.registry.get_config('localhost', build)
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, third)
+        cache.incr.assert_called_once_with(registry_module.VERSION_KEY)
+
+
+class SiteRegistryInvalidationTestCase(TestCase):
+    """站点变化在事务提交后才使注册表失效"""
+
+    @patch.object(registry_module.site_registry, 'invalidate')
+    def test_invalidates_on_commit(self, invalidate):
+        site = Site.objects.get(is_default_site=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            site.site_name = '默认站点'
+            site.save()
+            invalidate.assert_not_called()
+
+        invalidate.assert_called_once_with()
@@ -0,0 +1,55 @@
+"""
+阶段编排测试
+"""
+import time
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from apps.api.utils import stages
+from apps.api.utils.stages import StageRunner, get_stage_metrics
+
+
+class StageRunnerTestCase(SimpleTestCase):
+    """测试并发执行、截止时间降级与指标累计"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_stages_run_concurrently(self):
+        runner = StageRunner('test')
+        started = time.perf_counter()
+        first = runner.submit('a', time.sleep, 0.2, deadline_ms=1000)
+        second = runner.submit('b', time.sleep, 0.2, deadline_ms=1000)
+        runner.result(first)
+        runner.result(second)
+
+        self.assertLess(time.perf_counter() - started, 0.35)
+        self.assertEqual(runner.timings['a']['status'], 'ok')
+
+    def test_deadline_returns_fallback(self):
+        runner = StageRunner('test')
+        handle = runner.submit('slow', lambda: time.sleep(0.5) or 'late', deadline_ms=50, fallback='fallback')
+
+        self.assertEqual(runner.result(handle), 'fallback')
+        self.assertEqual(runner.timings['slow']['status'], 'timeout')
+
+    def test_errors_return_fallback_and_are_counted(self):
+        runner = StageRunner('test')
+        value = runner.run('boom', lambda: 1 / 0, fallback=[])
+        runner.skip('unused')
+        runner.export_metrics()
+
+        self.assertEqual(value, [])
+        metrics = get_stage_metrics('test')
+        self.assertEqual(metrics['boom']['counts'], {'error': 1})
+        self.assertEqual(metrics['unused']['counts'], {'skipped': 1})
+        self.assertEqual(metrics['total']['samples'], 1)
+
+    def test_worker_keeps_persistent_connections(self):
+        """池线程只清理过期连接，不在每个阶段后关闭全部连接"""
+        runner = StageRunner('test')
+        with patch.object(stages, 'close_old_connections') as close_old:
+            self.assertEqual(runner.result(runner.submit('a', lambda: 1, deadline_ms=1000)), 1)
+        self.assertEqual(close_old.call_count, 2)
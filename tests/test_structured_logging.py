@@ -0,0 +1,142 @@
+"""
+采样、延迟格式化与队列日志测试
+"""
+import json
+import logging
+import queue
+import threading
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from apps.core.middleware import RequestLogContextFilter
+from apps.core.utils.structured_logging import (
+    DeferredQueueHandler, JsonFormatter, SamplingFilter, dropped_log_records, lazy_json, start_queue_logging,
+    stop_queue_logging,
+)
+
+
+def _record(name='apps.api.rest.media_proxy', level=logging.INFO, msg='%s', args=('x',), **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class SamplingFilterTestCase(SimpleTestCase):
+    """按最长前缀匹配采样率，WARNING 及以上不采样"""
+
+    def setUp(self):
+        self.sampling = SamplingFilter({'apps': 1.0, 'apps.api.rest.media_proxy': 0.1, 'apps.noisy': 0.0})
+
+    def test_rate_by_longest_prefix(self):
+        self.assertEqual(self.sampling.rate_for('apps.api.rest.media_proxy'), 0.1)
+        self.assertEqual(self.sampling.rate_for('apps.api.rest.feed'), 1.0)
+        self.assertEqual(self.sampling.rate_for('django.request'), 1.0)
+
+    def test_sample_point_decides_and_warnings_always_pass(self):
+        self.assertTrue(self.sampling.filter(_record(sample_point=0.05)))
+        self.assertFalse(self.sampling.filter(_record(sample_point=0.5)))
+        self.assertFalse(self.sampling.filter(_record('apps.noisy.x')))
+        self.assertTrue(self.sampling.filter(_record(level=logging.WARNING, sample_point=0.5)))
+
+    def test_sample_point_kept_on_record(self):
+        record = _record()
+        first = self.sampling.filter(record)
+        self.assertIsNotNone(record.sample_point)
+        self.assertEqual([self.sampling.filter(record) for _ in range(5)], [first] * 5)
+
+
+class DeferredFormattingTestCase(SimpleTestCase):
+    """记录原样入队，消息与 lazy_json 在输出时才格式化"""
+
+    def test_queue_handler_keeps_args(self):
+        calls = []
+
+        class Payload:
+            def __str__(self):
+                calls.append(1)
+                return 'payload'
+
+        log_queue = queue.Queue()
+        handler = DeferredQueueHandler(log_queue)
+        handler.handle(_record(args=(Payload(),)))
+
+        record = log_queue.get_nowait()
+        self.assertEqual(calls, [])
+        self.assertEqual(record.getMessage(), 'payload')
+        self.assertEqual(str(lazy_json({'a': '中文'})), '{"a": "中文"}')
+
+    def test_json_formatter_merges_fields(self):
+        record = _record(correlation_id='cid-1', elapsed_ms=3.2, fields={'status': 200})
+        payload = json.loads(JsonFormatter().format(record))
+        self.assertEqual(payload['message'], 'x')
+        self.assertEqual(payload['correlation_id'], 'cid-1')
+        self.assertEqual(payload['status'], 200)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class QueueLoggingTestCase(SimpleTestCase):
+    """队列满时静默丢弃并计数；各 logger 的日志仍只写到原来的处理器"""
+
+    def test_full_queue_drops_quietly(self):
+        handler = DeferredQueueHandler(queue.Queue(1))
+        with patch.object(handler, 'handleError') as handle_error:
+            for _ in range(3):
+                handler.handle(_record())
+        handle_error.assert_not_called()
+        self.assertEqual(handler.dropped, 2)
+
+    def test_loggers_keep_their_own_handlers(self):
+        first, second = ListHandler(), ListHandler()
+        loggers = {'qtest.first': first, 'qtest.second': second}
+        for name, handler in loggers.items():
+            logger = logging.getLogger(name)
+            logger.addHandler(handler)
+            logger.propagate = False
+            self.addCleanup(setattr, logger, 'propagate', True)
+            self.addCleanup(logger.removeHandler, handler)
+
+        start_queue_logging(tuple(loggers))
+        try:
+            logging.getLogger('qtest.first').warning('one')
+            logging.getLogger('qtest.second').warning('two')
+            self.assertEqual(dropped_log_records(), 0)
+        finally:
+            stop_queue_logging(restore=True)
+
+        self.assertEqual(first.messages, ['one'])
+        self.assertEqual(second.messages, ['two'])
+        self.assertEqual(logging.getLogger('qtest.first').handlers, [first])
+
+
+class RequestLogContextFilterTestCase(SimpleTestCase):
+    """请求线程中写入上下文，已有上下文的记录不被覆盖"""
+
+    def tearDown(self):
+        if hasattr(threading.current_thread(), 'request'):
+            del threading.current_thread().request
+
+    def test_adds_request_timing_and_keeps_existing(self):
+        threading.current_thread().request = SimpleNamespace(
+            correlation_id='cid-2', META={'REMOTE_ADDR': '10.0.0.1'}, path='/api/feed/',
+            log_started=0.0, log_sample_point=0.3,
+        )
+        record = _record()
+        RequestLogContextFilter().filter(record)
+        self.assertEqual(record.correlation_id, 'cid-2')
+        self.assertEqual(record.path, '/api/feed/')
+        self.assertEqual(record.sample_point, 0.3)
+        self.assertGreater(record.elapsed_ms, 0)
+
+        del threading.current_thread().request
+        RequestLogContextFilter().filter(record)
+        self.assertEqual(record.correlation_id, 'cid-2')
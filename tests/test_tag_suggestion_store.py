@@ -0,0 +1,50 @@
+"""
+标签建议异步计算与缓存测试
+"""
+from unittest.mock import Mock, patch
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.news.services import tag_suggestion_store
+
+
+class TagSuggestionStoreTestCase(TestCase):
+    """测试按内容哈希去重调度与结果筛选"""
+
+    def setUp(self):
+        cache.clear()
+
+    def _revision(self, pk=1, title='标题', body='<p>正文</p>'):
+        return Mock(pk=pk, content={'title': title, 'body': body})
+
+    @patch('apps.news.tasks.compute_tag_suggestions')
+    def test_schedules_once_per_content_hash(self, task):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = tag_suggestion_store.schedule_suggestions(self._revision(pk=1))
+            second = tag_suggestion_store.schedule_suggestions(self._revision(pk=2))
+
+        self.assertEqual(first, second)
+        task.delay.assert_called_once_with(1)
+
+    @patch('apps.news.tasks.compute_tag_suggestions')
+    def test_cached_result_is_not_recomputed(self, task):
+        revision = self._revision()
+        tag_suggestion_store.store_suggestions(
+            tag_suggestion_store.revision_content_hash(revision), {'success': True, 'suggestions': []}
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tag_suggestion_store.schedule_suggestions(revision)
+
+        task.delay.assert_not_called()
+
+    def test_top_suggestions_filters_low_confidence(self):
+        result = {'success': True, 'suggestions': [
+            {'text': f't{i}', 'confidence': 0.9} for i in range(8)
+        ] + [{'text': 'low', 'confidence': 0.3}]}
+
+        top = tag_suggestion_store.top_suggestions(result)
+
+        self.assertEqual(len(top), tag_suggestion_store.MAX_SUGGESTIONS)
+        self.assertNotIn('low', [s['text'] for s in top])
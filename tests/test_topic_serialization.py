@@ -0,0 +1,44 @@
+"""
+专题序列化查询数回归测试
+"""
+from django.db.models import Count, Q
+from django.test import TestCase
+from wagtail.models import Site
+
+from apps.api.serializers.taxonomy import TopicSerializer
+from apps.news.models import ArticlePage, Topic
+
+
+class TopicSerializationTestCase(TestCase):
+    """专题列表的查询数不随专题数量增长"""
+
+    def setUp(self):
+        root_page = Site.objects.get(is_default_site=True).root_page
+        self.topics = [
+            Topic.objects.create(title=f'专题{i}', slug=f'topic-{i}') for i in range(6)
+        ]
+        for i in range(4):
+            article = root_page.add_child(instance=ArticlePage(title=f'文章{i}', slug=f'article-{i}', body='<p>正文</p>'))
+            article.topics.set(self.topics[:2])
+            article.save()
+
+    def _serialize(self, limit):
+        queryset = Topic.objects.annotate(
+            live_articles_count=Count('articles', filter=Q(articles__live=True), distinct=True)
+        ).order_by('id')
+        topics = Topic.load_recent_articles(queryset, limit=limit)
+        return TopicSerializer(topics, many=True).data
+
+    def test_constant_query_count(self):
+        """专题查询 + 一次窗口查询，与专题数量无关"""
+        with self.assertNumQueries(2):
+            data = self._serialize(limit=3)
+        self.assertEqual(len(data), 6)
+
+    def test_counts_and_recent_articles_per_topic(self):
+        data = {item['slug']: item for item in self._serialize(limit=3)}
+
+        self.assertEqual(data['topic-0']['articles_count'], 4)
+        self.assertEqual(len(data['topic-0']['recent_articles']), 3)
+        self.assertEqual(data['topic-5']['articles_count'], 0)
+        self.assertEqual(data['topic-5']['recent_articles'], [])
@@ -0,0 +1,45 @@
+"""
+用户阅读记录压缩与统计汇总测试
+"""
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.web_users.models import ReadingHistory, UserStatsDaily, WebUser
+from apps.web_users.stats import record_reading
+
+
+class UserStatsRollupTestCase(TestCase):
+    """测试阅读历史压缩与日汇总增量更新"""
+
+    def setUp(self):
+        self.user = WebUser.objects.create(username='reader', email='reader@example.com', password_hash='x')
+
+    def _read(self, article_id, channel='tech', duration=60):
+        return record_reading(self.user, {
+            'article_id': article_id, 'article_title': 't', 'article_slug': 't',
+            'article_channel': channel, 'read_duration': duration, 'read_progress': 50,
+        })
+
+    def test_repeat_reads_are_compacted(self):
+        """重复阅读同一文章只保留一行并累加次数与时长"""
+        self._read('1')
+        record = self._read('1', duration=30)
+
+        self.assertEqual(ReadingHistory.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(record.read_count, 2)
+        self.assertEqual(record.read_duration, 90)
+
+    def test_daily_row_carries_totals(self):
+        """最新一行汇总即可给出累计时长、最近7天活动与最常读频道"""
+        self._read('1', channel='tech')
+        self._read('2', channel='tech')
+        self._read('3', channel='sports')
+
+        row = UserStatsDaily.objects.get(user=self.user)
+        today = timezone.localdate()
+        self.assertEqual(row.total_read_duration, 180)
+        self.assertEqual(row.recent_activity(today), 3)
+        self.assertEqual(row.favorite_channel, 'tech')
+        self.assertEqual(row.recent_activity(today + timedelta(days=7)), 0)